@@ -24,12 +24,76 @@ class Settings(BaseSettings):
     lm_model: str = ""           # 空文字の場合は GPU に応じて自動選択
     lm_backend: str = "vllm"     # "vllm" または "pt"
     device: str = "auto"         # "auto", "cuda", "mps", "cpu"
+    # DiT と LM を別スレッドで同時に読み込む。同時に読み込むと問題が起きる環境では
+    # false にする（DiT → LM の順に読み込む）
+    parallel_model_loading: bool = True
+    # 読み込み後、readiness を返す前に短い曲を warmup_runs 回生成する（0 で無効）。
+    # 1 回目はカーネルの選択やメモリ確保を含み、2 回目以降で通常の速度になったことをログで確認できる。
+    # readiness が遅くなるため、既定では行わない
+    warmup_runs: int = 0
+    warmup_duration: int = 10   # ウォームアップで生成する曲の長さ（秒）
+    # DiT を torch.compile する。コンパイル結果は compile_cache_dir に保存し、再起動後も再利用する
+    compile_dit: bool = False
+    compile_cache_dir: str = "./.cache/torch_compile"
+    # 生成器: "acestep"（ACE-Step 1.5）または "fake"（モデルなしで無音を返す。動作確認用）
+    generator: str = Field(
+        default="acestep",
+        validation_alias="OTO_GENERATOR",
+    )
+    fake_seconds_per_audio_second: float = 0.05   # fake 生成器で曲 1 秒あたりにかける時間
+    fake_load_seconds: float = 0.0   # fake 生成器でモデルの読み込みにかける時間（起動中の動作確認用）
+    fake_work: str = "sleep"   # fake 生成器の時間の使い方: "sleep"（待つだけ）/ "cpu"（GIL を保持して計算する）
+
+    # ワーカープール。カンマ区切りのデバイス（例: "cuda:0,cuda:1"）を指定すると、
+    # デバイスごとに別プロセスでモデルを読み込み、空いているものから順にジョブを割り当てる。
+    # 空文字の場合はこのプロセス内で OTO_DEVICE のモデル 1 つを使う
+    devices: str = Field(
+        default="",
+        validation_alias="OTO_DEVICES",
+    )
+
+    # リモートワーカー。true にするとこのプロセスではモデルを読み込まず、
+    # `oto-backend worker` で起動した推論ノードにジョブを貸し出す（コーディネーター）
+    remote_workers: bool = Field(
+        default=False,
+        validation_alias="OTO_REMOTE_WORKERS",
+    )
+    # コーディネーターとワーカーで共有するトークン。OTO_REMOTE_WORKERS=true では必須
+    # （空文字のままでは起動しない）
+    worker_token: str = Field(
+        default="",
+        validation_alias="OTO_WORKER_TOKEN",
+    )
+    worker_upload_max_bytes: int = 256 * 1024**2   # ワーカーがアップロードできる MP3 1 ファイルの上限（超えると 413）
+    # 貸し出しの有効期限（秒）。ワーカーは期限内に進捗かハートビートを送って延長する
+    lease_seconds: float = Field(
+        default=60.0,
+        validation_alias="OTO_LEASE_SECONDS",
+    )
+    # 貸し出しの期限切れで再投入する回数の上限。超えたジョブは失敗にする
+    lease_max_attempts: int = Field(
+        default=3,
+        validation_alias="OTO_LEASE_MAX_ATTEMPTS",
+    )
 
     # 生成した音声の保存先
     audio_output_dir: str = Field(
         default="./.cache/audio",
         validation_alias="OTO_AUDIO_DIR",
     )
+    # 音声出力ディレクトリのバイト数上限。超えると最も長く参照されていない終了済みジョブから
+    # 削除する（0 で無制限。TTL による削除だけになる）
+    audio_max_bytes: int = Field(
+        default=10 * 1024**3,
+        validation_alias="OTO_AUDIO_MAX_BYTES",
+    )
+    # 生成した音声をまず書き込む一時置き場（例: /dev/shm/oto）。空文字の場合は使わない。
+    # 初めて参照されたときに音声出力ディレクトリへ移す
+    audio_staging_dir: str = Field(
+        default="",
+        validation_alias="OTO_AUDIO_STAGING_DIR",
+    )
+    audio_staging_min_free_mb: int = 512   # 一時置き場の空きがこれ未満ならディスクに直接書き込む
 
     # ジョブ管理
     job_ttl_seconds: int = Field(
@@ -40,9 +104,102 @@ class Settings(BaseSettings):
         default=100,
         validation_alias="OTO_QUEUE_MAX",
     )
+    # 実行順のスケジューリング方式: "fifo" / "fair"（クライアントごとの公平キューイング）/ "sjf"（短い曲から）
+    scheduler_policy: str = Field(
+        default="fifo",
+        validation_alias="OTO_SCHEDULER",
+    )
+    # priority と client_id を指定できるオペレーターのトークン（Authorization: Bearer）。
+    # 空文字の場合は誰も指定できない（priority は 0、クライアントは接続元アドレスで区別する）
+    operator_token: str = Field(
+        default="",
+        validation_alias="OTO_OPERATOR_TOKEN",
+    )
+    scheduler_sjf_aging: float = 0.1   # sjf で、待ち時間 1 秒あたりに短い扱いにする秒数
+    # 受け付けの制限。超えたリクエストは Retry-After 付きの 429（クライアントごとの上限）か
+    # 503（実行待ちが多い）で断る。1 クライアントが 1 分あたりに投入できる曲の秒数（0 で無効）。
+    # クライアントは公平キューイングと同じく接続元アドレス（オペレーターは client_id）で区別する
+    rate_limit_seconds_per_minute: float = Field(
+        default=0.0,
+        validation_alias="OTO_RATE_LIMIT",
+    )
+    rate_limit_burst_seconds: float = 1200.0   # まとめて投入できる曲の秒数（トークンバケットの容量）
+    # 今投入した場合の推定待ち時間（秒）がこれを超えていれば断る（0 で無効）
+    max_backlog_seconds: float = Field(
+        default=0.0,
+        validation_alias="OTO_MAX_BACKLOG",
+    )
+    # ジョブの永続化先（SQLite）。空文字の場合はメモリ上のみで管理する
+    job_db_path: str = Field(
+        default="",
+        validation_alias="OTO_JOB_DB",
+    )
+
+    # ジョブ状態ストリーム（SSE）
+    stream_coalesce_ms: int = 250         # 連続する進捗通知をまとめる時間
+    stream_heartbeat_seconds: int = 15    # 変更がないときの keep-alive 送信間隔
+    stream_max_jobs: int = 100            # 1 本のストリームで購読できるジョブ数
+
+    # セグメント生成（segmented=true のジョブを何秒ごとに分けて生成するか）
+    segment_seconds: int = 60
+    # セグメントの継ぎ目のクロスフェードの長さ（秒）。0 でそのままつなぐ
+    segment_crossfade_seconds: int = 2
+
+    # マイクロバッチ（同じ prompt/duration/bpm のジョブを 1 回の DiT 呼び出しにまとめる）
+    batch_max_size: int = Field(
+        default=1,   # 1 で無効。GPU の VRAM に応じた上限でさらに制限される
+        validation_alias="OTO_BATCH_MAX",
+    )
+    batch_window_ms: int = 200   # 同じバッチに入るジョブを待つ時間
+
+    # 結果キャッシュ（seed 指定の同一リクエストを再生成せずに返す）
+    result_cache_dir: str = "./.cache/results"
+    result_cache_max_bytes: int = 2 * 1024**3   # 0 で無効化
+
+    # LM メタデータキャッシュ（同じ caption・LM・bpm 指定では LM による BPM・キー等の推論を省く）
+    lm_cache_max_entries: int = 4096   # 0 で無効化
+    lm_cache_path: str = ""            # 保存先の JSON ファイル。空文字の場合はメモリ上のみ
+
+    # LM と DiT の 2 段パイプライン（ジョブ N の DiT 中にジョブ N+1 の LM を進める）。
+    # OTO_DEVICES・リモートワーカーを使わない、このプロセス内の生成（LM あり）だけが対象
+    pipeline: bool = Field(
+        default=False,
+        validation_alias="OTO_PIPELINE",
+    )
+    # 空き VRAM がこれ未満なら、前のジョブの DiT が終わるまで次のジョブの LM を始めない（0 で確認しない）
+    pipeline_min_free_gb: float = 4.0
+
+    # MP3 のエンコードと書き込みを行うプロセスの数。GPU の処理は波形を渡して次のジョブに進む。
+    # 0 で無効（ACE-Step が生成と同じスレッドで保存する）。numpy・soundfile で MP3 を
+    # エンコードできない環境でも無効になる。OTO_DEVICES・リモートワーカーでは使わない
+    encode_workers: int = 0
+    encode_queue_max: int = 8   # エンコード待ちにできる波形の数（超えると生成側が待つ）
+
+    # ステーション（1 つの生成を多数のリスナーに配信する共有ストリーム）。
+    # 起動時に作成するステーションを "名前=prompt" のセミコロン区切りで指定する
+    stations: str = Field(
+        default="",
+        validation_alias="OTO_STATIONS",
+    )
+    station_track_seconds: int = 120         # ステーションの 1 曲の長さ（秒）
+    station_crossfade_seconds: float = 4.0   # 曲の継ぎ目のクロスフェードの長さ（秒）
+    station_chunk_seconds: float = 1.0       # 配信するチャンクの長さ（秒）
+    station_lead_seconds: float = 5.0        # 再生位置より先に送っておく秒数（リスナー側のバッファ）
+
+    # ジョブごとの処理時刻の記録（GET /api/jobs/{job_id}/timings）。実行中も PUT /api/timings で切り替えられる
+    timings_enabled: bool = Field(
+        default=False,
+        validation_alias="OTO_TIMINGS",
+    )
+    timings_max_jobs: int = 1000   # 処理時刻を保持する直近のジョブ数
 
     model_config = SettingsConfigDict(env_prefix="OTO_")
 
+    @property
+    def device_list(self) -> list[str]:
+        """ワーカープールのデバイス名のリスト。空ならプール無効。"""
+        return [d.strip() for d in self.devices.split(",") if d.strip()]
+
     @property
     def acestep_root_path(self) -> Path:
         """ACE-Step ルートの Path オブジェクトを返す。"""
@@ -53,6 +210,16 @@ class Settings(BaseSettings):
         """音声出力ディレクトリの Path オブジェクトを返す。"""
         return Path(self.audio_output_dir).resolve()
 
+    @property
+    def compile_cache_path(self) -> Path:
+        """torch.compile のキャッシュディレクトリの Path オブジェクトを返す。"""
+        return Path(self.compile_cache_dir).resolve()
+
+    @property
+    def result_cache_path(self) -> Path:
+        """結果キャッシュディレクトリの Path オブジェクトを返す。"""
+        return Path(self.result_cache_dir).resolve()
+
 
 # シングルトンインスタンス。各モジュールからインポートして使用する。
 settings = Settings()
@@ -1,9 +1,13 @@
 """FastAPI アプリケーションのエントリポイント。"""
 
+import argparse
 import asyncio
-import sys
-from concurrent.futures import ThreadPoolExecutor
+import os
+import socket
+import threading
 from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Optional
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -12,8 +16,35 @@ from loguru import logger
 from backend.config import settings
 from backend.models.schemas import JobStatus
 from backend.routers.generate import router
-from backend.services.job_store import JobStore
-from backend.services.music_generator import generate_and_save
+from backend.routers.metrics import router as metrics_router
+from backend.routers.stations import router as stations_router
+from backend.routers.timings import router as timings_router
+from backend.routers.workers import router as workers_router
+from backend.services.admission import AdmissionController
+from backend.services.audio_staging import audio_staging
+from backend.services.eta import GenerationTimeModel
+from backend.services.job_events import JobEventBroker
+from backend.services.job_persistence import SqliteJobPersistence
+from backend.services.job_store import JobStore, _JobRecord
+from backend.services.job_timings import JobTimings
+from backend.services.metrics import JobMetrics
+from backend.services.model_loader import (
+    LoadedModels,
+    LoadReporter,
+    ModelLoadProgress,
+    ensure_acestep_importable,
+    load_models,
+)
+from backend.services.music_generator import (
+    GenerationCancelled,
+    batch_shape,
+    segment_durations,
+)
+from backend.services.remote_hub import RemoteWorkerHub
+from backend.services.result_cache import ResultCache
+from backend.services.scheduler import JobScheduler
+from backend.services.station import StationManager, parse_stations
+from backend.services.worker_pool import LocalGenerator, WorkerLost, WorkerPool
 
 
 # ---------------------------------------------------------------------------
@@ -21,46 +52,284 @@ from backend.services.music_generator import generate_and_save
 # ---------------------------------------------------------------------------
 async def _queue_worker(app: FastAPI) -> None:
     """
-    バックグラウンドワーカー。キューからジョブ ID を取り出し、順次処理する。
+    バックグラウンドワーカー。スケジューラからジョブ ID を取り出し、順次処理する。
+
+    生成器（app.state.generator）の空いている実行先を確保してからジョブを取り出す。
+    既定の LocalGenerator は実行先が 1 つなので、1 つのジョブ（またはバッチ）が
+    完了するまで次の処理は開始しない（GPU メモリの共有による OOM を防ぐ）。
+    WorkerPool の場合はデバイスの数だけ並行して処理する。
 
-    1 つのジョブが完了するまで次のジョブは開始しない（逐次処理）。
-    GPU メモリを複数ジョブで共有することによる OOM を防ぐため、
-    意図的に並列化していない。
+    app.state.max_batch_size が 2 以上の場合は、batch_shape() が一致するジョブを
+    最大その数まで集めて 1 回の DiT 呼び出しで生成する。
     """
-    loop = asyncio.get_event_loop()
-    job_store: JobStore = app.state.job_store
-    executor: ThreadPoolExecutor = app.state.executor
+    generator = app.state.generator
+    running: set[asyncio.Task] = set()
 
     logger.info("ワーカー起動: ジョブの受付を開始する")
 
+    try:
+        while True:
+            slot = await generator.acquire()
+            try:
+                batch = await _next_batch(app)
+            except BaseException:
+                generator.release(slot)
+                raise
+            _notify_queue_positions(app)
+            task = asyncio.create_task(_run_batch(app, batch, slot))
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        for task in running:
+            task.cancel()
+
+
+async def _next_batch(app: FastAPI) -> list[_JobRecord]:
+    """キャンセルされていない次のジョブを取り出し、同じ形のジョブと合わせて返す。"""
+    job_store: JobStore = app.state.job_store
     while True:
-        # キューからジョブ ID を取得（ブロッキング待機）
-        job_id: str = await app.state.job_queue.get()
+        # スケジューラからジョブ ID を取得（ブロッキング待機）
+        job_id = await app.state.job_queue.get()
         record = job_store.get(job_id)
         if record is None:
             logger.warning("ジョブが見つからない: job_id={}", job_id)
             continue
+        if not job_store.is_wanted(job_id):
+            logger.info("キャンセル済みのジョブをスキップ: job_id={}", job_id)
+            continue
+        return await _collect_batch(app, record)
+
+
+def _notify_queue_positions(app: FastAPI) -> None:
+    """実行待ちのジョブの順番が進んだことを、ストリームの購読者に通知する。"""
+    job_store: JobStore = app.state.job_store
+    broker: JobEventBroker = app.state.job_events
+    for job_id in app.state.job_queue.job_ids():
+        for linked_id in job_store.linked_job_ids(job_id):
+            broker.notify(linked_id)
+
+
+async def _collect_batch(app: FastAPI, first: _JobRecord) -> list[_JobRecord]:
+    """
+    first と同じ形のジョブを、実行待ちの中から最大 max_batch_size 件まで集める。
+
+    揃わなければ batch_window_ms まで追加を待つ。形の合わないジョブは
+    実行待ちのまま順番を保つ。
+    """
+    limit: int = app.state.max_batch_size
+    # セグメント生成のジョブは 1 件ずつ処理する
+    if limit <= 1 or first.segmented:
+        return [first]
+
+    job_store: JobStore = app.state.job_store
+    scheduler: JobScheduler = app.state.job_queue
+    shape = batch_shape(first)
+    records: dict[str, _JobRecord] = {}
+
+    def _matches(job_id: str) -> bool:
+        record = job_store.get(job_id)
+        if record is None or batch_shape(record) != shape or not job_store.is_wanted(job_id):
+            return False
+        records[job_id] = record
+        return True
+
+    job_ids = await scheduler.take_matching(
+        _matches,
+        limit - 1,
+        timeout=settings.batch_window_ms / 1000,
+    )
+    return [first] + [records[job_id] for job_id in job_ids]
+
 
-        # 状態を running に更新
+async def _run_batch(app: FastAPI, batch: list[_JobRecord], slot: Any) -> None:
+    """
+    バッチを 1 回の生成呼び出しで処理し、結果を各ジョブに振り分ける。
+
+    終了時に、確保していた生成器の実行先を返す。
+    """
+    generator = app.state.generator
+    job_store: JobStore = app.state.job_store
+    result_cache: ResultCache = app.state.result_cache
+    eta: GenerationTimeModel = app.state.eta
+    job_ids = [record.job_id for record in batch]
+
+    # 状態を running に更新（予定時刻の計算のため、先に開始を記録する）
+    eta.begin(job_ids, batch[0].duration)
+    for job_id in job_ids:
         job_store.update_status(job_id, JobStatus.RUNNING)
 
+    def _on_progress(progress: float, stage: str) -> None:
+        # progress コールバック: ACE-Step が進捗を通知するたびに呼ばれる
+        for job_id in job_ids:
+            job_store.update_progress(job_id, progress, stage)
+        # バッチ内のジョブがすべてキャンセルされていれば、ここで生成を打ち切る
+        if not any(job_store.is_wanted(job_id) for job_id in job_ids):
+            raise GenerationCancelled(",".join(job_ids))
+
+    try:
+        first = batch[0]
+        segment_count = len(segment_durations(first.duration, settings.segment_seconds))
+        if first.segmented and segment_count > 1:
+            job_store.set_segment_count(first.job_id, segment_count)
+        # 生成は数十秒〜数分かかる。実行先のスレッドまたはプロセスで行う
+        audio_paths = await generator.run(
+            slot,
+            batch,
+            _on_progress,
+            lambda path: job_store.add_segment(first.job_id, path),
+        )
+    except WorkerLost as e:
+        eta.finish(job_ids, batch[0].duration, succeeded=False)
+        logger.warning("ワーカーが失われたため再投入: job_id={}, reason={}", ",".join(job_ids), e)
+        _requeue(app, batch)
+        return
+    except Exception as e:
+        eta.finish(job_ids, batch[0].duration, succeeded=False)
+        if isinstance(e, GenerationCancelled) or not any(
+            job_store.is_wanted(job_id) for job_id in job_ids
+        ):
+            logger.info("キャンセルにより生成を中断: job_id={}", ",".join(job_ids))
+            return
+        logger.exception("ジョブ処理中にエラー: job_id={}", ",".join(job_ids))
+        for job_id in job_ids:
+            job_store.fail(job_id, error=str(e))
+        await asyncio.to_thread(job_store.flush)
+        return
+    finally:
+        generator.release(slot)
+
+    eta.finish(job_ids, batch[0].duration, succeeded=True)
+
+    # 生成中にキャンセルされたジョブの音声は complete() が削除する
+    delivered = [
+        job_store.complete(record.job_id, audio_path=audio_path)
+        for record, audio_path in zip(batch, audio_paths)
+    ]
+    # 完了を永続化してから次に進む（再起動後も完了済みとして音声を返せるように）
+    await asyncio.to_thread(job_store.flush)
+
+    for record, audio_path, ok in zip(batch, audio_paths, delivered):
+        # 結果キャッシュへの登録（ファイルコピーの可能性があるため別スレッドで行う）
+        if ok and record.cache_key is not None:
+            try:
+                await asyncio.to_thread(result_cache.store, record.cache_key, audio_path)
+            except Exception:
+                logger.exception("結果キャッシュへの登録に失敗: job_id={}", record.job_id)
+
+
+def _requeue(app: FastAPI, batch: list[_JobRecord]) -> None:
+    """実行中だったジョブを実行待ちに戻し、スケジューラに再投入する。"""
+    job_store: JobStore = app.state.job_store
+    for record in batch:
+        if not job_store.requeue(record.job_id, stage="ワーカーの応答が途絶えたため再実行を待っている"):
+            continue
         try:
-            # ブロッキングな音楽生成処理をスレッドプールで実行
-            # generate_and_save() は数十秒〜数分かかる
-            audio_path = await loop.run_in_executor(
-                executor,
-                generate_and_save,
-                app.state.dit_handler,
-                app.state.llm_handler,
-                record,
-                str(settings.audio_output_path),
-                # progress コールバック: ACE-Step が進捗を通知するたびに呼ばれる
-                lambda p, s: job_store.update_progress(job_id, p, s),
+            app.state.job_queue.put_nowait(
+                record.job_id,
+                priority=record.priority,
+                client_id=record.client_id,
+                duration=record.duration,
             )
-            job_store.complete(job_id, audio_path=audio_path)
-        except Exception as e:
-            logger.exception("ジョブ処理中にエラー: job_id={}", job_id)
-            job_store.fail(job_id, error=str(e))
+        except asyncio.QueueFull:
+            job_store.fail(record.job_id, error="再投入時にキューが満杯のため破棄された")
+
+
+async def _start_generator(app: FastAPI) -> None:
+    """
+    モデルを読み込んで生成器を用意し、キューの処理（_queue_worker）を始める。
+
+    OTO_REMOTE_WORKERS=true の場合はモデルを読み込まず、推論ノードにジョブを貸し出す。
+    OTO_DEVICES を指定した場合はデバイスごとに別プロセスで読み込み、
+    それ以外はこのプロセス内で OTO_DEVICE に 1 つ読み込む。
+
+    読み込みに失敗した場合は、実行待ちのジョブを失敗にして以降の投入を断る
+    （readiness・liveness が 503 を返し、オーケストレーターに再起動を促す）。
+    """
+    progress: ModelLoadProgress = app.state.load_progress
+    generator = None
+    try:
+        if settings.remote_workers:
+            generator = RemoteWorkerHub(
+                save_dir=str(settings.audio_output_path),
+                lm_model=settings.lm_model,
+                max_batch_size=settings.batch_max_size,
+                lease_seconds=settings.lease_seconds,
+                max_attempts=settings.lease_max_attempts,
+                max_upload_bytes=settings.worker_upload_max_bytes,
+            )
+            await generator.start()
+        elif settings.device_list:
+            generator = WorkerPool(settings.device_list, load_progress=progress)
+            await generator.start()
+        else:
+            generator = LocalGenerator(
+                await _load_in_thread(settings.device, progress.reporter(settings.device))
+            )
+    except asyncio.CancelledError:
+        if generator is not None:
+            await generator.close()
+        raise
+    except Exception as e:
+        logger.exception("モデルの読み込みに失敗")
+        app.state.load_error = str(e)
+        _fail_queued_jobs(app, f"モデルの読み込みに失敗したため実行できない: {e}")
+        return
+
+    # バッチサイズの上限は設定値と GPU ティアごとの推奨値の小さい方とする
+    max_batch_size = max(1, min(settings.batch_max_size, generator.max_batch_size))
+    if max_batch_size > 1:
+        logger.info("マイクロバッチ有効: max_batch_size={}", max_batch_size)
+
+    app.state.max_batch_size = max_batch_size
+    app.state.result_cache.set_model_tag(f"{settings.dit_config}|{generator.lm_model}")
+    app.state.eta.configure(
+        lm_enabled=bool(generator.lm_model),
+        workers=len(generator.health()),
+    )
+    app.state.generator = generator
+    app.state.model_loaded = True
+    logger.info("モデルの読み込み完了: 実行待ちのジョブ {} 件の処理を始める", app.state.job_queue.qsize())
+
+    await _queue_worker(app)
+
+
+def _load_in_thread(device: str, report: LoadReporter) -> "asyncio.Future[LoadedModels]":
+    """
+    load_models() をデーモンスレッドで実行する。
+
+    asyncio.to_thread() の既定のスレッドプールは終了時に完了を待つため、
+    読み込み中にシャットダウンしても待たされないよう専用のスレッドを使う。
+    """
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future[LoadedModels] = loop.create_future()
+
+    def settle(result: Any, error: Optional[BaseException]) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def target() -> None:
+        try:
+            models = load_models(device, report)
+        except BaseException as e:
+            loop.call_soon_threadsafe(settle, None, e)
+        else:
+            loop.call_soon_threadsafe(settle, models, None)
+
+    threading.Thread(target=target, name="model-loader", daemon=True).start()
+    return future
+
+
+def _fail_queued_jobs(app: FastAPI, error: str) -> None:
+    """実行待ちのジョブをすべてキューから外し、失敗にする。"""
+    job_store: JobStore = app.state.job_store
+    scheduler: JobScheduler = app.state.job_queue
+    for job_id in scheduler.job_ids():
+        scheduler.remove(job_id)
+        job_store.fail(job_id, error=error)
 
 
 async def _cleanup_worker(app: FastAPI) -> None:
@@ -79,104 +348,128 @@ async def _cleanup_worker(app: FastAPI) -> None:
 # ---------------------------------------------------------------------------
 # lifespan（起動・終了処理）
 # ---------------------------------------------------------------------------
+def _check_settings() -> None:
+    """起動してはいけない設定の組み合わせなら RuntimeError を送出する。"""
+    if settings.remote_workers and not settings.worker_token:
+        # 認証なしでは、誰でもジョブを借りて任意の MP3 を結果としてアップロードできてしまう
+        raise RuntimeError("OTO_REMOTE_WORKERS=true では OTO_WORKER_TOKEN の設定が必要である")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     アプリケーションのライフスパン管理。
 
-    起動時にモデルを読み込み、終了時にリソースを解放する。
-    モデルの読み込みには数分かかるため、起動ログを確認すること。
+    起動時にジョブの管理オブジェクトを用意し、モデルの読み込みをバックグラウンドで始める。
+    ポートはすぐに開き、読み込み中（数分かかる）もジョブの投入を受け付けてキューに積む。
+    読み込みの進捗は GET /api/health/ready で確認できる。終了時にリソースを解放する。
     """
     logger.info("=== oto-factory バックエンド起動開始 ===")
+    _check_settings()
 
     # --- 1. sys.path に ACE-Step ルートを追加 ---
-    # 標準運用では `uv run` により import は解決される。
-    # この追加は、ローカル直接実行時の補助策として残す。
-    acestep_root = str(settings.acestep_root_path)
-    if acestep_root not in sys.path:
-        sys.path.insert(0, acestep_root)
-        logger.info("sys.path に追加: {}", acestep_root)
+    ensure_acestep_importable()
 
     # --- 2. 音声出力ディレクトリの作成 ---
     settings.audio_output_path.mkdir(parents=True, exist_ok=True)
     logger.info("音声出力ディレクトリ: {}", settings.audio_output_path)
 
-    # --- 3. ACE-Step モジュールのインポート（sys.path 追加後） ---
-    from acestep.gpu_config import (
-        get_gpu_config,
-        get_recommended_lm_model,
-        set_global_gpu_config,
+    # --- 3. app.state に管理オブジェクトを格納 ---
+    # モデルの読み込み（数分かかる）は 5. でバックグラウンドに回し、その間も
+    # ジョブの投入は受け付けてキューに積む。読み込みが終わるまで generator は None
+    app.state.generator = None
+    app.state.model_loaded = False
+    app.state.load_error = None
+    app.state.load_progress = ModelLoadProgress()
+    app.state.max_batch_size = 1
+    app.state.result_cache = ResultCache(
+        cache_dir=settings.result_cache_path,
+        max_bytes=settings.result_cache_max_bytes,
+        # LM を使わない場合は生成結果が変わるため、実際に読み込んだ LM をキーに含める。
+        # 読み込みが終わるまでは未確定（その間に投入されたジョブはキャッシュしない）
+        model_tag=None,
     )
-    from acestep.handler import AceStepHandler
-    from acestep.llm_inference import LLMHandler
-    from acestep.model_downloader import get_checkpoints_dir
-
-    # --- 4. GPU 検出 ---
-    gpu_config = get_gpu_config()
-    set_global_gpu_config(gpu_config)
-    logger.info(
-        "GPU 検出完了: tier={}, memory={:.1f}GB",
-        gpu_config.tier,
-        gpu_config.gpu_memory_gb,
+    persistence = (
+        SqliteJobPersistence(Path(settings.job_db_path).resolve())
+        if settings.job_db_path
+        else None
     )
-
-    # --- 5. DiT ハンドラの初期化 ---
-    logger.info("DiT モデル初期化中 (config={})...", settings.dit_config)
-    dit_handler = AceStepHandler()
-    status_msg, ok = dit_handler.initialize_service(
-        project_root=acestep_root,
-        config_path=settings.dit_config,
-        device=settings.device,
+    app.state.metrics = JobMetrics()
+    app.state.timings = JobTimings(
+        enabled=settings.timings_enabled,
+        max_jobs=settings.timings_max_jobs,
+    )
+    app.state.job_store = JobStore(
+        ttl_seconds=settings.job_ttl_seconds,
+        persistence=persistence,
+        metrics=app.state.metrics,
+        timings=app.state.timings,
+        max_audio_bytes=settings.audio_max_bytes,
+    )
+    # LM の有無と並行数は読み込み後に configure() で実際の値に合わせる
+    app.state.eta = GenerationTimeModel(
+        lm_enabled=bool(settings.lm_model),
+        workers=len(settings.device_list) or 1,
+    )
+    app.state.job_events = JobEventBroker(asyncio.get_running_loop())
+    app.state.job_store.add_listener(app.state.job_events.notify)
+    # asyncio.Queue 互換のスケジューラ（優先度・公平キューイング・短い曲優先）
+    app.state.job_queue = JobScheduler(
+        maxsize=settings.queue_max_size,
+        policy=settings.scheduler_policy,
+        sjf_aging=settings.scheduler_sjf_aging,
     )
-    if not ok:
-        logger.error("DiT モデルの初期化に失敗: {}", status_msg)
-        raise RuntimeError(f"DiT モデルの初期化に失敗: {status_msg}")
-    logger.info("DiT モデル初期化完了: {}", status_msg)
-
-    # --- 6. LLM ハンドラの初期化 ---
-    # checkpoint_dir には ACE-Step ルートではなく checkpoints ディレクトリを渡す。
-    checkpoint_dir = str(get_checkpoints_dir())
-    lm_model = settings.lm_model or get_recommended_lm_model(gpu_config) or ""
-    llm_handler: LLMHandler | None = None
-
-    if lm_model:
-        logger.info("LLM 初期化中 (model={}, backend={})...", lm_model, settings.lm_backend)
-        llm_handler = LLMHandler()
-        llm_status, llm_ok = llm_handler.initialize(
-            checkpoint_dir=checkpoint_dir,
-            lm_model_path=lm_model,
-            backend=settings.lm_backend,
-            device=settings.device,
-        )
-        if not llm_ok:
-            logger.warning("LLM の初期化に失敗（DiT のみモードで続行）: {}", llm_status)
-            llm_handler = None
-        else:
-            logger.info("LLM 初期化完了: {}", llm_status)
-    else:
-        logger.info("LLM モデル未設定のため、DiT のみモードで起動")
 
-    # --- 7. app.state にハンドラと管理オブジェクトを格納 ---
-    app.state.dit_handler = dit_handler
-    app.state.llm_handler = llm_handler
-    app.state.model_loaded = True
-    app.state.job_store = JobStore(ttl_seconds=settings.job_ttl_seconds)
-    app.state.job_queue = asyncio.Queue(maxsize=settings.queue_max_size)
-    app.state.executor = ThreadPoolExecutor(max_workers=1)
+    app.state.admission = AdmissionController(
+        seconds_per_minute=settings.rate_limit_seconds_per_minute,
+        burst_seconds=settings.rate_limit_burst_seconds,
+        max_backlog_seconds=settings.max_backlog_seconds,
+    )
 
-    # --- 8. バックグラウンドタスクの起動 ---
-    worker_task = asyncio.create_task(_queue_worker(app))
+    # --- 4. 永続化されたジョブの復元（前回終了時に処理待ちだったジョブを再投入） ---
+    for job_id in app.state.job_store.restore():
+        record = app.state.job_store.get(job_id)
+        try:
+            app.state.job_queue.put_nowait(
+                job_id,
+                priority=record.priority,
+                client_id=record.client_id,
+                duration=record.duration,
+            )
+        except asyncio.QueueFull:
+            app.state.job_store.fail(job_id, error="再起動後のキューが満杯のため破棄された")
+    # クラッシュなどで残った、どのジョブからも参照されていない音声ファイルを削除する
+    audio_dirs = [str(settings.audio_output_path)]
+    if audio_staging.enabled:
+        audio_dirs.append(str(audio_staging.directory))
+    await asyncio.to_thread(app.state.job_store.sweep_orphans, audio_dirs)
+
+    # --- 5. バックグラウンドタスクの起動（モデルの読み込み → ワーカー） ---
+    worker_task = asyncio.create_task(_start_generator(app))
     cleanup_task = asyncio.create_task(_cleanup_worker(app))
 
-    logger.info("=== oto-factory バックエンド起動完了 (port={}) ===", settings.port)
+    # --- 6. ステーションの作成（最初のリスナーが接続するまで生成はしない） ---
+    app.state.stations = StationManager(app.state.job_store, app.state.job_queue, app.state.job_events)
+    for name, config in parse_stations(settings.stations).items():
+        await app.state.stations.put(name, config)
+
+    logger.info(
+        "=== oto-factory バックエンド起動完了 (port={})。モデルはバックグラウンドで読み込む ===",
+        settings.port,
+    )
 
     yield  # ← ここでアプリケーションが稼働する
 
     # --- 終了処理 ---
     logger.info("シャットダウン開始...")
+    await app.state.stations.close()
     worker_task.cancel()
     cleanup_task.cancel()
-    app.state.executor.shutdown(wait=False)
+    await asyncio.gather(worker_task, return_exceptions=True)
+    if app.state.generator is not None:
+        await app.state.generator.close()
+    if persistence is not None:
+        persistence.close()
     logger.info("シャットダウン完了")
 
 
@@ -194,19 +487,53 @@ app = FastAPI(
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],       # 開発時は全許可
-    allow_methods=["GET", "POST"],
+    allow_methods=["GET", "HEAD", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
+    # 部分取得・キャッシュ検証に使うヘッダーをブラウザの JS から読めるようにする
+    expose_headers=["ETag", "Content-Range", "Accept-Ranges", "Content-Length"],
 )
 
 # ルーターの登録
 app.include_router(router)
+app.include_router(workers_router)
+app.include_router(metrics_router)
+app.include_router(timings_router)
+app.include_router(stations_router)
 
 
 # ---------------------------------------------------------------------------
 # CLI エントリポイント
 # ---------------------------------------------------------------------------
 def cli_main() -> None:
-    """pyproject.toml の [project.scripts] から呼ばれるエントリポイント。"""
+    """
+    pyproject.toml の [project.scripts] から呼ばれるエントリポイント。
+
+    - `oto-backend`: API サーバーを起動する。
+    - `oto-backend worker --coordinator URL`: API は立てずにモデルだけを読み込み、
+      コーディネーター（OTO_REMOTE_WORKERS=true のサーバー）からジョブを借りて生成する。
+    """
+    parser = argparse.ArgumentParser(prog="oto-backend", description="oto-factory バックエンド")
+    subparsers = parser.add_subparsers(dest="command")
+    worker = subparsers.add_parser("worker", help="リモートワーカーとして起動する")
+    worker.add_argument("--coordinator", required=True, help="コーディネーターの URL")
+    worker.add_argument("--device", default=settings.device, help="モデルを読み込むデバイス")
+    worker.add_argument(
+        "--worker-id",
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="コーディネーターに名乗る識別子",
+    )
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        from backend.services.remote_worker import run_remote_worker
+
+        ensure_acestep_importable()
+        try:
+            run_remote_worker(args.coordinator, args.device, args.worker_id)
+        except KeyboardInterrupt:
+            logger.info("リモートワーカーを終了")
+        return
+
     import uvicorn
 
     logger.info("oto-factory バックエンドを起動: {}:{}", settings.host, settings.port)
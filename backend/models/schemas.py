@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field
 
@@ -17,6 +17,7 @@ class JobStatus(str, Enum):
     RUNNING = "running"      # 音楽生成中
     COMPLETED = "completed"  # 生成完了、MP3 ダウンロード可能
     FAILED = "failed"        # 生成失敗
+    CANCELLED = "cancelled"  # キャンセル済み
 
 
 # ---------------------------------------------------------------------------
@@ -48,6 +49,35 @@ class GenerateRequest(BaseModel):
         default=None,
         description="乱数シード。null の場合はランダム",
     )
+    segmented: bool = Field(
+        default=False,
+        description=(
+            "true の場合、長い曲をセグメントに分けて生成し、完成した分から取得できるようにする。"
+            "各セグメントは前のセグメントを条件にせず別々に生成するため、継ぎ目で曲の流れが変わることがある"
+            "（継ぎ目は OTO_SEGMENT_CROSSFADE_SECONDS 秒のクロスフェードでつなぐ）"
+        ),
+    )
+    priority: int = Field(
+        default=0,
+        ge=-10,
+        le=10,
+        description="優先度。大きいほど先に実行される。0 以外はオペレーターのトークン（OTO_OPERATOR_TOKEN）が必要",
+    )
+    client_id: Optional[str] = Field(
+        default=None,
+        max_length=128,
+        description="公平キューイング・投入量の上限の単位となるクライアントの識別子。オペレーターのトークン付きのリクエストでのみ使い、それ以外は接続元アドレス",
+    )
+
+
+class BatchGenerateRequest(BaseModel):
+    """POST /api/generate/batch のリクエストボディ。"""
+
+    jobs: list[GenerateRequest] = Field(
+        ...,
+        min_length=1,
+        description="投入するリクエスト。件数の上限は OTO_STREAM_MAX_JOBS（1 本の SSE ストリームで購読できる数）",
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -59,6 +89,18 @@ class GenerateJobResponse(BaseModel):
     job_id: str = Field(description="ジョブの一意識別子（UUID v4）")
     status: JobStatus = Field(description="ジョブの状態")
     message: str = Field(description="人間向けメッセージ")
+    queue_position: Optional[int] = Field(
+        default=None,
+        description="実行待ちの順番（0 が次に実行される）。実行待ちでなければ null",
+    )
+    estimated_start_at: Optional[datetime] = Field(
+        default=None,
+        description="生成の開始予定時刻（実行中なら開始時刻）。実行待ち・実行中でなければ null",
+    )
+    estimated_finish_at: Optional[datetime] = Field(
+        default=None,
+        description="生成の完了予定時刻。実行待ち・実行中でなければ null",
+    )
 
 
 class JobStatusResponse(BaseModel):
@@ -79,6 +121,202 @@ class JobStatusResponse(BaseModel):
     created_at: datetime
     completed_at: Optional[datetime] = None
     error: Optional[str] = None
+    queue_position: Optional[int] = Field(
+        default=None,
+        description="実行待ちの順番（0 が次に実行される）。実行待ちでなければ null",
+    )
+    estimated_start_at: Optional[datetime] = Field(
+        default=None,
+        description="生成の開始予定時刻（実行中なら開始時刻）。実行待ち・実行中でなければ null",
+    )
+    estimated_finish_at: Optional[datetime] = Field(
+        default=None,
+        description="生成の完了予定時刻。実行待ち・実行中でなければ null",
+    )
+    segment_count: Optional[int] = Field(
+        default=None,
+        description="セグメント生成の場合のセグメント総数",
+    )
+    segments_ready: int = Field(
+        default=0,
+        description="取得可能になったセグメントの数",
+    )
+    audio_expired: bool = Field(
+        default=False,
+        description="音声の保存容量の上限などにより、有効期限より前に音声を削除した（GET /audio は 410）",
+    )
+
+
+class BatchSummary(BaseModel):
+    """複数のジョブの進み具合のまとめ。"""
+
+    total: int = Field(description="指定したジョブの数")
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    missing: int = Field(default=0, description="見つからない（期限切れ・削除済みの）ジョブの数")
+    progress: float = Field(
+        ge=0.0,
+        le=1.0,
+        description="全体の進捗率 0.0〜1.0（終了したジョブは 1.0 として平均する）",
+    )
+    finished: bool = Field(description="すべてのジョブが終了した（見つからないものを含む）")
+
+
+class BatchGenerateResponse(BaseModel):
+    """POST /api/generate/batch のレスポンス。"""
+
+    jobs: list[GenerateJobResponse] = Field(description="リクエストと同じ順の投入結果")
+    summary: BatchSummary
+
+
+class JobListResponse(BaseModel):
+    """GET /api/jobs のレスポンス。"""
+
+    jobs: list[JobStatusResponse] = Field(description="見つかったジョブの状態（指定した順）")
+    missing: list[str] = Field(default_factory=list, description="見つからなかったジョブ ID")
+    summary: BatchSummary
+
+
+class EstimateResponse(BaseModel):
+    """GET /api/estimate のレスポンス。"""
+
+    duration: int = Field(description="曲の長さ（秒）")
+    generation_seconds: float = Field(description="生成にかかる推定秒数（キュー待ちを除く）")
+    estimated_start_at: datetime = Field(description="今投入した場合の開始予定時刻")
+    estimated_finish_at: datetime = Field(description="今投入した場合の完了予定時刻")
+
+
+class JobTimingEvent(BaseModel):
+    """ジョブの処理中に起きたイベントの時刻。"""
+
+    name: str = Field(
+        description="enqueue / dequeue / stage:<進捗の説明文> / generated / file_ready / failed / cancelled / requeue"
+    )
+    at: datetime
+    elapsed_seconds: float = Field(description="投入からの経過秒数")
+
+
+class JobTimingsResponse(BaseModel):
+    """GET /api/jobs/{job_id}/timings のレスポンス。"""
+
+    job_id: str
+    events: list[JobTimingEvent]
+    phases: dict[str, float] = Field(
+        description="区間の分類（queue / prepare / lm / dit / encode / finalize）ごとの合計秒数"
+    )
+
+
+class TimingsSettings(BaseModel):
+    """PUT /api/timings のリクエストボディ。"""
+
+    enabled: bool
+
+
+class TimingsStatusResponse(BaseModel):
+    """GET /api/timings・PUT /api/timings のレスポンス。"""
+
+    enabled: bool
+    recorded_jobs: int = Field(description="処理時刻を保持しているジョブ数")
+    max_jobs: int
+
+
+class CacheStats(BaseModel):
+    """キャッシュのヒット率と使用量。"""
+
+    hits: int
+    misses: int
+    hit_rate: float = Field(description="ヒット率 0.0〜1.0")
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+
+class LmCacheStats(BaseModel):
+    """LM メタデータキャッシュの統計（このプロセスで生成した分）。"""
+
+    hits: int
+    misses: int
+    hit_rate: float = Field(description="ヒット率 0.0〜1.0")
+    entries: int
+    max_entries: int
+
+
+class PipelineStats(BaseModel):
+    """LM/DiT パイプラインの段ごとの累計稼働秒数。"""
+
+    lm: float = Field(description="LM の段が動いていた秒数")
+    dit: float = Field(description="DiT の段（デコード・保存を含む）が動いていた秒数")
+    overlap: float = Field(description="両方の段が同時に動いていた秒数（直列に比べて短縮できた時間）")
+    busy: float = Field(description="いずれかの段が動いていた秒数")
+
+
+class StagingStats(BaseModel):
+    """音声の一時置き場の統計。"""
+
+    promoted: int = Field(description="ディスクに移した音声の数")
+    promoted_bytes: int
+    free_bytes: int = Field(description="一時置き場のファイルシステムの空き")
+
+
+class DiskUsage(BaseModel):
+    """生成した音声ファイルの使用量。"""
+
+    used_bytes: int = Field(description="ジョブが保持している音声ファイルの合計（一時置き場の分を含む）")
+    files: int
+    max_bytes: int = Field(description="上限。0 は無制限")
+    evicted_jobs: int = Field(description="容量上限を超えたため TTL より前に音声を削除したジョブ数")
+    free_bytes: int = Field(description="音声出力ディレクトリのファイルシステムの空き")
+    staging: Optional[StagingStats] = Field(
+        default=None,
+        description="一時置き場の統計。使わない場合は null",
+    )
+
+
+class WorkerHealth(BaseModel):
+    """生成器の実行先（デバイス）ごとの状態。"""
+
+    worker_id: Optional[str] = Field(default=None, description="リモートワーカーの識別子")
+    device: str
+    state: str = Field(description="starting / idle / busy / restarting / failed / offline")
+    pid: Optional[int] = Field(default=None, description="モデルを読み込んだプロセスの ID")
+    job_ids: list[str] = Field(default_factory=list, description="生成中のジョブ ID")
+    completed: int = Field(description="生成を終えたバッチ数")
+    restarts: int = Field(description="異常終了やメモリ不足で再起動した回数")
+    last_error: Optional[str] = None
+
+
+class ModelLoadStatus(BaseModel):
+    """モデル（DiT / LM）ごとの読み込みとウォームアップの進捗。"""
+
+    device: str
+    name: str = Field(description="dit / lm / warmup")
+    state: str = Field(description="pending / loading / ready / failed / skipped")
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    elapsed_seconds: Optional[float] = Field(
+        default=None,
+        description="読み込み中は経過秒数、終了後は所要秒数",
+    )
+    error: Optional[str] = None
+
+
+class LivenessResponse(BaseModel):
+    """GET /api/health/live のレスポンス。"""
+
+    status: str = Field(description="ok、またはモデルの読み込みに失敗した場合は failed")
+    error: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    """GET /api/health/ready のレスポンス。"""
+
+    ready: bool = Field(description="モデルの読み込みが終わり、ジョブを実行できる")
+    queue_size: int = Field(description="実行待ちのジョブ数（読み込み中に投入されたものを含む）")
+    models: list[ModelLoadStatus] = Field(default_factory=list)
+    error: Optional[str] = Field(default=None, description="モデルの読み込みに失敗した場合のエラー")
 
 
 class HealthResponse(BaseModel):
@@ -86,6 +324,122 @@ class HealthResponse(BaseModel):
 
     status: str
     model_loaded: bool
+    models: list[ModelLoadStatus] = Field(
+        default_factory=list,
+        description="モデルごとの読み込みの進捗",
+    )
     gpu: str
     vram_gb: float
     queue_size: int
+    result_cache: Optional[CacheStats] = Field(
+        default=None,
+        description="結果キャッシュの統計。無効化されている場合は null",
+    )
+    lm_cache: Optional[LmCacheStats] = Field(
+        default=None,
+        description="LM メタデータキャッシュの統計。無効化されている場合は null",
+    )
+    pipeline: Optional[PipelineStats] = Field(
+        default=None,
+        description="LM/DiT パイプラインの統計。無効な場合は null",
+    )
+    disk: Optional[DiskUsage] = Field(
+        default=None,
+        description="生成した音声ファイルのディスク使用量",
+    )
+    workers: list[WorkerHealth] = Field(
+        default_factory=list,
+        description="生成器の実行先（デバイス）ごとの状態",
+    )
+
+
+# ---------------------------------------------------------------------------
+# ステーション API のモデル
+# ---------------------------------------------------------------------------
+class StationRequest(BaseModel):
+    """PUT /api/stations/{name} のリクエストボディ。"""
+
+    prompt: str = Field(
+        ...,
+        min_length=1,
+        max_length=512,
+        description="ステーションで生成し続ける音楽の説明文",
+    )
+    duration: int = Field(
+        default=120,
+        ge=10,
+        le=600,
+        description="1 曲の長さ（秒）",
+    )
+    crossfade_seconds: float = Field(
+        default=4.0,
+        ge=0.0,
+        le=30.0,
+        description="曲の継ぎ目のクロスフェードの長さ（秒）",
+    )
+
+
+class StationStatus(BaseModel):
+    """ステーションの状態。"""
+
+    name: str
+    prompt: str
+    duration: int
+    crossfade_seconds: float
+    listeners: int = Field(description="接続中のリスナーの数")
+    tracks_generated: int = Field(description="これまでに生成した曲の数")
+    failures: int = Field(description="曲の生成に失敗した回数")
+    now_playing_job_id: Optional[str] = Field(default=None, description="配信中の曲のジョブ ID")
+    generating_job_id: Optional[str] = Field(default=None, description="生成中（実行待ちを含む）の曲のジョブ ID")
+    buffered_seconds: float = Field(description="生成済みでまだ再生されていない秒数")
+
+
+# ---------------------------------------------------------------------------
+# リモートワーカー API のモデル
+# ---------------------------------------------------------------------------
+class LeaseRequest(BaseModel):
+    """POST /api/workers/lease のリクエストボディ。"""
+
+    worker_id: str = Field(..., min_length=1, max_length=128, description="ワーカーの識別子")
+    device: str = Field(default="", max_length=64, description="ワーカーが使うデバイス")
+    wait_seconds: float = Field(
+        default=30.0,
+        ge=0,
+        le=60,
+        description="ジョブがなければこの秒数まで応答を待つ（ロングポーリング）",
+    )
+
+
+class LeaseResponse(BaseModel):
+    """POST /api/workers/lease のレスポンス。"""
+
+    lease_id: str
+    lease_seconds: float = Field(description="この秒数以内に進捗かハートビートを送ること")
+    segment_seconds: int = Field(description="セグメント生成の 1 セグメントの長さ（秒）")
+    segment_crossfade_seconds: int = Field(default=0, description="セグメントの継ぎ目のクロスフェードの長さ（秒）")
+    jobs: list[dict[str, Any]] = Field(description="生成するジョブ（JobStore の行形式）")
+
+
+class LeaseProgressRequest(BaseModel):
+    """POST /api/workers/leases/{lease_id}/progress のリクエストボディ。"""
+
+    progress: Optional[float] = Field(
+        default=None,
+        ge=0.0,
+        le=1.0,
+        description="進捗率。null の場合は期限の延長のみ（ハートビート）",
+    )
+    stage: str = ""
+
+
+class LeaseProgressResponse(BaseModel):
+    """POST /api/workers/leases/{lease_id}/progress のレスポンス。"""
+
+    cancelled: bool = Field(description="true の場合、ジョブがキャンセルされたので生成を中断する")
+
+
+class LeaseFailureRequest(BaseModel):
+    """POST /api/workers/leases/{lease_id}/fail のリクエストボディ。"""
+
+    error: str = ""
+    cancelled: bool = Field(default=False, description="キャンセルの通知を受けて中断した場合は true")
@@ -1,28 +1,279 @@
 """音楽生成エンドポイント。"""
 
 import asyncio
+import hmac
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
 from loguru import logger
 
+from backend.config import settings
 from backend.models.schemas import (
+    BatchGenerateRequest,
+    BatchGenerateResponse,
+    BatchSummary,
+    CacheStats,
+    DiskUsage,
+    EstimateResponse,
     GenerateJobResponse,
     GenerateRequest,
     HealthResponse,
+    JobListResponse,
     JobStatus,
     JobStatusResponse,
+    LivenessResponse,
+    LmCacheStats,
+    ModelLoadStatus,
+    PipelineStats,
+    ReadinessResponse,
+    StagingStats,
+    WorkerHealth,
 )
+from backend.services.admission import AdmissionController, Rejection
+from backend.services.audio_files import content_etag, etag_matches, mp3_payload
+from backend.services.audio_staging import audio_staging
+from backend.services.eta import GenerationTimeModel
+from backend.services.lm_cache import lm_metadata_cache
+from backend.services.music_generator import segment_durations
+from backend.services.scheduler import JobScheduler
 
 # プレフィックス /api を設定。main.py で app.include_router(router) する。
 router = APIRouter(prefix="/api", tags=["generate"])
 
+# これ以上状態が変わらないジョブの状態
+_TERMINAL_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+def _schedule_info(app, record) -> dict:
+    """
+    実行待ちの順番と開始・完了予定時刻を返す。
+
+    相乗りしているジョブは主ジョブの値を返す。
+    """
+    if record.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+        return {}
+    scheduler: JobScheduler = app.state.job_queue
+    eta: GenerationTimeModel = app.state.eta
+    job_id = record.primary_id or record.job_id
+    start, finish = eta.estimate(job_id, record.duration, scheduler.snapshot())
+    return {
+        "queue_position": scheduler.queue_position(job_id),
+        "estimated_start_at": start,
+        "estimated_finish_at": finish,
+    }
+
+
+def _to_status_response(record, app) -> JobStatusResponse:
+    """_JobRecord を JobStatusResponse に変換する。"""
+    return JobStatusResponse(
+        job_id=record.job_id,
+        status=record.status,
+        progress=record.progress,
+        stage=record.stage,
+        created_at=record.created_at,
+        completed_at=record.completed_at,
+        error=record.error,
+        segment_count=record.segment_count,
+        segments_ready=len(record.segment_paths),
+        audio_expired=record.audio_expired,
+        **_schedule_info(app, record),
+    )
+
+
+def _ensure_audio_kept(record) -> None:
+    """音声を有効期限より前に削除したジョブなら 410 を返す。"""
+    if record.audio_expired:
+        raise HTTPException(
+            status_code=410,
+            detail="音声の保存容量の上限を超えたため、音声を削除した。同じリクエストを再投入してほしい",
+        )
+
+
+async def _immutable_file_response(request: Request, path: str, filename: str) -> Response:
+    """
+    完成後に内容が変わらない音声ファイルを返す。
+
+    内容から計算した強い ETag と長期の Cache-Control を付け、If-None-Match が
+    一致すれば 304 を返す。Range リクエスト（206）と HEAD は FileResponse が処理する。
+    """
+    try:
+        etag = await asyncio.to_thread(content_etag, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="音声ファイルが見つからない")
+
+    headers = {
+        "ETag": etag,
+        # ジョブの保持期間中は内容が変わらない
+        "Cache-Control": f"public, max-age={settings.job_ttl_seconds}, immutable",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        path=path,
+        media_type="audio/mpeg",
+        filename=filename,
+        headers=headers,
+    )
+
+
+async def _accessed_path(request: Request, record, path: str) -> str:
+    """
+    ジョブの音声が参照されたことを記録し、配信に使うパスを返す。
+
+    完了したジョブの音声が一時置き場にあれば、ディスクに移してから移動後のパスを返す。
+    生成中のジョブは連結前のセグメントを動かさないよう、一時置き場から配信する。
+    """
+    job_store = request.app.state.job_store
+    job_store.touch(record.job_id)
+    if record.status != JobStatus.COMPLETED or not audio_staging.is_staged(path):
+        return path
+    promoted = await asyncio.to_thread(audio_staging.promote, path)
+    if promoted != path:
+        job_store.relocate(path, promoted)
+    return promoted
+
+
+def _is_operator(request: Request) -> bool:
+    """OTO_OPERATOR_TOKEN の Bearer トークンが付いているかどうか。"""
+    if not settings.operator_token:
+        return False
+    expected = f"Bearer {settings.operator_token}"
+    return hmac.compare_digest(request.headers.get("authorization", ""), expected)
+
+
+def _scheduled_request(request: Request, item: GenerateRequest, operator: bool) -> GenerateRequest:
+    """
+    スケジューリングに使う priority と client_id を確定したリクエストを返す。
+
+    client_id はリクエストごとに自由に変えられるため、オペレーター以外は接続元アドレスに
+    置き換える（公平キューイングと投入量の上限を、別のクライアントを装って逃れられないように）。
+    オペレーター以外が priority を指定した場合は 403。
+    """
+    if item.priority != 0 and not operator:
+        raise HTTPException(
+            status_code=403,
+            detail="priority の指定にはオペレーターのトークン（OTO_OPERATOR_TOKEN）が必要である",
+        )
+    if operator and item.client_id is not None:
+        return item
+    host = request.client.host if request.client else ""
+    return item.model_copy(update={"client_id": host})
+
+
+def _admit(app, costs: dict[str, float], new_jobs: int) -> Optional[Rejection]:
+    """
+    new_jobs 件のジョブをキューに積めるかを判定する。受け付ける場合は None を返す。
+
+    costs は client_id（オペレーター以外は接続元アドレス）→ 曲の秒数の合計。
+    受け付けた分はクライアントごとの上限から差し引く。
+    """
+    scheduler: JobScheduler = app.state.job_queue
+    eta: GenerationTimeModel = app.state.eta
+    admission: AdmissionController = app.state.admission
+
+    queue = scheduler.snapshot()
+    free = scheduler.free_slots()
+    if free is not None and free < new_jobs:
+        # 実行待ちの先頭が実行に移れば 1 件分空く
+        start, _ = eta.estimate(queue[0][0], queue[0][1], queue) if queue else (None, None)
+        now = datetime.now(timezone.utc)
+        return admission.reject_queue_full((start - now).total_seconds() if start else 1)
+
+    backlog = 0.0
+    if admission.backlog_limited:
+        # キューの末尾に並んだ場合に生成が始まるまでの秒数
+        start, _ = eta.estimate("", 0, queue + [("", 0)])
+        backlog = (start - datetime.now(timezone.utc)).total_seconds() if start else 0.0
+    return admission.admit(costs, backlog)
+
+
+def _rejected(rejection: Rejection) -> HTTPException:
+    """受け付けなかったことを示す 429（クライアントごとの上限）または 503 を作る。"""
+    return HTTPException(
+        status_code=429 if rejection.reason == "rate_limit" else 503,
+        detail=rejection.detail,
+        headers={"Retry-After": str(rejection.retry_after)},
+    )
+
+
+def _not_persisted() -> HTTPException:
+    """ジョブの保存をコミットできず、受け付けを取り消したことを示す 503 を作る。"""
+    return HTTPException(
+        status_code=503,
+        detail="ジョブを保存できなかったため受け付けられない。時間をおいて再投入してほしい",
+    )
+
+
+def _roll_back(app, job_ids: list[str]) -> None:
+    """
+    受け付けを取り消す。キューから外し、ジョブの登録を削除する。
+
+    相乗りしたジョブは主ジョブより先に渡すこと（主ジョブの削除で失敗扱いにならないようにする）。
+    """
+    for job_id in job_ids:
+        app.state.job_queue.remove(job_id)
+        app.state.job_store.delete(job_id)
+
+
+def _batch_summary(records: list) -> BatchSummary:
+    """複数のジョブの状態ごとの件数と全体の進捗をまとめる。見つからないジョブは None で渡す。"""
+    counts = {status: 0 for status in JobStatus}
+    progress = 0.0
+    missing = 0
+    for record in records:
+        if record is None:
+            missing += 1
+            progress += 1.0
+            continue
+        counts[record.status] += 1
+        progress += 1.0 if record.status in _TERMINAL_STATUSES else (record.progress or 0.0)
+    return BatchSummary(
+        total=len(records),
+        **{status.value: count for status, count in counts.items()},
+        missing=missing,
+        progress=round(progress / len(records), 4) if records else 1.0,
+        finished=counts[JobStatus.QUEUED] == 0 and counts[JobStatus.RUNNING] == 0,
+    )
+
+
+def _parse_job_ids(ids: str) -> list[str]:
+    """カンマ区切りのジョブ ID を重複を除いて返す。件数が 1〜stream_max_jobs でなければ 400。"""
+    job_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if not job_ids or len(job_ids) > settings.stream_max_jobs:
+        raise HTTPException(
+            status_code=400,
+            detail=f"ジョブ ID は 1〜{settings.stream_max_jobs} 件で指定してほしい",
+        )
+    return job_ids
+
+
+def _sse(event: str, data: dict) -> str:
+    """Server-Sent Events の 1 イベント分の文字列を組み立てる。"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 
 @router.post(
     "/generate",
     response_model=GenerateJobResponse,
     status_code=202,
     summary="音楽生成ジョブを投入する",
+    responses={
+        403: {"description": "オペレーターのトークンなしで priority を指定した"},
+        429: {"description": "クライアントごとの投入量の上限を超えた（Retry-After 付き）"},
+        503: {"description": "キューが満杯・実行待ちが多い（Retry-After 付き）、モデルの読み込みに失敗している、またはジョブを保存できなかった"},
+    },
 )
 async def create_generate_job(
     request_body: GenerateRequest,
@@ -31,27 +282,301 @@ async def create_generate_job(
     """
     テキストプロンプトを受け取り、音楽生成ジョブをキューに投入する。
     レスポンスは即時返却される（生成完了を待たない）。
+
+    seed 指定の同一リクエストが結果キャッシュにあれば、キューを経由せず
+    completed 状態のジョブを返す。実行待ち・実行中であれば、そのジョブに相乗りする。
+
+    実行順はスケジューラが priority と接続元アドレスから決める。priority の指定と、
+    接続元アドレスの代わりに client_id を使うのはオペレーター（OTO_OPERATOR_TOKEN）だけができる。
+    モデルの読み込み中も受け付け、読み込みが終わり次第実行する。
+
+    キューが満杯か実行待ちが多すぎる場合は 503、クライアントごとの投入量の上限
+    （OTO_RATE_LIMIT）を超えた場合は 429 を、再試行までの秒数を表す Retry-After 付きで返す。
+    永続化が有効でジョブの保存をコミットできなかった場合は、受け付けを取り消して 503 を返す。
     """
     job_store = request.app.state.job_store
-    job_queue: asyncio.Queue = request.app.state.job_queue
+    job_queue: JobScheduler = request.app.state.job_queue
+    result_cache = request.app.state.result_cache
 
-    # ジョブ作成 → キューに投入
-    job_id = job_store.create(request_body)
-    try:
-        job_queue.put_nowait(job_id)
-    except asyncio.QueueFull:
-        # キューが満杯の場合はジョブ登録をロールバックして 503 を返す
-        job_store.delete(job_id)
+    if request.app.state.load_error is not None:
         raise HTTPException(
             status_code=503,
-            detail="キューが満杯である。しばらく待ってからリトライしてほしい",
+            detail=f"モデルの読み込みに失敗したため受け付けられない: {request.app.state.load_error}",
         )
+
+    request_body = _scheduled_request(request, request_body, _is_operator(request))
+
+    cache_key = result_cache.key_for(
+        request_body.prompt,
+        request_body.duration,
+        request_body.bpm,
+        request_body.seed,
+        segmented=request_body.segmented,
+    )
+
+    # 同じパラメータのジョブが実行待ち・実行中なら、キューに積まずに相乗りする
+    if cache_key is not None:
+        follower = job_store.attach(request_body, cache_key)
+        if follower is not None:
+            if not await asyncio.to_thread(job_store.flush):
+                _roll_back(request.app, [follower.job_id])
+                raise _not_persisted()
+            return GenerateJobResponse(
+                job_id=follower.job_id,
+                status=follower.status,
+                message="実行中の同一ジョブに相乗りした",
+                **_schedule_info(request.app, follower),
+            )
+
+    job_id = job_store.create(request_body, cache_key=cache_key)
+
+    # 結果キャッシュの確認（ヒットすればジョブ固有のファイル名で取り出して即完了）
+    if cache_key is not None:
+        audio_path = os.path.join(str(settings.audio_output_path), f"{job_id}.mp3")
+        hit = await asyncio.to_thread(result_cache.fetch, cache_key, audio_path)
+        if hit:
+            job_store.complete(job_id, audio_path=audio_path, cached=True)
+            if not await asyncio.to_thread(job_store.flush):
+                _roll_back(request.app, [job_id])
+                raise _not_persisted()
+            return GenerateJobResponse(
+                job_id=job_id,
+                status=JobStatus.COMPLETED,
+                message="生成済みの結果を返した",
+            )
+
+    # 受け付けの判定（キューの空き・実行待ちの待ち時間・クライアントごとの上限）。
+    # 断る場合はジョブ登録をロールバックし、Retry-After 付きで返す
+    rejection = _admit(request.app, {request_body.client_id: request_body.duration}, 1)
+    if rejection is not None:
+        job_store.delete(job_id)
+        raise _rejected(rejection)
+
+    # キューに投入（判定から投入までは await を挟まないため、空きが埋まることはない）
+    job_queue.put_nowait(
+        job_id,
+        priority=request_body.priority,
+        client_id=request_body.client_id,
+        duration=request_body.duration,
+    )
     logger.info("ジョブをキューに投入: job_id={}", job_id)
+    # 受け付けを返す前に永続化を待つ（返した後に落ちてもジョブを失わない）。
+    # コミットできなければ、再起動で失われるジョブを受け付けたことにしない
+    if not await asyncio.to_thread(job_store.flush):
+        _roll_back(request.app, [job_id])
+        raise _not_persisted()
 
     return GenerateJobResponse(
         job_id=job_id,
         status=JobStatus.QUEUED,
         message="ジョブを受け付けた",
+        **_schedule_info(request.app, job_store.get(job_id)),
+    )
+
+
+@router.post(
+    "/generate/batch",
+    response_model=BatchGenerateResponse,
+    status_code=202,
+    summary="複数の音楽生成ジョブをまとめて投入する",
+    responses={
+        400: {"description": "リクエストの件数が上限を超えている"},
+        403: {"description": "オペレーターのトークンなしで priority を指定した"},
+        429: {"description": "クライアントごとの投入量の上限を超えた（Retry-After 付き）"},
+        503: {"description": "キューの空きが足りない・実行待ちが多い（Retry-After 付き）、モデルの読み込みに失敗している、またはジョブを保存できなかった"},
+    },
+)
+async def create_generate_batch(
+    request_body: BatchGenerateRequest,
+    request: Request,
+) -> BatchGenerateResponse:
+    """
+    複数のリクエストをまとめて投入する。
+
+    すべて受け付けるか、1 件も受け付けないかのどちらかになる。キューに積む必要のある
+    ジョブの数だけ空きがない、またはクライアントごとの上限を超える場合は、何も投入せずに
+    POST /api/generate と同じく 503 / 429 を返す。結果キャッシュ・実行中の同一ジョブへの
+    相乗りも POST /api/generate と同じく扱い、その分はキューの空きや上限を使わない。
+    jobs はリクエストと同じ順に並ぶ。進み具合は GET /api/jobs?ids=... でまとめて確認できる。
+    """
+    job_store = request.app.state.job_store
+    job_queue: JobScheduler = request.app.state.job_queue
+    result_cache = request.app.state.result_cache
+
+    if request.app.state.load_error is not None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"モデルの読み込みに失敗したため受け付けられない: {request.app.state.load_error}",
+        )
+    if len(request_body.jobs) > settings.stream_max_jobs:
+        raise HTTPException(
+            status_code=400,
+            detail=f"一度に投入できるのは {settings.stream_max_jobs} 件までである",
+        )
+
+    operator = _is_operator(request)
+    items = [_scheduled_request(request, item, operator) for item in request_body.jobs]
+    job_ids: list[str] = []
+    messages: list[str] = []
+    attached: list[str] = []
+    created: list[tuple[int, GenerateRequest, Optional[str]]] = []
+
+    # 相乗りとジョブの作成。同じパラメータのリクエストが複数あれば、2 件目以降は 1 件目に相乗りする
+    for index, item in enumerate(items):
+        cache_key = result_cache.key_for(
+            item.prompt, item.duration, item.bpm, item.seed, segmented=item.segmented
+        )
+        follower = job_store.attach(item, cache_key) if cache_key is not None else None
+        if follower is not None:
+            job_ids.append(follower.job_id)
+            messages.append("実行中の同一ジョブに相乗りした")
+            attached.append(follower.job_id)
+            continue
+        job_ids.append(job_store.create(item, cache_key=cache_key))
+        messages.append("ジョブを受け付けた")
+        created.append((index, item, cache_key))
+
+    # 結果キャッシュの確認（ヒットしたものはキューに積まない）
+    pending: list[tuple[int, GenerateRequest]] = []
+    for index, item, cache_key in created:
+        if cache_key is not None:
+            audio_path = os.path.join(str(settings.audio_output_path), f"{job_ids[index]}.mp3")
+            if await asyncio.to_thread(result_cache.fetch, cache_key, audio_path):
+                job_store.complete(job_ids[index], audio_path=audio_path, cached=True)
+                messages[index] = "生成済みの結果を返した"
+                continue
+        pending.append((index, item))
+
+    # 受け付けの判定から投入までは await を挟まないため、他のリクエストの投入と混ざらない
+    costs: dict[str, float] = {}
+    for _, item in pending:
+        costs[item.client_id] = costs.get(item.client_id, 0) + item.duration
+    rejection = _admit(request.app, costs, len(pending)) if pending else None
+    if rejection is not None:
+        _roll_back(request.app, attached + [job_ids[index] for index, _, _ in created])
+        raise _rejected(rejection)
+    for index, item in pending:
+        job_queue.put_nowait(
+            job_ids[index],
+            priority=item.priority,
+            client_id=item.client_id,
+            duration=item.duration,
+        )
+    logger.info(
+        "ジョブをまとめて投入: {} 件（キュー {} 件, 相乗り {} 件）",
+        len(items),
+        len(pending),
+        len(attached),
+    )
+    if not await asyncio.to_thread(job_store.flush):
+        _roll_back(request.app, attached + [job_ids[index] for index, _, _ in created])
+        raise _not_persisted()
+
+    records = job_store.get_many(job_ids)
+    return BatchGenerateResponse(
+        jobs=[
+            GenerateJobResponse(
+                job_id=job_id,
+                status=record.status if record is not None else JobStatus.FAILED,
+                message=message,
+                **(_schedule_info(request.app, record) if record is not None else {}),
+            )
+            for job_id, message, record in zip(job_ids, messages, records)
+        ],
+        summary=_batch_summary(records),
+    )
+
+
+@router.get(
+    "/jobs",
+    response_model=JobListResponse,
+    summary="複数のジョブの状態をまとめて確認する",
+    responses={400: {"description": "ジョブ ID の指定が不正"}},
+)
+async def list_jobs(
+    request: Request,
+    ids: str = Query(..., description="確認するジョブ ID（カンマ区切り）"),
+) -> JobListResponse:
+    """
+    指定したジョブの状態と、全体の進み具合のまとめを返す。
+
+    GET /api/jobs/{job_id} を 1 件ずつ呼ぶ代わりに使う。見つからないジョブは missing に入る。
+    """
+    job_ids = _parse_job_ids(ids)
+    records = request.app.state.job_store.get_many(job_ids)
+    return JobListResponse(
+        jobs=[_to_status_response(record, request.app) for record in records if record is not None],
+        missing=[job_id for job_id, record in zip(job_ids, records) if record is None],
+        summary=_batch_summary(records),
+    )
+
+
+@router.get(
+    "/jobs/events",
+    summary="ジョブの状態変化をストリームで受け取る",
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "SSE ストリーム"},
+        400: {"description": "ジョブ ID の指定が不正"},
+    },
+)
+async def stream_job_events(
+    request: Request,
+    ids: str = Query(..., description="購読するジョブ ID（カンマ区切り）"),
+) -> StreamingResponse:
+    """
+    指定したジョブの状態・進捗・段階の変化を Server-Sent Events で配信する。
+
+    接続直後に各ジョブの現在の状態を `job` イベントで送り、以降は変化のたびに送る。
+    短時間に連続する進捗通知はまとめて 1 回分だけ送る。
+    存在しないジョブは `missing` イベント、すべてのジョブが完了・失敗したら
+    `done` イベントを送ってストリームを閉じる。
+    """
+    job_ids = _parse_job_ids(ids)
+
+    job_store = request.app.state.job_store
+    broker = request.app.state.job_events
+    coalesce = settings.stream_coalesce_ms / 1000
+    heartbeat = settings.stream_heartbeat_seconds
+
+    async def _event_stream() -> AsyncIterator[str]:
+        # 最初の状態を送る前に購読を始め、その間の変化を取りこぼさないようにする
+        subscription = broker.subscribe(job_ids)
+        try:
+            watching = set(job_ids)
+            changed = set(job_ids)
+            while True:
+                for job_id in job_ids:
+                    if job_id not in changed or job_id not in watching:
+                        continue
+                    record = job_store.get(job_id)
+                    if record is None:
+                        watching.discard(job_id)
+                        yield _sse("missing", {"job_id": job_id})
+                        continue
+                    if record.status in _TERMINAL_STATUSES:
+                        watching.discard(job_id)
+                    yield _sse(
+                        "job", _to_status_response(record, request.app).model_dump(mode="json")
+                    )
+
+                if not watching:
+                    yield _sse("done", {})
+                    return
+
+                changed = await subscription.wait(heartbeat, coalesce)
+                if not changed:
+                    yield ": keep-alive\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        _event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # リバースプロキシでのバッファリングを無効化する
+            "X-Accel-Buffering": "no",
+        },
     )
 
 
@@ -63,7 +588,8 @@ async def create_generate_job(
 async def get_job_status(job_id: str, request: Request) -> JobStatusResponse:
     """
     ジョブの現在の状態と進捗を返す。
-    クライアントはこのエンドポイントを 2 秒間隔でポーリングする。
+    通常は /api/jobs/events のストリームを使い、このエンドポイントは
+    ストリームを使えないクライアントのポーリング用に残す。
     """
     job_store = request.app.state.job_store
     record = job_store.get(job_id)
@@ -71,28 +597,74 @@ async def get_job_status(job_id: str, request: Request) -> JobStatusResponse:
     if record is None:
         raise HTTPException(status_code=404, detail="ジョブが見つからない")
 
-    return JobStatusResponse(
-        job_id=record.job_id,
-        status=record.status,
-        progress=record.progress,
-        stage=record.stage,
-        created_at=record.created_at,
-        completed_at=record.completed_at,
-        error=record.error,
-    )
+    return _to_status_response(record, request.app)
 
 
-@router.get(
+@router.delete(
+    "/jobs/{job_id}",
+    response_model=JobStatusResponse,
+    summary="ジョブをキャンセルする",
+    responses={
+        404: {"description": "ジョブが見つからない"},
+        409: {"description": "ジョブがすでに完了または失敗している"},
+        503: {"description": "キャンセルを保存できなかった"},
+    },
+)
+async def cancel_job(job_id: str, request: Request) -> JobStatusResponse:
+    """
+    実行待ち・実行中のジョブをキャンセルする。
+
+    実行待ちのジョブはキューから取り除く。実行中のジョブは次の進捗通知の時点で
+    生成を打ち切り、GPU メモリを解放する。同じパラメータのリクエストが相乗りしている
+    場合は、それらのために生成を続ける。すでにキャンセル済みなら現在の状態を返す。
+    キャンセルを永続化できなかった場合は 503 を返す（再試行すれば保存し直す）。
+    """
+    job_store = request.app.state.job_store
+    scheduler: JobScheduler = request.app.state.job_queue
+
+    record = job_store.cancel(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="ジョブが見つからない")
+    if record.status != JobStatus.CANCELLED:
+        raise HTTPException(
+            status_code=409,
+            detail=f"ジョブはすでに終了している（現在の状態: {record.status.value}）",
+        )
+
+    primary_id = record.primary_id or record.job_id
+    if not job_store.is_wanted(primary_id) and scheduler.remove(primary_id):
+        logger.info("キャンセルされたジョブをキューから削除: job_id={}", primary_id)
+
+    if not await asyncio.to_thread(job_store.flush):
+        raise HTTPException(
+            status_code=503,
+            detail="キャンセルを保存できなかった。再起動すると実行待ちに戻る可能性があるため、再試行してほしい",
+        )
+    return _to_status_response(record, request.app)
+
+
+@router.api_route(
     "/jobs/{job_id}/audio",
+    methods=["GET", "HEAD"],
     summary="生成された MP3 をダウンロードする",
     responses={
         200: {"content": {"audio/mpeg": {}}, "description": "MP3 ファイル"},
-        404: {"description": "ジョブが見つからない"},
+        206: {"content": {"audio/mpeg": {}}, "description": "Range 指定された部分"},
+        304: {"description": "If-None-Match の ETag と一致（未変更）"},
+        404: {"description": "ジョブまたは音声ファイルが見つからない"},
         409: {"description": "ジョブが未完了"},
+        410: {"description": "有効期限より前に音声を削除した（audio_expired）"},
+        416: {"description": "Range が不正"},
     },
 )
-async def download_audio(job_id: str, request: Request) -> FileResponse:
-    """生成完了した MP3 ファイルを返す。"""
+async def download_audio(job_id: str, request: Request) -> Response:
+    """
+    生成完了した MP3 ファイルを返す。
+
+    生成結果は完了後に変わらないため、内容から計算した強い ETag と
+    長期の Cache-Control を付ける。If-None-Match が一致すれば 304 を返す。
+    Range リクエスト（206）と HEAD にも対応する。
+    """
     job_store = request.app.state.job_store
     record = job_store.get(job_id)
 
@@ -104,14 +676,194 @@ async def download_audio(job_id: str, request: Request) -> FileResponse:
             status_code=409,
             detail=f"ジョブがまだ完了していない（現在の状態: {record.status.value}）",
         )
+    _ensure_audio_kept(record)
 
     if not record.audio_path:
         raise HTTPException(status_code=500, detail="音声ファイルのパスが未設定")
 
-    return FileResponse(
-        path=record.audio_path,
+    audio_path = await _accessed_path(request, record, record.audio_path)
+    return await _immutable_file_response(request, audio_path, f"oto_{job_id}.mp3")
+
+
+@router.api_route(
+    "/jobs/{job_id}/segments/{index}",
+    methods=["GET", "HEAD"],
+    summary="完成したセグメントの MP3 をダウンロードする",
+    responses={
+        200: {"content": {"audio/mpeg": {}}, "description": "セグメントの MP3 ファイル"},
+        404: {"description": "ジョブまたはセグメントが見つからない"},
+        409: {"description": "セグメントが未完成"},
+        410: {"description": "有効期限より前に音声を削除した（audio_expired）"},
+    },
+)
+async def download_segment(job_id: str, index: int, request: Request) -> Response:
+    """セグメント生成のジョブについて、完成済みのセグメントを返す。"""
+    job_store = request.app.state.job_store
+    record = job_store.get(job_id)
+
+    if record is None:
+        raise HTTPException(status_code=404, detail="ジョブが見つからない")
+    _ensure_audio_kept(record)
+
+    segment_paths = list(record.segment_paths)
+    if index < 0 or (record.segment_count is not None and index >= record.segment_count):
+        raise HTTPException(status_code=404, detail="セグメントが見つからない")
+    if index >= len(segment_paths):
+        if record.status in _TERMINAL_STATUSES:
+            raise HTTPException(status_code=404, detail="セグメントが見つからない")
+        raise HTTPException(status_code=409, detail="セグメントがまだ完成していない")
+
+    segment_path = await _accessed_path(request, record, segment_paths[index])
+    return await _immutable_file_response(request, segment_path, f"oto_{job_id}_{index}.mp3")
+
+
+@router.get(
+    "/jobs/{job_id}/playlist.m3u8",
+    summary="完成したセグメントの HLS プレイリストを返す",
+    response_class=PlainTextResponse,
+    responses={
+        200: {"content": {"application/vnd.apple.mpegurl": {}}, "description": "HLS プレイリスト"},
+        404: {"description": "ジョブが見つからない"},
+        409: {"description": "ジョブが失敗またはキャンセルされている"},
+        410: {"description": "有効期限より前に音声を削除した（audio_expired）"},
+    },
+)
+async def get_playlist(job_id: str, request: Request) -> Response:
+    """
+    完成済みのセグメントを並べた HLS（EVENT 型）プレイリストを返す。
+
+    生成中はセグメントが増えるたびに内容が伸び、完了すると EXT-X-ENDLIST が付く。
+    セグメント生成でないジョブは、完了後に曲全体を 1 セグメントとして返す。
+    """
+    job_store = request.app.state.job_store
+    record = job_store.get(job_id)
+
+    if record is None:
+        raise HTTPException(status_code=404, detail="ジョブが見つからない")
+    if record.status in (JobStatus.FAILED, JobStatus.CANCELLED):
+        raise HTTPException(status_code=409, detail="ジョブが失敗またはキャンセルされている")
+    _ensure_audio_kept(record)
+
+    if record.segment_paths:
+        lengths = segment_durations(record.duration, settings.segment_seconds)
+        entries = [
+            (lengths[i] if i < len(lengths) else record.duration, f"segments/{i}")
+            for i in range(len(record.segment_paths))
+        ]
+    elif record.status == JobStatus.COMPLETED:
+        lengths = [record.duration]
+        entries = [(record.duration, "audio")]
+    else:
+        lengths = segment_durations(record.duration, settings.segment_seconds)
+        entries = []
+
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        f"#EXT-X-TARGETDURATION:{max(lengths)}",
+        "#EXT-X-PLAYLIST-TYPE:EVENT",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+    ]
+    for length, uri in entries:
+        lines += [f"#EXTINF:{length:.1f},", uri]
+    if record.status == JobStatus.COMPLETED:
+        lines.append("#EXT-X-ENDLIST")
+
+    return Response(
+        content="\n".join(lines) + "\n",
+        media_type="application/vnd.apple.mpegurl",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.get(
+    "/jobs/{job_id}/stream",
+    summary="生成中の曲を完成したセグメントから順にストリームで受け取る",
+    responses={
+        200: {"content": {"audio/mpeg": {}}, "description": "連結された MP3 ストリーム"},
+        404: {"description": "ジョブが見つからない"},
+        410: {"description": "有効期限より前に音声を削除した（audio_expired）"},
+    },
+)
+async def stream_audio(job_id: str, request: Request) -> StreamingResponse:
+    """
+    セグメントが完成するたびに、その MP3 フレームをチャンクとして送る。
+
+    `<audio src>` に直接指定すれば、最初のセグメントの完成時点で再生が始まる。
+    セグメント生成でないジョブは、完了後に曲全体を送る。
+    """
+    job_store = request.app.state.job_store
+    broker = request.app.state.job_events
+
+    record = job_store.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="ジョブが見つからない")
+    _ensure_audio_kept(record)
+
+    async def _read(record, path: str) -> bytes:
+        path = await _accessed_path(request, record, path)
+
+        def _load() -> bytes:
+            with open(path, "rb") as f:
+                return mp3_payload(f.read())
+
+        return await asyncio.to_thread(_load)
+
+    async def _chunks() -> AsyncIterator[bytes]:
+        subscription = broker.subscribe([job_id])
+        try:
+            sent = 0
+            while True:
+                record = job_store.get(job_id)
+                if record is None:
+                    return
+                segment_paths = list(record.segment_paths)
+                while sent < len(segment_paths):
+                    yield await _read(record, segment_paths[sent])
+                    sent += 1
+                if record.status in (JobStatus.FAILED, JobStatus.CANCELLED):
+                    return
+                if record.status == JobStatus.COMPLETED:
+                    if sent == 0 and record.audio_path:
+                        yield await _read(record, record.audio_path)
+                    return
+                await subscription.wait(settings.stream_heartbeat_seconds)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        _chunks(),
         media_type="audio/mpeg",
-        filename=f"oto_{job_id}.mp3",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/estimate",
+    response_model=EstimateResponse,
+    summary="今投入した場合の生成時間と完了予定時刻を見積もる",
+)
+async def estimate_generation(
+    request: Request,
+    duration: int = Query(60, ge=10, le=600, description="曲の長さ（秒）"),
+) -> EstimateResponse:
+    """
+    完了したジョブの実測値から学習した生成時間と、現在の実行待ちから
+    今ジョブを投入した場合の開始・完了予定時刻を返す。
+
+    ループ再生で、次の曲の生成を再生終了にちょうど間に合う時刻に始めるために使う。
+    """
+    scheduler: JobScheduler = request.app.state.job_queue
+    eta: GenerationTimeModel = request.app.state.eta
+
+    # キューの末尾に並んだものとして見積もる
+    queue = scheduler.snapshot() + [("", duration)]
+    start, finish = eta.estimate("", duration, queue)
+    return EstimateResponse(
+        duration=duration,
+        generation_seconds=round(eta.predict(duration), 1),
+        estimated_start_at=start,
+        estimated_finish_at=finish,
     )
 
 
@@ -124,7 +876,7 @@ async def health_check(request: Request) -> HealthResponse:
     """サーバーとモデルの状態を返す。"""
     import torch
 
-    job_queue: asyncio.Queue = request.app.state.job_queue
+    job_queue: JobScheduler = request.app.state.job_queue
 
     # GPU 情報の取得
     if torch.cuda.is_available():
@@ -143,13 +895,70 @@ async def health_check(request: Request) -> HealthResponse:
         gpu_name = "CPU"
         vram_gb = 0.0
 
-    job_store = request.app.state.job_store
     model_loaded = request.app.state.model_loaded
+    result_cache = request.app.state.result_cache
+    generator = request.app.state.generator
+    pipeline = getattr(generator, "pipeline", None)
+
+    def _disk_usage() -> DiskUsage:
+        # ファイルシステムへの問い合わせを含むため別スレッドで行う
+        return DiskUsage(
+            **request.app.state.job_store.disk_usage(),
+            free_bytes=shutil.disk_usage(settings.audio_output_path).free,
+            staging=StagingStats(**audio_staging.stats()) if audio_staging.enabled else None,
+        )
 
     return HealthResponse(
         status="ok",
         model_loaded=model_loaded,
+        models=[ModelLoadStatus(**model) for model in request.app.state.load_progress.snapshot()],
         gpu=gpu_name,
         vram_gb=round(vram_gb, 1),
         queue_size=job_queue.qsize(),
+        result_cache=CacheStats(**result_cache.stats()) if result_cache.enabled else None,
+        lm_cache=LmCacheStats(**lm_metadata_cache.stats()) if lm_metadata_cache.enabled else None,
+        pipeline=PipelineStats(**{name: round(value, 3) for name, value in pipeline.stats().items()})
+        if pipeline is not None
+        else None,
+        disk=await asyncio.to_thread(_disk_usage),
+        workers=[WorkerHealth(**worker) for worker in generator.health()] if generator is not None else [],
+    )
+
+
+@router.get(
+    "/health/live",
+    response_model=LivenessResponse,
+    summary="プロセスが動いているかを確認する（liveness）",
+    responses={503: {"model": LivenessResponse, "description": "モデルの読み込みに失敗した"}},
+)
+async def liveness(request: Request) -> Response:
+    """
+    イベントループが応答していれば 200 を返す。モデルの読み込み中も 200。
+
+    モデルの読み込みに失敗した場合は、再起動しないと回復しないため 503 を返す。
+    """
+    error = request.app.state.load_error
+    body = LivenessResponse(status="failed" if error else "ok", error=error)
+    return JSONResponse(body.model_dump(mode="json"), status_code=503 if error else 200)
+
+
+@router.get(
+    "/health/ready",
+    response_model=ReadinessResponse,
+    summary="ジョブを実行できる状態かを確認する（readiness）",
+    responses={503: {"model": ReadinessResponse, "description": "モデルの読み込み中、または失敗した"}},
+)
+async def readiness(request: Request) -> Response:
+    """
+    モデルの読み込みが終わっていれば 200、読み込み中・失敗した場合は 503 を返す。
+
+    どちらの場合もモデルごとの読み込みの進捗を返す。読み込み中もジョブの投入は受け付ける。
+    """
+    state = request.app.state
+    body = ReadinessResponse(
+        ready=state.model_loaded,
+        queue_size=state.job_queue.qsize(),
+        models=[ModelLoadStatus(**model) for model in state.load_progress.snapshot()],
+        error=state.load_error,
     )
+    return JSONResponse(body.model_dump(mode="json"), status_code=200 if state.model_loaded else 503)
@@ -0,0 +1,146 @@
+"""Prometheus 用のメトリクスエンドポイント。"""
+
+import asyncio
+from collections import Counter
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from backend.services.job_store import JobStore
+from backend.services.lm_cache import lm_metadata_cache
+from backend.services.metrics import JobMetrics, gpu_memory_stats
+from backend.services.scheduler import JobScheduler
+
+# Prometheus のスクレイパーが参照する慣習に合わせ、/api の外に置く
+router = APIRouter(tags=["metrics"])
+
+_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _gauge(name: str, help_text: str, samples: list[tuple[str, float]]) -> list[str]:
+    """ゲージの行を作る。samples は (ラベル部分, 値) のリスト（ラベルなしは空文字）。"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    lines += [f"{name}{labels} {value:g}" for labels, value in samples]
+    return lines
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Prometheus 形式のメトリクス",
+)
+async def metrics(request: Request) -> PlainTextResponse:
+    """キューの待ち時間・処理段階ごとの所要時間・結果・キャッシュ・GPU メモリを返す。"""
+    state = request.app.state
+    job_metrics: JobMetrics = state.metrics
+    job_store: JobStore = state.job_store
+    scheduler: JobScheduler = state.job_queue
+
+    lines = job_metrics.render()
+    lines += _gauge(
+        "oto_queue_size",
+        "Jobs waiting in the scheduler.",
+        [("", scheduler.qsize())],
+    )
+    rejected = state.admission.rejected
+    lines += [
+        "# HELP oto_admission_rejected_total Job submissions rejected by admission control, by reason.",
+        "# TYPE oto_admission_rejected_total counter",
+    ]
+    lines += [
+        f'oto_admission_rejected_total{{reason="{reason}"}} {rejected[reason]}'
+        for reason in ("queue_full", "backlog", "rate_limit")
+    ]
+    lines += _gauge(
+        "oto_jobs",
+        "Jobs held in the job store, by status.",
+        [(f'{{status="{status.value}"}}', count) for status, count in job_store.status_counts().items()],
+    )
+
+    disk = job_store.disk_usage()
+    lines += _gauge(
+        "oto_audio_bytes",
+        "Bytes of generated audio files held by jobs.",
+        [("", disk["used_bytes"])],
+    )
+    lines += [
+        "# HELP oto_audio_evictions_total Jobs whose audio was deleted before their TTL because the audio quota was exceeded.",
+        "# TYPE oto_audio_evictions_total counter",
+        f"oto_audio_evictions_total {disk['evicted_jobs']}",
+    ]
+
+    result_cache = state.result_cache
+    if result_cache.enabled:
+        stats = result_cache.stats()
+        lines += [
+            "# HELP oto_result_cache_requests_total Result cache lookups, by outcome.",
+            "# TYPE oto_result_cache_requests_total counter",
+            f'oto_result_cache_requests_total{{result="hit"}} {stats["hits"]}',
+            f'oto_result_cache_requests_total{{result="miss"}} {stats["misses"]}',
+        ]
+        lines += _gauge("oto_result_cache_hit_ratio", "Result cache hit ratio.", [("", stats["hit_rate"])])
+        lines += _gauge("oto_result_cache_bytes", "Bytes stored in the result cache.", [("", stats["size_bytes"])])
+
+    if lm_metadata_cache.enabled:
+        # ワーカープールの子プロセス・リモートワーカーのキャッシュは含まない
+        stats = lm_metadata_cache.stats()
+        lines += [
+            "# HELP oto_lm_cache_requests_total LM metadata cache lookups in this process, by outcome.",
+            "# TYPE oto_lm_cache_requests_total counter",
+            f'oto_lm_cache_requests_total{{result="hit"}} {stats["hits"]}',
+            f'oto_lm_cache_requests_total{{result="miss"}} {stats["misses"]}',
+        ]
+        lines += _gauge("oto_lm_cache_entries", "Entries in the LM metadata cache.", [("", stats["entries"])])
+
+    # CUDA の問い合わせはドライバを呼ぶため、イベントループを止めないよう別スレッドで行う
+    memory = await asyncio.to_thread(gpu_memory_stats)
+    lines += _gauge(
+        "oto_gpu_memory_used_bytes",
+        "GPU memory allocated by this process.",
+        [(f'{{device="{device}"}}', used) for device, used, _ in memory],
+    )
+    lines += _gauge(
+        "oto_gpu_memory_peak_bytes",
+        "Peak GPU memory allocated by this process.",
+        [(f'{{device="{device}"}}', peak) for device, _, peak in memory],
+    )
+
+    lines += _gauge(
+        "oto_model_ready",
+        "Whether model loading has finished and jobs can run (0 while loading or after a failure).",
+        [("", 1 if state.model_loaded else 0)],
+    )
+    generator = state.generator
+    worker_states = Counter(worker["state"] for worker in generator.health()) if generator is not None else {}
+    lines += _gauge(
+        "oto_workers",
+        "Generator workers, by state.",
+        [(f'{{state="{name}"}}', count) for name, count in sorted(worker_states.items())],
+    )
+
+    stations = state.stations.list()
+    if stations:
+        lines += _gauge(
+            "oto_station_listeners",
+            "Listeners attached to each station stream.",
+            [(f'{{station="{station.name}"}}', station.listeners) for station in stations],
+        )
+        lines += [
+            "# HELP oto_station_tracks_total Tracks generated for each station.",
+            "# TYPE oto_station_tracks_total counter",
+        ]
+        lines += [f'oto_station_tracks_total{{station="{station.name}"}} {station.tracks_generated}' for station in stations]
+
+    pipeline = getattr(generator, "pipeline", None)
+    if pipeline is not None:
+        # overlap は LM と DiT が同時に動いていた秒数（直列に実行した場合に比べて短縮できた時間）
+        stats = pipeline.stats()
+        lines += [
+            "# HELP oto_pipeline_stage_seconds_total Seconds each LM/DiT pipeline stage was busy "
+            '(stage="overlap": both at once, "busy": either).',
+            "# TYPE oto_pipeline_stage_seconds_total counter",
+        ]
+        lines += [
+            f'oto_pipeline_stage_seconds_total{{stage="{name}"}} {value:g}' for name, value in stats.items()
+        ]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=_CONTENT_TYPE)
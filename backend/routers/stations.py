@@ -0,0 +1,107 @@
+"""ステーション（共有の放送ストリーム）のエンドポイント。"""
+
+from fastapi import APIRouter, HTTPException, Path, Request, Response
+from fastapi.responses import StreamingResponse
+
+from backend.models.schemas import StationRequest, StationStatus
+from backend.services.station import STATION_NAME_PATTERN, StationConfig, StationManager
+
+router = APIRouter(prefix="/api/stations", tags=["stations"])
+
+_NAME = Path(pattern=STATION_NAME_PATTERN, description="ステーション名（英小文字・数字・-_、32 文字まで）")
+
+
+def _manager(request: Request) -> StationManager:
+    return request.app.state.stations
+
+
+@router.get(
+    "",
+    response_model=list[StationStatus],
+    summary="ステーションの一覧",
+)
+async def list_stations(request: Request) -> list[StationStatus]:
+    return [StationStatus(**station.status()) for station in _manager(request).list()]
+
+
+@router.put(
+    "/{name}",
+    response_model=StationStatus,
+    summary="ステーションを作成する（同じ名前があれば作り直す）",
+    responses={503: {"description": "モデルの読み込みに失敗した、またはこのサーバーで MP3 をエンコードできない"}},
+)
+async def put_station(request_body: StationRequest, request: Request, name: str = _NAME) -> StationStatus:
+    """
+    prompt の曲を生成し続けるステーションを作成する。
+
+    既存のステーションを作り直した場合、接続中のリスナーのストリームは終わる。
+    """
+    if request.app.state.load_error is not None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"モデルの読み込みに失敗したため受け付けられない: {request.app.state.load_error}",
+        )
+    try:
+        station = await _manager(request).put(
+            name,
+            StationConfig(
+                prompt=request_body.prompt,
+                duration=request_body.duration,
+                crossfade_seconds=request_body.crossfade_seconds,
+            ),
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return StationStatus(**station.status())
+
+
+@router.get(
+    "/{name}",
+    response_model=StationStatus,
+    summary="ステーションの状態を取得する",
+    responses={404: {"description": "ステーションが見つからない"}},
+)
+async def get_station(request: Request, name: str = _NAME) -> StationStatus:
+    station = _manager(request).get(name)
+    if station is None:
+        raise HTTPException(status_code=404, detail="ステーションが見つからない")
+    return StationStatus(**station.status())
+
+
+@router.delete(
+    "/{name}",
+    status_code=204,
+    summary="ステーションを削除する",
+    responses={404: {"description": "ステーションが見つからない"}},
+)
+async def delete_station(request: Request, name: str = _NAME) -> Response:
+    """ステーションを削除し、生成中の曲のジョブを取り消す。接続中のリスナーのストリームは終わる。"""
+    if not await _manager(request).remove(name):
+        raise HTTPException(status_code=404, detail="ステーションが見つからない")
+    return Response(status_code=204)
+
+
+@router.get(
+    "/{name}/stream",
+    summary="ステーションの放送を MP3 ストリームで受け取る",
+    responses={
+        200: {"content": {"audio/mpeg": {}}, "description": "曲をクロスフェードでつないだ連続した MP3 ストリーム"},
+        404: {"description": "ステーションが見つからない"},
+    },
+)
+async def stream_station(request: Request, name: str = _NAME) -> StreamingResponse:
+    """
+    再生中の位置から、曲をクロスフェードでつないだ MP3 を送り続ける。
+
+    `<audio src>` に直接指定できる。何人が接続しても生成は 1 曲ずつで、
+    全リスナーに同じデータを送る。最初のリスナーが接続した時点で生成を始めるため、
+    1 曲目が完成するまでは何も送られない。
+    """
+    station = _manager(request).get(name)
+    if station is None:
+        raise HTTPException(status_code=404, detail="ステーションが見つからない")
+    return StreamingResponse(
+        station.listen(),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,86 @@
+"""処理時刻の内訳（プロファイリング）エンドポイント。"""
+
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from backend.config import settings
+from backend.models.schemas import (
+    JobTimingEvent,
+    JobTimingsResponse,
+    TimingsSettings,
+    TimingsStatusResponse,
+)
+from backend.services.job_timings import JobTimings, phase_breakdown
+
+router = APIRouter(prefix="/api", tags=["timings"])
+
+
+def _status(timings: JobTimings) -> TimingsStatusResponse:
+    return TimingsStatusResponse(
+        enabled=timings.enabled,
+        recorded_jobs=timings.recorded_jobs(),
+        max_jobs=settings.timings_max_jobs,
+    )
+
+
+@router.get(
+    "/timings",
+    response_model=TimingsStatusResponse,
+    summary="処理時刻の記録が有効かどうかを確認する",
+)
+async def get_timings_status(request: Request) -> TimingsStatusResponse:
+    return _status(request.app.state.timings)
+
+
+@router.put(
+    "/timings",
+    response_model=TimingsStatusResponse,
+    summary="処理時刻の記録を有効・無効にする",
+)
+async def set_timings_status(body: TimingsSettings, request: Request) -> TimingsStatusResponse:
+    """再起動せずに記録を切り替える。無効にしても記録済みの内容は残る。"""
+    timings: JobTimings = request.app.state.timings
+    timings.set_enabled(body.enabled)
+    return _status(timings)
+
+
+@router.get(
+    "/timings/trace",
+    summary="直近のジョブの処理時刻を Chrome のトレース形式で出力する",
+)
+async def export_trace(
+    request: Request,
+    limit: int = Query(default=100, ge=1, le=10000, description="出力する直近のジョブ数"),
+) -> dict:
+    """chrome://tracing や https://ui.perfetto.dev で読み込める JSON を返す。"""
+    return request.app.state.timings.chrome_trace(limit)
+
+
+@router.get(
+    "/jobs/{job_id}/timings",
+    response_model=JobTimingsResponse,
+    summary="ジョブの処理時刻の内訳を取得する",
+    responses={404: {"description": "処理時刻が記録されていない"}},
+)
+async def get_job_timings(job_id: str, request: Request) -> JobTimingsResponse:
+    """投入・取り出し・各段階・generate_music() の戻り・ファイル完成の時刻を返す。"""
+    events = request.app.state.timings.events(job_id)
+    if not events:
+        raise HTTPException(
+            status_code=404,
+            detail="処理時刻が記録されていない（OTO_TIMINGS または PUT /api/timings で有効にする）",
+        )
+    started = events[0][1]
+    return JobTimingsResponse(
+        job_id=job_id,
+        events=[
+            JobTimingEvent(
+                name=name,
+                at=datetime.fromtimestamp(at, tz=timezone.utc),
+                elapsed_seconds=round(at - started, 6),
+            )
+            for name, at in events
+        ],
+        phases={name: round(seconds, 6) for name, seconds in phase_breakdown(events).items()},
+    )
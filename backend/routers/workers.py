@@ -0,0 +1,147 @@
+"""
+リモートワーカー用エンドポイント。
+
+OTO_REMOTE_WORKERS=true のコーディネーターでのみ使える。推論ノードは
+`oto-backend worker --coordinator URL` で起動し、次の順に呼び出す。
+
+1. POST /api/workers/lease でジョブを借りる（なければ最大 wait_seconds 待つ）
+2. POST /api/workers/leases/{lease_id}/progress で進捗を送る（期限の延長を兼ねる）
+3. PUT  /api/workers/leases/{lease_id}/jobs/{job_id}/segments で完成したセグメントを送る
+4. PUT  /api/workers/leases/{lease_id}/jobs/{job_id}/audio で完成した MP3 を送る
+   （失敗・中断した場合は POST /api/workers/leases/{lease_id}/fail）
+"""
+
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+
+from backend.config import settings
+from backend.models.schemas import (
+    LeaseFailureRequest,
+    LeaseProgressRequest,
+    LeaseProgressResponse,
+    LeaseRequest,
+    LeaseResponse,
+)
+from backend.services.remote_hub import RemoteWorkerHub, UploadTooLarge, _Lease
+
+
+def _authorize(request: Request) -> None:
+    """OTO_WORKER_TOKEN が設定されていれば、Bearer トークンを検証する。"""
+    if not settings.worker_token:
+        return
+    expected = f"Bearer {settings.worker_token}"
+    if not hmac.compare_digest(request.headers.get("authorization", ""), expected):
+        raise HTTPException(status_code=401, detail="ワーカーの認証に失敗した")
+
+
+router = APIRouter(prefix="/api/workers", tags=["workers"], dependencies=[Depends(_authorize)])
+
+
+def _hub(request: Request) -> RemoteWorkerHub:
+    generator = request.app.state.generator
+    if not isinstance(generator, RemoteWorkerHub):
+        raise HTTPException(status_code=404, detail="リモートワーカーは無効（OTO_REMOTE_WORKERS）")
+    return generator
+
+
+def _check_upload_size(request: Request) -> None:
+    """Content-Length が上限を超えていれば、受け取る前に 413 を返す。"""
+    limit = settings.worker_upload_max_bytes
+    length = request.headers.get("content-length", "")
+    if limit > 0 and length.isdigit() and int(length) > limit:
+        raise HTTPException(status_code=413, detail=f"アップロードは {limit} バイトまでである")
+
+
+def _lease(request: Request, lease_id: str) -> _Lease:
+    """リースの期限を延長して返す。期限切れ・終了済みなら 404。"""
+    lease = _hub(request).touch(lease_id)
+    if lease is None:
+        raise HTTPException(status_code=404, detail="リースが見つからない（期限切れ）")
+    return lease
+
+
+@router.post(
+    "/lease",
+    response_model=LeaseResponse,
+    summary="生成するジョブを借りる",
+    responses={204: {"description": "待機時間内にジョブがなかった"}},
+)
+async def lease_jobs(body: LeaseRequest, request: Request):
+    """実行待ちのジョブ（バッチ）を借りる。ジョブがなければ最大 wait_seconds 秒待つ。"""
+    hub = _hub(request)
+    lease = await hub.lease(body.worker_id, body.device, body.wait_seconds)
+    if lease is None:
+        return Response(status_code=204)
+    return LeaseResponse(
+        lease_id=lease.lease_id,
+        lease_seconds=hub.lease_seconds,
+        segment_seconds=settings.segment_seconds,
+        segment_crossfade_seconds=settings.segment_crossfade_seconds,
+        jobs=[record.to_row() for record in lease.jobs],
+    )
+
+
+@router.post(
+    "/leases/{lease_id}/progress",
+    response_model=LeaseProgressResponse,
+    summary="進捗を送り、リースを延長する",
+)
+async def report_progress(
+    lease_id: str,
+    body: LeaseProgressRequest,
+    request: Request,
+) -> LeaseProgressResponse:
+    lease = _lease(request, lease_id)
+    cancelled = False
+    if body.progress is not None:
+        cancelled = _hub(request).report_progress(lease, body.progress, body.stage)
+    return LeaseProgressResponse(cancelled=cancelled)
+
+
+@router.put(
+    "/leases/{lease_id}/jobs/{job_id}/segments",
+    status_code=204,
+    summary="完成したセグメントの MP3 を送る",
+    responses={413: {"description": "OTO_WORKER_UPLOAD_MAX_BYTES を超えている"}},
+)
+async def upload_segment(lease_id: str, job_id: str, request: Request) -> Response:
+    _check_upload_size(request)
+    lease = _lease(request, lease_id)
+    try:
+        await _hub(request).store_segment(lease, job_id, request.stream())
+    except KeyError:
+        raise HTTPException(status_code=404, detail="リースに含まれないジョブ")
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=f"アップロードが大きすぎる（{e}）")
+    return Response(status_code=204)
+
+
+@router.put(
+    "/leases/{lease_id}/jobs/{job_id}/audio",
+    status_code=204,
+    summary="完成した MP3 を送る",
+    responses={413: {"description": "OTO_WORKER_UPLOAD_MAX_BYTES を超えている"}},
+)
+async def upload_audio(lease_id: str, job_id: str, request: Request) -> Response:
+    """リースのすべてのジョブの MP3 が揃った時点で、ジョブを完了にする。"""
+    _check_upload_size(request)
+    lease = _lease(request, lease_id)
+    try:
+        await _hub(request).store_audio(lease, job_id, request.stream())
+    except KeyError:
+        raise HTTPException(status_code=404, detail="リースに含まれないジョブ")
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=f"アップロードが大きすぎる（{e}）")
+    return Response(status_code=204)
+
+
+@router.post(
+    "/leases/{lease_id}/fail",
+    status_code=204,
+    summary="生成の失敗・中断を報告する",
+)
+async def report_failure(lease_id: str, body: LeaseFailureRequest, request: Request) -> Response:
+    lease = _lease(request, lease_id)
+    _hub(request).fail(lease, body.error, body.cancelled)
+    return Response(status_code=204)
@@ -0,0 +1,146 @@
+"""
+ジョブの受け付け判定（アドミッション制御）。
+
+クライアントごとのトークンバケットで、投入できる曲の長さ（GPU を使う時間の目安）を制限する。
+また、実行待ちの推定待ち時間が上限を超えている間は新しいジョブを断る。
+断る場合は、いつ再試行すれば受け付けられるかの目安（Retry-After）を計算して返す。
+"""
+
+import math
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+# バケットの数がこれを超えたら、満タンに戻ったもの（しばらく投入のないクライアント）を捨てる
+_MAX_IDLE_BUCKETS = 1024
+
+
+@dataclass
+class Rejection:
+    """受け付けなかった理由と、再試行までの秒数。"""
+
+    reason: str   # "rate_limit" / "backlog" / "queue_full"
+    retry_after: int
+    detail: str
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens = tokens
+        self.updated = updated
+
+
+class AdmissionController:
+    """
+    クライアントごとのトークンバケットと、実行待ちの待ち時間による受け付け判定。
+
+    トークンの単位は曲の秒数で、1 件のジョブは duration 分のトークンを使う。
+    バケットは毎秒 rate_per_second ずつ、burst_seconds まで回復する。
+    JobScheduler と同じくイベントループ上でのみ使うこと（スレッドセーフではない）。
+    """
+
+    def __init__(
+        self,
+        seconds_per_minute: float,
+        burst_seconds: float,
+        max_backlog_seconds: float,
+    ) -> None:
+        """
+        Args:
+            seconds_per_minute: 1 クライアントが 1 分あたりに投入できる曲の秒数。0 以下なら制限しない。
+            burst_seconds: まとめて投入できる曲の秒数（バケットの容量）。
+            max_backlog_seconds: 新しいジョブの推定待ち時間の上限（秒）。0 以下なら制限しない。
+        """
+        self._rate = seconds_per_minute / 60
+        self._burst = burst_seconds
+        self._max_backlog = max_backlog_seconds
+        self._buckets: dict[str, _Bucket] = {}
+        self.rejected: Counter[str] = Counter()
+
+    @property
+    def rate_limited(self) -> bool:
+        """クライアントごとの制限が有効かどうか。"""
+        return self._rate > 0
+
+    @property
+    def backlog_limited(self) -> bool:
+        """待ち時間による制限が有効かどうか。"""
+        return self._max_backlog > 0
+
+    def admit(self, costs: dict[str, float], backlog_seconds: float) -> Optional[Rejection]:
+        """
+        ジョブを受け付けるかどうかを判定し、受け付ける場合はトークンを使う。
+
+        複数のジョブをまとめて投入する場合は、すべて受け付けられるときだけトークンを使う。
+
+        Args:
+            costs: クライアント（接続元アドレス）→ 投入する曲の秒数の合計。
+            backlog_seconds: 今投入した場合に生成が始まるまでの推定秒数。
+
+        Returns:
+            受け付けない場合はその理由。受け付ける場合は None。
+        """
+        if self.backlog_limited and backlog_seconds > self._max_backlog:
+            # 実行待ちが上限まで減るのを待ってもらう
+            return self._reject(
+                "backlog",
+                backlog_seconds - self._max_backlog,
+                f"実行待ちが多い（推定待ち時間 {backlog_seconds:.0f} 秒、上限 {self._max_backlog:.0f} 秒）",
+            )
+        if not self.rate_limited:
+            return None
+
+        now = time.monotonic()
+        buckets = {client: self._refill(client, now) for client in costs}
+        for client, cost in costs.items():
+            # 容量を超える分はバケットが満タンなら受け付ける（上限より長い曲を投入できなくならないように）
+            cost = min(cost, self._burst)
+            shortage = cost - buckets[client].tokens
+            if shortage > 0:
+                return self._reject(
+                    "rate_limit",
+                    shortage / self._rate,
+                    f"投入できる曲の長さの上限を超えた（1 分あたり {self._rate * 60:.0f} 秒）",
+                )
+        for client, cost in costs.items():
+            buckets[client].tokens -= min(cost, self._burst)
+        self._prune(now)
+        return None
+
+    def reject_queue_full(self, retry_after: float) -> Rejection:
+        """キューが満杯で受け付けられなかったことを記録する。"""
+        return self._reject(
+            "queue_full",
+            retry_after,
+            "キューが満杯である。しばらく待ってからリトライしてほしい",
+        )
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+    def _reject(self, reason: str, retry_after: float, detail: str) -> Rejection:
+        self.rejected[reason] += 1
+        return Rejection(reason=reason, retry_after=max(1, math.ceil(retry_after)), detail=detail)
+
+    def _refill(self, client: str, now: float) -> _Bucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = _Bucket(self._burst, now)
+            return bucket
+        bucket.tokens = min(self._burst, bucket.tokens + (now - bucket.updated) * self._rate)
+        bucket.updated = now
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        """満タンに戻ったバケットを捨てる（次に投入したときに満タンで作り直すのと同じ）。"""
+        if len(self._buckets) <= _MAX_IDLE_BUCKETS:
+            return
+        full_after = self._burst / self._rate
+        self._buckets = {
+            client: bucket
+            for client, bucket in self._buckets.items()
+            if now - bucket.updated < full_after
+        }
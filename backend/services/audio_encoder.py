@@ -0,0 +1,106 @@
+"""
+生成した音声波形の MP3 エンコードと書き込み。
+
+generate_music() に保存先を渡すと、GPU の処理を担当するスレッドが MP3 のエンコードと
+ファイルの書き込みまで行い、その間 GPU は空いている。波形だけを受け取って別プロセスの
+プールでエンコードし、GPU の処理は次のジョブに進める。
+
+プロセスは spawn で起動する（親プロセスの CUDA の状態を引き継がない）。
+このモジュールは子プロセスで import されるため、重いライブラリは関数の中で import する。
+"""
+
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+from loguru import logger
+
+
+class AudioEncoderPool:
+    """
+    波形を MP3 にエンコードしてファイルに書き込むプロセスプール。
+
+    エンコード待ちの波形はメモリに載ったままになるため、件数を max_pending までに制限し、
+    超える場合は submit() が空くまで待つ（生成側に背圧をかける）。
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        """
+        Args:
+            workers: エンコードするプロセスの数。
+            max_pending: 実行中を含め、エンコード待ちにできる波形の数。
+        """
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._pending = threading.BoundedSemaphore(max(1, max_pending))
+        logger.info("MP3 エンコードを別プロセスで行う: workers={}, max_pending={}", workers, max_pending)
+
+    def submit(self, audio: dict[str, Any], save_dir: str) -> "Future[str]":
+        """
+        generate_music() が返した音声 1 つをエンコードに回し、保存先のパスを返す Future を返す。
+
+        エンコード待ちが上限に達している場合は空くまで待つ。
+
+        Raises:
+            RuntimeError: 音声に波形（tensor）が含まれていない場合。
+        """
+        tensor = audio.get("tensor")
+        if tensor is None:
+            raise RuntimeError(
+                "生成結果に音声の波形が含まれていない（OTO_ENCODE_WORKERS=0 で生成と同じスレッドで保存する）"
+            )
+        samples = _to_numpy(tensor)
+        path = os.path.join(save_dir, f"{audio.get('key') or uuid.uuid4()}.mp3")
+
+        self._pending.acquire()
+        try:
+            future = self._executor.submit(encode_mp3, samples, int(audio["sample_rate"]), path)
+        except BaseException:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda _: self._pending.release())
+        return future
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def encode_mp3(samples: Any, sample_rate: int, path: str) -> str:
+    """
+    波形（チャンネル × サンプルの float 配列）を MP3 として path に書き込み、path を返す。
+
+    一時ファイルに書いてから置き換え、書き込み途中のファイルを配信しないようにする。
+    子プロセスで実行される。
+    """
+    import numpy as np
+    import soundfile as sf
+
+    data = np.clip(samples, -1.0, 1.0)
+    if data.ndim == 2:
+        # soundfile はサンプル × チャンネルの並びを受け取る
+        data = data.T
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        sf.write(tmp_path, data, sample_rate, format="MP3")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def _to_numpy(tensor: Any) -> Any:
+    """torch.Tensor（GPU 上でもよい）を CPU の float32 の numpy 配列にする。"""
+    if hasattr(tensor, "detach"):
+        import torch
+
+        return tensor.detach().to("cpu", dtype=torch.float32).numpy()
+    import numpy as np
+
+    return np.asarray(tensor, dtype=np.float32)
@@ -0,0 +1,140 @@
+"""生成済み音声ファイルに関する補助処理。"""
+
+import hashlib
+import os
+import threading
+
+# (path, mtime_ns, size) → ETag。同じファイルを何度もハッシュしないためのキャッシュ
+_etag_cache: dict[tuple[str, int, int], str] = {}
+_etag_lock = threading.Lock()
+_ETAG_CACHE_MAX = 4096
+
+
+def content_etag(path: str) -> str:
+    """
+    ファイル内容の SHA-256 から強い ETag（引用符付き）を計算する。
+
+    ブロッキング処理のため、非同期ハンドラからは asyncio.to_thread() 経由で呼ぶこと。
+
+    Raises:
+        FileNotFoundError: ファイルが存在しない場合。
+    """
+    stat = os.stat(path)
+    cache_key = (path, stat.st_mtime_ns, stat.st_size)
+    with _etag_lock:
+        etag = _etag_cache.get(cache_key)
+    if etag is not None:
+        return etag
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    etag = f'"{digest.hexdigest()[:32]}"'
+
+    with _etag_lock:
+        if len(_etag_cache) >= _ETAG_CACHE_MAX:
+            _etag_cache.clear()
+        _etag_cache[cache_key] = etag
+    return etag
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match ヘッダーが etag に一致するかどうかを判定する（弱い比較）。"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+# ---------------------------------------------------------------------------
+# MP3 の連結
+# ---------------------------------------------------------------------------
+# Layer III のビットレート表（kbps）。インデックスはフレームヘッダーの 4 ビット値
+_MPEG1_BITRATES = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_MPEG2_BITRATES = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+# バージョンビット → サンプリングレート表（3: MPEG1, 2: MPEG2, 0: MPEG2.5）
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _frame_length(header: bytes) -> int | None:
+    """MPEG Layer III のフレームヘッダーからフレーム長を求める。不正なら None。"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    if version == 3:
+        return 144000 * _MPEG1_BITRATES[bitrate_index] // sample_rate + padding
+    return 72000 * _MPEG2_BITRATES[bitrate_index] // sample_rate + padding
+
+
+def mp3_payload(data: bytes) -> bytes:
+    """
+    MP3 データから ID3 タグと Xing/Info（VBR 情報）フレームを取り除き、音声フレームだけを返す。
+
+    これらのヘッダーには曲の長さが記録されているため、残したまま連結すると
+    プレイヤーが最初のファイルの長さで再生を打ち切ることがある。
+    """
+    start, end = 0, len(data)
+    # ID3v2（先頭）: 10 バイトのヘッダー + syncsafe 整数のサイズ（+ フッター）
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        start = 10 + size + (10 if data[5] & 0x10 else 0)
+    # ID3v1（末尾 128 バイト）
+    if end - start >= 128 and data[end - 128 : end - 125] == b"TAG":
+        end -= 128
+
+    length = _frame_length(data[start : start + 4])
+    if length is not None:
+        first_frame = data[start : start + length]
+        if b"Xing" in first_frame or b"Info" in first_frame or b"VBRI" in first_frame:
+            start += length
+    return data[start:end]
+
+
+def concat_mp3(paths: list[str], dest_path: str) -> None:
+    """複数の MP3 ファイルを、ヘッダーを取り除いたうえで 1 つのファイルに連結する。"""
+    tmp_path = f"{dest_path}.tmp"
+    with open(tmp_path, "wb") as out:
+        for path in paths:
+            with open(path, "rb") as f:
+                out.write(mp3_payload(f.read()))
+    os.replace(tmp_path, dest_path)
+
+
+def split_mp3(data: bytes, chunk_seconds: float) -> list[tuple[memoryview, float]]:
+    """
+    ヘッダーを取り除いた MP3 データを、フレームの境界で約 chunk_seconds 秒ずつに分ける。
+
+    チャンクは data を参照する memoryview であり、コピーしない。
+
+    Returns:
+        (チャンク, 再生時間の秒数) のリスト。フレームとして解釈できない末尾は捨てる。
+    """
+    view = memoryview(data)
+    chunks: list[tuple[memoryview, float]] = []
+    start = position = 0
+    seconds = 0.0
+    while position + 4 <= len(data):
+        header = data[position : position + 4]
+        length = _frame_length(header)
+        if length is None or position + length > len(data):
+            break
+        version = (header[1] >> 3) & 0x03
+        samples = 1152 if version == 3 else 576
+        seconds += samples / _SAMPLE_RATES[version][(header[2] >> 2) & 0x03]
+        position += length
+        if seconds >= chunk_seconds:
+            chunks.append((view[start:position], seconds))
+            start, seconds = position, 0.0
+    if position > start:
+        chunks.append((view[start:position], seconds))
+    return chunks
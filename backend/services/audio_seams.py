@@ -0,0 +1,212 @@
+"""
+続けて再生する音声の継ぎ目の処理（クロスフェードと、途切れない MP3 エンコード）。
+
+別々に生成した曲やセグメントをそのまま並べると、継ぎ目で音が急に切り替わる。
+さらに、別々にエンコードした MP3 をバイト列のまま連結すると、それぞれの先頭に入る
+エンコーダーの遅延と末尾のパディングが継ぎ目ごとに短い無音になる。
+
+Crossfader は継ぎ目を等パワーでクロスフェードし、Mp3StreamEncoder は 1 つのエンコーダーに
+波形を順に渡して、出力されたフレームをそのつど取り出す（継ぎ目に遅延・パディングが入らない）。
+numpy と soundfile（MP3 の書き込みには libsndfile 1.1 以上）が必要である。
+"""
+
+import functools
+import io
+import math
+import os
+from typing import Any, Optional
+
+from backend.services.audio_files import mp3_payload, split_mp3
+
+# ID3 タグなしで最初のフレーム（Xing/Info）を含むのに十分なバイト数
+_HEADER_BYTES = 4096
+
+
+@functools.cache
+def mp3_encoding_error() -> Optional[str]:
+    """
+    このプロセスで MP3 にエンコードできるかを確かめる。
+
+    Returns:
+        できない場合はその理由。できる場合は None。
+    """
+    try:
+        import numpy as np
+        import soundfile as sf
+    except ImportError as e:
+        return f"{e.name} がインストールされていない"
+    if "MP3" not in sf.available_formats():
+        return f"libsndfile {sf.__libsndfile_version__} は MP3 の書き込みに対応していない（1.1 以上が必要）"
+    try:
+        encoder = Mp3StreamEncoder(sample_rate=48000, channels=2)
+        encoder.encode(np.zeros((4800, 2), dtype=np.float32))
+        encoder.close()
+    except Exception as e:
+        return f"MP3 のエンコードに失敗した: {e}"
+    return None
+
+
+class Crossfader:
+    """
+    続けて再生する波形（サンプル × チャンネル）の継ぎ目を等パワーでクロスフェードする。
+
+    各波形の末尾 fade_seconds 秒は次の波形の先頭と重ねるために保留し、join() の戻り値には
+    含めない。最後の波形は last=True で渡す（保留せずに末尾まで返す）。
+    """
+
+    def __init__(self, fade_seconds: float) -> None:
+        self._fade_seconds = fade_seconds
+        self._tail: Any = None
+
+    def join(self, samples: Any, sample_rate: int, last: bool = False) -> Any:
+        """samples の先頭を保留中の末尾と重ね、次に渡すまで再生できる部分を返す。"""
+        import numpy as np
+
+        samples = np.asarray(samples, dtype=np.float32)
+        fade = min(int(self._fade_seconds * sample_rate), len(samples) // 2)
+        tail = self._tail
+        if tail is None:
+            tail = np.zeros((0, samples.shape[1]), dtype=np.float32)
+        elif tail.shape[1] != samples.shape[1]:
+            tail = np.broadcast_to(tail.mean(axis=1, keepdims=True), (len(tail), samples.shape[1]))
+
+        overlap = min(fade, len(tail))
+        head = samples[:overlap].copy()
+        if overlap > 0:
+            t = np.linspace(0.0, math.pi / 2, overlap, dtype=np.float32)[:, None]
+            head = tail[len(tail) - overlap :] * np.cos(t) + head * np.sin(t)
+        end = len(samples) if last else len(samples) - fade
+        body = np.concatenate([tail[: len(tail) - overlap], head, samples[overlap:end]])
+        self._tail = None if last else samples[end:].copy()
+        return np.clip(body, -1.0, 1.0)
+
+
+class _Sink:
+    """
+    soundfile の書き込み先。書き込まれたバイト列を take() で取り出すまで保持する。
+
+    取り出し済みの位置への書き込み（エンコーダーの終了時のヘッダーの更新）は捨てる。
+    """
+
+    def __init__(self) -> None:
+        self._pending = bytearray()
+        self._taken = 0
+        self._position = 0
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        offset = self._position - self._taken
+        if offset < 0:
+            skipped = min(-offset, len(data))
+            self._pending[0 : len(data) - skipped] = data[skipped:]
+        else:
+            if offset > len(self._pending):
+                self._pending += bytes(offset - len(self._pending))
+            self._pending[offset : offset + len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._taken + len(self._pending)
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        return b""
+
+    def take(self) -> bytes:
+        data = bytes(self._pending)
+        self._taken += len(data)
+        self._pending.clear()
+        return data
+
+
+class Mp3StreamEncoder:
+    """
+    波形を順に受け取り、1 本の連続した MP3 ストリームとしてエンコードする。
+
+    encode() はそれまでに出力された MP3 フレーム（ヘッダーなし・フレーム単位）を返す。
+    返したバイト列をつなげたものが継ぎ目のない 1 本のストリームになり、
+    それぞれ単独でも再生できる。スレッドセーフではない。
+    """
+
+    def __init__(self, sample_rate: int, channels: int) -> None:
+        import soundfile as sf
+
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self._sink = _Sink()
+        self._file = sf.SoundFile(self._sink, "w", samplerate=sample_rate, channels=channels, format="MP3")
+        self._pending = b""   # まだ返していない、フレームの途中までのバイト列
+        self._started = False
+
+    def encode(self, samples: Any) -> bytes:
+        """samples（サンプル × チャンネル）をエンコードし、出力されたフレームを返す。"""
+        self._file.write(_match_channels(samples, self.channels))
+        return self._take()
+
+    def close(self) -> bytes:
+        """エンコーダーに残っているフレームを出力して終える。"""
+        self._file.close()
+        return self._take()
+
+    def _take(self) -> bytes:
+        data = self._pending + self._sink.take()
+        if not self._started:
+            # 先頭の ID3 タグと Xing/Info フレームは、最初のフレームが揃ってから取り除く
+            if len(data) < _HEADER_BYTES and not self._file.closed:
+                self._pending = data
+                return b""
+            data = mp3_payload(data)
+            self._started = True
+        if self._file.closed:
+            self._pending = b""
+            return data
+        frames = sum(len(chunk) for chunk, _ in split_mp3(data, math.inf))
+        self._pending = data[frames:]
+        return data[:frames]
+
+
+class Mp3Joiner:
+    """
+    MP3 ファイルを再生順に受け取り、継ぎ目をクロスフェードした連続する MP3 に書き直す。
+
+    書き直したファイルはそれぞれ前のファイルの続きのフレームから成るため、
+    audio_files.concat_mp3() で連結すると継ぎ目のない 1 曲になる。
+    ブロッキング処理である。
+    """
+
+    def __init__(self, fade_seconds: float) -> None:
+        self._crossfader = Crossfader(fade_seconds)
+        self._encoder: Optional[Mp3StreamEncoder] = None
+
+    def rewrite(self, path: str, last: bool = False) -> None:
+        """path の MP3 を、前のファイルとの継ぎ目をクロスフェードした内容に置き換える。"""
+        import soundfile as sf
+
+        samples, sample_rate = sf.read(path, dtype="float32", always_2d=True)
+        if self._encoder is None:
+            self._encoder = Mp3StreamEncoder(sample_rate, samples.shape[1])
+        data = self._encoder.encode(self._crossfader.join(samples, sample_rate, last=last))
+        if last:
+            data += self._encoder.close()
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+def _match_channels(samples: Any, channels: int) -> Any:
+    """サンプル × チャンネルの波形をエンコーダーのチャンネル数に合わせる。"""
+    import numpy as np
+
+    if samples.shape[1] == channels:
+        return samples
+    return np.broadcast_to(samples.mean(axis=1, keepdims=True), (len(samples), channels))
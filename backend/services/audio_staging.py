@@ -0,0 +1,125 @@
+"""
+生成した音声の一時置き場（tmpfs など）。
+
+OTO_AUDIO_STAGING_DIR を指定すると、このプロセスと OTO_DEVICES のワーカープロセスは
+生成した MP3 をまずそこに書き込む。ダウンロードなどで初めて参照されたときに
+音声出力ディレクトリ（ディスク）へ移し（昇格）、一度も参照されずに期限切れや容量超過で
+削除された音声はディスクに書き込まずに済む。
+
+一時置き場の空きが OTO_AUDIO_STAGING_MIN_FREE_MB を下回っている間は、
+最初から音声出力ディレクトリに書き込む。
+"""
+
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from backend.config import settings
+
+
+class AudioStaging:
+    """
+    一時置き場への書き込み先の選択と、ディスクへの昇格を行う。
+
+    すべてのパブリックメソッドはスレッドセーフである。
+    """
+
+    def __init__(self, staging_dir: Optional[Path], output_dir: Path, min_free_bytes: int) -> None:
+        """
+        Args:
+            staging_dir: 一時置き場のディレクトリ。None なら無効（常に output_dir に書き込む）。
+            output_dir: 昇格先の音声出力ディレクトリ。
+            min_free_bytes: 一時置き場の空きがこれ未満なら output_dir に書き込む。
+        """
+        self._dir = staging_dir
+        self._output_dir = output_dir
+        self._min_free_bytes = min_free_bytes
+        self._lock = threading.Lock()
+        self.promoted = 0
+        self.promoted_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        """一時置き場が有効かどうか。"""
+        return self._dir is not None
+
+    @property
+    def directory(self) -> Optional[Path]:
+        """一時置き場のディレクトリ。無効なら None。"""
+        return self._dir
+
+    def save_dir(self) -> str:
+        """これから生成する音声の書き込み先を返す。生成を始めるたびに呼ぶ。"""
+        if self._dir is None:
+            return str(self._output_dir)
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            free = shutil.disk_usage(self._dir).free
+        except OSError:
+            logger.exception("音声の一時置き場を使えない: {}", self._dir)
+            return str(self._output_dir)
+        if free < self._min_free_bytes:
+            logger.info("音声の一時置き場の空きが少ないため、ディスクに直接書き込む: free={}", free)
+            return str(self._output_dir)
+        return str(self._dir)
+
+    def is_staged(self, path: str) -> bool:
+        """path が一時置き場のファイルかどうか。"""
+        return self._dir is not None and os.path.dirname(path) == str(self._dir)
+
+    def promote(self, path: str) -> str:
+        """
+        一時置き場のファイルを音声出力ディレクトリに移し、移動後のパスを返す。
+
+        一時置き場のファイルでなければ path をそのまま返す。同じファイルを同時に
+        昇格しようとした場合、後の呼び出しは移動済みのパスを返す。
+        ブロッキング処理のため、非同期ハンドラからは asyncio.to_thread() 経由で呼ぶこと。
+        """
+        if not self.is_staged(path):
+            return path
+        dest = os.path.join(str(self._output_dir), os.path.basename(path))
+        with self._lock:
+            if not os.path.exists(path):
+                # 他のリクエストが昇格済み（移動先もなければ削除済みのまま返す）
+                return dest if os.path.exists(dest) else path
+            # 別のファイルシステムへの移動はコピーになるため、途中のファイルを見せないよう
+            # 一時ファイルに書いてから置き換える
+            tmp_path = f"{dest}.{os.getpid()}.tmp"
+            try:
+                shutil.copyfile(path, tmp_path)
+                os.replace(tmp_path, dest)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            size = os.path.getsize(dest)
+            os.remove(path)
+            self.promoted += 1
+            self.promoted_bytes += size
+        logger.info("音声を一時置き場からディスクに移した: {}", dest)
+        return dest
+
+    def stats(self) -> dict[str, int]:
+        """昇格した件数・バイト数と一時置き場の空きを返す。"""
+        try:
+            free = shutil.disk_usage(self._dir).free if self._dir is not None else 0
+        except OSError:
+            free = 0
+        with self._lock:
+            return {
+                "promoted": self.promoted,
+                "promoted_bytes": self.promoted_bytes,
+                "free_bytes": free,
+            }
+
+
+# プロセスごとのシングルトン。生成器が書き込み先を、ダウンロードのエンドポイントが昇格を問い合わせる
+audio_staging = AudioStaging(
+    staging_dir=Path(settings.audio_staging_dir).resolve() if settings.audio_staging_dir else None,
+    output_dir=settings.audio_output_path,
+    min_free_bytes=settings.audio_staging_min_free_mb * 1024**2,
+)
@@ -0,0 +1,179 @@
+"""生成時間の推定。完了したジョブの実測値から学習し、開始・完了の予定時刻を返す。"""
+
+import heapq
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+# 実測値がないときの初期推定: 固定のオーバーヘッド + 曲の長さ 1 秒あたりの生成秒数
+DEFAULT_OVERHEAD_SECONDS = 10.0
+DEFAULT_SECONDS_PER_AUDIO_SECOND = 0.5
+
+# 1 回観測するごとに過去の観測の重みに掛ける係数（直近およそ 10 件を重視する）
+_DECAY = 0.9
+
+
+class _DurationFit:
+    """
+    生成時間 = a + b × 曲の長さ を、減衰付きの重み付き最小二乗で逐次推定する。
+
+    GPU の負荷状況やキャッシュの温まり具合で速度が変わるため、
+    古い観測ほど重みを小さくする。
+    """
+
+    __slots__ = ("weight", "sum_x", "sum_y", "sum_xx", "sum_xy")
+
+    def __init__(self) -> None:
+        self.weight = 0.0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xx = 0.0
+        self.sum_xy = 0.0
+
+    def observe(self, x: float, y: float) -> None:
+        self.weight = self.weight * _DECAY + 1.0
+        self.sum_x = self.sum_x * _DECAY + x
+        self.sum_y = self.sum_y * _DECAY + y
+        self.sum_xx = self.sum_xx * _DECAY + x * x
+        self.sum_xy = self.sum_xy * _DECAY + x * y
+
+    def predict(self, x: float) -> Optional[float]:
+        if self.weight == 0:
+            return None
+        mean_x = self.sum_x / self.weight
+        mean_y = self.sum_y / self.weight
+        var_x = self.sum_xx / self.weight - mean_x * mean_x
+        # 曲の長さがほぼ一定の観測しかなければ、長さに比例するとみなす
+        if var_x < 1.0:
+            return mean_y * x / mean_x if mean_x > 0 else mean_y
+        slope = (self.sum_xy / self.weight - mean_x * mean_y) / var_x
+        intercept = mean_y - slope * mean_x
+        if slope < 0:
+            return mean_y
+        return intercept + slope * x
+
+
+class GenerationTimeModel:
+    """
+    生成にかかる秒数を、曲の長さ・LM の有無・バッチサイズごとに学習する。
+
+    実行中のジョブの開始時刻と推定所要時間も保持し、実行待ちのジョブの
+    開始・完了予定時刻を計算する。すべてのパブリックメソッドはスレッドセーフである。
+    """
+
+    def __init__(self, lm_enabled: bool, workers: int = 1) -> None:
+        """
+        Args:
+            lm_enabled: LM を使って生成するかどうか。学習結果はこの区別ごとに持つ。
+            workers: 並行して生成できるバッチの数（ワーカープールのデバイス数）。
+        """
+        self._lm_enabled = lm_enabled
+        self._workers = max(1, workers)
+        self._lock = threading.Lock()
+        # (LM の有無, バッチサイズ) → 推定器
+        self._fits: dict[tuple[bool, int], _DurationFit] = {}
+        # 実行中のジョブ ID → (開始時刻, 推定所要秒数)
+        self._running: dict[str, tuple[datetime, float]] = {}
+
+    def configure(self, lm_enabled: bool, workers: int) -> None:
+        """モデルの読み込み後に、実際の LM の有無と並行数に合わせる。"""
+        with self._lock:
+            self._lm_enabled = lm_enabled
+            self._workers = max(1, workers)
+
+    def predict(self, duration: int, batch_size: int = 1) -> float:
+        """
+        生成にかかる秒数を推定する。
+
+        Args:
+            duration: 曲の長さ（秒）。
+            batch_size: 1 回の生成呼び出しにまとめるジョブ数。
+
+        Returns:
+            推定秒数。
+        """
+        with self._lock:
+            return self._predict(duration, batch_size)
+
+    def begin(self, job_ids: list[str], duration: int) -> None:
+        """ジョブ（バッチ）の生成開始を記録する。"""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            expected = self._predict(duration, len(job_ids))
+            for job_id in job_ids:
+                self._running[job_id] = (now, expected)
+
+    def finish(self, job_ids: list[str], duration: int, succeeded: bool) -> None:
+        """
+        ジョブ（バッチ）の生成終了を記録する。成功した場合は所要時間を学習する。
+
+        失敗したジョブは途中で打ち切られている可能性があるため学習しない。
+        """
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            started = [self._running.pop(job_id, None) for job_id in job_ids]
+            if not succeeded or started[0] is None:
+                return
+            elapsed = (now - started[0][0]).total_seconds()
+            key = (self._lm_enabled, len(job_ids))
+            self._fits.setdefault(key, _DurationFit()).observe(duration, elapsed)
+
+    def estimate(
+        self,
+        job_id: str,
+        duration: int,
+        queue: list[tuple[str, int]],
+    ) -> tuple[Optional[datetime], Optional[datetime]]:
+        """
+        ジョブの開始予定時刻と完了予定時刻を返す。
+
+        実行待ちのジョブは、前に並んでいるジョブが 1 件ずつ、空いたワーカーから順に
+        処理されるとみなす（バッチにまとめられれば実際にはそれより早く終わる）。
+
+        Args:
+            job_id: 対象のジョブ ID（相乗りしている場合は主ジョブの ID）。
+            duration: 対象のジョブの曲の長さ（秒）。
+            queue: 実行待ちのジョブ ID と曲の長さを実行順に並べたもの。
+
+        Returns:
+            (開始予定時刻, 完了予定時刻)。実行待ちでも実行中でもなければ (None, None)。
+        """
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            running = self._running.get(job_id)
+            if running is not None:
+                started, expected = running
+                return started, max(started + timedelta(seconds=expected), now)
+
+            # 実行中のバッチの終了予定時刻（同じバッチのジョブは同時に終わる）。
+            # ワーカーごとの空く時刻として扱い、実行待ちのジョブを空いた順に割り当てる
+            batches = {(started, expected) for started, expected in self._running.values()}
+            free_at = sorted(
+                max(now, started + timedelta(seconds=expected)) for started, expected in batches
+            )[-self._workers:]
+            free_at += [now] * (self._workers - len(free_at))
+            heapq.heapify(free_at)
+
+            for queued_id, queued_duration in queue:
+                start = heapq.heappop(free_at)
+                if queued_id == job_id:
+                    return start, start + timedelta(seconds=self._predict(duration, 1))
+                heapq.heappush(free_at, start + timedelta(seconds=self._predict(queued_duration, 1)))
+        return None, None
+
+    # ------------------------------------------------------------------
+    # 内部処理（ロックを保持した状態で呼ぶこと）
+    # ------------------------------------------------------------------
+    def _predict(self, duration: int, batch_size: int) -> float:
+        fit = self._fits.get((self._lm_enabled, batch_size))
+        predicted = fit.predict(duration) if fit is not None else None
+        if predicted is None and batch_size > 1:
+            # 同じバッチサイズの実測がなければ、1 件ずつ生成した場合の時間を上限として使う
+            single = self._fits.get((self._lm_enabled, 1))
+            if single is not None:
+                predicted = single.predict(duration)
+                if predicted is not None:
+                    predicted *= batch_size
+        if predicted is None:
+            predicted = DEFAULT_OVERHEAD_SECONDS + DEFAULT_SECONDS_PER_AUDIO_SECOND * duration
+        return max(predicted, 1.0)
@@ -0,0 +1,134 @@
+"""
+ACE-Step の代わりに無音の MP3 を返す生成器。
+
+GPU やモデルのチェックポイントがない環境で、ワーカープールやキャンセルなど
+生成の周辺処理を動かして確認するために使う（OTO_GENERATOR=fake）。
+acestep.inference と同じ generate_music() / GenerationParams / GenerationConfig を提供する。
+"""
+
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+# 44.1kHz・128kbps・モノラルの MPEG1 Layer III フレームヘッダー（パディングなし）
+_FRAME_HEADER = bytes((0xFF, 0xFB, 0x90, 0xC4))
+_FRAME_LENGTH = 417
+_FRAMES_PER_SECOND = 44100 / 1152
+# 保存先を渡さない場合に返す波形のサンプリングレート（ACE-Step と同じ）
+_SAMPLE_RATE = 48000
+# サイド情報がすべて 0 のフレームは無音として再生される
+_SILENT_FRAME = _FRAME_HEADER + bytes(_FRAME_LENGTH - len(_FRAME_HEADER))
+
+# この文字列を caption に含めると、GPU のメモリ不足を模した失敗を返す
+OOM_MARKER = "__oom__"
+
+
+# 生成時間の使い方。"sleep" は待つだけ（GPU で推論中の状態に近い）、
+# "cpu" は GIL を保持したまま計算し続ける（CPU で推論する場合や前後処理の重さを模す）
+FAKE_WORK_MODES = ("sleep", "cpu")
+
+
+class FakeDitHandler:
+    """AceStepHandler の代わりに渡すハンドラ。生成速度とデバイス名だけを持つ。"""
+
+    def __init__(self, device: str, seconds_per_audio_second: float, work: str = "sleep") -> None:
+        """
+        Args:
+            device: 割り当てられたデバイス名（ログとヘルスチェック用）。
+            seconds_per_audio_second: 曲の長さ 1 秒あたりにかける生成時間（秒）。
+            work: 生成時間の使い方（FAKE_WORK_MODES のいずれか）。
+        """
+        if work not in FAKE_WORK_MODES:
+            raise ValueError(f"未知の work: {work}（{' / '.join(FAKE_WORK_MODES)} のいずれか）")
+        self.device = device
+        self.seconds_per_audio_second = seconds_per_audio_second
+        self.work = work
+
+
+@dataclass
+class GenerationParams:
+    caption: str = ""
+    lyrics: str = ""
+    instrumental: bool = False
+    duration: float = -1.0
+    bpm: Optional[int] = None
+    thinking: bool = False
+    task_type: str = "text2music"
+
+
+@dataclass
+class GenerationConfig:
+    batch_size: int = 1
+    use_random_seed: bool = True
+    seeds: Optional[list[int]] = None
+    audio_format: str = "mp3"
+
+
+@dataclass
+class GenerationResult:
+    audios: list[dict[str, Any]] = field(default_factory=list)
+    extra_outputs: dict[str, Any] = field(default_factory=dict)
+    success: bool = True
+    error: Optional[str] = None
+
+
+def generate_music(
+    dit_handler: FakeDitHandler,
+    llm_handler: Any,
+    params: GenerationParams,
+    config: GenerationConfig,
+    save_dir: Optional[str],
+    progress: Optional[Callable[..., None]] = None,
+) -> GenerationResult:
+    """
+    曲の長さに比例した時間だけ待ち（または計算し）、無音の MP3 を batch_size 個保存する。
+
+    save_dir が None の場合は保存せず、ACE-Step と同じく無音の波形（tensor）を返す。
+    """
+    if OOM_MARKER in params.caption:
+        return GenerationResult(success=False, error="CUDA out of memory (fake generator)")
+
+    steps = 10
+    delay = max(params.duration, 0.0) * dit_handler.seconds_per_audio_second / steps
+    for step in range(steps):
+        if progress is not None:
+            progress(step / steps, desc=f"DiT 推論中 ({dit_handler.device})")
+        if dit_handler.work == "cpu":
+            _busy(delay)
+        else:
+            time.sleep(delay)
+    if progress is not None:
+        progress(1.0, desc="Decoding audio...")
+
+    if save_dir is None:
+        import numpy as np
+
+        samples = np.zeros((2, max(1, round(params.duration * _SAMPLE_RATE))), dtype=np.float32)
+        return GenerationResult(
+            audios=[
+                {"key": str(uuid.uuid4()), "tensor": samples, "sample_rate": _SAMPLE_RATE}
+                for _ in range(config.batch_size)
+            ],
+            extra_outputs={"lm_metadata": {"bpm": params.bpm or 120}},
+        )
+
+    frames = max(1, round(params.duration * _FRAMES_PER_SECOND))
+    audios = []
+    for _ in range(config.batch_size):
+        path = os.path.join(save_dir, f"{uuid.uuid4()}.mp3")
+        with open(path, "wb") as f:
+            f.write(_SILENT_FRAME * frames)
+        audios.append({"path": path})
+    return GenerationResult(
+        audios=audios,
+        extra_outputs={"lm_metadata": {"bpm": params.bpm or 120}},
+    )
+
+
+def _busy(seconds: float) -> None:
+    """seconds 秒の間、GIL を保持したまま Python の計算を続ける。"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(i * i for i in range(1000))
@@ -0,0 +1,92 @@
+"""ジョブ状態の変更通知。SSE ストリームへの配信に使う。"""
+
+import asyncio
+import threading
+from typing import Iterable
+
+from loguru import logger
+
+
+class JobSubscription:
+    """
+    1 本のストリームが購読しているジョブ ID と、未送信の変更を保持する。
+
+    変更通知はイベントループ上でのみ書き換えられるため、ロックは不要である。
+    """
+
+    def __init__(self, job_ids: Iterable[str]) -> None:
+        self.job_ids: frozenset[str] = frozenset(job_ids)
+        self._dirty: set[str] = set()
+        self._event = asyncio.Event()
+
+    def _mark(self, job_id: str) -> None:
+        self._dirty.add(job_id)
+        self._event.set()
+
+    async def wait(self, timeout: float, coalesce: float = 0.0) -> set[str]:
+        """
+        変更があるまで最大 timeout 秒待ち、変更のあったジョブ ID をまとめて返す。
+
+        Args:
+            timeout: 待機の上限秒数。タイムアウトした場合は空集合を返す。
+            coalesce: 最初の変更から返すまでに待つ秒数。この間の進捗通知は
+                      1 回分にまとめられる。
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return set()
+        if coalesce > 0:
+            await asyncio.sleep(coalesce)
+        self._event.clear()
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+
+class JobEventBroker:
+    """
+    JobStore の変更をストリームの購読者に配信する。
+
+    notify() はワーカースレッド（progress コールバック）からも呼ばれるため、
+    購読者への反映は call_soon_threadsafe でイベントループに委ねる。
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._lock = threading.Lock()
+        # job_id → そのジョブを購読しているストリーム
+        self._subscribers: dict[str, set[JobSubscription]] = {}
+
+    def subscribe(self, job_ids: Iterable[str]) -> JobSubscription:
+        """ジョブ ID の集合を購読する。イベントループ上で呼ぶこと。"""
+        subscription = JobSubscription(job_ids)
+        with self._lock:
+            for job_id in subscription.job_ids:
+                self._subscribers.setdefault(job_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: JobSubscription) -> None:
+        """購読を解除する。"""
+        with self._lock:
+            for job_id in subscription.job_ids:
+                subscribers = self._subscribers.get(job_id)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    def notify(self, job_id: str) -> None:
+        """ジョブの変更を購読者に通知する。任意のスレッドから呼べる。"""
+        with self._lock:
+            subscribers = self._subscribers.get(job_id)
+            if not subscribers:
+                return
+            targets = list(subscribers)
+        for subscription in targets:
+            try:
+                self._loop.call_soon_threadsafe(subscription._mark, job_id)
+            except RuntimeError:
+                # シャットダウン中でイベントループが閉じている
+                logger.debug("イベントループ停止済みのため通知を破棄: job_id={}", job_id)
+                return
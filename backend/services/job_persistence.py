@@ -0,0 +1,234 @@
+"""JobStore の永続化バックエンド（SQLite）。"""
+
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id        TEXT PRIMARY KEY,
+    status        TEXT NOT NULL,
+    prompt        TEXT NOT NULL,
+    duration      INTEGER NOT NULL,
+    bpm           INTEGER,
+    seed          INTEGER,
+    segmented     INTEGER NOT NULL DEFAULT 0,
+    priority      INTEGER NOT NULL DEFAULT 0,
+    client_id     TEXT NOT NULL DEFAULT '',
+    cache_key     TEXT,
+    primary_id    TEXT,
+    progress      REAL,
+    stage         TEXT,
+    created_at    TEXT NOT NULL,
+    completed_at  TEXT,
+    error         TEXT,
+    audio_path    TEXT,
+    segment_count INTEGER,
+    segment_paths TEXT NOT NULL DEFAULT '[]',
+    audio_expired INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+CREATE INDEX IF NOT EXISTS idx_jobs_completed_at ON jobs (completed_at);
+"""
+
+# 行の列順。_JobRecord.to_row() はこの順序の dict を返す
+COLUMNS = (
+    "job_id",
+    "status",
+    "prompt",
+    "duration",
+    "bpm",
+    "seed",
+    "segmented",
+    "priority",
+    "client_id",
+    "cache_key",
+    "primary_id",
+    "progress",
+    "stage",
+    "created_at",
+    "completed_at",
+    "error",
+    "audio_path",
+    "segment_count",
+    "segment_paths",
+    "audio_expired",
+)
+
+# 後から追加した列。既存の DB には ALTER TABLE で追加する
+_ADDED_COLUMNS = {
+    "priority": "INTEGER NOT NULL DEFAULT 0",
+    "client_id": "TEXT NOT NULL DEFAULT ''",
+    "audio_expired": "INTEGER NOT NULL DEFAULT 0",
+}
+
+_UPSERT = (
+    f"INSERT OR REPLACE INTO jobs ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)})"
+)
+
+# 書き込みスレッドを止めるための番兵
+_STOP = object()
+
+
+class _FlushWaiter:
+    """flush() の呼び出し元が、手前までの書き込みのコミットを待つための目印。"""
+
+    __slots__ = ("done", "committed")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        # 手前までの書き込みがすべてコミットされた場合だけ True になる
+        self.committed = False
+
+
+class SqliteJobPersistence:
+    """
+    ジョブレコードを SQLite（WAL モード）に書き込む。
+
+    JobStore のロックを保持したまま SQLite を待たないよう、書き込みは
+    専用スレッドでキュー順に行う。save()/delete() は書き込みを待たずに戻るため、
+    クライアントに受け付けを返す前や状態が確定したときは flush() でコミットを待つ。
+    同時に待っている書き込みは 1 トランザクションにまとめる。
+    読み出しは起動時の load_all() のみで、通常のステータス取得はメモリ上の dict から返す。
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        """
+        Args:
+            db_path: SQLite データベースファイルのパス。親ディレクトリは自動作成する。
+        """
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db_path = db_path
+        self._queue: queue.Queue[Any] = queue.Queue()
+
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        self._migrate(conn)
+        conn.close()
+
+        self._writer = threading.Thread(
+            target=self._write_loop,
+            name="job-persistence",
+            daemon=True,
+        )
+        self._writer.start()
+        logger.info("ジョブの永続化を有効化: {}", db_path)
+
+    def load_all(self) -> list[dict[str, Any]]:
+        """保存済みの全ジョブを作成順に返す。起動時に 1 回だけ呼ぶ。"""
+        conn = self._connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at").fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def save(self, rows: list[dict[str, Any]]) -> None:
+        """ジョブレコードの行を保存（upsert）する。書き込みは非同期に行われる。"""
+        if rows:
+            self._queue.put(("save", [tuple(row[c] for c in COLUMNS) for row in rows]))
+
+    def delete(self, job_ids: list[str]) -> None:
+        """ジョブレコードを削除する。書き込みは非同期に行われる。"""
+        if job_ids:
+            self._queue.put(("delete", [(job_id,) for job_id in job_ids]))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        ここまでに呼んだ save()/delete() がコミットされるまで待つ。
+
+        Returns:
+            コミットを確認できた場合は True。書き込みに失敗した、timeout 秒を過ぎた、
+            または close() 済みなら False。
+        """
+        if not self._writer.is_alive():
+            return False
+        waiter = _FlushWaiter()
+        self._queue.put(waiter)
+        return waiter.done.wait(timeout) and waiter.committed
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """未書き込みの変更を書き出してから書き込みスレッドを止める。"""
+        self._queue.put(_STOP)
+        self._writer.join(timeout)
+        # 書き込みスレッドが止まった後に flush() を始めた呼び出し元を待たせたままにしない
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, _FlushWaiter):
+                item.done.set()
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # flush() が戻った変更は OS ごと落ちても失われないよう、コミットごとに WAL を fsync する
+        conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """古いバージョンで作成した DB に不足している列を追加する。"""
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        with conn:
+            for name, definition in _ADDED_COLUMNS.items():
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {definition}")
+                    logger.info("ジョブ DB に列を追加: {}", name)
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        # 最後に flush() に応えてから、書き込みに失敗したトランザクションがあったか。
+        # flush() より前の変更は、待っている目印より前のトランザクションで書かれることがある
+        failed = False
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    return
+                # 溜まっている変更はまとめて 1 トランザクションで書く
+                batch = [item]
+                stop = False
+                while True:
+                    try:
+                        more = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if more is _STOP:
+                        stop = True
+                        break
+                    batch.append(more)
+
+                waiters = [op for op in batch if isinstance(op, _FlushWaiter)]
+                try:
+                    with conn:
+                        for op in batch:
+                            if isinstance(op, _FlushWaiter):
+                                continue
+                            kind, params = op
+                            if kind == "save":
+                                conn.executemany(_UPSERT, params)
+                            else:
+                                conn.executemany("DELETE FROM jobs WHERE job_id = ?", params)
+                except sqlite3.Error:
+                    logger.exception("ジョブの永続化に失敗")
+                    failed = True
+                # 失敗した場合も待っている呼び出し元は止めず、コミットできなかったことを返す
+                for waiter in waiters:
+                    waiter.committed = not failed
+                    waiter.done.set()
+                if waiters:
+                    failed = False
+                if stop:
+                    return
+        finally:
+            conn.close()
@@ -1,15 +1,34 @@
 """インメモリのジョブ状態管理。スレッドセーフ。"""
 
+import heapq
+import json
 import os
+import queue
+import re
 import threading
+from collections import Counter, OrderedDict
 from datetime import datetime, timezone
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Callable, Optional
 from uuid import uuid4
 
 from loguru import logger
 
 from backend.models.schemas import GenerateRequest, JobStatus
 
+if TYPE_CHECKING:
+    from backend.services.job_persistence import SqliteJobPersistence
+    from backend.services.job_timings import JobTimings
+    from backend.services.metrics import JobMetrics
+
+# このサービスが書き込む音声ファイルの名前（UUID.mp3 と、書き込み途中の UUID.mp3.<pid>.tmp）。
+# 音声出力ディレクトリに置かれた他のファイルは孤立ファイルの掃除で削除しない
+_AUDIO_FILE_NAME = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\.mp3(\.\d+\.tmp)?"
+)
+
+# flush() でコミットを待つ上限（秒）。SQLite が応答しなくなってもリクエストを止め続けない
+_FLUSH_TIMEOUT = 10.0
+
 
 class _JobRecord:
     """ジョブの内部状態を保持するデータクラス。"""
@@ -21,27 +40,151 @@ class _JobRecord:
         "duration",
         "bpm",
         "seed",
+        "priority",
+        "client_id",
         "progress",
         "stage",
         "created_at",
         "completed_at",
         "error",
         "audio_path",
+        "cache_key",
+        "primary_id",
+        "segmented",
+        "segment_count",
+        "segment_paths",
+        "audio_expired",
     )
 
-    def __init__(self, job_id: str, request: GenerateRequest) -> None:
+    def __init__(
+        self,
+        job_id: str,
+        request: GenerateRequest,
+        cache_key: Optional[str] = None,
+    ) -> None:
         self.job_id: str = job_id
         self.status: JobStatus = JobStatus.QUEUED
         self.prompt: str = request.prompt
         self.duration: int = request.duration
         self.bpm: Optional[int] = request.bpm
         self.seed: Optional[int] = request.seed
+        # スケジューリング用（優先度と公平キューイングの単位）
+        self.priority: int = request.priority
+        self.client_id: str = request.client_id or ""
         self.progress: Optional[float] = None
         self.stage: Optional[str] = None
         self.created_at: datetime = datetime.now(timezone.utc)
         self.completed_at: Optional[datetime] = None
         self.error: Optional[str] = None
         self.audio_path: Optional[str] = None
+        # 結果キャッシュのキー（キャッシュ対象外なら None）
+        self.cache_key: Optional[str] = cache_key
+        # 同一パラメータの実行中ジョブに相乗りしている場合、その主ジョブの ID
+        self.primary_id: Optional[str] = None
+        # セグメント生成（完成したセグメントから順に取得できるモード）
+        self.segmented: bool = request.segmented
+        self.segment_count: Optional[int] = None
+        self.segment_paths: list[str] = []
+        # 容量上限・ファイルの消失により、TTL より前に音声を削除した
+        self.audio_expired: bool = False
+
+    def to_row(self) -> dict[str, Any]:
+        """永続化用の行（列名 → 値）に変換する。"""
+        return {
+            "job_id": self.job_id,
+            "status": self.status.value,
+            "prompt": self.prompt,
+            "duration": self.duration,
+            "bpm": self.bpm,
+            "seed": self.seed,
+            "segmented": int(self.segmented),
+            "priority": self.priority,
+            "client_id": self.client_id,
+            "cache_key": self.cache_key,
+            "primary_id": self.primary_id,
+            "progress": self.progress,
+            "stage": self.stage,
+            "created_at": self.created_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "error": self.error,
+            "audio_path": self.audio_path,
+            "segment_count": self.segment_count,
+            "segment_paths": json.dumps(self.segment_paths),
+            "audio_expired": int(self.audio_expired),
+        }
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> "_JobRecord":
+        """to_row() で保存した行からレコードを復元する。"""
+        request = GenerateRequest.model_construct(
+            prompt=row["prompt"],
+            duration=row["duration"],
+            bpm=row["bpm"],
+            seed=row["seed"],
+            segmented=bool(row["segmented"]),
+            priority=row["priority"],
+            client_id=row["client_id"],
+        )
+        record = cls(row["job_id"], request, cache_key=row["cache_key"])
+        record.status = JobStatus(row["status"])
+        record.primary_id = row["primary_id"]
+        record.progress = row["progress"]
+        record.stage = row["stage"]
+        record.created_at = datetime.fromisoformat(row["created_at"])
+        if row["completed_at"]:
+            record.completed_at = datetime.fromisoformat(row["completed_at"])
+        record.error = row["error"]
+        record.audio_path = row["audio_path"]
+        record.segment_count = row["segment_count"]
+        record.segment_paths = json.loads(row["segment_paths"])
+        record.audio_expired = bool(row["audio_expired"])
+        return record
+
+
+class _FileReaper:
+    """
+    期限切れの音声ファイルを専用スレッドで削除する。
+
+    os.remove() を JobStore のロック内やイベントループ上で行うと、
+    ステータス取得や進捗コールバックが待たされるため分離している。
+    """
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue[str] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="file-reaper", daemon=True)
+        self._thread.start()
+
+    def submit(self, paths: list[str]) -> None:
+        """削除するファイルを登録する。削除は非同期に行われる。"""
+        for path in paths:
+            self._queue.put(path)
+
+    def _run(self) -> None:
+        while True:
+            path = self._queue.get()
+            try:
+                os.remove(path)
+                logger.info("音声ファイル削除: {}", path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                logger.exception("音声ファイルの削除に失敗: {}", path)
+
+
+def _file_size(path: str) -> int:
+    """ファイルのバイト数。存在しなければ 0。"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _audio_files(record: _JobRecord) -> list[str]:
+    """ジョブが保持している音声ファイル（完成版とセグメント）のパスを返す。"""
+    paths = list(record.segment_paths)
+    if record.audio_path:
+        paths.append(record.audio_path)
+    return paths
 
 
 class JobStore:
@@ -51,35 +194,133 @@ class JobStore:
     すべてのパブリックメソッドはスレッドセーフである。
     ワーカースレッド（generate_music を実行）と FastAPI の非同期ハンドラの
     両方から同時にアクセスされる可能性があるため、Lock で排他制御する。
+
+    件数が数十万件に増えてもロックの保持時間が伸びないよう、状態ごとの件数は
+    遷移のたびに更新するカウンタで、TTL の判定は completed_at のヒープで管理する。
+
+    max_audio_bytes を指定すると、音声ファイルの合計バイト数が上限を超えたとき、
+    最も長く参照（touch()）されていない終了済みのジョブから TTL を待たずに音声を削除する。
+    ジョブのレコードは TTL まで残し、音声の期限切れ（audio_expired）として返す。
+
+    persistence を渡すと、状態の変更を書き込み先にも反映する。書き込みは永続化バックエンドの
+    スレッドで非同期に行われるため（write-behind）、受け付けを返す前や状態が確定したときは
+    flush() でコミットを待つこと。
+    読み出しは常にメモリ上の dict から行うため、ステータス取得の速度は変わらない。
+    進捗（progress/stage）だけの更新は頻度が高く、再起動後に意味を持たないため書き込まない。
     """
 
-    def __init__(self, ttl_seconds: int = 3600) -> None:
+    def __init__(
+        self,
+        ttl_seconds: int = 3600,
+        persistence: Optional["SqliteJobPersistence"] = None,
+        metrics: Optional["JobMetrics"] = None,
+        timings: Optional["JobTimings"] = None,
+        max_audio_bytes: int = 0,
+    ) -> None:
         """
         Args:
             ttl_seconds: completed/failed ジョブを保持する秒数。
                          この期間を過ぎたジョブは cleanup_expired() で削除される。
+            persistence: 永続化バックエンド。None ならメモリ上のみで管理する。
+            metrics: 待ち時間・処理時間などの記録先。ロックの外で呼ぶ。
+            timings: ジョブごとのイベント時刻の記録先。timings.enabled のときだけ呼ぶ。
+            max_audio_bytes: 音声ファイルの合計バイト数の上限。0 以下なら無制限。
         """
         self._jobs: dict[str, _JobRecord] = {}
         self._lock = threading.Lock()
         self._ttl = ttl_seconds
+        self._persistence = persistence
+        self._metrics = metrics
+        self._timings = timings
+        # cache_key → 実行待ち・実行中の主ジョブ ID
+        self._inflight: dict[str, str] = {}
+        # 主ジョブ ID → 相乗りしているジョブ ID のリスト
+        self._followers: dict[str, list[str]] = {}
+        # 状態変更の通知先（SSE 配信など）。ロックの外で呼ぶ
+        self._listeners: list[Callable[[str], None]] = []
+        # 状態ごとのジョブ数
+        self._status_counts: Counter[JobStatus] = Counter()
+        # (completed_at の UNIX 秒, job_id) のヒープ。削除済みのエントリは取り出し時に読み飛ばす
+        self._expiry: list[tuple[float, str]] = []
+        # 音声ファイルのパス → 参照しているジョブ ID（相乗りジョブはファイルを共有する）
+        self._file_jobs: dict[str, set[str]] = {}
+        # 音声ファイルのパス → バイト数と、その合計
+        self._file_sizes: dict[str, int] = {}
+        self._audio_bytes = 0
+        self._max_audio_bytes = max_audio_bytes
+        # 音声ファイルを持つ終了済みのジョブ ID。末尾ほど最近参照されたジョブ
+        self._recent: OrderedDict[str, None] = OrderedDict()
+        self.evicted = 0
+        self._reaper = _FileReaper()
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        ジョブの状態・進捗が変わるたびに job_id を受け取るコールバックを登録する。
+
+        コールバックはワーカースレッドから呼ばれることがあるため、スレッドセーフであること。
+        """
+        self._listeners.append(listener)
 
-    def create(self, request: GenerateRequest) -> str:
+    def create(self, request: GenerateRequest, cache_key: Optional[str] = None) -> str:
         """
         新規ジョブを作成し、ジョブ ID を返す。
 
         Args:
             request: クライアントからの生成リクエスト。
+            cache_key: 結果キャッシュのキー。キャッシュ対象外なら None。
 
         Returns:
             生成されたジョブ ID（UUID v4 文字列）。
         """
         job_id = str(uuid4())
-        record = _JobRecord(job_id, request)
+        record = _JobRecord(job_id, request, cache_key=cache_key)
         with self._lock:
-            self._jobs[job_id] = record
+            self._add_record(record)
+            if cache_key is not None:
+                self._inflight.setdefault(cache_key, job_id)
+            self._persist([record])
+        if self._timings is not None and self._timings.enabled:
+            self._timings.record(job_id, "enqueue")
         logger.info("ジョブ作成: job_id={}, prompt={!r}", job_id, request.prompt)
         return job_id
 
+    def attach(self, request: GenerateRequest, cache_key: str) -> Optional[_JobRecord]:
+        """
+        同じ cache_key のジョブが実行待ち・実行中であれば、それに相乗りするジョブを作成する。
+
+        相乗りしたジョブはキューに投入しない。主ジョブの進捗・完了・失敗が
+        そのまま反映され、完了時には同じ audio_path を共有する。
+
+        Args:
+            request: クライアントからの生成リクエスト。
+            cache_key: 結果キャッシュのキー（seed 指定のリクエストのみ）。
+
+        Returns:
+            作成したジョブのレコード。相乗り先がなければ None。
+        """
+        with self._lock:
+            primary_id = self._inflight.get(cache_key)
+            if primary_id is None:
+                return None
+            primary = self._jobs[primary_id]
+
+            job_id = str(uuid4())
+            record = _JobRecord(job_id, request, cache_key=cache_key)
+            record.primary_id = primary_id
+            record.status = primary.status
+            record.progress = primary.progress
+            record.stage = primary.stage
+            record.segment_count = primary.segment_count
+            record.segment_paths = list(primary.segment_paths)
+            self._add_record(record)
+            self._followers.setdefault(primary_id, []).append(job_id)
+            self._persist([record])
+
+        if self._timings is not None and self._timings.enabled:
+            self._timings.record(job_id, "enqueue", primary_id=primary_id)
+        logger.info("ジョブ相乗り: job_id={}, primary_id={}", job_id, primary_id)
+        return record
+
     def get(self, job_id: str) -> Optional[_JobRecord]:
         """
         ジョブを取得する。存在しない場合は None を返す。
@@ -93,6 +334,21 @@ class JobStore:
         with self._lock:
             return self._jobs.get(job_id)
 
+    def get_many(self, job_ids: list[str]) -> list[Optional[_JobRecord]]:
+        """
+        複数のジョブを 1 回のロックで取得する。
+
+        Returns:
+            job_ids と同じ順のレコードのリスト。存在しないジョブは None。
+        """
+        with self._lock:
+            return [self._jobs.get(job_id) for job_id in job_ids]
+
+    def linked_job_ids(self, job_id: str) -> list[str]:
+        """主ジョブとそれに相乗りしているジョブの ID を返す。"""
+        with self._lock:
+            return [record.job_id for record in self._linked_records(job_id)]
+
     def update_status(self, job_id: str, status: JobStatus) -> None:
         """
         ジョブの状態を更新する。
@@ -102,11 +358,16 @@ class JobStore:
             status: 新しい状態。
         """
         with self._lock:
-            record = self._jobs.get(job_id)
-            if record is None:
-                return
-            record.status = status
-            logger.info("ジョブ状態更新: job_id={}, status={}", job_id, status.value)
+            records = self._linked_records(job_id)
+            for record in records:
+                self._set_status(record, status)
+            self._persist(records)
+        logger.info("ジョブ状態更新: job_id={}, status={}", job_id, status.value)
+        if self._metrics is not None and status == JobStatus.RUNNING:
+            self._metrics.on_started(records)
+        if self._timings is not None and self._timings.enabled and status == JobStatus.RUNNING:
+            self._timings.record(job_id, "dequeue")
+        self._notify(records)
 
     def update_progress(self, job_id: str, progress: float, stage: str) -> None:
         """
@@ -117,41 +378,219 @@ class JobStore:
             progress: 進捗率 0.0〜1.0。
             stage: 現在の処理段階の説明文（例: "Preparing inputs...", "Decoding audio..."）。
         """
+        with self._lock:
+            records = self._linked_records(job_id)
+            for record in records:
+                record.progress = progress
+                record.stage = stage
+        if self._metrics is not None and records:
+            self._metrics.on_progress(job_id, stage)
+        if self._timings is not None and self._timings.enabled and records:
+            self._timings.record_stage(job_id, stage)
+        self._notify(records)
+
+    def set_segment_count(self, job_id: str, segment_count: int) -> None:
+        """
+        セグメント生成のジョブについて、セグメントの総数を設定する。
+
+        Args:
+            job_id: 更新するジョブの ID。
+            segment_count: セグメントの総数。
+        """
+        with self._lock:
+            records = self._linked_records(job_id)
+            for record in records:
+                record.segment_count = segment_count
+            self._persist(records)
+        self._notify(records)
+
+    def add_segment(self, job_id: str, segment_path: str) -> None:
+        """
+        完成したセグメントの MP3 パスを追加する。セグメント生成のワーカーから呼ばれる。
+
+        Args:
+            job_id: 更新するジョブの ID。
+            segment_path: 完成したセグメントの MP3 ファイルの絶対パス。
+        """
+        size = _file_size(segment_path)
+        with self._lock:
+            records = self._linked_records(job_id)
+            for record in records:
+                record.segment_paths.append(segment_path)
+                self._ref_file(segment_path, record.job_id, size)
+            self._persist(records)
+            evicted, unused_files = self._evict_locked()
+        if not records:
+            # 生成中にすべてキャンセルされた
+            self._reaper.submit([segment_path])
+            return
+        self._reaper.submit(unused_files)
+        self._announce_evicted(evicted)
+        logger.info("セグメント完成: job_id={}, path={}", job_id, segment_path)
+        self._notify(records)
+
+    def cancel(self, job_id: str) -> Optional[_JobRecord]:
+        """
+        実行待ち・実行中のジョブをキャンセルする。
+
+        キャンセルしたジョブが参照していた音声ファイル（完成済みのセグメント）は削除する。
+        相乗りしているジョブがあれば、主ジョブをキャンセルしてもそれらのために生成は続く。
+        生成を止めてよいかは is_wanted() で判定する。
+
+        Args:
+            job_id: キャンセルするジョブの ID。
+
+        Returns:
+            キャンセル後のレコード。存在しない場合は None。
+            すでに終了しているジョブは状態を変えずに返す。
+        """
+        now = datetime.now(timezone.utc)
         with self._lock:
             record = self._jobs.get(job_id)
-            if record is None:
-                return
-            record.progress = progress
-            record.stage = stage
+            if record is None or record.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+                return record
+            self._finish(record, JobStatus.CANCELLED, now)
+            record.stage = "キャンセルされた"
+            unused_files = self._release_files(record)
+
+            primary_id = record.primary_id or record.job_id
+            if record.primary_id is not None:
+                followers = self._followers.get(primary_id, [])
+                if job_id in followers:
+                    followers.remove(job_id)
+            # 結果を待つジョブがなくなれば、同じパラメータの新しいリクエストを相乗りさせない
+            stopped = not self._wanted(primary_id)
+            if stopped:
+                self._release_inflight_of(primary_id)
+                self._followers.pop(primary_id, None)
+            self._persist([record])
+        self._reaper.submit(unused_files)
+        logger.info("ジョブキャンセル: job_id={}", job_id)
+        if self._metrics is not None:
+            self._metrics.on_cancelled(primary_id if stopped else None)
+        if self._timings is not None and self._timings.enabled:
+            self._timings.record(job_id, "cancelled")
+        self._notify([record])
+        return record
+
+    def requeue(self, job_id: str, stage: str) -> bool:
+        """
+        実行中のジョブを実行待ちに戻す。生成を担当したワーカーが応答しなくなったときに使う。
+
+        途中まで届いていたセグメントは、生成し直すため破棄する。
+
+        Args:
+            job_id: 実行待ちに戻す主ジョブの ID。
+            stage: 進捗の説明文として表示する理由。
+
+        Returns:
+            結果を待つジョブが残っていて、キューに再投入すべきなら True。
+        """
+        with self._lock:
+            records = self._linked_records(job_id)
+            unused_files: list[str] = []
+            for record in records:
+                if record.status != JobStatus.RUNNING:
+                    continue
+                self._set_status(record, JobStatus.QUEUED)
+                record.progress = 0.0
+                record.stage = stage
+                unused_files.extend(self._release_files(record))
+            self._persist(records)
+            wanted = self._wanted(job_id)
+        self._reaper.submit(unused_files)
+        logger.info("ジョブを実行待ちに戻す: job_id={}", job_id)
+        if self._metrics is not None:
+            self._metrics.on_requeued(job_id)
+        if self._timings is not None and self._timings.enabled:
+            self._timings.record(job_id, "requeue")
+        self._notify(records)
+        return wanted
+
+    def is_wanted(self, job_id: str) -> bool:
+        """
+        主ジョブの生成結果を待っているジョブがあるかどうかを返す。
+
+        主ジョブも相乗りしているジョブもすべてキャンセルされていれば False になり、
+        ワーカーは生成を打ち切ってよい。
+        """
+        with self._lock:
+            return self._wanted(job_id)
 
     def delete(self, job_id: str) -> None:
         """
         ジョブをストアから削除する。
 
         キュー投入に失敗したときのロールバックで使用する。
+        すでに相乗りしているジョブがあれば、それらは失敗状態にする。
+        相乗りしているジョブ自身を削除した場合、主ジョブの生成はそのまま続く。
         """
+        now = datetime.now(timezone.utc)
+        failed: list[_JobRecord] = []
         with self._lock:
-            removed = self._jobs.pop(job_id, None)
+            removed, unused_files = self._remove_record(job_id)
+            if removed is not None:
+                self._release_inflight(removed)
+                # 相乗りしていたジョブなら、主ジョブの結果を待つジョブから外す
+                if removed.primary_id is not None and job_id in self._followers.get(removed.primary_id, []):
+                    self._followers[removed.primary_id].remove(job_id)
+            for follower_id in self._followers.pop(job_id, []):
+                follower = self._jobs.get(follower_id)
+                if follower is None:
+                    continue
+                self._finish(follower, JobStatus.FAILED, now)
+                follower.error = "共有元のジョブがキューに投入できなかった"
+                failed.append(follower)
+            if removed is not None and self._persistence is not None:
+                self._persistence.delete([job_id])
+            self._persist(failed)
+        self._reaper.submit(unused_files)
         if removed is not None:
             logger.info("ジョブ削除: job_id={}", job_id)
+        self._notify(failed)
 
-    def complete(self, job_id: str, audio_path: str) -> None:
+    def complete(self, job_id: str, audio_path: str, cached: bool = False) -> bool:
         """
         ジョブを完了状態にする。
 
         Args:
             job_id: 完了するジョブの ID。
             audio_path: 生成された MP3 ファイルの絶対パス。
+            cached: 生成せずに結果キャッシュから返した場合は True（メトリクスで区別する）。
+
+        Returns:
+            結果を受け取るジョブがあった場合は True。生成中にすべてキャンセルされていた
+            場合は False を返し、audio_path は削除される。
         """
+        now = datetime.now(timezone.utc)
+        size = _file_size(audio_path)
         with self._lock:
-            record = self._jobs.get(job_id)
-            if record is None:
-                return
-            record.status = JobStatus.COMPLETED
-            record.progress = 1.0
-            record.completed_at = datetime.now(timezone.utc)
-            record.audio_path = audio_path
+            records = self._linked_records(job_id)
+            for record in records:
+                self._finish(record, JobStatus.COMPLETED, now)
+                record.progress = 1.0
+                # 生成直後の「ファイルを準備中」などの途中の段階を表示し続けない
+                record.stage = "完了"
+                record.audio_path = audio_path
+                self._ref_file(audio_path, record.job_id, size)
+                self._recent[record.job_id] = None
+            self._persist(records)
+            self._release_inflight_of(job_id)
+            self._followers.pop(job_id, None)
+            # 完了したばかりのジョブは最も最近参照されたものとして扱われ、最後に削除される
+            evicted, unused_files = self._evict_locked()
+        if not records:
+            self._reaper.submit([audio_path])
+            return False
+        self._reaper.submit(unused_files)
         logger.info("ジョブ完了: job_id={}, audio_path={}", job_id, audio_path)
+        self._announce_evicted(evicted)
+        if self._metrics is not None:
+            self._metrics.on_finished(job_id, records, JobStatus.COMPLETED, cached=cached)
+        if self._timings is not None and self._timings.enabled:
+            self._timings.record(job_id, "file_ready")
+        self._notify(records)
+        return True
 
     def fail(self, job_id: str, error: str) -> None:
         """
@@ -161,47 +600,402 @@ class JobStore:
             job_id: 失敗したジョブの ID。
             error: エラーメッセージ。
         """
+        now = datetime.now(timezone.utc)
         with self._lock:
-            record = self._jobs.get(job_id)
-            if record is None:
-                return
-            record.status = JobStatus.FAILED
-            record.completed_at = datetime.now(timezone.utc)
-            record.error = error
+            records = self._linked_records(job_id)
+            for record in records:
+                self._finish(record, JobStatus.FAILED, now)
+                record.stage = "失敗"
+                record.error = error
+                if record.segment_paths:
+                    self._recent[record.job_id] = None
+            self._persist(records)
+            self._release_inflight_of(job_id)
+            self._followers.pop(job_id, None)
         logger.error("ジョブ失敗: job_id={}, error={}", job_id, error)
+        if self._metrics is not None:
+            self._metrics.on_finished(job_id, records, JobStatus.FAILED, error)
+        if self._timings is not None and self._timings.enabled:
+            self._timings.record(job_id, "failed")
+        self._notify(records)
+
+    def restore(self) -> list[str]:
+        """
+        永続化バックエンドからジョブを読み込む。起動時、ワーカー開始前に 1 回だけ呼ぶ。
+
+        - queued のジョブはそのまま復元し、再投入すべき主ジョブの ID を返す。
+        - running のジョブは再起動で中断されたため failed にする。
+        - completed のジョブは音声ファイルが残っていれば再び取得可能にし、
+          ファイルが失われていれば音声の期限切れ（audio_expired）として残す。
+
+        Returns:
+            キューに再投入すべきジョブ ID のリスト（作成順）。
+        """
+        if self._persistence is None:
+            return []
+
+        rows = self._persistence.load_all()
+        now = datetime.now(timezone.utc)
+        requeue: list[str] = []
+        changed: list[_JobRecord] = []
+        lost = 0
+
+        with self._lock:
+            for row in rows:
+                record = _JobRecord.from_row(row)
+                if record.status == JobStatus.RUNNING:
+                    record.status = JobStatus.FAILED
+                    record.completed_at = now
+                    record.error = "サーバーの再起動により中断された"
+                    changed.append(record)
+                elif (
+                    record.status == JobStatus.COMPLETED
+                    and not record.audio_expired
+                    and not (record.audio_path and os.path.exists(record.audio_path))
+                ):
+                    record.audio_path = None
+                    record.segment_paths = []
+                    record.audio_expired = True
+                    changed.append(record)
+                    lost += 1
+                self._add_record(record)
+                if record.status in (JobStatus.COMPLETED, JobStatus.FAILED) and _audio_files(record):
+                    self._recent[record.job_id] = None
+
+            # 相乗り関係と実行中キーの復元。主ジョブが中断されていれば相乗りも失敗にする
+            for record in self._jobs.values():
+                if record.primary_id is None:
+                    if record.status == JobStatus.QUEUED:
+                        requeue.append(record.job_id)
+                        if record.cache_key is not None:
+                            self._inflight.setdefault(record.cache_key, record.job_id)
+                    continue
+                primary = self._jobs.get(record.primary_id)
+                if record.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+                    continue
+                if primary is not None and primary.status == JobStatus.QUEUED:
+                    self._followers.setdefault(primary.job_id, []).append(record.job_id)
+                else:
+                    self._finish(record, JobStatus.FAILED, now)
+                    record.error = "サーバーの再起動により中断された"
+                    changed.append(record)
+
+            self._persist(changed)
+            # 参照の記録は残らないため、終了の古い順に削除する
+            self._recent = OrderedDict(
+                sorted(self._recent.items(), key=lambda item: self._jobs[item[0]].completed_at)
+            )
+            evicted, unused_files = self._evict_locked()
+
+        self._reaper.submit(unused_files)
+        self._announce_evicted(evicted)
+        logger.info(
+            "ジョブを復元: {} 件（再投入 {} 件, 中断 {} 件, 音声消失 {} 件）",
+            len(rows),
+            len(requeue),
+            len(changed) - lost,
+            lost,
+        )
+        return requeue
+
+    def flush(self) -> bool:
+        """
+        ここまでの状態の変更が永続化バックエンドにコミットされるまで待つ。
+
+        永続化しない場合は何もせずに True を返す。ブロッキング処理のため、非同期ハンドラからは
+        asyncio.to_thread() 経由で呼ぶこと。
+
+        Returns:
+            コミットを確認できた場合は True。書き込みに失敗した、または
+            _FLUSH_TIMEOUT 秒以内に終わらなかった場合は False。
+        """
+        if self._persistence is None or self._persistence.flush(timeout=_FLUSH_TIMEOUT):
+            return True
+        logger.warning("ジョブの永続化の完了を確認できなかった（上限 {} 秒）", _FLUSH_TIMEOUT)
+        return False
 
     def queue_size(self) -> int:
         """QUEUED 状態のジョブ数を返す。"""
         with self._lock:
-            return sum(
-                1 for r in self._jobs.values() if r.status == JobStatus.QUEUED
-            )
+            return self._status_counts[JobStatus.QUEUED]
+
+    def status_counts(self) -> dict[JobStatus, int]:
+        """状態ごとのジョブ数を返す。"""
+        with self._lock:
+            return dict(self._status_counts)
 
     def cleanup_expired(self) -> int:
         """
         TTL を超えた completed/failed ジョブを削除する。
-        関連する音声ファイルも削除する。
+        関連する音声ファイルも（別スレッドで）削除する。
 
         Returns:
             削除したジョブの数。
         """
-        now = datetime.now(timezone.utc)
+        deadline = datetime.now(timezone.utc).timestamp() - self._ttl
         to_delete: list[str] = []
+        unused_files: list[str] = []
         with self._lock:
-            for job_id, record in self._jobs.items():
-                if record.completed_at is None:
+            while self._expiry and self._expiry[0][0] < deadline:
+                completed_ts, job_id = heapq.heappop(self._expiry)
+                record = self._jobs.get(job_id)
+                # 削除済み・再完了したジョブの古いエントリは読み飛ばす
+                if (
+                    record is None
+                    or record.completed_at is None
+                    or record.completed_at.timestamp() != completed_ts
+                ):
                     continue
-                elapsed = (now - record.completed_at).total_seconds()
-                if elapsed > self._ttl:
-                    to_delete.append(job_id)
+                _, files = self._remove_record(job_id)
+                to_delete.append(job_id)
+                unused_files.extend(files)
 
-            for job_id in to_delete:
-                record = self._jobs.pop(job_id)
-                # 音声ファイルの削除
-                if record.audio_path and os.path.exists(record.audio_path):
-                    os.remove(record.audio_path)
-                    logger.info("期限切れ音声ファイル削除: {}", record.audio_path)
+            if self._persistence is not None:
+                self._persistence.delete(to_delete)
 
+        # 相乗りジョブと共有しているファイルは、参照がなくなった時点で削除される
+        self._reaper.submit(unused_files)
         if to_delete:
             logger.info("期限切れジョブを {} 件削除した", len(to_delete))
         return len(to_delete)
+
+    def touch(self, job_id: str) -> None:
+        """
+        ジョブの音声が参照されたことを記録する。容量上限による削除の順序（LRU）に使う。
+
+        音声のダウンロード・ストリームのエンドポイントから呼ぶ。
+        """
+        with self._lock:
+            if job_id in self._recent:
+                self._recent.move_to_end(job_id)
+
+    def relocate(self, old_path: str, new_path: str) -> None:
+        """
+        音声ファイルの移動（一時置き場からの昇格）を、参照しているジョブに反映する。
+
+        移動の間にジョブが削除されていた場合は、移動先のファイルを削除する。
+        同じ移動を 2 回反映しても問題ない。
+        """
+        with self._lock:
+            job_ids = self._file_jobs.pop(old_path, None)
+            if job_ids is None:
+                orphaned = new_path not in self._file_jobs
+            else:
+                orphaned = False
+                self._file_jobs[new_path] = job_ids
+                self._file_sizes[new_path] = self._file_sizes.pop(old_path, 0)
+                records = [self._jobs[job_id] for job_id in job_ids if job_id in self._jobs]
+                for record in records:
+                    if record.audio_path == old_path:
+                        record.audio_path = new_path
+                    record.segment_paths = [
+                        new_path if path == old_path else path for path in record.segment_paths
+                    ]
+                self._persist(records)
+        if orphaned:
+            self._reaper.submit([new_path])
+
+    def disk_usage(self) -> dict[str, int]:
+        """音声ファイルの合計バイト数・ファイル数・上限・容量超過で削除したジョブ数を返す。"""
+        with self._lock:
+            return {
+                "used_bytes": self._audio_bytes,
+                "files": len(self._file_jobs),
+                "max_bytes": max(self._max_audio_bytes, 0),
+                "evicted_jobs": self.evicted,
+            }
+
+    def sweep_orphans(self, directories: list[str]) -> tuple[int, int]:
+        """
+        どのジョブからも参照されていない音声ファイルを directories から削除する。
+
+        クラッシュなどで completed にならなかったジョブのファイルや、書き込み途中の
+        一時ファイルが対象になる。このサービスの命名規則（UUID.mp3）に合わないファイルは
+        削除しない。起動時、restore() の後・ワーカー開始前に 1 回だけ呼ぶ
+        （生成中のファイルを消さないため）。ブロッキング処理である。
+
+        Returns:
+            (削除したファイル数, 削除したバイト数)
+        """
+        with self._lock:
+            referenced = set(self._file_jobs)
+        removed = 0
+        removed_bytes = 0
+        for directory in directories:
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if not entry.is_file() or not _AUDIO_FILE_NAME.fullmatch(entry.name):
+                    continue
+                if entry.path in referenced:
+                    continue
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+                except OSError:
+                    logger.exception("孤立した音声ファイルの削除に失敗: {}", entry.path)
+                    continue
+                removed += 1
+                removed_bytes += size
+        if removed:
+            logger.info(
+                "どのジョブからも参照されていない音声ファイルを削除: {} 件, {:.1f}MB",
+                removed,
+                removed_bytes / (1024**2),
+            )
+        return removed, removed_bytes
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+    def _notify(self, records: list[_JobRecord]) -> None:
+        """変更のあったジョブをリスナーに通知する。ロックの外で呼ぶこと。"""
+        for listener in self._listeners:
+            for record in records:
+                try:
+                    listener(record.job_id)
+                except Exception:
+                    logger.exception("ジョブ変更通知でエラー: job_id={}", record.job_id)
+
+    def _announce_evicted(self, evicted: list[_JobRecord]) -> None:
+        """音声を削除したジョブをログに残し、リスナーに通知する。ロックの外で呼ぶこと。"""
+        if evicted:
+            logger.info(
+                "音声ファイルの容量上限を超えたため、参照の古いジョブの音声を {} 件削除した: {}",
+                len(evicted),
+                ",".join(record.job_id for record in evicted),
+            )
+            self._notify(evicted)
+
+    # 以下はロックを保持した状態で呼ぶこと
+    def _persist(self, records: list[_JobRecord]) -> None:
+        """レコードを永続化バックエンドに書き込む。ロック内で呼ぶことで書き込み順を保つ。"""
+        if self._persistence is not None and records:
+            self._persistence.save([record.to_row() for record in records])
+
+    def _add_record(self, record: _JobRecord) -> None:
+        """レコードを登録し、件数・期限・ファイル参照の索引に反映する。"""
+        self._jobs[record.job_id] = record
+        self._status_counts[record.status] += 1
+        if record.completed_at is not None:
+            heapq.heappush(self._expiry, (record.completed_at.timestamp(), record.job_id))
+        for path in _audio_files(record):
+            self._ref_file(path, record.job_id)
+
+    def _remove_record(self, job_id: str) -> tuple[Optional[_JobRecord], list[str]]:
+        """
+        レコードを取り除く。
+
+        Returns:
+            (取り除いたレコード, どのジョブからも参照されなくなった音声ファイルのパス)
+        """
+        record = self._jobs.pop(job_id, None)
+        if record is None:
+            return None, []
+        self._status_counts[record.status] -= 1
+        self._recent.pop(job_id, None)
+        return record, self._release_files(record)
+
+    def _set_status(self, record: _JobRecord, status: JobStatus) -> None:
+        """状態を変更し、状態ごとの件数を更新する。"""
+        self._status_counts[record.status] -= 1
+        self._status_counts[status] += 1
+        record.status = status
+
+    def _finish(self, record: _JobRecord, status: JobStatus, now: datetime) -> None:
+        """終了状態（completed/failed）にし、TTL のヒープに登録する。"""
+        self._set_status(record, status)
+        record.completed_at = now
+        heapq.heappush(self._expiry, (now.timestamp(), record.job_id))
+
+    def _linked_records(self, job_id: str) -> list[_JobRecord]:
+        """
+        主ジョブとそれに相乗りしているジョブのレコードを返す。
+
+        キャンセルされた主ジョブは含めない（相乗りしているジョブのためだけに生成を続ける）。
+        """
+        record = self._jobs.get(job_id)
+        if record is None:
+            return []
+        records = [record] if record.status != JobStatus.CANCELLED else []
+        for follower_id in self._followers.get(job_id, []):
+            follower = self._jobs.get(follower_id)
+            if follower is not None:
+                records.append(follower)
+        return records
+
+    def _wanted(self, job_id: str) -> bool:
+        """主ジョブか、相乗りしているジョブのいずれかが結果を待っているかどうか。"""
+        record = self._jobs.get(job_id)
+        if record is None:
+            return False
+        return record.status != JobStatus.CANCELLED or bool(self._followers.get(job_id))
+
+    def _release_files(self, record: _JobRecord) -> list[str]:
+        """レコードが参照している音声ファイルを手放し、参照がなくなったパスを返す。"""
+        unused: list[str] = []
+        for path in _audio_files(record):
+            job_ids = self._file_jobs.get(path)
+            if job_ids is None:
+                continue
+            job_ids.discard(record.job_id)
+            if not job_ids:
+                del self._file_jobs[path]
+                self._audio_bytes -= self._file_sizes.pop(path, 0)
+                unused.append(path)
+        record.audio_path = None
+        record.segment_paths = []
+        return unused
+
+    def _ref_file(self, path: str, job_id: str, size: Optional[int] = None) -> None:
+        """
+        ジョブが音声ファイルを参照していることを記録する。
+
+        初めて参照されるファイルは size（None ならファイルから読む）を合計バイト数に加える。
+        """
+        job_ids = self._file_jobs.get(path)
+        if job_ids is None:
+            job_ids = self._file_jobs[path] = set()
+            file_size = size if size is not None else _file_size(path)
+            self._file_sizes[path] = file_size
+            self._audio_bytes += file_size
+        job_ids.add(job_id)
+
+    def _evict_locked(self) -> tuple[list[_JobRecord], list[str]]:
+        """
+        音声ファイルの合計が上限を超えた分、最も長く参照されていない終了済みのジョブの音声を手放す。
+
+        ジョブのレコードは TTL まで残し、音声の期限切れ（audio_expired）として返す。
+        最も最近参照されたジョブは残す（1 曲だけで上限を超えていても削除しない）。
+        相乗りジョブと共有しているファイルは、共有しているジョブがすべて手放すまで残る。
+
+        Returns:
+            (音声を手放したジョブのレコード, どのジョブからも参照されなくなった音声ファイルのパス)
+        """
+        evicted: list[_JobRecord] = []
+        unused_files: list[str] = []
+        if self._max_audio_bytes <= 0:
+            return evicted, unused_files
+        while self._audio_bytes > self._max_audio_bytes and len(self._recent) > 1:
+            job_id, _ = self._recent.popitem(last=False)
+            record = self._jobs[job_id]
+            unused_files.extend(self._release_files(record))
+            record.audio_expired = True
+            evicted.append(record)
+        self.evicted += len(evicted)
+        self._persist(evicted)
+        return evicted, unused_files
+
+    def _release_inflight(self, record: _JobRecord) -> None:
+        """主ジョブが終了したら、相乗り先の登録を外す。"""
+        if record.cache_key is not None and self._inflight.get(record.cache_key) == record.job_id:
+            del self._inflight[record.cache_key]
+
+    def _release_inflight_of(self, job_id: str) -> None:
+        record = self._jobs.get(job_id)
+        if record is not None:
+            self._release_inflight(record)
@@ -0,0 +1,177 @@
+"""
+ジョブごとの処理時刻の記録（プロファイリング用）。
+
+投入・取り出し・進捗の段階の切り替わり・generate_music() の戻り・ファイル完成の
+時刻を記録し、ジョブ単位の内訳や Chrome のトレース形式（chrome://tracing, Perfetto）で返す。
+実行時に有効・無効を切り替えられ、無効の間は JobStore からの呼び出しが
+属性 1 つの参照だけで終わる。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from backend.services.metrics import stage_phase
+from backend.services.music_generator import GENERATED_STAGE
+
+# 1 ジョブあたりに記録するイベント数の上限（段階の文字列が細かく変わる場合の保険）
+_MAX_EVENTS_PER_JOB = 256
+
+
+class _Timeline:
+    """1 ジョブ分のイベント列。"""
+
+    __slots__ = ("events", "primary_id", "last_stage")
+
+    def __init__(self) -> None:
+        # (イベント名, UNIX 秒)
+        self.events: list[tuple[str, float]] = []
+        # 相乗りしている場合は主ジョブの ID（生成のイベントは主ジョブ側に記録される）
+        self.primary_id: Optional[str] = None
+        self.last_stage: Optional[str] = None
+
+
+class JobTimings:
+    """
+    直近 max_jobs 件のジョブのイベント時刻を保持する。すべてのメソッドはスレッドセーフである。
+
+    イベント名:
+        enqueue / dequeue / stage:<進捗の説明文> / generated（generate_music() の戻り）/
+        file_ready / failed / cancelled / requeue
+    """
+
+    def __init__(self, enabled: bool, max_jobs: int) -> None:
+        # JobStore はこの属性だけを見て、無効なら何もしない
+        self.enabled = enabled
+        self._max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._timelines: OrderedDict[str, _Timeline] = OrderedDict()
+
+    def set_enabled(self, enabled: bool) -> None:
+        """記録を有効・無効にする。無効にしても記録済みのイベントは残す。"""
+        self.enabled = enabled
+
+    def recorded_jobs(self) -> int:
+        with self._lock:
+            return len(self._timelines)
+
+    # ------------------------------------------------------------------
+    # 記録（JobStore から、enabled のときだけ呼ばれる）
+    # ------------------------------------------------------------------
+    def record(self, job_id: str, event: str, primary_id: Optional[str] = None) -> None:
+        """イベントの時刻を記録する。primary_id は相乗りしたジョブの投入時に渡す。"""
+        now = time.time()
+        with self._lock:
+            timeline = self._timeline(job_id)
+            if primary_id is not None:
+                timeline.primary_id = primary_id
+            if len(timeline.events) < _MAX_EVENTS_PER_JOB:
+                timeline.events.append((event, now))
+
+    def record_stage(self, job_id: str, stage: str) -> None:
+        """進捗の説明文が前回から変わっていれば、段階の切り替わりとして記録する。"""
+        now = time.time()
+        with self._lock:
+            timeline = self._timeline(job_id)
+            if stage == timeline.last_stage:
+                return
+            timeline.last_stage = stage
+            if len(timeline.events) < _MAX_EVENTS_PER_JOB:
+                name = "generated" if stage.endswith(GENERATED_STAGE) else f"stage:{stage}"
+                timeline.events.append((name, now))
+
+    # ------------------------------------------------------------------
+    # 出力
+    # ------------------------------------------------------------------
+    def events(self, job_id: str) -> Optional[list[tuple[str, float]]]:
+        """
+        ジョブのイベントを時刻順に返す。記録がなければ None。
+
+        相乗りしたジョブは、主ジョブの生成のイベントを合わせて返す。
+        """
+        with self._lock:
+            timeline = self._timelines.get(job_id)
+            if timeline is None:
+                return None
+            events = list(timeline.events)
+            primary = self._timelines.get(timeline.primary_id) if timeline.primary_id else None
+            if primary is not None:
+                joined_at = events[0][1] if events else 0.0
+                events += [
+                    (name, at) for name, at in primary.events if name != "enqueue" and at >= joined_at
+                ]
+        events.sort(key=lambda event: event[1])
+        return events
+
+    def chrome_trace(self, limit: int) -> dict[str, Any]:
+        """
+        直近 limit 件のジョブを Chrome のトレースイベント形式で返す。
+
+        ジョブごとに 1 行（tid）を割り当て、イベントの間を区間（ph="X"）として表す。
+        区間の cat は queue / prepare / lm / dit / encode / finalize のいずれか。
+        """
+        with self._lock:
+            items = list(self._timelines.items())[-limit:]
+        trace: list[dict[str, Any]] = []
+        for tid, (job_id, _) in enumerate(items, start=1):
+            events = self.events(job_id) or []
+            trace.append(
+                {"ph": "M", "name": "thread_name", "pid": 1, "tid": tid, "args": {"name": job_id}}
+            )
+            for (name, start), (next_name, end) in zip(events, events[1:]):
+                category = _span_category(name)
+                if category is None:
+                    continue
+                trace.append(
+                    {
+                        "ph": "X",
+                        "name": name.removeprefix("stage:") if category != "queue" else "queued",
+                        "cat": category,
+                        "pid": 1,
+                        "tid": tid,
+                        "ts": int(start * 1_000_000),
+                        "dur": max(0, int((end - start) * 1_000_000)),
+                        "args": {"job_id": job_id, "next": next_name},
+                    }
+                )
+            for name, at in events:
+                if name in ("enqueue", "file_ready", "failed", "cancelled", "requeue"):
+                    trace.append(
+                        {"ph": "i", "s": "t", "name": name, "pid": 1, "tid": tid, "ts": int(at * 1_000_000)}
+                    )
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    # ------------------------------------------------------------------
+    # 内部処理（ロックを保持した状態で呼ぶこと）
+    # ------------------------------------------------------------------
+    def _timeline(self, job_id: str) -> _Timeline:
+        timeline = self._timelines.get(job_id)
+        if timeline is None:
+            timeline = self._timelines[job_id] = _Timeline()
+            while len(self._timelines) > self._max_jobs:
+                self._timelines.popitem(last=False)
+        return timeline
+
+
+def phase_breakdown(events: list[tuple[str, float]]) -> dict[str, float]:
+    """イベント列から、区間の分類ごとの合計秒数を求める。"""
+    totals: dict[str, float] = {}
+    for (name, start), (_, end) in zip(events, events[1:]):
+        category = _span_category(name)
+        if category is not None:
+            totals[category] = totals.get(category, 0.0) + (end - start)
+    return totals
+
+
+def _span_category(event: str) -> Optional[str]:
+    """イベントから次のイベントまでの区間の分類。区間にしないイベントは None。"""
+    if event in ("enqueue", "requeue"):
+        return "queue"
+    if event == "dequeue":
+        return "prepare"
+    if event == "generated":
+        return "finalize"
+    if event.startswith("stage:"):
+        return stage_phase(event)
+    return None
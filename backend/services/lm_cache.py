@@ -0,0 +1,157 @@
+"""
+LM が caption から生成したメタデータ（BPM・キー・拍子など）のキャッシュ。
+
+LM を使う場合、generate_music() は毎回 Phase 1 で caption からメタデータを推論する。
+同じ caption・LM・bpm 指定の組み合わせでは前回の結果を再利用し、この推論を省く。
+音声そのものを保存する ResultCache と異なり、seed 未指定のジョブも対象にする
+（曲は毎回変わるが、BPM やキーは同じ caption に対して固定される）。
+
+生成はこのプロセスのほか、ワーカープールの子プロセスやリモートワーカーでも行われるため、
+キャッシュはプロセスごとに持つ。OTO_LM_CACHE_PATH を指定すると JSON ファイルに保存し、
+再起動後や他のプロセスの起動時に読み込む。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger
+
+from backend.config import settings
+
+
+class LmMetadataCache:
+    """
+    メタデータを件数上限つきの LRU で保持する。
+
+    すべてのパブリックメソッドはスレッドセーフである。
+    """
+
+    def __init__(self, max_entries: int, path: Optional[Path]) -> None:
+        """
+        Args:
+            max_entries: 保持する件数の上限。0 以下ならキャッシュを無効化する。
+            path: 保存先の JSON ファイル。None の場合はメモリ上のみで保持する。
+        """
+        self._max_entries = max_entries
+        self._path = path
+        self._lock = threading.Lock()
+        # key → メタデータ。末尾ほど最近参照されたエントリ
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        # キーに含める LM のモデル名。読み込みが終わるまでは未確定
+        self._lm_model: Optional[str] = None
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """キャッシュが有効かどうか。"""
+        return self._max_entries > 0
+
+    def set_model(self, lm_model: str) -> None:
+        """読み込んだ LM のモデル名を設定する（LM を使わない場合は空文字）。"""
+        self._lm_model = lm_model
+
+    def key_for(self, caption: str, bpm: Optional[int]) -> Optional[str]:
+        """
+        caption と bpm 指定からキャッシュキーを計算する。
+
+        Returns:
+            SHA-256 の16進文字列。無効化されている、または LM を使わない場合は None。
+        """
+        if not self.enabled or not self._lm_model:
+            return None
+        payload = json.dumps([caption, bpm, self._lm_model], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        """キャッシュ済みのメタデータを返す。なければ None。"""
+        with self._lock:
+            self._load_locked()
+            metadata = self._entries.get(key)
+            if metadata is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(metadata)
+
+    def put(self, key: str, metadata: dict[str, Any]) -> None:
+        """
+        LM が生成したメタデータを登録し、上限を超えた分を LRU で削除する。
+
+        JSON にできない値（テンソルなど）は保存しない。
+        """
+        entry = {
+            name: value
+            for name, value in metadata.items()
+            if isinstance(value, (str, int, float, bool)) or value is None
+        }
+        if not entry:
+            return
+        with self._lock:
+            self._load_locked()
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            snapshot = list(self._entries.items()) if self._path is not None else None
+        if snapshot is not None:
+            self._save(snapshot)
+
+    def stats(self) -> dict[str, int | float]:
+        """ヒット数・ミス数・件数を返す。"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+            }
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+    def _load_locked(self) -> None:
+        """初回の参照時に保存先のファイルを読み込む。ロックを保持した状態で呼ぶこと。"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if self._path is None or not self._path.exists():
+            return
+        try:
+            entries = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            logger.warning("LM メタデータキャッシュを読み込めない（空の状態から始める）: {}", self._path)
+            return
+        # ファイルは古い順に並んでいる
+        for key, metadata in list(entries.items())[-self._max_entries:]:
+            if isinstance(metadata, dict):
+                self._entries[key] = metadata
+        logger.info("LM メタデータキャッシュを復元: {} 件", len(self._entries))
+
+    def _save(self, entries: list[tuple[str, dict[str, Any]]]) -> None:
+        """一時ファイルに書いてから置き換える（同時に書いた場合は後の書き込みが残る）。"""
+        assert self._path is not None
+        tmp_path = self._path.with_name(f".{self._path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(dict(entries), ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, self._path)
+        except OSError:
+            logger.exception("LM メタデータキャッシュの保存に失敗: {}", self._path)
+            tmp_path.unlink(missing_ok=True)
+
+
+# プロセスごとのシングルトン。load_models() がモデル名を設定し、music_generator が参照する
+lm_metadata_cache = LmMetadataCache(
+    max_entries=settings.lm_cache_max_entries,
+    path=Path(settings.lm_cache_path).resolve() if settings.lm_cache_path else None,
+)
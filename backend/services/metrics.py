@@ -0,0 +1,293 @@
+"""
+Prometheus 形式のメトリクス。
+
+JobStore の状態遷移・進捗更新のたびに呼ばれるため、記録側はロックを取らず、
+観測値を deque に追加するだけにする（CPython の deque.append はスレッドセーフ）。
+ヒストグラムへの集計は GET /metrics の取得時にまとめて行う。
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+from backend.models.schemas import JobStatus
+from backend.services.music_generator import GENERATED_STAGE
+
+if TYPE_CHECKING:
+    from backend.services.job_store import _JobRecord
+
+# 曲の長さ（秒）の区分。ヒストグラムのラベルに使う
+DURATION_BUCKETS = (30, 60, 120, 300, 600)
+
+# ヒストグラムのバケット上限（秒）
+_LATENCY_BUCKETS = (1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+_PHASE_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# 集計されずに溜まった観測値がこの数を超えたら、記録側で集計する（取得されない場合の上限）
+_MAX_PENDING = 10_000
+
+
+def duration_bucket(duration: int) -> str:
+    """曲の長さをラベル用の区分（例: "31-60"）に変換する。"""
+    lower = 0
+    for upper in DURATION_BUCKETS:
+        if duration <= upper:
+            return f"{lower}-{upper}"
+        lower = upper + 1
+    return f"{lower}+"
+
+
+def stage_phase(stage: str) -> str:
+    """
+    update_progress() の stage 文字列から処理段階を判定する。
+
+    Returns:
+        "lm"（LM によるメタデータ・音声コードの生成）、"encode"（デコード・MP3 への変換）、
+        "dit"（それ以外の拡散処理）のいずれか。
+    """
+    text = stage.lower()
+    if stage.endswith(GENERATED_STAGE) or any(word in text for word in ("decod", "encod", "mp3", "saving")):
+        return "encode"
+    if any(word in text for word in ("llm", "lm ", "5hz", "thinking", "metadata", "audio code", "cot")):
+        return "lm"
+    return "dit"
+
+
+def error_class(error: Optional[str]) -> str:
+    """エラーメッセージを、失敗の種類を表すラベルに変換する。"""
+    text = error or ""
+    if "out of memory" in text.lower():
+        return "out_of_memory"
+    if "満杯" in text:
+        return "queue_full"
+    if "モデルの読み込み" in text:
+        return "model_load"
+    if "再起動" in text:
+        return "server_restart"
+    if "ワーカー" in text:
+        return "worker_lost"
+    if "音楽生成に失敗" in text:
+        return "generation"
+    return "other"
+
+
+class _Histogram:
+    """ラベルごとのヒストグラム。集計時（ロックを保持した状態）にだけ更新する。"""
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self._buckets = buckets
+        # ラベル値のタプル → (バケットごとの累積件数, [合計, 件数])
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, labels: tuple[str, ...], value: float) -> None:
+        counts, total = self._series.setdefault(labels, ([0] * len(self._buckets), [0.0, 0.0]))
+        for i, upper in enumerate(self._buckets):
+            if value <= upper:
+                counts[i] += 1
+        total[0] += value
+        total[1] += 1
+
+    def render(self, name: str, help_text: str, label_names: tuple[str, ...]) -> list[str]:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for labels, (counts, (total, count)) in sorted(self._series.items()):
+            series = ",".join(f'{label_name}="{label}"' for label_name, label in zip(label_names, labels))
+            for upper, bucket_count in zip(self._buckets, counts):
+                lines.append(f'{name}_bucket{{{series},le="{upper:g}"}} {bucket_count}')
+            lines.append(f'{name}_bucket{{{series},le="+Inf"}} {count:g}')
+            lines.append(f'{name}_sum{{{series}}} {total:.6f}')
+            lines.append(f'{name}_count{{{series}}} {count:g}')
+        return lines
+
+
+class JobMetrics:
+    """
+    ジョブの待ち時間・処理時間・段階ごとの所要時間・結果を集計する。
+
+    on_* メソッドは JobStore からロックの外で呼ばれる。観測値を deque に積むだけで、
+    ロックは取らない。段階の追跡（ジョブ ID → 現在の段階）は 1 つのジョブにつき
+    1 つのスレッドからしか更新されないため、dict の単純な読み書きで足りる。
+    """
+
+    def __init__(self) -> None:
+        self._pending: deque[tuple[str, Any, float]] = deque()
+        self._lock = threading.Lock()
+        # ジョブ ID → (現在の段階, 段階が始まった時刻)
+        self._phases: dict[str, tuple[str, float]] = {}
+        self._queue_wait = _Histogram(_LATENCY_BUCKETS)
+        self._latency = _Histogram(_LATENCY_BUCKETS)
+        self._phase_durations = _Histogram(_PHASE_BUCKETS)
+        self._completed = 0
+        self._cancelled = 0
+        self._failed: Counter[str] = Counter()
+
+    # ------------------------------------------------------------------
+    # 記録（JobStore から呼ばれる）
+    # ------------------------------------------------------------------
+    def on_started(self, records: Iterable["_JobRecord"]) -> None:
+        """ジョブが実行中になった。キューでの待ち時間を記録する。"""
+        now = datetime.now(timezone.utc)
+        for record in records:
+            waited = (now - record.created_at).total_seconds()
+            self._record("wait", (duration_bucket(record.duration),), waited)
+
+    def on_progress(self, job_id: str, stage: str) -> None:
+        """進捗が更新された。段階が変わっていれば、前の段階の所要時間を記録する。"""
+        phase = stage_phase(stage)
+        now = time.monotonic()
+        current = self._phases.get(job_id)
+        if current is not None and current[0] == phase:
+            return
+        if current is not None:
+            self._record("phase", (current[0],), now - current[1])
+        self._phases[job_id] = (phase, now)
+
+    def on_requeued(self, job_id: str) -> None:
+        """ジョブが実行待ちに戻った。途中の段階は記録しない。"""
+        self._phases.pop(job_id, None)
+
+    def on_finished(
+        self,
+        job_id: str,
+        records: Iterable["_JobRecord"],
+        status: JobStatus,
+        error: Optional[str] = None,
+        cached: bool = False,
+    ) -> None:
+        """
+        ジョブ（と相乗りしているジョブ）が完了・失敗した。
+
+        所要時間は、生成したもの・結果キャッシュから返したもの（cached）・相乗りしたものを
+        source ラベルで分けて記録する（生成の所要時間の分布に、生成しなかったジョブを混ぜない）。
+        """
+        current = self._phases.pop(job_id, None)
+        if current is not None:
+            self._record("phase", (current[0],), time.monotonic() - current[1])
+        now = datetime.now(timezone.utc)
+        for record in records:
+            source = "cache" if cached else "coalesced" if record.primary_id is not None else "generated"
+            self._record(
+                "latency",
+                (source, duration_bucket(record.duration)),
+                (now - record.created_at).total_seconds(),
+            )
+            if status == JobStatus.COMPLETED:
+                self._record("completed", "", 1)
+            else:
+                self._record("failed", error_class(error), 1)
+
+    def on_cancelled(self, stopped_job_id: Optional[str]) -> None:
+        """
+        ジョブがキャンセルされた。
+
+        Args:
+            stopped_job_id: 結果を待つジョブがなくなり生成を打ち切る主ジョブの ID。
+                            相乗りしているジョブのために生成を続ける場合は None。
+        """
+        if stopped_job_id is not None:
+            self._phases.pop(stopped_job_id, None)
+        self._record("cancelled", "", 1)
+
+    # ------------------------------------------------------------------
+    # 出力
+    # ------------------------------------------------------------------
+    def render(self) -> list[str]:
+        """集計済みの値を Prometheus のテキスト形式の行にして返す。"""
+        with self._lock:
+            self._drain()
+            lines = self._queue_wait.render(
+                "oto_queue_wait_seconds",
+                "Time from job submission until generation started.",
+                ("duration_bucket",),
+            )
+            lines += self._latency.render(
+                "oto_job_latency_seconds",
+                "Time from job submission until the job completed or failed "
+                '(source="generated", "cache": served from the result cache, "coalesced": shared another job\'s result).',
+                ("source", "duration_bucket"),
+            )
+            lines += self._phase_durations.render(
+                "oto_phase_duration_seconds",
+                "Time spent in each generation phase (lm, dit, encode).",
+                ("phase",),
+            )
+            lines += [
+                "# HELP oto_jobs_completed_total Jobs completed successfully.",
+                "# TYPE oto_jobs_completed_total counter",
+                f"oto_jobs_completed_total {self._completed}",
+                "# HELP oto_jobs_cancelled_total Jobs cancelled by clients.",
+                "# TYPE oto_jobs_cancelled_total counter",
+                f"oto_jobs_cancelled_total {self._cancelled}",
+                "# HELP oto_jobs_failed_total Jobs failed, by error class.",
+                "# TYPE oto_jobs_failed_total counter",
+            ]
+            lines += [
+                f'oto_jobs_failed_total{{error_class="{name}"}} {count}'
+                for name, count in sorted(self._failed.items())
+            ]
+        return lines
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+    def _record(self, kind: str, label: Any, value: float) -> None:
+        self._pending.append((kind, label, value))
+        # 長期間取得されなくても溜まり続けないよう、ここで集計する（取得中なら任せる）
+        if len(self._pending) > _MAX_PENDING and self._lock.acquire(blocking=False):
+            try:
+                self._drain()
+            finally:
+                self._lock.release()
+
+    def _drain(self) -> None:
+        """溜まった観測値をヒストグラム・カウンタに反映する。ロックを保持した状態で呼ぶこと。"""
+        while True:
+            try:
+                kind, label, value = self._pending.popleft()
+            except IndexError:
+                return
+            if kind == "wait":
+                self._queue_wait.observe(label, value)
+            elif kind == "latency":
+                self._latency.observe(label, value)
+            elif kind == "phase":
+                self._phase_durations.observe(label, value)
+            elif kind == "completed":
+                self._completed += 1
+            elif kind == "cancelled":
+                self._cancelled += 1
+            elif kind == "failed":
+                self._failed[label] += 1
+
+
+def gpu_memory_stats() -> list[tuple[str, int, int]]:
+    """
+    このプロセスが使用している GPU メモリを返す。
+
+    Returns:
+        (デバイス名, 使用中のバイト数, 起動以来の最大バイト数) のリスト。GPU がなければ空。
+    """
+    try:
+        import torch
+    except ImportError:
+        return []
+    stats: list[tuple[str, int, int]] = []
+    if torch.cuda.is_available():
+        for index in range(torch.cuda.device_count()):
+            stats.append(
+                (
+                    f"cuda:{index}",
+                    torch.cuda.memory_allocated(index),
+                    torch.cuda.max_memory_allocated(index),
+                )
+            )
+    elif hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
+        try:
+            allocated = torch.mps.current_allocated_memory()
+            # MPS には最大値の記録がないため、driver が確保している量を上限の目安として返す
+            driver = torch.mps.driver_allocated_memory()
+        except Exception:
+            return []
+        stats.append(("mps", allocated, driver))
+    return stats
@@ -0,0 +1,316 @@
+"""ACE-Step の DiT / LM モデルの読み込み。"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+from backend.config import settings
+from backend.services import fake_generator
+from backend.services.lm_cache import lm_metadata_cache
+from backend.services.warmup import compile_dit, warm_up
+
+
+class GenerationApi:
+    """
+    generate_music() と、その引数の GenerationParams / GenerationConfig の実装。
+
+    ACE-Step（acestep.inference）と代替生成器（fake_generator）は同じ形の API を持つ。
+    どちらを使うかは load_models() が 1 回だけ決める。
+    """
+
+    __slots__ = ("generate_music", "params_class", "config_class")
+
+    def __init__(
+        self,
+        generate_music: Callable[..., Any],
+        params_class: type,
+        config_class: type,
+    ) -> None:
+        self.generate_music = generate_music
+        self.params_class = params_class
+        self.config_class = config_class
+
+
+class LoadedModels:
+    """1 つのデバイスに読み込んだモデル一式と、それを使う生成 API。"""
+
+    __slots__ = ("device", "dit_handler", "llm_handler", "lm_model", "max_batch_size", "api")
+
+    def __init__(
+        self,
+        device: str,
+        dit_handler: Any,
+        llm_handler: Optional[Any],
+        lm_model: str,
+        max_batch_size: int,
+        api: GenerationApi,
+    ) -> None:
+        self.device = device
+        self.dit_handler = dit_handler
+        self.llm_handler = llm_handler
+        # 実際に読み込んだ LM のモデル名。LM を使わない場合は空文字
+        self.lm_model = lm_model
+        # GPU ティアごとの推奨バッチサイズ上限
+        self.max_batch_size = max_batch_size
+        self.api = api
+
+
+# 読み込みの進捗の通知先。(モデル名 "dit" / "lm" / "warmup", 状態, エラーメッセージ) を受け取る。
+# 状態は pending → loading → ready / failed、または読み込まない場合の skipped
+LoadReporter = Callable[[str, str, Optional[str]], None]
+
+
+def _ignore_progress(name: str, state: str, error: Optional[str]) -> None:
+    pass
+
+
+class ModelLoadProgress:
+    """
+    デバイス・モデルごとの読み込みの進捗。readiness・ヘルスチェックから参照する。
+
+    読み込みは別スレッドや子プロセスで進むため、すべてのメソッドはスレッドセーフである。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # (デバイス, モデル名) → 状態の dict。挿入順（デバイス順）に返す
+        self._models: dict[tuple[str, str], dict[str, Any]] = {}
+
+    def reporter(self, device: str) -> LoadReporter:
+        """device の読み込みを記録する、load_models() に渡すコールバックを返す。"""
+
+        def report(name: str, state: str, error: Optional[str]) -> None:
+            self.update(device, name, state, error)
+
+        return report
+
+    def update(self, device: str, name: str, state: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            entry = self._models.get((device, name))
+            if entry is None or state in ("pending", "loading"):
+                # 再起動したワーカーは読み込みからやり直すため、時刻も記録し直す
+                entry = self._models[(device, name)] = {
+                    "started_at": None,
+                    "finished_at": None,
+                    "started": None,
+                    "seconds": None,
+                }
+            if state == "loading":
+                entry["started_at"] = datetime.now(timezone.utc)
+                entry["started"] = time.monotonic()
+            elif state in ("ready", "failed", "skipped"):
+                entry["finished_at"] = datetime.now(timezone.utc)
+                if entry["started"] is not None:
+                    entry["seconds"] = time.monotonic() - entry["started"]
+            entry["state"] = state
+            entry["error"] = error
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """ModelLoadStatus に渡せる dict のリストを返す。"""
+        now = time.monotonic()
+        with self._lock:
+            items = [(key, dict(entry)) for key, entry in self._models.items()]
+        snapshot = []
+        for (device, name), entry in items:
+            # 読み込み中は経過秒数、終了後は所要秒数
+            if entry["state"] == "loading":
+                elapsed = now - entry["started"]
+            else:
+                elapsed = entry["seconds"]
+            snapshot.append(
+                {
+                    "device": device,
+                    "name": name,
+                    "state": entry["state"],
+                    "started_at": entry["started_at"],
+                    "finished_at": entry["finished_at"],
+                    "elapsed_seconds": round(elapsed, 3) if elapsed is not None else None,
+                    "error": entry["error"],
+                }
+            )
+        return snapshot
+
+
+def ensure_acestep_importable() -> str:
+    """
+    sys.path に ACE-Step ルートを追加する。
+
+    標準運用では `uv run` により import は解決される。
+    この追加は、ローカル直接実行時の補助策として残す。
+
+    Returns:
+        ACE-Step ルートの絶対パス。
+    """
+    acestep_root = str(settings.acestep_root_path)
+    if acestep_root not in sys.path:
+        sys.path.insert(0, acestep_root)
+        logger.info("sys.path に追加: {}", acestep_root)
+    return acestep_root
+
+
+def load_models(device: str, report: LoadReporter = _ignore_progress) -> LoadedModels:
+    """
+    指定したデバイスに DiT と LM を読み込み、ウォームアップする。ブロッキングで、数分かかることがある。
+
+    OTO_PARALLEL_MODEL_LOADING=true（既定）の場合、DiT は別スレッドで、
+    LM は呼び出し元のスレッドで同時に読み込む（チェックポイントの読み出しと
+    GPU への転送が重なるため、合計時間は長い方に近づく）。
+
+    OTO_GENERATOR=fake の場合は、モデルを読み込まずに代替の生成器を返す。
+
+    Args:
+        device: "auto", "cuda", "cuda:1", "mps", "cpu" など。
+        report: モデルごとの読み込みの進捗を受け取るコールバック。
+
+    Raises:
+        RuntimeError: DiT モデルの初期化に失敗した場合。
+    """
+    if settings.generator == "fake":
+        logger.info("代替生成器を使用 (device={})", device)
+        report("dit", "loading", None)
+        report("lm", "skipped", None)
+        report("warmup", "pending", None)
+        time.sleep(settings.fake_load_seconds)
+        report("dit", "ready", None)
+        models = LoadedModels(
+            device=device,
+            dit_handler=fake_generator.FakeDitHandler(
+                device, settings.fake_seconds_per_audio_second, settings.fake_work
+            ),
+            llm_handler=None,
+            lm_model="",
+            max_batch_size=settings.batch_max_size,
+            api=GenerationApi(
+                fake_generator.generate_music,
+                fake_generator.GenerationParams,
+                fake_generator.GenerationConfig,
+            ),
+        )
+        lm_metadata_cache.set_model(models.lm_model)
+        warm_up(models, report)
+        return models
+
+    acestep_root = ensure_acestep_importable()
+
+    # --- 1. ACE-Step モジュールのインポート（sys.path 追加後） ---
+    from acestep.gpu_config import (
+        get_gpu_config,
+        get_recommended_lm_model,
+        set_global_gpu_config,
+    )
+    from acestep.handler import AceStepHandler
+    from acestep.inference import GenerationConfig, GenerationParams, generate_music
+    from acestep.llm_inference import LLMHandler
+    from acestep.model_downloader import get_checkpoints_dir
+
+    # --- 2. GPU 検出 ---
+    gpu_config = get_gpu_config()
+    set_global_gpu_config(gpu_config)
+    logger.info(
+        "GPU 検出完了: tier={}, memory={:.1f}GB",
+        gpu_config.tier,
+        gpu_config.gpu_memory_gb,
+    )
+
+    # --- 3. DiT と LLM ハンドラの初期化 ---
+    # checkpoint_dir には ACE-Step ルートではなく checkpoints ディレクトリを渡す。
+    checkpoint_dir = str(get_checkpoints_dir())
+    lm_model = settings.lm_model or get_recommended_lm_model(gpu_config) or ""
+    report("dit", "pending", None)
+    report("lm", "pending" if lm_model else "skipped", None)
+    report("warmup", "pending", None)
+
+    if settings.parallel_model_loading:
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="dit-loader") as executor:
+            dit_future = executor.submit(_load_dit, AceStepHandler, acestep_root, device, report)
+            llm_handler = _load_lm(LLMHandler, checkpoint_dir, lm_model, device, report)
+            dit_handler = dit_future.result()
+    else:
+        dit_handler = _load_dit(AceStepHandler, acestep_root, device, report)
+        llm_handler = _load_lm(LLMHandler, checkpoint_dir, lm_model, device, report)
+
+    # バッチサイズの上限は GPU ティアごとの推奨値とする
+    gpu_batch_limit = getattr(
+        gpu_config,
+        "max_batch_size_with_lm" if llm_handler else "max_batch_size_without_lm",
+        1,
+    )
+    models = LoadedModels(
+        device=device,
+        dit_handler=dit_handler,
+        llm_handler=llm_handler,
+        lm_model=lm_model if llm_handler else "",
+        max_batch_size=gpu_batch_limit,
+        api=GenerationApi(generate_music, GenerationParams, GenerationConfig),
+    )
+
+    # LM メタデータのキャッシュは、実際に読み込んだ LM ごとに分ける
+    lm_metadata_cache.set_model(models.lm_model)
+
+    # --- 4. ウォームアップ（torch.compile のコンパイルもここで行われる） ---
+    warm_up(models, report)
+    return models
+
+
+def _load_dit(handler_class: Any, acestep_root: str, device: str, report: LoadReporter) -> Any:
+    """DiT ハンドラを初期化する。"""
+    logger.info("DiT モデル初期化中 (config={}, device={})...", settings.dit_config, device)
+    report("dit", "loading", None)
+    try:
+        dit_handler = handler_class()
+        status_msg, ok = dit_handler.initialize_service(
+            project_root=acestep_root,
+            config_path=settings.dit_config,
+            device=device,
+        )
+    except Exception as e:
+        report("dit", "failed", str(e))
+        raise
+    if not ok:
+        logger.error("DiT モデルの初期化に失敗: {}", status_msg)
+        report("dit", "failed", str(status_msg))
+        raise RuntimeError(f"DiT モデルの初期化に失敗: {status_msg}")
+    logger.info("DiT モデル初期化完了: {}", status_msg)
+    if settings.compile_dit:
+        compile_dit(dit_handler, settings.compile_cache_path)
+    report("dit", "ready", None)
+    return dit_handler
+
+
+def _load_lm(
+    handler_class: Any,
+    checkpoint_dir: str,
+    lm_model: str,
+    device: str,
+    report: LoadReporter,
+) -> Optional[Any]:
+    """LLM ハンドラを初期化する。モデル未設定・初期化失敗の場合は None（DiT のみモード）。"""
+    if not lm_model:
+        logger.info("LLM モデル未設定のため、DiT のみモードで起動")
+        return None
+
+    logger.info("LLM 初期化中 (model={}, backend={})...", lm_model, settings.lm_backend)
+    report("lm", "loading", None)
+    try:
+        llm_handler = handler_class()
+        llm_status, llm_ok = llm_handler.initialize(
+            checkpoint_dir=checkpoint_dir,
+            lm_model_path=lm_model,
+            backend=settings.lm_backend,
+            device=device,
+        )
+    except Exception as e:
+        report("lm", "failed", str(e))
+        raise
+    if not llm_ok:
+        logger.warning("LLM の初期化に失敗（DiT のみモードで続行）: {}", llm_status)
+        report("lm", "failed", str(llm_status))
+        return None
+    logger.info("LLM 初期化完了: {}", llm_status)
+    report("lm", "ready", None)
+    return llm_handler
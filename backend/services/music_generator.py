@@ -1,19 +1,68 @@
 """ACE-Step 1.5 を使用した音楽生成のラッパー。"""
 
-from typing import TYPE_CHECKING, Callable, Optional
+import gc
+import os
+import random
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
 from loguru import logger
 
+from backend.services.audio_files import concat_mp3
+from backend.services.audio_seams import Mp3Joiner, mp3_encoding_error
 from backend.services.job_store import _JobRecord
+from backend.services.lm_cache import lm_metadata_cache
 
 if TYPE_CHECKING:
-    from acestep.handler import AceStepHandler
-    from acestep.llm_inference import LLMHandler
+    from acestep.inference import GenerationResult
+
+    from backend.services.audio_encoder import AudioEncoderPool
+    from backend.services.model_loader import LoadedModels
+
+
+# generate_music() が戻った直後に通知する進捗の説明文
+GENERATED_STAGE = "生成完了（ファイルを準備中）"
+
+# LM メタデータのうち、ジョブごとに決まるため GenerationParams に反映しない項目
+_FIXED_PARAMS = {"caption", "lyrics", "instrumental", "duration", "task_type", "thinking"}
+# LM メタデータのキー名と GenerationParams の引数名が異なるもの
+_METADATA_PARAM_ALIASES = {"language": "vocal_language"}
+
+
+class GenerationCancelled(Exception):
+    """生成中のジョブがすべてキャンセルされたときに、progress コールバックから送出する。"""
+
+
+def release_gpu_memory() -> None:
+    """打ち切った生成が確保していた GPU メモリを解放する。"""
+    gc.collect()
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    elif hasattr(torch, "mps") and hasattr(torch.mps, "empty_cache"):
+        try:
+            torch.mps.empty_cache()
+        except RuntimeError:
+            pass
+
+
+def batch_shape(job: _JobRecord) -> tuple[str, int, Optional[int], bool]:
+    """
+    バッチとしてまとめて生成できるかどうかの判定キーを返す。
+
+    ACE-Step の generate_music() は 1 回の呼び出しで GenerationParams を 1 つしか
+    受け取らないため、caption・duration・bpm が一致するジョブ同士のみ
+    同じ DiT 呼び出しにまとめられる（seed はジョブごとに変えられる）。
+    セグメント生成のジョブはバッチに含めない。
+    """
+    return (job.prompt, job.duration, job.bpm, job.segmented)
 
 
 def generate_and_save(
-    dit_handler: "AceStepHandler",
-    llm_handler: Optional["LLMHandler"],
+    models: "LoadedModels",
     job: _JobRecord,
     save_dir: str,
     progress_callback: Callable[[float, str], None],
@@ -25,8 +74,7 @@ def generate_and_save(
     生成には数十秒〜数分かかる（GPU 性能に依存）。
 
     Args:
-        dit_handler: 初期化済みの AceStepHandler インスタンス。
-        llm_handler: 初期化済みの LLMHandler インスタンス（None の場合は LM を使わない）。
+        models: load_models() で読み込んだモデルと生成 API（llm_handler が None なら LM を使わない）。
         job: 処理対象のジョブレコード。
         save_dir: MP3 ファイルの保存先ディレクトリ。
         progress_callback: 進捗更新コールバック。(value: float, desc: str) を受け取る。
@@ -37,22 +85,350 @@ def generate_and_save(
     Raises:
         RuntimeError: 音楽生成に失敗した場合。
     """
-    # `acestep` は遅延 import にする。main.py の import 時点で
-    # ACE-Step が未解決でも、この関数が呼ばれる頃には lifespan で準備済み。
-    from acestep.inference import (
-        GenerationConfig,
-        GenerationParams,
-        GenerationResult,
-        generate_music,
+    return generate_batch_and_save(models, [job], save_dir, progress_callback)[0]
+
+
+def generate_batch_and_save(
+    models: "LoadedModels",
+    jobs: list[_JobRecord],
+    save_dir: str,
+    progress_callback: Callable[[float, str], None],
+) -> list[str]:
+    """
+    batch_shape() が一致する複数ジョブを 1 回の DiT 呼び出しで生成し、MP3 として保存する。
+
+    Args:
+        models: load_models() で読み込んだモデルと生成 API（llm_handler が None なら LM を使わない）。
+        jobs: 処理対象のジョブレコード。batch_shape() がすべて一致していること。
+        save_dir: MP3 ファイルの保存先ディレクトリ。
+        progress_callback: 進捗更新コールバック。バッチ内の全ジョブ共通。
+
+    Returns:
+        jobs と同じ順序の MP3 ファイルの絶対パスのリスト。
+
+    Raises:
+        RuntimeError: 音楽生成に失敗した場合。
+    """
+    futures = _generate_batch(models, jobs, save_dir, progress_callback, None)
+    return [future.result() for future in futures]
+
+
+def _generate_batch(
+    models: "LoadedModels",
+    jobs: list[_JobRecord],
+    save_dir: str,
+    progress_callback: Callable[[float, str], None],
+    encoder: Optional["AudioEncoderPool"],
+) -> list["Future[str]"]:
+    """generate_batch_and_save() の本体。MP3 のパスを返す Future を jobs と同じ順序で返す。"""
+    job = jobs[0]
+    job_ids = [j.job_id for j in jobs]
+    logger.info(
+        "音楽生成開始: job_id={}, prompt={!r}, duration={}s, bpm={}, batch_size={}",
+        ",".join(job_ids),
+        job.prompt,
+        job.duration,
+        job.bpm,
+        len(jobs),
+    )
+
+    result = _generate(
+        models,
+        caption=job.prompt,
+        duration=job.duration,
+        bpm=job.bpm,
+        seeds=[j.seed for j in jobs],
+        save_dir=save_dir,
+        progress_callback=progress_callback,
+        log_id=",".join(job_ids),
+        encoder=encoder,
+    )
+
+    # result.audios はバッチ内の順序（= seeds の順序）で返る
+    futures = _saved_audio(result, len(jobs), save_dir, encoder)
+    for job_id, future in zip(job_ids, futures):
+        future.add_done_callback(lambda done, job_id=job_id: _log_saved(job_id, done))
+    return futures
+
+
+def generate_jobs_and_save(
+    models: "LoadedModels",
+    jobs: list[_JobRecord],
+    save_dir: str,
+    segment_seconds: int,
+    segment_crossfade_seconds: int,
+    progress_callback: Callable[[float, str], None],
+    segment_callback: Callable[[str], None],
+) -> list[str]:
+    """
+    ワーカーが取り出したバッチを生成し、MP3 の保存まで済ませる。
+
+    Returns:
+        jobs と同じ順序の MP3 ファイルの絶対パスのリスト。
+    """
+    futures = generate_jobs(
+        models,
+        jobs,
+        save_dir,
+        segment_seconds,
+        segment_crossfade_seconds,
+        progress_callback,
+        segment_callback,
+        encoder=None,
+    )
+    return [future.result() for future in futures]
+
+
+def generate_jobs(
+    models: "LoadedModels",
+    jobs: list[_JobRecord],
+    save_dir: str,
+    segment_seconds: int,
+    segment_crossfade_seconds: int,
+    progress_callback: Callable[[float, str], None],
+    segment_callback: Callable[[str], None],
+    encoder: Optional["AudioEncoderPool"],
+) -> list["Future[str]"]:
+    """
+    ワーカーが取り出したバッチを生成する。
+
+    セグメント生成のジョブ（常に 1 件のバッチ）は generate_segments_and_save() と、
+    それ以外は generate_batch_and_save() と同じ手順で生成する。
+    encoder を渡した場合、MP3 のエンコードと書き込みは encoder のプロセスに任せ、
+    GPU の処理が終わった時点で戻る。
+
+    Returns:
+        jobs と同じ順序の、MP3 ファイルの絶対パスを返す Future のリスト。
+    """
+    first = jobs[0]
+    if first.segmented and len(segment_durations(first.duration, segment_seconds)) > 1:
+        future = _generate_segments(
+            models,
+            first,
+            save_dir,
+            segment_seconds,
+            segment_crossfade_seconds,
+            progress_callback,
+            segment_callback,
+            encoder,
+        )
+        return [future]
+    return _generate_batch(models, jobs, save_dir, progress_callback, encoder)
+
+
+def segment_durations(duration: int, segment_seconds: int) -> list[int]:
+    """
+    曲全体の長さをセグメントごとの長さに分割する。
+
+    最後のセグメントが GenerateRequest の下限（10 秒）に満たない場合は、
+    直前のセグメントに含める。
+    """
+    if segment_seconds <= 0 or duration <= segment_seconds:
+        return [duration]
+    lengths = [segment_seconds] * (duration // segment_seconds)
+    remainder = duration - sum(lengths)
+    if remainder >= 10:
+        lengths.append(remainder)
+    else:
+        lengths[-1] += remainder
+    return lengths
+
+
+def generate_segments_and_save(
+    models: "LoadedModels",
+    job: _JobRecord,
+    save_dir: str,
+    segment_seconds: int,
+    segment_crossfade_seconds: int,
+    progress_callback: Callable[[float, str], None],
+    segment_callback: Callable[[str], None],
+) -> str:
+    """
+    長い曲を連続するセグメントに分けて生成し、1 つ完成するごとに通知する。
+
+    クライアントは最初のセグメントが完成した時点で再生を始められる。
+    すべてのセグメントが揃ったら、連結した MP3 を曲全体のファイルとして保存する。
+
+    各セグメントは前のセグメントを条件にせず、同じ caption・BPM で別々に生成する
+    （seed 指定時はセグメントごとに seed+index）。そのため継ぎ目で曲の流れが変わることがある。
+    継ぎ目は segment_crossfade_seconds 秒のクロスフェードでつなぎ、セグメントの MP3 は
+    1 本のストリームとしてエンコードし直す（連結しても継ぎ目に無音が入らない）。
+    numpy・soundfile で MP3 をエンコードできない環境では、クロスフェードせずにそのままつなぐ。
+
+    Args:
+        models: load_models() で読み込んだモデルと生成 API（llm_handler が None なら LM を使わない）。
+        job: 処理対象のジョブレコード。
+        save_dir: MP3 ファイルの保存先ディレクトリ。
+        segment_seconds: 1 セグメントの長さ（秒）。
+        segment_crossfade_seconds: セグメントの継ぎ目のクロスフェードの長さ（秒）。0 ならそのままつなぐ。
+        progress_callback: 曲全体に対する進捗を受け取るコールバック。
+        segment_callback: セグメントの MP3 パスを、完成した順に受け取るコールバック。
+
+    Returns:
+        全セグメントを連結した MP3 ファイルの絶対パス。
+
+    Raises:
+        RuntimeError: 音楽生成に失敗した場合。
+    """
+    future = _generate_segments(
+        models,
+        job,
+        save_dir,
+        segment_seconds,
+        segment_crossfade_seconds,
+        progress_callback,
+        segment_callback,
+        None,
     )
+    return future.result()
 
+
+def _generate_segments(
+    models: "LoadedModels",
+    job: _JobRecord,
+    save_dir: str,
+    segment_seconds: int,
+    segment_crossfade_seconds: int,
+    progress_callback: Callable[[float, str], None],
+    segment_callback: Callable[[str], None],
+    encoder: Optional["AudioEncoderPool"],
+) -> "Future[str]":
+    """
+    generate_segments_and_save() の本体。
+
+    encoder を渡した場合、セグメントのエンコードを待たずに次のセグメントの生成に進み、
+    エンコードが済んだものから順に通知する。連結の前に残りのエンコードを待つ。
+    """
+    lengths = segment_durations(job.duration, segment_seconds)
     logger.info(
-        "音楽生成開始: job_id={}, prompt={!r}, duration={}s, bpm={}",
+        "セグメント生成開始: job_id={}, prompt={!r}, duration={}s, segments={}",
         job.job_id,
         job.prompt,
         job.duration,
-        job.bpm,
+        lengths,
     )
+    joiner = _segment_joiner(segment_crossfade_seconds)
+    # 最後以外のセグメントは、次のセグメントと重ねる分だけ長く生成する
+    overlap = segment_crossfade_seconds if joiner is not None else 0
+
+    def _deliver(index: int, segment_path: str) -> None:
+        if joiner is not None:
+            joiner.rewrite(segment_path, last=index == len(lengths) - 1)
+        segment_callback(segment_path)
+
+    # 2 つ目以降のセグメントは、最初のセグメントで LM が決めた BPM に揃える
+    bpm = job.bpm
+    segment_futures: list[Future[str]] = []
+    notified = 0
+    for index, length in enumerate(lengths):
+
+        def _on_progress(value: float, stage: str, index: int = index) -> None:
+            progress_callback(
+                (index + value) / len(lengths),
+                f"セグメント {index + 1}/{len(lengths)}: {stage}",
+            )
+
+        result = _generate(
+            models,
+            caption=job.prompt,
+            duration=length + overlap if index < len(lengths) - 1 else length,
+            bpm=bpm,
+            # seed 指定時はセグメントごとにずらし、同じ内容の繰り返しを避ける
+            seeds=[job.seed + index if job.seed is not None else None],
+            save_dir=save_dir,
+            progress_callback=_on_progress,
+            log_id=f"{job.job_id}#{index}",
+            encoder=encoder,
+        )
+        if bpm is None:
+            bpm = _lm_bpm(result)
+
+        segment_futures += _saved_audio(result, 1, save_dir, encoder)
+        while notified < len(segment_futures) and segment_futures[notified].done():
+            _deliver(notified, segment_futures[notified].result())
+            notified += 1
+
+    segment_paths = [future.result() for future in segment_futures]
+    for index in range(notified, len(segment_paths)):
+        _deliver(index, segment_paths[index])
+
+    audio_path = os.path.join(save_dir, f"{job.job_id}.mp3")
+    concat_mp3(segment_paths, audio_path)
+    logger.info("セグメント生成完了: job_id={}, path={}", job.job_id, audio_path)
+    return _completed(audio_path)
+
+
+def _segment_joiner(crossfade_seconds: int) -> Optional[Mp3Joiner]:
+    """セグメントの継ぎ目をクロスフェードする Mp3Joiner を返す。無効またはエンコードできなければ None。"""
+    if crossfade_seconds <= 0:
+        return None
+    error = mp3_encoding_error()
+    if error is not None:
+        logger.warning("セグメントの継ぎ目をクロスフェードできないため、そのままつなぐ: {}", error)
+        return None
+    return Mp3Joiner(crossfade_seconds)
+
+
+def _saved_audio(
+    result: "GenerationResult",
+    count: int,
+    save_dir: str,
+    encoder: Optional["AudioEncoderPool"],
+) -> list["Future[str]"]:
+    """生成結果の先頭 count 個の音声について、MP3 のパスを返す Future を返す。"""
+    audios = result.audios[:count]
+    if encoder is None:
+        # generate_music() が保存済み
+        return [_completed(audio["path"]) for audio in audios]
+    return [encoder.submit(audio, save_dir) for audio in audios]
+
+
+def _completed(value: str) -> "Future[str]":
+    future: Future[str] = Future()
+    future.set_result(value)
+    return future
+
+
+def _log_saved(job_id: str, future: "Future[str]") -> None:
+    if not future.cancelled() and future.exception() is None:
+        logger.info("音楽生成完了: job_id={}, path={}", job_id, future.result())
+
+
+def _lm_bpm(result: "GenerationResult") -> Optional[int]:
+    """LM が決めた BPM を生成結果から取り出す。取得できなければ None。"""
+    extra = getattr(result, "extra_outputs", None) or {}
+    metadata = extra.get("lm_metadata") or {}
+    try:
+        return int(metadata["bpm"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _generate(
+    models: "LoadedModels",
+    *,
+    caption: str,
+    duration: int,
+    bpm: Optional[int],
+    seeds: list[Optional[int]],
+    save_dir: str,
+    progress_callback: Callable[[float, str], None],
+    log_id: str,
+    encoder: Optional["AudioEncoderPool"] = None,
+) -> "GenerationResult":
+    """
+    generate_music() を 1 回呼び出す。seeds の数がバッチサイズになる。
+
+    encoder を渡した場合は generate_music() に保存先を渡さず、波形だけを受け取る。
+
+    Raises:
+        RuntimeError: 音楽生成に失敗した場合。
+        GenerationCancelled: progress_callback がキャンセルを通知した場合。
+    """
+    # ACE-Step と代替生成器のどちらの API を使うかは、読み込み時に models.api に決まっている
+    llm_handler = models.llm_handler
+    params_class = models.api.params_class
+    config_class = models.api.config_class
 
     # --- 1. GenerationParams の構築 ---
     # caption: 音楽の説明文（ユーザーの prompt をそのまま使用）
@@ -60,63 +436,141 @@ def generate_and_save(
     # thinking: True（LM によるメタデータ自動生成を有効化）
     # duration: ユーザー指定の秒数
     # bpm: ユーザー指定 or None（None の場合 LM が自動決定）
-    params = GenerationParams(
-        caption=job.prompt,
+    params_kwargs: dict[str, Any] = dict(
+        caption=caption,
         lyrics="",
         instrumental=True,
-        duration=float(job.duration),
-        bpm=job.bpm,
+        duration=float(duration),
+        bpm=bpm,
         thinking=llm_handler is not None,
         task_type="text2music",
     )
+    # 同じ caption・bpm 指定で LM が生成済みのメタデータがあれば、LM の Phase 1 を省く。
+    # メタデータの推論だけを省けない（use_cot_metas のない）ACE-Step ではキャッシュを使わない
+    # （thinking=False にすると LM による音声コードの生成まで省かれ、出力が変わる）
+    metadata_key = (
+        lm_metadata_cache.key_for(caption, bpm)
+        if llm_handler is not None and "use_cot_metas" in _param_fields(params_class)
+        else None
+    )
+    cached_metadata = lm_metadata_cache.get(metadata_key) if metadata_key is not None else None
+    if cached_metadata is not None:
+        params_kwargs.update(_metadata_params(cached_metadata, params_class, params_kwargs))
+        logger.info("LM メタデータキャッシュヒット: job_id={}, metadata={}", log_id, cached_metadata)
+    params = params_class(**params_kwargs)
 
     # --- 2. GenerationConfig の構築 ---
-    # batch_size: 1（1リクエストにつき1曲生成）
+    # batch_size: seeds の数（1 ジョブにつき 1 曲生成）
     # audio_format: "mp3"（ブラウザ再生用）
-    # use_random_seed: seed 未指定ならランダム、指定なら固定
-    if job.seed is not None:
-        config = GenerationConfig(
-            batch_size=1,
+    # use_random_seed: すべて seed 未指定ならランダム。
+    #   1 つでも指定があれば、未指定の分にはここで乱数を割り当てて固定する
+    if any(seed is not None for seed in seeds):
+        config = config_class(
+            batch_size=len(seeds),
             use_random_seed=False,
-            seeds=[job.seed],
+            seeds=[
+                seed if seed is not None else random.randint(0, 2**31 - 1)
+                for seed in seeds
+            ],
             audio_format="mp3",
         )
     else:
-        config = GenerationConfig(
-            batch_size=1,
+        config = config_class(
+            batch_size=len(seeds),
             use_random_seed=True,
             audio_format="mp3",
         )
 
+    cancelled = False
+
     def _on_progress(value: float, desc: str | None = None, **_: object) -> None:
         """
         ACE-Step は progress(0.52, desc="...") のように keyword 引数で呼ぶ。
         バックエンド側では stage 文字列をそのまま JobStore に保存する。
         """
-        progress_callback(value, desc or "")
+        nonlocal cancelled
+        try:
+            progress_callback(value, desc or "")
+        except GenerationCancelled:
+            cancelled = True
+            raise
 
     # --- 3. 音楽生成の実行 ---
     # generate_music() は内部で以下の処理を行う:
     #   Phase 1（LM）: caption からメタデータ（BPM, キー等）を生成
     #   Phase 2（DiT）: メタデータをもとに音声波形を生成
     #   Phase 3（保存）: AudioSaver で MP3 にエンコードして save_dir に保存
-    result: GenerationResult = generate_music(
-        dit_handler=dit_handler,
+    #     （encoder を渡した場合は省き、呼び出し元が波形を encoder に渡す）
+    result = models.api.generate_music(
+        dit_handler=models.dit_handler,
         llm_handler=llm_handler,
         params=params,
         config=config,
-        save_dir=save_dir,
+        save_dir=save_dir if encoder is None else None,
         progress=_on_progress,
     )
 
     # --- 4. 結果の確認 ---
+    # generate_music() がコールバックの例外を捕捉して処理を続けた場合も打ち切りとして扱う
+    if cancelled:
+        for audio in result.audios or []:
+            _remove_quietly(audio.get("path"))
+        logger.info("音楽生成を打ち切った: job_id={}", log_id)
+        raise GenerationCancelled(log_id)
+
     if not result.success:
-        logger.error("音楽生成失敗: job_id={}, error={}", job.job_id, result.error)
+        logger.error("音楽生成失敗: job_id={}, error={}", log_id, result.error)
         raise RuntimeError(f"音楽生成に失敗: {result.error}")
 
-    if not result.audios:
+    if len(result.audios) < len(seeds):
         raise RuntimeError("音楽生成は成功したが、音声ファイルが見つからない")
 
-    audio_path = result.audios[0]["path"]
-    logger.info("音楽生成完了: job_id={}, path={}", job.job_id, audio_path)
-    return audio_path
+    if metadata_key is not None and cached_metadata is None:
+        metadata = (getattr(result, "extra_outputs", None) or {}).get("lm_metadata")
+        if isinstance(metadata, dict):
+            lm_metadata_cache.put(metadata_key, metadata)
+
+    # generate_music() が戻った時刻を、処理時間の内訳（job_timings）のために通知する
+    try:
+        progress_callback(1.0, GENERATED_STAGE)
+    except GenerationCancelled:
+        for audio in result.audios:
+            _remove_quietly(audio.get("path"))
+        raise
+
+    return result
+
+
+def _metadata_params(
+    metadata: dict[str, Any],
+    params_class: type,
+    params_kwargs: dict[str, Any],
+) -> dict[str, Any]:
+    """
+    キャッシュ済みの LM メタデータを GenerationParams の引数に変換する。
+
+    ユーザーが指定した値（bpm など）は上書きしない。use_cot_metas=False により、
+    LM はメタデータの推論だけを省いて音声コードの生成は続ける。
+    """
+    fields = _param_fields(params_class)
+    updates: dict[str, Any] = {}
+    for name, value in metadata.items():
+        name = _METADATA_PARAM_ALIASES.get(name, name)
+        if name in fields and name not in _FIXED_PARAMS and params_kwargs.get(name) in (None, ""):
+            updates[name] = value
+    updates["use_cot_metas"] = False
+    return updates
+
+
+def _param_fields(params_class: type) -> set[str]:
+    """GenerationParams の引数名（dataclass のフィールド名）を返す。"""
+    return set(getattr(params_class, "__dataclass_fields__", {}))
+
+
+def _remove_quietly(path: Optional[str]) -> None:
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
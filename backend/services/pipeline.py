@@ -0,0 +1,162 @@
+"""
+LM と DiT の 2 段パイプライン。
+
+generate_music() は 1 回の呼び出しの中で LM（メタデータ・音声コードの推論）と
+DiT（拡散・デコード）を順に実行するため、どちらかの間はもう一方が空いている。
+2 つのジョブを別スレッドで同時に実行し、進捗の説明文から今どちらの段にいるかを判定して、
+段ごとのロックを受け渡す。ジョブ N が DiT の間にジョブ N+1 の LM を進められる。
+
+各段に入れるのは 1 ジョブだけなので、段の間で待つジョブも含めて同時に扱うのは
+最大 2 ジョブ（段の数）に限られる。空き VRAM が少ない場合は、前のジョブの DiT が
+終わるまで次のジョブの LM を始めない。
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from loguru import logger
+
+from backend.services.metrics import stage_phase
+
+# 段の空きを待つ間に、キャンセルされていないかを確かめる間隔（秒）
+_WAIT_POLL_SECONDS = 0.5
+
+# LM の段の空きを待っている間の進捗の説明文
+LM_WAIT_STAGE = "前のジョブの LM 処理の完了を待っている"
+
+STAGES = ("lm", "dit")
+
+
+class StagePipeline:
+    """
+    段ごとのロックと、段ごとの稼働時間・重なった時間の集計を持つ。
+
+    gate() で得た _StageGate を 1 回の生成（1 スレッド）で使う。
+    """
+
+    def __init__(self, min_free_bytes: int) -> None:
+        """
+        Args:
+            min_free_bytes: 次のジョブの LM を DiT と同時に始めるのに必要な空き VRAM。
+                            0 以下なら確認しない。
+        """
+        self._min_free_bytes = min_free_bytes
+        self._locks = {stage: threading.Lock() for stage in STAGES}
+        self._stats_lock = threading.Lock()
+        self._active = {stage: 0 for stage in STAGES}
+        self._last = time.monotonic()
+        # 段ごとの稼働秒数、両方の段が同時に動いていた秒数、いずれかが動いていた秒数
+        self._seconds = {"lm": 0.0, "dit": 0.0, "overlap": 0.0, "busy": 0.0}
+
+    def gate(self, probe: Callable[[float, str], None]) -> "_StageGate":
+        """
+        1 回の生成の段の移動を管理するゲートを返す。
+
+        Args:
+            probe: 段の空きを待つ間に定期的に呼ぶ進捗コールバック。
+                   GenerationCancelled を送出すれば待つのをやめる。
+        """
+        return _StageGate(self, probe)
+
+    def stats(self) -> dict[str, float]:
+        """
+        段ごとの累計秒数を返す。
+
+        overlap は LM と DiT が同時に動いていた秒数で、直列に実行した場合に比べて
+        短縮できた時間にあたる（lm + dit - busy = overlap）。
+        """
+        with self._stats_lock:
+            self._advance(time.monotonic())
+            return dict(self._seconds)
+
+    # ------------------------------------------------------------------
+    # 内部処理（_StageGate から呼ばれる）
+    # ------------------------------------------------------------------
+    def _acquire(self, stage: str, probe: Callable[[], None]) -> None:
+        """段のロックを取る。空いていなければ probe を呼びながら待つ。"""
+        lock = self._locks[stage]
+        while not lock.acquire(timeout=_WAIT_POLL_SECONDS):
+            probe()
+        self._mark(stage, +1)
+
+    def _release(self, stage: str) -> None:
+        self._mark(stage, -1)
+        self._locks[stage].release()
+
+    def _wait_for_memory(self, probe: Callable[[], None]) -> None:
+        """空き VRAM が足りなければ、実行中の DiT が終わるまで待つ。"""
+        if self._active["dit"] == 0 or _enough_memory(self._min_free_bytes):
+            return
+        logger.info("空き VRAM が少ないため、前のジョブの DiT が終わってから LM を始める")
+        lock = self._locks["dit"]
+        while not lock.acquire(timeout=_WAIT_POLL_SECONDS):
+            probe()
+        lock.release()
+
+    def _mark(self, stage: str, delta: int) -> None:
+        with self._stats_lock:
+            self._advance(time.monotonic())
+            self._active[stage] += delta
+
+    def _advance(self, now: float) -> None:
+        """前回からの経過時間を、動いていた段に加算する。_stats_lock を保持した状態で呼ぶこと。"""
+        elapsed = now - self._last
+        self._last = now
+        lm, dit = self._active["lm"] > 0, self._active["dit"] > 0
+        if lm:
+            self._seconds["lm"] += elapsed
+        if dit:
+            self._seconds["dit"] += elapsed
+        if lm and dit:
+            self._seconds["overlap"] += elapsed
+        if lm or dit:
+            self._seconds["busy"] += elapsed
+
+
+class _StageGate:
+    """1 回の生成が今いる段を追跡し、段が変わるたびにロックを持ち替える。"""
+
+    def __init__(self, pipeline: StagePipeline, probe: Callable[[float, str], None]) -> None:
+        self._pipeline = pipeline
+        self._probe = probe
+        self.stage: Optional[str] = None
+
+    def start(self) -> None:
+        """生成の開始前に LM の段に入る。"""
+        self._enter("lm", lambda: self._probe(0.0, LM_WAIT_STAGE))
+
+    def on_progress(self, value: float, desc: str) -> None:
+        """進捗の説明文から段を判定し、変わっていれば移る（デコード・保存は DiT の段に含める）。"""
+        stage = "lm" if stage_phase(desc) == "lm" else "dit"
+        self._enter(stage, lambda: self._probe(value, desc))
+
+    def close(self) -> None:
+        """生成の終了時（失敗・キャンセルを含む）に今いる段を出る。"""
+        if self.stage is not None:
+            self._pipeline._release(self.stage)
+            self.stage = None
+
+    def _enter(self, stage: str, probe: Callable[[], None]) -> None:
+        if stage == self.stage:
+            return
+        # 2 つのロックを同時に持たないよう、先に今の段を出る（デッドロックを防ぐ）
+        self.close()
+        if stage == "lm":
+            self._pipeline._wait_for_memory(probe)
+        self._pipeline._acquire(stage, probe)
+        self.stage = stage
+
+
+def _enough_memory(min_free_bytes: int) -> bool:
+    """CUDA の空きメモリが min_free_bytes 以上か。CUDA 以外では確認せずに True。"""
+    if min_free_bytes <= 0:
+        return True
+    try:
+        import torch
+    except ImportError:
+        return True
+    if not torch.cuda.is_available():
+        return True
+    free, _ = torch.cuda.mem_get_info()
+    return free >= min_free_bytes
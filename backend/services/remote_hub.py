@@ -0,0 +1,440 @@
+"""
+リモートワーカーへのジョブの貸し出し（コーディネーター側）。
+
+推論ノードは `oto-backend worker` で起動し、HTTP でジョブを借りに来る（プル型）。
+貸し出し（リース）には有効期限があり、ワーカーは進捗かハートビートを送って延長する。
+期限が切れたリースのジョブは、ワーカーが落ちたものとみなして実行待ちに戻す。
+
+RemoteWorkerHub は LocalGenerator / WorkerPool と同じ acquire() / run() / release()
+を持つため、バッチの組み立て・状態更新・キャンセルは _queue_worker の処理をそのまま使う。
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Optional
+
+from loguru import logger
+
+from backend.services.job_store import _JobRecord
+from backend.services.music_generator import GenerationCancelled
+from backend.services.worker_pool import WorkerLost
+
+# 期限切れのリースを確認する間隔（秒）
+_EXPIRY_CHECK_SECONDS = 1.0
+# アップロードをまとめてファイルに書き込む単位（バイト）
+_UPLOAD_WRITE_BYTES = 1024**2
+
+
+class UploadTooLarge(Exception):
+    """アップロードされたファイルが上限のバイト数を超えた。"""
+
+
+class _Slot:
+    """acquire() で確保した実行権。run() でワーカーに渡したら handed になる。"""
+
+    __slots__ = ("handed",)
+
+    def __init__(self) -> None:
+        self.handed = False
+
+
+class _Poll:
+    """ジョブを待っているワーカーからのリクエスト（ロングポーリング）。"""
+
+    __slots__ = ("worker_id", "future")
+
+    def __init__(self, worker_id: str, future: "asyncio.Future[_Lease]") -> None:
+        self.worker_id = worker_id
+        self.future = future
+
+
+class _Lease:
+    """ワーカーに貸し出したバッチ。"""
+
+    __slots__ = (
+        "lease_id",
+        "worker_id",
+        "jobs",
+        "expires_at",
+        "future",
+        "progress_callback",
+        "segment_callback",
+        "results",
+    )
+
+    def __init__(
+        self,
+        worker_id: str,
+        jobs: list[_JobRecord],
+        expires_at: float,
+        future: "asyncio.Future[list[str]]",
+        progress_callback: Callable[[float, str], None],
+        segment_callback: Callable[[str], None],
+    ) -> None:
+        self.lease_id = str(uuid.uuid4())
+        self.worker_id = worker_id
+        self.jobs = jobs
+        self.expires_at = expires_at
+        self.future = future
+        self.progress_callback = progress_callback
+        self.segment_callback = segment_callback
+        # アップロード済みのジョブ ID → 保存先のパス
+        self.results: dict[str, str] = {}
+
+
+class _RemoteWorker:
+    """接続してきたワーカーの状態（ヘルスチェック用）。"""
+
+    __slots__ = ("worker_id", "device", "last_seen", "job_ids", "completed", "lost", "last_error")
+
+    def __init__(self, worker_id: str, device: str) -> None:
+        self.worker_id = worker_id
+        self.device = device
+        self.last_seen = time.monotonic()
+        self.job_ids: list[str] = []
+        self.completed = 0
+        # 最後のリースが期限切れになった（次に接続してくるまで）
+        self.lost = False
+        self.last_error: Optional[str] = None
+
+
+class RemoteWorkerHub:
+    """
+    リモートワーカーにバッチを貸し出し、結果のアップロードを待つ。
+
+    すべてのメソッドはイベントループ上で呼ぶこと。
+    """
+
+    def __init__(
+        self,
+        save_dir: str,
+        lm_model: str,
+        max_batch_size: int,
+        lease_seconds: float,
+        max_attempts: int,
+        max_upload_bytes: int = 0,
+    ) -> None:
+        """
+        Args:
+            save_dir: アップロードされた MP3 の保存先。
+            lm_model: ワーカーが使う LM のモデル名（結果キャッシュのキーに含める）。
+            max_batch_size: 1 回の貸し出しにまとめるジョブ数の上限。
+            lease_seconds: リースの有効期限（秒）。進捗・ハートビートのたびに延長する。
+            max_attempts: 期限切れで実行待ちに戻す回数の上限。
+            max_upload_bytes: アップロードできる MP3 1 ファイルのバイト数の上限。0 以下なら無制限。
+        """
+        self.lm_model = lm_model
+        self.max_batch_size = max_batch_size
+        self.lease_seconds = lease_seconds
+        self._save_dir = save_dir
+        self._max_attempts = max_attempts
+        self._max_upload_bytes = max_upload_bytes
+        self._polls: deque[_Poll] = deque()
+        self._leases: dict[str, _Lease] = {}
+        self._workers: dict[str, _RemoteWorker] = {}
+        # 期限切れになった回数（ジョブ ID ごと）
+        self._attempts: dict[str, int] = {}
+        # acquire() 済みで、まだワーカーに渡していない実行権の数
+        self._reserved = 0
+        self._changed = asyncio.Event()
+        self._expiry_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """期限切れのリースを回収するタスクを起動する。"""
+        self._expiry_task = asyncio.create_task(self._expire_loop())
+        logger.info("リモートワーカーの受付を開始 (lease={}s)", self.lease_seconds)
+
+    # ------------------------------------------------------------------
+    # _queue_worker から使うインターフェース
+    # ------------------------------------------------------------------
+    async def acquire(self) -> _Slot:
+        """ジョブを待っているワーカーが現れるまで待ち、実行権を確保する。"""
+        while len(self._polls) <= self._reserved:
+            self._changed.clear()
+            await self._changed.wait()
+        self._reserved += 1
+        return _Slot()
+
+    def release(self, slot: _Slot) -> None:
+        """acquire() で確保した実行権を返す。"""
+        if not slot.handed:
+            slot.handed = True
+            self._reserved -= 1
+            self._changed.set()
+
+    async def run(
+        self,
+        slot: _Slot,
+        batch: list[_JobRecord],
+        progress_callback: Callable[[float, str], None],
+        segment_callback: Callable[[str], None],
+    ) -> list[str]:
+        """
+        バッチをワーカーに貸し出し、すべての MP3 がアップロードされるまで待つ。
+
+        acquire() の後にワーカーのリクエストがタイムアウトしていた場合は、
+        次にジョブを待ちに来たワーカーに渡す。
+
+        Raises:
+            GenerationCancelled: ワーカーが生成を中断した場合。
+            WorkerLost: リースが期限切れになった場合（ジョブは実行待ちに戻す）。
+            RuntimeError: 生成に失敗した場合、または期限切れが上限回数に達した場合。
+        """
+        while not self._polls:
+            self._changed.clear()
+            await self._changed.wait()
+        poll = self._polls.popleft()
+        self.release(slot)
+
+        loop = asyncio.get_running_loop()
+        lease = _Lease(
+            worker_id=poll.worker_id,
+            jobs=batch,
+            expires_at=time.monotonic() + self.lease_seconds,
+            future=loop.create_future(),
+            progress_callback=progress_callback,
+            segment_callback=segment_callback,
+        )
+        self._leases[lease.lease_id] = lease
+        worker = self._workers[poll.worker_id]
+        worker.job_ids = [record.job_id for record in batch]
+        poll.future.set_result(lease)
+        logger.info(
+            "ジョブを貸し出し: worker={}, lease={}, job_id={}",
+            poll.worker_id,
+            lease.lease_id,
+            ",".join(worker.job_ids),
+        )
+
+        try:
+            audio_paths = await lease.future
+        except WorkerLost:
+            raise
+        except Exception as e:
+            if not isinstance(e, GenerationCancelled):
+                worker.last_error = str(e)
+            self._forget_attempts(batch)
+            raise
+        else:
+            worker.completed += 1
+            self._forget_attempts(batch)
+            return audio_paths
+        finally:
+            self._leases.pop(lease.lease_id, None)
+            worker.job_ids = []
+
+    def health(self) -> list[dict[str, Any]]:
+        """接続してきたワーカーごとの状態を返す。"""
+        now = time.monotonic()
+        polling = {poll.worker_id for poll in self._polls}
+        workers = []
+        for worker in self._workers.values():
+            if worker.job_ids:
+                state = "busy"
+            elif worker.worker_id in polling:
+                state = "idle"
+            elif worker.lost or now - worker.last_seen > self.lease_seconds:
+                state = "offline"
+            else:
+                state = "idle"
+            workers.append(
+                {
+                    "worker_id": worker.worker_id,
+                    "device": worker.device,
+                    "state": state,
+                    "pid": None,
+                    "job_ids": list(worker.job_ids),
+                    "completed": worker.completed,
+                    "restarts": 0,
+                    "last_error": worker.last_error,
+                }
+            )
+        return workers
+
+    async def close(self) -> None:
+        """回収タスクを止め、待機中のワーカーには空の応答を返す。"""
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+        for lease in self._leases.values():
+            if not lease.future.done():
+                lease.future.set_exception(WorkerLost("コーディネーターが停止した"))
+        while self._polls:
+            poll = self._polls.popleft()
+            if not poll.future.done():
+                poll.future.cancel()
+
+    # ------------------------------------------------------------------
+    # ワーカー向け API（routers/workers.py）から使うインターフェース
+    # ------------------------------------------------------------------
+    async def lease(self, worker_id: str, device: str, wait_seconds: float) -> Optional[_Lease]:
+        """
+        ジョブを借りに来たワーカーを待たせ、バッチが割り当てられたらそのリースを返す。
+
+        Returns:
+            貸し出したリース。wait_seconds 以内に割り当てられなければ None。
+        """
+        worker = self._workers.get(worker_id)
+        if worker is None:
+            worker = self._workers[worker_id] = _RemoteWorker(worker_id, device)
+            logger.info("リモートワーカー登録: worker={}, device={}", worker_id, device)
+        worker.device = device
+        worker.last_seen = time.monotonic()
+        worker.lost = False
+
+        poll = _Poll(worker_id, asyncio.get_running_loop().create_future())
+        self._polls.append(poll)
+        self._changed.set()
+        try:
+            await asyncio.wait({poll.future}, timeout=wait_seconds)
+        finally:
+            if not poll.future.done():
+                self._polls.remove(poll)
+            worker.last_seen = time.monotonic()
+        if poll.future.cancelled():
+            return None
+        return poll.future.result()
+
+    def touch(self, lease_id: str) -> Optional[_Lease]:
+        """リースの期限を延長する。期限切れ・終了済みなら None を返す。"""
+        lease = self._leases.get(lease_id)
+        if lease is None or lease.future.done():
+            return None
+        now = time.monotonic()
+        lease.expires_at = now + self.lease_seconds
+        self._workers[lease.worker_id].last_seen = now
+        return lease
+
+    def report_progress(self, lease: _Lease, progress: float, stage: str) -> bool:
+        """
+        進捗を反映する。
+
+        Returns:
+            バッチのジョブがすべてキャンセルされ、生成を中断すべきなら True。
+        """
+        try:
+            lease.progress_callback(progress, stage)
+        except GenerationCancelled:
+            return True
+        return False
+
+    async def store_segment(self, lease: _Lease, job_id: str, chunks: AsyncIterator[bytes]) -> None:
+        """アップロードされたセグメントを保存し、ジョブに追加する。"""
+        self._check_job(lease, job_id)
+        path = await self._receive_file(chunks)
+        lease.segment_callback(path)
+
+    async def store_audio(self, lease: _Lease, job_id: str, chunks: AsyncIterator[bytes]) -> None:
+        """アップロードされた MP3 を保存する。バッチのすべてが揃ったら完了とする。"""
+        self._check_job(lease, job_id)
+        path = await self._receive_file(chunks)
+        if lease.future.done():
+            # 保存中に期限切れになった
+            await asyncio.to_thread(_remove_quietly, path)
+            return
+        previous = lease.results.pop(job_id, None)
+        if previous is not None:
+            await asyncio.to_thread(_remove_quietly, previous)
+        lease.results[job_id] = path
+        if len(lease.results) == len(lease.jobs):
+            lease.future.set_result([lease.results[record.job_id] for record in lease.jobs])
+
+    def fail(self, lease: _Lease, error: str, cancelled: bool) -> None:
+        """ワーカーが報告した失敗・中断を反映する。"""
+        if lease.future.done():
+            return
+        self._discard_results(lease)
+        if cancelled:
+            job_ids = ",".join(record.job_id for record in lease.jobs)
+            lease.future.set_exception(GenerationCancelled(job_ids))
+        else:
+            lease.future.set_exception(RuntimeError(error))
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+    async def _expire_loop(self) -> None:
+        while True:
+            await asyncio.sleep(_EXPIRY_CHECK_SECONDS)
+            now = time.monotonic()
+            for lease in list(self._leases.values()):
+                if lease.expires_at < now and not lease.future.done():
+                    self._expire(lease)
+
+    def _expire(self, lease: _Lease) -> None:
+        """期限切れのリースを打ち切る。上限回数までは実行待ちに戻させる。"""
+        worker = self._workers[lease.worker_id]
+        worker.lost = True
+        worker.last_error = "リースの期限切れ（応答なし）"
+        self._discard_results(lease)
+
+        attempts = 0
+        for record in lease.jobs:
+            attempts = max(attempts, self._attempts.get(record.job_id, 0) + 1)
+            self._attempts[record.job_id] = attempts
+        logger.warning(
+            "リースの期限切れ: worker={}, lease={}, 回数={}",
+            lease.worker_id,
+            lease.lease_id,
+            attempts,
+        )
+        if attempts >= self._max_attempts:
+            self._forget_attempts(lease.jobs)
+            lease.future.set_exception(
+                RuntimeError(f"ワーカーの応答が {attempts} 回途絶えたため中止した")
+            )
+        else:
+            lease.future.set_exception(WorkerLost(f"ワーカー {lease.worker_id} の応答が途絶えた"))
+
+    def _forget_attempts(self, jobs: list[_JobRecord]) -> None:
+        for record in jobs:
+            self._attempts.pop(record.job_id, None)
+
+    def _discard_results(self, lease: _Lease) -> None:
+        """完了前に打ち切ったリースの、アップロード済みのファイルを削除する。"""
+        for path in lease.results.values():
+            _remove_quietly(path)
+        lease.results.clear()
+
+    @staticmethod
+    def _check_job(lease: _Lease, job_id: str) -> None:
+        if all(record.job_id != job_id for record in lease.jobs):
+            raise KeyError(job_id)
+
+    async def _receive_file(self, chunks: AsyncIterator[bytes]) -> str:
+        """
+        アップロードを一時ファイルに書き込み、受け取り終えたら MP3 のパスに置き換えて返す。
+
+        上限のバイト数を超えた時点で受け取りをやめ、一時ファイルを消して UploadTooLarge を送出する。
+        """
+        path = os.path.join(self._save_dir, f"{uuid.uuid4()}.mp3")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        f = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            received = 0
+            buffer = bytearray()
+            async for chunk in chunks:
+                received += len(chunk)
+                if 0 < self._max_upload_bytes < received:
+                    raise UploadTooLarge(f"{self._max_upload_bytes} バイトを超えている")
+                buffer += chunk
+                if len(buffer) >= _UPLOAD_WRITE_BYTES:
+                    await asyncio.to_thread(f.write, bytes(buffer))
+                    buffer.clear()
+            await asyncio.to_thread(f.write, bytes(buffer))
+        except BaseException:
+            f.close()
+            _remove_quietly(tmp_path)
+            raise
+        f.close()
+        await asyncio.to_thread(os.replace, tmp_path, path)
+        return path
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,265 @@
+"""
+リモートワーカー（推論ノード側）。`oto-backend worker` から起動する。
+
+モデルを読み込み、公開 API は立てずにコーディネーターからジョブを借りて生成する。
+進捗はコーディネーターに送り返し、完成した MP3 はアップロードした後に削除する。
+通信には標準ライブラリの urllib だけを使う。
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Optional
+
+from loguru import logger
+
+from backend.config import settings
+from backend.services.job_store import _JobRecord
+from backend.services.model_loader import LoadedModels, load_models
+from backend.services.music_generator import (
+    GenerationCancelled,
+    generate_jobs_and_save,
+    release_gpu_memory,
+)
+
+# ジョブを借りるときに、コーディネーターに待ってもらう秒数
+_LEASE_WAIT_SECONDS = 30.0
+# コーディネーターに接続できないときに再試行するまでの秒数
+_RETRY_SECONDS = 5.0
+# 進捗を送る最小間隔（秒）。ACE-Step は拡散ステップごとに通知するため間引く
+_PROGRESS_INTERVAL_SECONDS = 0.5
+
+
+class _LeaseGone(Exception):
+    """リースが期限切れなどでコーディネーターから消えた。"""
+
+
+class _CoordinatorClient:
+    """コーディネーターのワーカー用 API を呼び出す。"""
+
+    def __init__(self, base_url: str, token: str) -> None:
+        self._base_url = base_url.rstrip("/")
+        self._token = token
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[dict[str, Any]] = None,
+        data: Optional[bytes] = None,
+        timeout: float = 30.0,
+    ) -> Optional[dict[str, Any]]:
+        """
+        API を呼び出し、JSON のレスポンスを返す。204 の場合は None。
+
+        Raises:
+            _LeaseGone: 404 が返った場合。
+            urllib.error.URLError: 接続できない場合、または 404 以外のエラー。
+        """
+        headers = {}
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        elif data is not None:
+            headers["Content-Type"] = "audio/mpeg"
+        if self._token:
+            headers["Authorization"] = f"Bearer {self._token}"
+        req = urllib.request.Request(
+            self._base_url + path,
+            data=data,
+            headers=headers,
+            method=method,
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as res:
+                if res.status == 204:
+                    return None
+                return json.loads(res.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                raise _LeaseGone(e.reason) from e
+            raise
+
+
+class _Heartbeat:
+    """生成中、一定間隔でリースを延長する。進捗の送信が止まる LM の推論中も期限を保つ。"""
+
+    def __init__(self, client: _CoordinatorClient, lease_id: str, interval: float) -> None:
+        self._client = client
+        self._lease_id = lease_id
+        self._interval = interval
+        self._stop = threading.Event()
+        # リースが失われた（これ以上生成を続けても結果を受け取ってもらえない）
+        self.lost = False
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self._client.request("POST", f"/api/workers/leases/{self._lease_id}/progress", body={})
+            except _LeaseGone:
+                logger.warning("リースが失われた: lease={}", self._lease_id)
+                self.lost = True
+                return
+            except (urllib.error.URLError, OSError) as e:
+                logger.warning("ハートビートの送信に失敗: {}", e)
+
+
+def run_remote_worker(coordinator_url: str, device: str, worker_id: str) -> None:
+    """
+    モデルを読み込み、コーディネーターからジョブを借りて生成し続ける。戻らない。
+
+    Args:
+        coordinator_url: コーディネーターの URL（例: "http://10.0.0.1:8000"）。
+        device: モデルを読み込むデバイス。
+        worker_id: コーディネーターに名乗る識別子。
+    """
+    client = _CoordinatorClient(coordinator_url, settings.worker_token)
+    settings.audio_output_path.mkdir(parents=True, exist_ok=True)
+    models = load_models(device)
+    logger.info("リモートワーカー起動: worker={}, coordinator={}", worker_id, coordinator_url)
+
+    while True:
+        try:
+            lease = client.request(
+                "POST",
+                "/api/workers/lease",
+                body={"worker_id": worker_id, "device": device, "wait_seconds": _LEASE_WAIT_SECONDS},
+                timeout=_LEASE_WAIT_SECONDS + 30,
+            )
+        except (urllib.error.URLError, OSError, _LeaseGone) as e:
+            logger.warning("コーディネーターに接続できない（{}s 後に再試行）: {}", _RETRY_SECONDS, e)
+            time.sleep(_RETRY_SECONDS)
+            continue
+        if lease is None:
+            continue
+        _process_lease(client, models, lease)
+
+
+def _process_lease(client: _CoordinatorClient, models: LoadedModels, lease: dict[str, Any]) -> None:
+    """借りたバッチを生成し、結果をアップロードする。"""
+    lease_id = lease["lease_id"]
+    base = f"/api/workers/leases/{lease_id}"
+    jobs = [_JobRecord.from_row(row) for row in lease["jobs"]]
+    job_ids = [record.job_id for record in jobs]
+    logger.info("ジョブを借りた: lease={}, job_id={}", lease_id, ",".join(job_ids))
+
+    last_sent = 0.0
+
+    def _on_progress(progress: float, stage: str) -> None:
+        nonlocal last_sent
+        if heartbeat.lost:
+            raise GenerationCancelled(",".join(job_ids))
+        now = time.monotonic()
+        if now - last_sent < _PROGRESS_INTERVAL_SECONDS and progress < 1.0:
+            return
+        last_sent = now
+        try:
+            status = client.request("POST", f"{base}/progress", body={"progress": progress, "stage": stage})
+        except _LeaseGone:
+            heartbeat.lost = True
+            raise GenerationCancelled(",".join(job_ids))
+        except (urllib.error.URLError, OSError) as e:
+            logger.warning("進捗の送信に失敗: {}", e)
+            return
+        if status and status.get("cancelled"):
+            raise GenerationCancelled(",".join(job_ids))
+
+    # セグメントは最後に連結するため、生成が終わるまで残しておく
+    segment_paths: list[str] = []
+
+    def _on_segment(path: str) -> None:
+        segment_paths.append(path)
+        _upload(client, f"{base}/jobs/{jobs[0].job_id}/segments", path, remove=False)
+
+    with _Heartbeat(client, lease_id, interval=lease["lease_seconds"] / 3) as heartbeat:
+        try:
+            audio_paths = _generate_in_chunks(
+                models,
+                jobs,
+                lease["segment_seconds"],
+                lease.get("segment_crossfade_seconds", 0),
+                _on_progress,
+                _on_segment,
+            )
+        except GenerationCancelled:
+            logger.info("生成を中断: lease={}", lease_id)
+            release_gpu_memory()
+            _report_failure(client, base, "", cancelled=True)
+            return
+        except Exception as e:
+            logger.exception("生成に失敗: lease={}", lease_id)
+            release_gpu_memory()
+            _report_failure(client, base, str(e), cancelled=False)
+            return
+        finally:
+            for path in segment_paths:
+                _remove_quietly(path)
+
+        try:
+            for record, path in zip(jobs, audio_paths):
+                _upload(client, f"{base}/jobs/{record.job_id}/audio", path)
+        except (_LeaseGone, urllib.error.URLError, OSError) as e:
+            logger.warning("結果のアップロードに失敗: lease={}, error={}", lease_id, e)
+            for path in audio_paths:
+                _remove_quietly(path)
+            return
+    logger.info("ジョブ完了: lease={}", lease_id)
+
+
+def _generate_in_chunks(
+    models: LoadedModels,
+    jobs: list[_JobRecord],
+    segment_seconds: int,
+    segment_crossfade_seconds: int,
+    progress_callback: Any,
+    segment_callback: Any,
+) -> list[str]:
+    """このノードのバッチサイズ上限を超える場合は、分けて順に生成する。"""
+    size = max(1, models.max_batch_size)
+    audio_paths: list[str] = []
+    for start in range(0, len(jobs), size):
+        audio_paths += generate_jobs_and_save(
+            models,
+            jobs[start:start + size],
+            str(settings.audio_output_path),
+            segment_seconds,
+            segment_crossfade_seconds,
+            progress_callback,
+            segment_callback,
+        )
+    return audio_paths
+
+
+def _upload(client: _CoordinatorClient, path: str, file_path: str, remove: bool = True) -> None:
+    """MP3 をアップロードする。remove が True ならローカルのファイルを削除する。"""
+    with open(file_path, "rb") as f:
+        data = f.read()
+    client.request("PUT", path, data=data, timeout=120)
+    if remove:
+        _remove_quietly(file_path)
+
+
+def _report_failure(client: _CoordinatorClient, base: str, error: str, cancelled: bool) -> None:
+    try:
+        client.request("POST", f"{base}/fail", body={"error": error, "cancelled": cancelled})
+    except (_LeaseGone, urllib.error.URLError, OSError) as e:
+        logger.warning("失敗の報告に失敗: {}", e)
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
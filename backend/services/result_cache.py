@@ -0,0 +1,220 @@
+"""生成結果のディスクキャッシュ。同一リクエストの再生成を避ける。"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+
+def link_or_copy(src: str, dst: str) -> None:
+    """
+    src を dst にハードリンクする。別ファイルシステム等でリンクできない場合はコピーする。
+
+    ハードリンクであれば、片方を os.remove() してももう片方の実体は残る。
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class ResultCache:
+    """
+    生成済み MP3 を内容アドレス（リクエスト + モデル設定のハッシュ）で保持するキャッシュ。
+
+    JobStore の TTL とは独立しており、バイト数の上限を超えたときに
+    最も長く参照されていないエントリから削除する（LRU）。
+    seed が指定されたリクエストのみが対象である。seed 未指定のリクエストは
+    毎回異なる曲を期待しているため、キャッシュしない。
+
+    すべてのパブリックメソッドはスレッドセーフである。
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int, model_tag: Optional[str]) -> None:
+        """
+        Args:
+            cache_dir: キャッシュファイルの保存先ディレクトリ。
+            max_bytes: キャッシュ全体のバイト数上限。0 以下ならキャッシュを無効化する。
+            model_tag: モデル設定を表す文字列（DiT 設定名・LM モデル名）。キーに含める。
+                       モデルの読み込み中で未確定なら None（set_model_tag() で後から設定する）。
+        """
+        self._dir = cache_dir
+        self._max_bytes = max_bytes
+        self._model_tag = model_tag
+        self._lock = threading.Lock()
+        # key → ファイルサイズ。末尾ほど最近参照されたエントリ。
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        if self.enabled:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            self._load_existing()
+
+    @property
+    def enabled(self) -> bool:
+        """キャッシュが有効かどうか。"""
+        return self._max_bytes > 0
+
+    def set_model_tag(self, model_tag: str) -> None:
+        """モデルの読み込みが終わり、キーに含めるモデル設定が確定した。"""
+        self._model_tag = model_tag
+
+    def key_for(
+        self,
+        prompt: str,
+        duration: int,
+        bpm: Optional[int],
+        seed: Optional[int],
+        segmented: bool = False,
+    ) -> Optional[str]:
+        """
+        生成パラメータからキャッシュキーを計算する。
+
+        キャッシュが無効化されていてもキーは計算する（実行中ジョブの相乗り判定にも使うため）。
+
+        Returns:
+            SHA-256 の16進文字列。seed 未指定（結果が決定的でない）、
+            またはモデルの読み込み中でモデル設定が未確定なら None。
+        """
+        if seed is None or self._model_tag is None:
+            return None
+        payload = json.dumps(
+            [prompt, duration, bpm, seed, segmented, self._model_tag],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def fetch(self, key: str, dest_path: str) -> bool:
+        """
+        キャッシュ済みの音声を dest_path に取り出す。
+
+        Args:
+            key: key_for() で計算したキャッシュキー。
+            dest_path: 取り出し先のパス（ジョブ固有のファイル名）。
+
+        Returns:
+            ヒットした場合は True、ミスの場合は False。
+        """
+        if not self.enabled:
+            return False
+        path = self._path(key)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return False
+            self._entries.move_to_end(key)
+
+        try:
+            link_or_copy(str(path), dest_path)
+            # 再起動後も LRU 順序を復元できるよう、mtime を参照時刻として更新する
+            os.utime(path)
+        except FileNotFoundError:
+            # 取り出しの直前に削除された場合はミスとして扱う
+            with self._lock:
+                self._forget(key)
+                self.misses += 1
+            return False
+
+        with self._lock:
+            self.hits += 1
+        logger.info("結果キャッシュヒット: key={}", key[:12])
+        return True
+
+    def store(self, key: str, audio_path: str) -> None:
+        """
+        生成済みの音声をキャッシュに登録し、上限を超えた分を LRU で削除する。
+
+        Args:
+            key: key_for() で計算したキャッシュキー。
+            audio_path: 生成された MP3 ファイルのパス。
+        """
+        if not self.enabled:
+            return
+        path = self._path(key)
+        size = os.path.getsize(audio_path)
+        if size > self._max_bytes:
+            return
+
+        tmp_path = path.with_suffix(".tmp")
+        link_or_copy(audio_path, str(tmp_path))
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = size
+            self._total_bytes += size
+            evicted = self._evict_locked()
+
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except FileNotFoundError:
+                pass
+        if evicted:
+            logger.info("結果キャッシュから {} 件を削除した", len(evicted))
+
+    def stats(self) -> dict[str, int | float]:
+        """ヒット数・ミス数・使用量を返す。"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self._max_bytes,
+            }
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+    def _path(self, key: str) -> Path:
+        return self._dir / f"{key}.mp3"
+
+    def _forget(self, key: str) -> None:
+        """エントリを索引から外す。ロックを保持した状態で呼ぶこと。"""
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict_locked(self) -> list[str]:
+        """上限を超えた分のキーを索引から外して返す。ロックを保持した状態で呼ぶこと。"""
+        evicted: list[str] = []
+        while self._total_bytes > self._max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            evicted.append(key)
+        return evicted
+
+    def _load_existing(self) -> None:
+        """起動時に既存のキャッシュファイルを mtime 順に索引へ登録する。"""
+        files = []
+        for path in self._dir.glob("*.mp3"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+        evicted = self._evict_locked()
+        for key in evicted:
+            self._path(key).unlink(missing_ok=True)
+        if self._entries:
+            logger.info(
+                "結果キャッシュを復元: {} 件, {:.1f}MB",
+                len(self._entries),
+                self._total_bytes / (1024**2),
+            )
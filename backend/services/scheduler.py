@@ -0,0 +1,273 @@
+"""ジョブの実行順を決めるスケジューラ。"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Callable, Optional
+
+# 選択できるスケジューリング方式
+POLICIES = ("fifo", "fair", "sjf")
+
+
+class _Entry:
+    """実行待ちジョブ 1 件分のスケジューリング情報。"""
+
+    __slots__ = ("job_id", "sort_key", "client_id", "duration", "removed")
+
+    def __init__(self, job_id: str, sort_key: tuple, client_id: str, duration: int) -> None:
+        self.job_id = job_id
+        self.sort_key = sort_key
+        self.client_id = client_id
+        self.duration = duration
+        self.removed = False
+
+    def __lt__(self, other: "_Entry") -> bool:
+        return self.sort_key < other.sort_key
+
+
+class JobScheduler:
+    """
+    実行待ちのジョブ ID を保持し、方式に応じた順序で取り出す。
+
+    asyncio.Queue と同じ put_nowait() / get() / qsize() を持ち、満杯のときは
+    asyncio.QueueFull を送出する。イベントループ上でのみ使うこと（スレッドセーフではない）。
+
+    priority が大きいジョブは方式によらず常に先に取り出す。同じ priority の中では:
+
+    - fifo: 投入順
+    - fair: クライアントごとの公平キューイング（start-time fair queuing）。
+      各クライアントが生成させた曲の長さ（秒）の合計が揃うように順番を割り当てるため、
+      長い曲を大量に投入したクライアントが他のクライアントを待たせ続けることがない。
+    - sjf: duration の短い順。待ち時間 1 秒ごとに sjf_aging 秒分だけ短い扱いにし、
+      長いジョブが無期限に後回しにされないようにする（エージング）。
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        policy: str = "fifo",
+        sjf_aging: float = 0.1,
+    ) -> None:
+        """
+        Args:
+            maxsize: 保持できるジョブ数の上限。0 以下なら無制限。
+            policy: "fifo" / "fair" / "sjf" のいずれか。
+            sjf_aging: sjf で、待ち時間 1 秒あたりに差し引く duration の秒数。
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"未対応のスケジューリング方式: {policy}（{', '.join(POLICIES)}）")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._sjf_aging = sjf_aging
+        self._heap: list[_Entry] = []
+        self._entries: dict[str, _Entry] = {}
+        self._seq = itertools.count()
+        # fair: 仮想時刻（最後に取り出したジョブの開始タグ）と、クライアントごとの終了タグ
+        self._virtual_time = 0.0
+        self._finish_tags: dict[str, float] = {}
+        # クライアントごとの実行待ちのジョブ数。0 になったら終了タグを捨てる
+        self._pending: dict[str, int] = {}
+        # ジョブの追加を待っているコルーチン
+        self._waiters: list[asyncio.Future[None]] = []
+        # 実行順に並べたエントリと順番のキャッシュ。変更のたびに破棄する
+        self._order: Optional[list[_Entry]] = None
+        self._positions: Optional[dict[str, int]] = None
+
+    # ------------------------------------------------------------------
+    # asyncio.Queue 互換のインタフェース
+    # ------------------------------------------------------------------
+    def qsize(self) -> int:
+        """実行待ちのジョブ数を返す。"""
+        return len(self._entries)
+
+    def full(self) -> bool:
+        """上限に達しているかどうか。"""
+        return 0 < self.maxsize <= len(self._entries)
+
+    def put_nowait(
+        self,
+        job_id: str,
+        *,
+        priority: int = 0,
+        client_id: str = "",
+        duration: int = 0,
+    ) -> None:
+        """
+        ジョブを実行待ちに追加する。
+
+        Args:
+            job_id: ジョブ ID。
+            priority: 優先度。大きいほど先に実行される。
+            client_id: 公平キューイングの単位となるクライアントの識別子。
+            duration: 生成する曲の長さ（秒）。fair と sjf で順番の計算に使う。
+
+        Raises:
+            asyncio.QueueFull: 上限に達している場合。
+        """
+        if self.full():
+            raise asyncio.QueueFull
+        seq = next(self._seq)
+        if self.policy == "fair":
+            start = max(self._virtual_time, self._finish_tags.get(client_id, 0.0))
+            self._finish_tags[client_id] = start + max(duration, 1)
+            order: float = start
+        elif self.policy == "sjf":
+            # duration - aging * (now - t) の大小は duration + aging * t の大小と等しいため、
+            # 投入時に計算した値のままヒープで並べられる
+            order = duration + self._sjf_aging * time.monotonic()
+        else:
+            order = float(seq)
+
+        entry = _Entry(job_id, (-priority, order, seq), client_id, duration)
+        self._entries[job_id] = entry
+        self._pending[client_id] = self._pending.get(client_id, 0) + 1
+        heapq.heappush(self._heap, entry)
+        self._invalidate()
+        self._wake()
+
+    async def get(self) -> str:
+        """次に実行するジョブ ID を取り出す。実行待ちがなければ追加されるまで待つ。"""
+        while True:
+            job_id = self._pop()
+            if job_id is not None:
+                return job_id
+            await self._wait_for_put(None)
+
+    # ------------------------------------------------------------------
+    # スケジューラ固有のインタフェース
+    # ------------------------------------------------------------------
+    def free_slots(self) -> Optional[int]:
+        """あと何件追加できるか。上限がなければ None。"""
+        if self.maxsize <= 0:
+            return None
+        return max(self.maxsize - len(self._entries), 0)
+
+    def remove(self, job_id: str) -> bool:
+        """
+        実行待ちからジョブを取り除く。
+
+        Returns:
+            取り除いた場合は True。実行待ちになければ False。
+        """
+        entry = self._entries.pop(job_id, None)
+        if entry is None:
+            return False
+        entry.removed = True
+        self._release(entry)
+        self._invalidate()
+        return True
+
+    async def take_matching(
+        self,
+        predicate: Callable[[str], bool],
+        limit: int,
+        timeout: float = 0.0,
+    ) -> list[str]:
+        """
+        predicate を満たすジョブを実行順に最大 limit 件取り出す。
+
+        バッチ生成で、先頭のジョブと同じ形のジョブを集めるために使う。
+        揃わなければ、新しいジョブが追加されるのを最大 timeout 秒待つ。
+        条件を満たさないジョブは実行待ちのまま順番を保つ。
+        """
+        taken: list[str] = []
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        checked: set[str] = set()
+        while True:
+            for entry in sorted(self._entries.values()):
+                if len(taken) >= limit:
+                    return taken
+                if entry.job_id in checked:
+                    continue
+                checked.add(entry.job_id)
+                if predicate(entry.job_id):
+                    self._take(entry)
+                    taken.append(entry.job_id)
+
+            remaining = deadline - loop.time()
+            if len(taken) >= limit or remaining <= 0:
+                return taken
+            if not await self._wait_for_put(remaining):
+                return taken
+
+    def job_ids(self) -> list[str]:
+        """実行待ちのジョブ ID を実行順に返す。"""
+        return [entry.job_id for entry in self._ordered()]
+
+    def snapshot(self) -> list[tuple[str, int]]:
+        """実行待ちのジョブ ID と曲の長さ（秒）を実行順に返す。"""
+        return [(entry.job_id, entry.duration) for entry in self._ordered()]
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """
+        実行待ちの中での順番を返す（0 が次に実行される）。
+
+        Returns:
+            順番。実行待ちでなければ None。
+        """
+        if self._positions is None:
+            self._positions = {entry.job_id: index for index, entry in enumerate(self._ordered())}
+        return self._positions.get(job_id)
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+    def _ordered(self) -> list[_Entry]:
+        if self._order is None:
+            self._order = sorted(self._entries.values())
+        return self._order
+
+    def _invalidate(self) -> None:
+        self._order = None
+        self._positions = None
+
+    async def _wait_for_put(self, timeout: Optional[float]) -> bool:
+        """ジョブが追加されるまで最大 timeout 秒待つ。追加されれば True を返す。"""
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _wake(self) -> None:
+        """追加を待っているコルーチンを起こす。"""
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _pop(self) -> Optional[str]:
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if entry.removed:
+                continue
+            self._take(entry)
+            return entry.job_id
+        return None
+
+    def _take(self, entry: _Entry) -> None:
+        """エントリを実行待ちから外し、fair の仮想時刻を進める。"""
+        entry.removed = True
+        self._entries.pop(entry.job_id, None)
+        self._invalidate()
+        if self.policy == "fair":
+            self._virtual_time = max(self._virtual_time, entry.sort_key[1])
+        self._release(entry)
+
+    def _release(self, entry: _Entry) -> None:
+        """クライアントの実行待ちを 1 件減らし、なくなれば不要になった終了タグを捨てる。"""
+        remaining = self._pending[entry.client_id] - 1
+        if remaining:
+            self._pending[entry.client_id] = remaining
+            return
+        del self._pending[entry.client_id]
+        tag = self._finish_tags.get(entry.client_id)
+        if tag is not None and tag <= self._virtual_time:
+            del self._finish_tags[entry.client_id]
@@ -0,0 +1,348 @@
+"""
+ステーション（共有の放送ストリーム）。
+
+ループ再生ではリスナーごとに曲を生成するため、GPU の負荷がリスナーの数に比例する。
+ステーションは 1 つの prompt で次の曲を先行して生成し続け、曲の継ぎ目をクロスフェードで
+つないだ 1 本の連続した MP3 ストリームを、何人のリスナーにも同じデータで配信する。
+生成はリスナーの数によらず 1 曲ずつで、リスナーがいない間は新しい曲を生成しない。
+
+生成は通常のジョブ（client_id="station:<名前>"）としてスケジューラに投入する。
+配信するチャンクは bytes を参照する memoryview で、全リスナーが同じものを共有する。
+"""
+
+import asyncio
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+from loguru import logger
+
+from backend.config import settings
+from backend.models.schemas import GenerateRequest, JobStatus
+from backend.services.audio_files import split_mp3
+from backend.services.audio_seams import Crossfader, Mp3StreamEncoder, mp3_encoding_error
+from backend.services.job_events import JobEventBroker
+from backend.services.job_store import JobStore
+from backend.services.scheduler import JobScheduler
+
+# 生成に失敗した場合に、次の曲の生成を始めるまでの待ち時間（秒）
+_RETRY_DELAY_SECONDS = 10.0
+# 配信済みのチャンクを保持する秒数（遅れたリスナーが追いつくための余裕）
+_RETENTION_SECONDS = 30.0
+
+# ステーション名（URL のパスに使う）
+STATION_NAME_PATTERN = r"^[a-z0-9][a-z0-9_-]{0,31}$"
+
+
+@dataclass(frozen=True)
+class StationConfig:
+    """ステーションの設定。"""
+
+    prompt: str
+    duration: int                # 1 曲の長さ（秒）
+    crossfade_seconds: float     # 曲の継ぎ目のクロスフェードの長さ（秒）
+
+
+@dataclass(frozen=True)
+class _Chunk:
+    """配信するチャンク。seq はステーション内の通し番号。"""
+
+    seq: int
+    data: memoryview
+    seconds: float
+    starts_at: float   # 再生が始まる時刻（イベントループの時計）
+
+
+@dataclass(frozen=True)
+class _Track:
+    """クロスフェード済みの 1 曲分のチャンク。"""
+
+    job_id: str
+    chunks: list[tuple[memoryview, float]]
+
+
+class Station:
+    """
+    1 つのステーション。生成（_produce）と配信（_publish）の 2 つのタスクを持つ。
+
+    _produce は完成した曲をクロスフェードして _ready に積む。_ready の上限は 1 曲のため、
+    先行して生成するのは再生中の曲の次の 1〜2 曲までである。_publish は再生の時計に
+    合わせて lead 秒先までのチャンクを公開し、リスナーはそれを順に読む。
+    """
+
+    def __init__(self, name: str, config: StationConfig, manager: "StationManager") -> None:
+        self.name = name
+        self.config = config
+        self._manager = manager
+        self._loop = asyncio.get_running_loop()
+        self._ready: asyncio.Queue[_Track] = asyncio.Queue(maxsize=1)
+        self._ready_seconds = 0.0   # _ready に積まれている曲の秒数
+        self._chunks: deque[_Chunk] = deque()
+        self._next_seq = 0
+        self._published = asyncio.Event()
+        self._has_listener = asyncio.Event()
+        self._closed = False
+        self.listeners = 0
+        self.tracks_generated = 0
+        self.failures = 0
+        self.now_playing: Optional[str] = None
+        self.generating: Optional[str] = None
+        self._tasks = [
+            asyncio.create_task(self._produce(), name=f"station-{name}-produce"),
+            asyncio.create_task(self._publish(), name=f"station-{name}-publish"),
+        ]
+
+    async def listen(self) -> AsyncIterator[memoryview]:
+        """
+        再生中の位置からチャンクを順に返す。
+
+        読むのが遅れて保持期間を過ぎたチャンクは飛ばす。ステーションが閉じられると終わる。
+        """
+        self.listeners += 1
+        self._has_listener.set()
+        try:
+            seq = self._live_seq()
+            while not self._closed:
+                published = self._published
+                chunks = self._chunks_from(seq)
+                if not chunks:
+                    await published.wait()
+                    continue
+                for chunk in chunks:
+                    yield chunk.data
+                    seq = chunk.seq + 1
+        finally:
+            self.listeners -= 1
+            if self.listeners == 0:
+                self._has_listener.clear()
+
+    def status(self) -> dict[str, Any]:
+        """ステーションの状態を返す。"""
+        now = self._loop.time()
+        buffered = sum(chunk.seconds for chunk in self._chunks if chunk.starts_at > now)
+        buffered += self._ready_seconds
+        return {
+            "name": self.name,
+            "prompt": self.config.prompt,
+            "duration": self.config.duration,
+            "crossfade_seconds": self.config.crossfade_seconds,
+            "listeners": self.listeners,
+            "tracks_generated": self.tracks_generated,
+            "failures": self.failures,
+            "now_playing_job_id": self.now_playing,
+            "generating_job_id": self.generating,
+            "buffered_seconds": round(buffered, 1),
+        }
+
+    async def close(self) -> None:
+        """生成・配信を止め、リスナーのストリームを終わらせる。"""
+        self._closed = True
+        self._published.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # 生成
+    # ------------------------------------------------------------------
+    async def _produce(self) -> None:
+        encoder = TrackEncoder(self.config.crossfade_seconds, settings.station_chunk_seconds)
+        while True:
+            # リスナーがいなければ、次の曲を生成しない（GPU を使わない）
+            await self._has_listener.wait()
+            try:
+                job_id, audio_path = await self._manager.generate_track(self)
+                chunks = await asyncio.to_thread(encoder.encode, audio_path)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                logger.exception("ステーションの曲の生成に失敗: station={}", self.name)
+                await asyncio.sleep(_RETRY_DELAY_SECONDS)
+                continue
+            self.tracks_generated += 1
+            await self._ready.put(_Track(job_id, chunks))
+            self._ready_seconds += sum(seconds for _, seconds in chunks)
+
+    # ------------------------------------------------------------------
+    # 配信
+    # ------------------------------------------------------------------
+    async def _publish(self) -> None:
+        clock = 0.0
+        while True:
+            track = await self._ready.get()
+            self._ready_seconds = max(0.0, self._ready_seconds - sum(seconds for _, seconds in track.chunks))
+            self.now_playing = track.job_id
+            # 次の曲が間に合わず途切れた場合は、今から数え直す
+            clock = max(clock, self._loop.time())
+            for data, seconds in track.chunks:
+                # 再生位置より station_lead_seconds 秒先のチャンクまでを公開しておく
+                delay = clock - self._loop.time() - settings.station_lead_seconds
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self._append(data, seconds, clock)
+                clock += seconds
+
+    def _append(self, data: memoryview, seconds: float, starts_at: float) -> None:
+        self._chunks.append(_Chunk(self._next_seq, data, seconds, starts_at))
+        self._next_seq += 1
+        expired = self._loop.time() - _RETENTION_SECONDS
+        while self._chunks and self._chunks[0].starts_at + self._chunks[0].seconds < expired:
+            self._chunks.popleft()
+        # 待っているリスナーを起こし、次のチャンク用のイベントに差し替える
+        published, self._published = self._published, asyncio.Event()
+        published.set()
+
+    def _live_seq(self) -> int:
+        """新しいリスナーが読み始めるチャンク（再生中のもの）の通し番号。"""
+        now = self._loop.time()
+        for chunk in reversed(self._chunks):
+            if chunk.starts_at <= now:
+                return chunk.seq
+        return self._chunks[0].seq if self._chunks else self._next_seq
+
+    def _chunks_from(self, seq: int) -> list[_Chunk]:
+        if not self._chunks or seq >= self._next_seq:
+            return []
+        offset = max(0, seq - self._chunks[0].seq)
+        return list(self._chunks)[offset:]
+
+
+class StationManager:
+    """ステーションの作成・削除と、ステーションの曲の生成ジョブの投入を行う。"""
+
+    def __init__(self, job_store: JobStore, job_queue: JobScheduler, job_events: JobEventBroker) -> None:
+        self._job_store = job_store
+        self._job_queue = job_queue
+        self._job_events = job_events
+        self._stations: dict[str, Station] = {}
+
+    def get(self, name: str) -> Optional[Station]:
+        return self._stations.get(name)
+
+    def list(self) -> list[Station]:
+        return [self._stations[name] for name in sorted(self._stations)]
+
+    async def put(self, name: str, config: StationConfig) -> Station:
+        """
+        ステーションを作成する。同じ名前があれば設定を変えて作り直す（リスナーは切断される）。
+
+        Raises:
+            RuntimeError: このプロセスで MP3 をエンコードできない場合。
+        """
+        error = mp3_encoding_error()
+        if error is not None:
+            raise RuntimeError(f"ステーションには MP3 のエンコードが必要である: {error}")
+        await self.remove(name)
+        station = Station(name, config, self)
+        self._stations[name] = station
+        logger.info("ステーションを作成: name={}, prompt={!r}", name, config.prompt)
+        return station
+
+    async def remove(self, name: str) -> bool:
+        """ステーションを削除する。存在しなければ False。"""
+        station = self._stations.pop(name, None)
+        if station is None:
+            return False
+        await station.close()
+        logger.info("ステーションを削除: name={}", name)
+        return True
+
+    async def close(self) -> None:
+        for name in list(self._stations):
+            await self.remove(name)
+
+    async def generate_track(self, station: Station) -> tuple[str, str]:
+        """
+        ステーションの次の曲を生成するジョブを投入し、完成を待つ。
+
+        Returns:
+            (ジョブ ID, MP3 ファイルのパス)。
+
+        Raises:
+            RuntimeError: キューが満杯の場合、または生成に失敗した場合。
+        """
+        request = GenerateRequest(
+            prompt=station.config.prompt,
+            duration=station.config.duration,
+            client_id=f"station:{station.name}",
+        )
+        job_id = self._job_store.create(request)
+        try:
+            self._job_queue.put_nowait(job_id, client_id=request.client_id, duration=request.duration)
+        except asyncio.QueueFull:
+            self._job_store.delete(job_id)
+            raise RuntimeError("キューが満杯のため、ステーションの曲を投入できない")
+
+        station.generating = job_id
+        subscription = self._job_events.subscribe([job_id])
+        try:
+            while True:
+                record = self._job_store.get(job_id)
+                if record is None:
+                    raise RuntimeError("ステーションの曲のジョブが削除された")
+                if record.status == JobStatus.COMPLETED and record.audio_path:
+                    return job_id, record.audio_path
+                if record.status in (JobStatus.FAILED, JobStatus.CANCELLED):
+                    raise RuntimeError(f"ステーションの曲の生成に失敗: {record.error or record.status.value}")
+                await subscription.wait(settings.stream_heartbeat_seconds)
+        except asyncio.CancelledError:
+            # ステーションの削除時は、実行待ち・実行中のジョブを取り消す
+            if self._job_store.cancel(job_id) is not None:
+                self._job_queue.remove(job_id)
+            raise
+        finally:
+            station.generating = None
+            self._job_events.unsubscribe(subscription)
+
+
+class TrackEncoder:
+    """
+    ステーションの曲を順に受け取り、継ぎ目をクロスフェードした 1 本の MP3 ストリームのチャンクにする。
+
+    曲ごとに別々にエンコードすると、継ぎ目ごとにエンコーダーの遅延と末尾のパディングが
+    短い無音として入るため、ステーションごとに 1 つのエンコーダーを使い続ける。
+    曲の末尾 crossfade_seconds 秒は次の曲とのクロスフェードに使うため、次の曲を渡すまで配信しない。
+    """
+
+    def __init__(self, crossfade_seconds: float, chunk_seconds: float) -> None:
+        self._crossfader = Crossfader(crossfade_seconds)
+        self._chunk_seconds = chunk_seconds
+        self._encoder: Optional[Mp3StreamEncoder] = None
+
+    def encode(self, audio_path: str) -> list[tuple[memoryview, float]]:
+        """
+        曲をクロスフェードしてエンコードし、配信するチャンクを返す。
+
+        ブロッキング処理のため別スレッドで呼ぶこと。同時に呼んではならない。
+        """
+        import soundfile as sf
+
+        samples, sample_rate = sf.read(audio_path, dtype="float32", always_2d=True)
+        if self._encoder is None:
+            self._encoder = Mp3StreamEncoder(sample_rate, samples.shape[1])
+        data = self._encoder.encode(self._crossfader.join(samples, sample_rate))
+        return split_mp3(data, self._chunk_seconds)
+
+
+def parse_stations(text: str) -> dict[str, StationConfig]:
+    """
+    OTO_STATIONS（"名前=prompt" をセミコロンで区切った文字列）を解釈する。
+
+    Raises:
+        ValueError: 形式が正しくない場合。
+    """
+    stations: dict[str, StationConfig] = {}
+    for item in text.split(";"):
+        if not item.strip():
+            continue
+        name, sep, prompt = (part.strip() for part in item.partition("="))
+        if not sep or not prompt or not re.match(STATION_NAME_PATTERN, name):
+            raise ValueError(f"OTO_STATIONS の形式が正しくない（名前=prompt、名前は英小文字・数字・-_）: {item!r}")
+        stations[name] = StationConfig(
+            prompt=prompt,
+            duration=settings.station_track_seconds,
+            crossfade_seconds=settings.station_crossfade_seconds,
+        )
+    return stations
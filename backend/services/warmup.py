@@ -0,0 +1,117 @@
+"""
+起動時のウォームアップと DiT の torch.compile。
+
+起動直後の 1 曲目は、カーネルの選択・GPU メモリの確保・各種キャッシュの構築を含むため
+2 曲目以降より大幅に遅い。モデルの読み込み後、readiness を返す前に短い曲を生成して
+この分を済ませておく。torch.compile のコンパイルも最初の呼び出しで行われるため、
+ウォームアップの中で済み、結果はディスクに保存して再起動後に再利用する。
+"""
+
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+from loguru import logger
+
+from backend.config import settings
+
+if TYPE_CHECKING:
+    from backend.services.model_loader import LoadedModels, LoadReporter
+
+# DiT 本体（torch.nn.Module）を保持している AceStepHandler の属性の候補
+_DIT_MODULE_ATTRIBUTES = ("model", "dit_model", "transformer")
+
+
+def compile_dit(dit_handler: Any, cache_dir: Path) -> bool:
+    """
+    DiT を torch.compile する（コンパイル自体は最初の推論時に行われる）。
+
+    Inductor の FX グラフキャッシュと Triton のキャッシュを cache_dir に置き、
+    再起動後は保存済みの結果を読み込んでコンパイル時間を省く。
+    コンパイルできないグラフ（CPU で C++ コンパイラがない場合など）は通常の実行に戻す。
+
+    Returns:
+        コンパイルを設定した場合は True。DiT が見つからない・torch が古い場合は False。
+    """
+    try:
+        import torch
+    except ImportError:
+        return False
+
+    module = _dit_module(dit_handler)
+    if module is None or not hasattr(module, "compile"):
+        logger.warning("torch.compile を省略: DiT のモジュールが見つからない、または torch が古い")
+        return False
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # 環境変数で明示されていればそちらを優先する
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str(cache_dir / "inductor"))
+    os.environ.setdefault("TRITON_CACHE_DIR", str(cache_dir / "triton"))
+    try:
+        import torch._dynamo
+        import torch._inductor.config as inductor_config
+
+        inductor_config.fx_graph_cache = True
+        torch._dynamo.config.suppress_errors = True
+    except (ImportError, AttributeError):
+        pass
+
+    # 曲の長さはジョブごとに変わるため、形状ごとの再コンパイルを避ける
+    module.compile(dynamic=True)
+    logger.info("DiT を torch.compile する設定にした (cache={})", cache_dir)
+    return True
+
+
+def warm_up(models: "LoadedModels", report: "LoadReporter") -> None:
+    """
+    短い曲を OTO_WARMUP_RUNS 回生成し、1 回目（コールド）と最後（ウォーム）の所要時間をログに出す。
+
+    失敗してもサーバーの起動は続ける（初回のジョブが遅くなるだけ）。
+    """
+    if settings.warmup_runs <= 0:
+        report("warmup", "skipped", None)
+        return
+
+    from backend.models.schemas import GenerateRequest
+    from backend.services.job_store import _JobRecord
+    from backend.services.music_generator import generate_and_save
+
+    report("warmup", "loading", None)
+    timings: list[float] = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="oto-warmup-") as save_dir:
+            for _ in range(settings.warmup_runs):
+                job = _JobRecord(
+                    f"warmup-{uuid.uuid4()}",
+                    GenerateRequest(prompt="warm-up", duration=settings.warmup_duration, seed=0),
+                )
+                started = time.perf_counter()
+                generate_and_save(models, job, save_dir, lambda value, stage: None)
+                timings.append(time.perf_counter() - started)
+    except Exception as e:
+        logger.exception("ウォームアップに失敗（初回のジョブが遅くなる）: device={}", models.device)
+        report("warmup", "failed", str(e))
+        return
+
+    report("warmup", "ready", None)
+    logger.info(
+        "ウォームアップ完了: device={}, {} 秒の曲で 1 回目（コールド）{:.2f}s{}",
+        models.device,
+        settings.warmup_duration,
+        timings[0],
+        f" / {len(timings)} 回目（ウォーム）{timings[-1]:.2f}s" if len(timings) > 1 else "",
+    )
+
+
+def _dit_module(dit_handler: Any) -> Optional[Any]:
+    """AceStepHandler から DiT の torch.nn.Module を探す。"""
+    import torch
+
+    for name in _DIT_MODULE_ATTRIBUTES:
+        module = getattr(dit_handler, name, None)
+        if isinstance(module, torch.nn.Module):
+            return module
+    return None
@@ -0,0 +1,580 @@
+"""
+生成処理の実行先。
+
+- LocalGenerator: このプロセス内の 1 つのモデルで、1 バッチずつ生成する（既定）。
+- WorkerPool: デバイスごとに別プロセスでモデルを読み込み、空いているプロセスに割り当てる。
+- RemoteWorkerHub（remote_hub.py）: 別ノードのワーカーにジョブを貸し出す。
+
+いずれも acquire() で空いている実行先を確保し、run() で生成し、release() で返す。
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+from backend.config import settings
+from backend.services.audio_encoder import AudioEncoderPool
+from backend.services.audio_seams import mp3_encoding_error
+from backend.services.audio_staging import audio_staging
+from backend.services.job_store import _JobRecord
+from backend.services.model_loader import LoadedModels, ModelLoadProgress, load_models
+from backend.services.music_generator import (
+    GenerationCancelled,
+    generate_jobs,
+    generate_jobs_and_save,
+    release_gpu_memory,
+)
+from backend.services.pipeline import STAGES, StagePipeline
+
+# 異常終了したワーカープロセスを再起動するまでの待ち時間（秒）
+_RESTART_DELAY_SECONDS = 2.0
+# シャットダウン時にワーカープロセスの終了を待つ時間（秒）
+_STOP_TIMEOUT_SECONDS = 10.0
+
+
+class WorkerLost(Exception):
+    """生成を担当していたワーカーが応答しなくなった。ジョブは実行待ちに戻す。"""
+
+
+def is_out_of_memory(error: BaseException) -> bool:
+    """GPU のメモリ不足による失敗かどうかを判定する。"""
+    return type(error).__name__ == "OutOfMemoryError" or "out of memory" in str(error).lower()
+
+
+class _LocalSlot:
+    """LocalGenerator の実行権 1 つ分。GPU で処理中のジョブを保持する。"""
+
+    __slots__ = ("job_ids",)
+
+    def __init__(self) -> None:
+        self.job_ids: list[str] = []
+
+
+class LocalGenerator:
+    """
+    このプロセス内で読み込んだモデルで生成する。
+
+    GPU メモリを複数ジョブで共有することによる OOM を防ぐため、
+    同時に実行するバッチは 1 つに限る。
+
+    OTO_PIPELINE=true かつ LM を使う場合は 2 バッチを別スレッドで同時に実行し、
+    StagePipeline で LM と DiT をそれぞれ 1 バッチずつに制限する
+    （あるバッチの DiT 中に次のバッチの LM を進める）。
+
+    OTO_ENCODE_WORKERS が 1 以上の場合、MP3 のエンコードは AudioEncoderPool に任せ、
+    GPU の処理が終わった時点で実行権を返す（ジョブはエンコードの完了時に完了する）。
+    """
+
+    def __init__(self, models: LoadedModels) -> None:
+        self.lm_model = models.lm_model
+        self.max_batch_size = models.max_batch_size
+        self._models = models
+        self.pipeline: Optional[StagePipeline] = None
+        if settings.pipeline and models.llm_handler is not None:
+            self.pipeline = StagePipeline(min_free_bytes=int(settings.pipeline_min_free_gb * 1024**3))
+            logger.info("LM/DiT パイプライン有効: 空き VRAM の下限 {} GB", settings.pipeline_min_free_gb)
+        elif settings.pipeline:
+            logger.info("LM を使わないため、LM/DiT パイプラインは無効")
+        concurrency = len(STAGES) if self.pipeline is not None else 1
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._slots: list[_LocalSlot] = []
+        self._encoder: Optional[AudioEncoderPool] = None
+        if settings.encode_workers > 0:
+            error = mp3_encoding_error()
+            if error is None:
+                self._encoder = AudioEncoderPool(settings.encode_workers, settings.encode_queue_max)
+            else:
+                logger.warning("MP3 を別プロセスでエンコードできないため、生成と同じスレッドで保存する: {}", error)
+        self._completed = 0
+
+    async def acquire(self) -> _LocalSlot:
+        """前のバッチの GPU の処理が終わるまで（パイプライン有効時は空きができるまで）待ち、実行権を確保する。"""
+        await self._semaphore.acquire()
+        slot = _LocalSlot()
+        self._slots.append(slot)
+        return slot
+
+    def release(self, slot: _LocalSlot) -> None:
+        """acquire() で確保した実行権を返す。run() が返却済みの場合は何もしない。"""
+        if slot in self._slots:
+            self._slots.remove(slot)
+            self._semaphore.release()
+
+    async def run(
+        self,
+        slot: _LocalSlot,
+        batch: list[_JobRecord],
+        progress_callback: Callable[[float, str], None],
+        segment_callback: Callable[[str], None],
+    ) -> list[str]:
+        """
+        バッチを生成し、jobs と同じ順序の MP3 パスを返す。
+
+        ブロッキングな生成処理は専用スレッドで実行する（数十秒〜数分かかる）。
+
+        Raises:
+            GenerationCancelled: progress_callback がキャンセルを通知した場合。
+        """
+        loop = asyncio.get_running_loop()
+        slot.job_ids = [record.job_id for record in batch]
+        try:
+            futures = await loop.run_in_executor(
+                self._executor,
+                self._generate,
+                batch,
+                progress_callback,
+                segment_callback,
+            )
+        except GenerationCancelled:
+            # 中断した生成が確保していたメモリを、生成と同じスレッドで解放する
+            await loop.run_in_executor(self._executor, release_gpu_memory)
+            raise
+        # GPU の処理は終わったため、エンコードの完了を待たずに次のバッチに実行権を渡す
+        self.release(slot)
+        audio_paths = [await asyncio.wrap_future(future) for future in futures]
+        self._completed += 1
+        return audio_paths
+
+    def _generate(
+        self,
+        batch: list[_JobRecord],
+        progress_callback: Callable[[float, str], None],
+        segment_callback: Callable[[str], None],
+    ) -> list["Future[str]"]:
+        """生成スレッドで実行する。パイプライン有効時は段の移動に合わせてロックを持ち替える。"""
+        if self.pipeline is None:
+            return generate_jobs(
+                self._models,
+                batch,
+                audio_staging.save_dir(),
+                settings.segment_seconds,
+                settings.segment_crossfade_seconds,
+                progress_callback,
+                segment_callback,
+                self._encoder,
+            )
+
+        gate = self.pipeline.gate(progress_callback)
+
+        def on_progress(value: float, stage: str) -> None:
+            # キャンセルを先に確かめてから、次の段の空きを待つ
+            progress_callback(value, stage)
+            gate.on_progress(value, stage)
+
+        gate.start()
+        try:
+            return generate_jobs(
+                self._models,
+                batch,
+                audio_staging.save_dir(),
+                settings.segment_seconds,
+                settings.segment_crossfade_seconds,
+                on_progress,
+                segment_callback,
+                self._encoder,
+            )
+        finally:
+            gate.close()
+
+    def health(self) -> list[dict[str, Any]]:
+        """実行先ごとの状態を返す。"""
+        job_ids = [job_id for slot in self._slots for job_id in slot.job_ids]
+        return [
+            {
+                "device": self._models.device,
+                "state": "busy" if job_ids else "idle",
+                "pid": os.getpid(),
+                "job_ids": job_ids,
+                "completed": self._completed,
+                "restarts": 0,
+                "last_error": None,
+            }
+        ]
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        if self._encoder is not None:
+            self._encoder.shutdown()
+
+
+class _Replica:
+    """ワーカープール内の 1 プロセス（1 デバイス）の状態。"""
+
+    __slots__ = (
+        "device",
+        "state",
+        "reserved",
+        "process",
+        "conn",
+        "cancel_event",
+        "job_ids",
+        "completed",
+        "restarts",
+        "last_error",
+        "lm_model",
+        "max_batch_size",
+        "future",
+        "progress_callback",
+        "segment_callback",
+    )
+
+    def __init__(self, device: str) -> None:
+        self.device = device
+        # starting → idle ⇄ busy、異常終了で restarting → starting、読み込み失敗で failed
+        self.state = "starting"
+        # acquire() で確保され、ジョブの割り当てを待っている
+        self.reserved = False
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.conn: Optional[Connection] = None
+        self.cancel_event: Any = None
+        self.job_ids: list[str] = []
+        self.completed = 0
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+        self.lm_model = ""
+        self.max_batch_size = 1
+        self.future: Optional[asyncio.Future[list[str]]] = None
+        self.progress_callback: Optional[Callable[[float, str], None]] = None
+        self.segment_callback: Optional[Callable[[str], None]] = None
+
+
+class WorkerPool:
+    """
+    デバイスごとに 1 プロセスずつモデルを読み込み、空いているプロセスでバッチを生成する。
+
+    プロセスは spawn で起動するため、親プロセスで CUDA を初期化していても影響しない。
+    子プロセスが GPU のメモリ不足を報告した場合や異常終了した場合は、
+    そのプロセスを破棄して同じデバイスで起動し直す（メモリは OS に返される）。
+
+    状態の更新はイベントループ上で行い、子プロセスからのメッセージは
+    プロセスごとの受信スレッドが受け取ってイベントループに渡す。
+    進捗・セグメントのコールバックは受信スレッドから直接呼ぶ（JobStore はスレッドセーフ）。
+    """
+
+    def __init__(self, devices: list[str], load_progress: Optional[ModelLoadProgress] = None) -> None:
+        """
+        Args:
+            devices: モデルを読み込むデバイス名のリスト（例: ["cuda:0", "cuda:1"]）。
+            load_progress: 子プロセスでのモデルの読み込みの進捗を記録する先。
+        """
+        self._replicas = [_Replica(device) for device in devices]
+        self._load_progress = load_progress
+        self._context = multiprocessing.get_context("spawn")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed = asyncio.Event()
+        self._closing = False
+
+    @property
+    def lm_model(self) -> str:
+        """読み込んだ LM のモデル名（最初に起動したプロセスの値）。"""
+        return next((r.lm_model for r in self._replicas if r.state != "failed"), "")
+
+    @property
+    def max_batch_size(self) -> int:
+        """すべてのプロセスで扱えるバッチサイズの上限。"""
+        sizes = [r.max_batch_size for r in self._replicas if r.state != "failed"]
+        return min(sizes) if sizes else 1
+
+    async def start(self) -> None:
+        """
+        すべてのプロセスを起動し、モデルの読み込みが終わるまで待つ。
+
+        Raises:
+            RuntimeError: どのデバイスでもモデルを読み込めなかった場合。
+        """
+        self._loop = asyncio.get_running_loop()
+        for replica in self._replicas:
+            self._spawn(replica)
+        while any(r.state == "starting" for r in self._replicas):
+            self._changed.clear()
+            await self._changed.wait()
+
+        ready = [r.device for r in self._replicas if r.state == "idle"]
+        if not ready:
+            errors = "; ".join(f"{r.device}: {r.last_error}" for r in self._replicas)
+            raise RuntimeError(f"ワーカープロセスの起動に失敗: {errors}")
+        logger.info("ワーカープール起動完了: devices={}", ",".join(ready))
+
+    async def acquire(self) -> _Replica:
+        """空いているプロセスを確保する。すべて使用中なら空くまで待つ。"""
+        while True:
+            for replica in self._replicas:
+                if replica.state == "idle" and not replica.reserved:
+                    replica.reserved = True
+                    return replica
+            self._changed.clear()
+            await self._changed.wait()
+
+    def release(self, replica: _Replica) -> None:
+        """acquire() で確保したプロセスを返す。"""
+        replica.job_ids = []
+        replica.reserved = False
+        if replica.state == "busy":
+            self._set_state(replica, "idle")
+        else:
+            self._changed.set()
+
+    async def run(
+        self,
+        replica: _Replica,
+        batch: list[_JobRecord],
+        progress_callback: Callable[[float, str], None],
+        segment_callback: Callable[[str], None],
+    ) -> list[str]:
+        """
+        確保したプロセスでバッチを生成し、jobs と同じ順序の MP3 パスを返す。
+
+        progress_callback が GenerationCancelled を送出したら、子プロセスに中断を伝える。
+
+        Raises:
+            GenerationCancelled: 生成を中断した場合。
+            RuntimeError: 生成に失敗した場合、またはプロセスが異常終了した場合。
+        """
+        assert self._loop is not None and replica.conn is not None
+        replica.job_ids = [record.job_id for record in batch]
+        replica.progress_callback = progress_callback
+        replica.segment_callback = segment_callback
+        replica.cancel_event.clear()
+        if replica.state != "idle":
+            raise RuntimeError(f"ワーカープロセスが利用できない（{replica.device}: {replica.state}）")
+        replica.state = "busy"
+        future: asyncio.Future[list[str]] = self._loop.create_future()
+        replica.future = future
+        try:
+            replica.conn.send(("run", [record.to_row() for record in batch]))
+        except OSError as e:
+            replica.future = None
+            raise RuntimeError(f"ワーカープロセスに送信できない: {e}") from e
+        return await future
+
+    def health(self) -> list[dict[str, Any]]:
+        """プロセスごとの状態を返す。"""
+        return [
+            {
+                "device": r.device,
+                "state": r.state,
+                "pid": r.process.pid if r.process is not None else None,
+                "job_ids": list(r.job_ids),
+                "completed": r.completed,
+                "restarts": r.restarts,
+                "last_error": r.last_error,
+            }
+            for r in self._replicas
+        ]
+
+    async def close(self) -> None:
+        """すべてのプロセスに終了を指示し、終わらなければ強制終了する。"""
+        self._closing = True
+        for replica in self._replicas:
+            if replica.conn is not None:
+                try:
+                    replica.conn.send(("stop",))
+                except OSError:
+                    pass
+        await asyncio.gather(
+            *(asyncio.to_thread(self._stop_process, r) for r in self._replicas)
+        )
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+    def _set_state(self, replica: _Replica, state: str) -> None:
+        replica.state = state
+        self._changed.set()
+
+    def _spawn(self, replica: _Replica) -> None:
+        parent_conn, child_conn = self._context.Pipe()
+        replica.cancel_event = self._context.Event()
+        replica.process = self._context.Process(
+            target=_replica_main,
+            args=(replica.device, child_conn, replica.cancel_event),
+            name=f"oto-worker-{replica.device}",
+        )
+        replica.process.start()
+        child_conn.close()
+        replica.conn = parent_conn
+        self._set_state(replica, "starting")
+        threading.Thread(
+            target=self._read_loop,
+            args=(replica, parent_conn),
+            name=f"worker-reader-{replica.device}",
+            daemon=True,
+        ).start()
+        logger.info("ワーカープロセス起動: device={}, pid={}", replica.device, replica.process.pid)
+
+    def _read_loop(self, replica: _Replica, conn: Connection) -> None:
+        """子プロセスからのメッセージを受け取る。プロセスが終了したら抜ける。"""
+        assert self._loop is not None
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                self._loop.call_soon_threadsafe(self._on_exit, replica, conn)
+                return
+
+            kind = message[0]
+            if kind == "progress":
+                callback = replica.progress_callback
+                if callback is None:
+                    continue
+                try:
+                    callback(message[1], message[2])
+                except GenerationCancelled:
+                    replica.cancel_event.set()
+                except Exception:
+                    logger.exception("進捗の反映でエラー: device={}", replica.device)
+            elif kind == "load_progress":
+                if self._load_progress is not None:
+                    self._load_progress.update(replica.device, message[1], message[2], message[3])
+            elif kind == "segment":
+                if replica.segment_callback is not None:
+                    try:
+                        replica.segment_callback(message[1])
+                    except Exception:
+                        logger.exception("セグメントの反映でエラー: device={}", replica.device)
+            else:
+                self._loop.call_soon_threadsafe(self._on_message, replica, message)
+
+    def _on_message(self, replica: _Replica, message: tuple) -> None:
+        kind = message[0]
+        if kind == "ready":
+            info = message[1]
+            replica.lm_model = info["lm_model"]
+            replica.max_batch_size = info["max_batch_size"]
+            self._set_state(replica, "idle")
+            logger.info("ワーカー準備完了: device={}", replica.device)
+        elif kind == "load_failed":
+            replica.last_error = message[1]
+            self._set_state(replica, "failed")
+            logger.error("ワーカーのモデル読み込みに失敗: device={}, error={}", replica.device, message[1])
+        elif kind == "done":
+            replica.completed += 1
+            self._settle(replica, result=message[1])
+        elif kind == "cancelled":
+            self._settle(replica, error=GenerationCancelled(",".join(replica.job_ids)))
+        elif kind == "error":
+            replica.last_error = message[1]
+            if message[2]:
+                # 子プロセスは OOM を報告した後に自ら終了する。再起動は _on_exit で行う
+                logger.warning("ワーカーで GPU メモリ不足: device={}", replica.device)
+                self._set_state(replica, "restarting")
+            self._settle(replica, error=RuntimeError(message[1]))
+
+    def _on_exit(self, replica: _Replica, conn: Connection) -> None:
+        """子プロセスとの接続が切れた（終了した）ときの処理。"""
+        if conn is not replica.conn:
+            return
+        self._settle(replica, error=RuntimeError(f"ワーカープロセスが異常終了した（{replica.device}）"))
+        if self._closing or replica.state == "failed":
+            return
+        if replica.state != "restarting":
+            replica.last_error = replica.last_error or "プロセスが異常終了した"
+            logger.error("ワーカープロセスが終了した: device={}", replica.device)
+        self._set_state(replica, "restarting")
+        asyncio.ensure_future(self._restart(replica))
+
+    async def _restart(self, replica: _Replica) -> None:
+        replica.restarts += 1
+        await asyncio.to_thread(self._stop_process, replica)
+        await asyncio.sleep(_RESTART_DELAY_SECONDS)
+        if self._closing:
+            return
+        logger.info("ワーカープロセスを再起動: device={}, 回数={}", replica.device, replica.restarts)
+        self._spawn(replica)
+
+    def _settle(
+        self,
+        replica: _Replica,
+        result: Optional[list[str]] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        future, replica.future = replica.future, None
+        replica.progress_callback = None
+        replica.segment_callback = None
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result or [])
+
+    @staticmethod
+    def _stop_process(replica: _Replica) -> None:
+        process = replica.process
+        if process is None:
+            return
+        process.join(_STOP_TIMEOUT_SECONDS)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+
+# ---------------------------------------------------------------------------
+# 子プロセス
+# ---------------------------------------------------------------------------
+def _replica_main(device: str, conn: Connection, cancel_event: Any) -> None:
+    """ワーカープロセスのエントリポイント。モデルを読み込み、親からの指示を待つ。"""
+    # 各プロセスには 1 枚の GPU だけを見せる（vLLM などのライブラリもこの設定に従う）
+    if device.startswith("cuda:"):
+        os.environ["CUDA_VISIBLE_DEVICES"] = device.split(":", 1)[1]
+        device = "cuda"
+
+    started = time.monotonic()
+    try:
+        models = load_models(
+            device,
+            lambda name, state, error: conn.send(("load_progress", name, state, error)),
+        )
+    except Exception as e:
+        logger.exception("モデルの読み込みに失敗")
+        conn.send(("load_failed", str(e)))
+        return
+    logger.info("モデル読み込み完了 ({:.1f}s)", time.monotonic() - started)
+    conn.send(("ready", {"lm_model": models.lm_model, "max_batch_size": models.max_batch_size}))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message[0] == "stop":
+            return
+
+        jobs = [_JobRecord.from_row(row) for row in message[1]]
+
+        def _on_progress(value: float, stage: str) -> None:
+            conn.send(("progress", value, stage))
+            if cancel_event.is_set():
+                raise GenerationCancelled(",".join(job.job_id for job in jobs))
+
+        try:
+            audio_paths = generate_jobs_and_save(
+                models,
+                jobs,
+                audio_staging.save_dir(),
+                settings.segment_seconds,
+                settings.segment_crossfade_seconds,
+                _on_progress,
+                lambda path: conn.send(("segment", path)),
+            )
+        except GenerationCancelled:
+            release_gpu_memory()
+            conn.send(("cancelled",))
+            continue
+        except Exception as e:
+            oom = is_out_of_memory(e)
+            logger.exception("生成に失敗 (oom={})", oom)
+            conn.send(("error", str(e), oom))
+            if oom:
+                # 断片化したメモリごと破棄するため、プロセスを終了して親に再起動させる
+                return
+            continue
+        conn.send(("done", audio_paths))
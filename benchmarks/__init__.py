@@ -0,0 +1,12 @@
+"""
+oto-factory の負荷試験・ベンチマーク。
+
+- `python -m benchmarks load`: 代替生成器（OTO_GENERATOR=fake）で API サーバーを別プロセスで起動し、
+  投入・状態確認・ダウンロードを並行して繰り返す。スループット、各リクエストの
+  p50/p95/p99、キュー満杯（503）の割合、JobStore のロックの競合を計測する。
+- `python -m benchmarks model`: 実際のモデルを読み込み、曲の長さごとに
+  壁時計 1 秒あたりに生成できる曲の秒数を計測する（GPU とチェックポイントが必要）。
+- `python -m benchmarks compare OLD.json NEW.json`: 2 つの結果を比較する。
+
+結果はいずれも JSON で出力し、リリース間で比較できるようにする。
+"""
@@ -0,0 +1,96 @@
+"""`python -m benchmarks {load,model,compare}` のエントリポイント。"""
+
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+from benchmarks.report import build_report, compare, write_report
+
+
+def _int_list(text: str) -> list[int]:
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="oto-factory のベンチマーク")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    load = subparsers.add_parser("load", help="代替生成器で API サーバーに負荷をかける")
+    load.add_argument("--clients", type=int, default=8, help="並行して投入するクライアント数")
+    load.add_argument("--seconds", type=float, default=30.0, help="新しいジョブを投入し続ける時間")
+    load.add_argument("--durations", type=_int_list, default=[10, 30, 60], help="曲の長さ（カンマ区切り）")
+    load.add_argument("--poll-interval", type=float, default=0.2, help="状態確認の間隔（秒）")
+    load.add_argument("--work", choices=("sleep", "cpu"), default="sleep", help="代替生成器の時間の使い方")
+    load.add_argument(
+        "--seconds-per-audio-second",
+        type=float,
+        default=0.01,
+        help="代替生成器で曲 1 秒あたりにかける時間",
+    )
+    load.add_argument("--queue-max", type=int, default=100, help="OTO_QUEUE_MAX")
+    load.add_argument("--batch-max", type=int, default=1, help="OTO_BATCH_MAX")
+    load.add_argument("--devices", default="", help="OTO_DEVICES（例: cpu,cpu でワーカープール）")
+    load.add_argument("--seed", type=int, default=0, help="曲の長さを選ぶ乱数のシード")
+    load.add_argument("--output", help="結果の JSON の書き出し先（省略時は標準出力）")
+
+    model = subparsers.add_parser("model", help="実際のモデルで生成速度を計測する（GPU が必要）")
+    model.add_argument("--durations", type=_int_list, default=[30, 60, 120], help="曲の長さ（カンマ区切り）")
+    model.add_argument("--repeat", type=int, default=3, help="曲の長さごとの計測回数")
+    model.add_argument(
+        "--warmup",
+        type=int,
+        default=0,
+        help="計測前に捨てる生成の回数（起動時のウォームアップ OTO_WARMUP_RUNS とは別）",
+    )
+    model.add_argument("--device", default="auto", help="モデルを読み込むデバイス")
+    model.add_argument("--output", help="結果の JSON の書き出し先（省略時は標準出力）")
+
+    diff = subparsers.add_parser("compare", help="2 つの結果の JSON を比較する")
+    diff.add_argument("old")
+    diff.add_argument("new")
+
+    args = parser.parse_args()
+
+    if args.command == "load":
+        from benchmarks.load import LoadConfig, run_load
+
+        config = LoadConfig(
+            clients=args.clients,
+            seconds=args.seconds,
+            durations=args.durations,
+            poll_interval=args.poll_interval,
+            work=args.work,
+            seconds_per_audio_second=args.seconds_per_audio_second,
+            queue_max=args.queue_max,
+            batch_max=args.batch_max,
+            devices=args.devices,
+            seed=args.seed,
+        )
+        write_report(build_report("load", asdict(config), run_load(config)), args.output)
+    elif args.command == "model":
+        from benchmarks.model import ModelBenchConfig, run_model_bench
+
+        config = ModelBenchConfig(
+            durations=args.durations,
+            repeat=args.repeat,
+            warmup=args.warmup,
+            device=args.device,
+        )
+        write_report(build_report("model", asdict(config), run_model_bench(config)), args.output)
+    else:
+        old = json.loads(Path(args.old).read_text(encoding="utf-8"))
+        new = json.loads(Path(args.new).read_text(encoding="utf-8"))
+        try:
+            rows = compare(old, new)
+        except ValueError as e:
+            sys.exit(str(e))
+        width = max((len(path) for path, *_ in rows), default=0)
+        for path, before, after, change in rows:
+            ratio = f"{change:+.1f}%" if change is not None else "-"
+            print(f"{path:<{width}}  {before:>14.6g}  {after:>14.6g}  {ratio:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+代替生成器を使った API サーバーの負荷試験。
+
+API サーバーを別プロセス（benchmarks.server）で起動し、このプロセスの clients 個の
+スレッドがそれぞれ「投入 → 完了まで状態確認 → ダウンロード」を繰り返す。
+負荷をかける側とサーバーが GIL を取り合わないよう、プロセスを分けている。
+"""
+
+import http.client
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from benchmarks.report import percentiles
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# サーバーの起動を待つ上限（秒）
+_STARTUP_TIMEOUT = 60.0
+# 1 つのジョブの完了を待つ上限（秒）
+_JOB_TIMEOUT = 600.0
+
+
+@dataclass
+class LoadConfig:
+    """負荷試験の条件。"""
+
+    clients: int = 8                         # 並行して投入するクライアント数
+    seconds: float = 30.0                    # 新しいジョブを投入し続ける時間
+    durations: list[int] = field(default_factory=lambda: [10, 30, 60])   # 曲の長さ（ランダムに選ぶ）
+    poll_interval: float = 0.2               # 状態確認の間隔（秒）
+    work: str = "sleep"                      # 代替生成器の時間の使い方（sleep / cpu）
+    seconds_per_audio_second: float = 0.01   # 代替生成器で曲 1 秒あたりにかける時間
+    queue_max: int = 100                     # OTO_QUEUE_MAX
+    batch_max: int = 1                       # OTO_BATCH_MAX
+    devices: str = ""                        # OTO_DEVICES（空ならプロセス内で 1 つ）
+    seed: int = 0                            # 曲の長さを選ぶ乱数のシード
+
+
+class _Recorder:
+    """クライアントのスレッドから計測値を集める。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = {"submit": [], "poll": [], "download": []}
+        self.errors: dict[str, int] = {"submit": 0, "poll": 0, "download": 0}
+        self.submit_statuses: dict[str, int] = {}
+        self.job_latencies: list[float] = []
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.audio_seconds = 0
+        self.downloaded_bytes = 0
+
+    def request(self, operation: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[operation].append(seconds)
+            if not ok:
+                self.errors[operation] += 1
+
+    def submitted(self, status: int) -> None:
+        with self._lock:
+            key = str(status)
+            self.submit_statuses[key] = self.submit_statuses.get(key, 0) + 1
+
+    def finished(self, status: str, seconds: float, duration: int, size: int) -> None:
+        with self._lock:
+            if status == "completed":
+                self.completed += 1
+                self.job_latencies.append(seconds)
+                self.audio_seconds += duration
+                self.downloaded_bytes += size
+            elif status == "timeout":
+                self.timed_out += 1
+            else:
+                self.failed += 1
+
+
+class _Client:
+    """1 本の keep-alive 接続で API を呼ぶ。接続が切れたらつなぎ直す。"""
+
+    def __init__(self, host: str, port: int) -> None:
+        self._host = host
+        self._port = port
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def request(self, method: str, path: str, body: Optional[dict] = None) -> tuple[int, bytes]:
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        for attempt in range(2):
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self._host, self._port, timeout=60)
+            try:
+                self._conn.request(method, path, body=payload, headers=headers)
+                response = self._conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, OSError):
+                self._conn.close()
+                self._conn = None
+                if attempt == 1:
+                    raise
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+
+
+def _client_loop(
+    index: int,
+    port: int,
+    config: LoadConfig,
+    deadline: float,
+    recorder: _Recorder,
+) -> None:
+    """投入 → 状態確認 → ダウンロードを deadline まで繰り返す。"""
+    rng = random.Random(config.seed * 1000 + index)
+    client = _Client("127.0.0.1", port)
+    sequence = 0
+    try:
+        while time.monotonic() < deadline:
+            sequence += 1
+            duration = rng.choice(config.durations)
+            body = {
+                # seed を指定しないため、結果キャッシュと相乗りは起きない
+                "prompt": f"benchmark client {index} job {sequence}",
+                "duration": duration,
+                "client_id": f"bench-{index}",
+            }
+            submitted_at = time.perf_counter()
+            try:
+                status, payload = client.request("POST", "/api/generate", body)
+            except (http.client.HTTPException, OSError):
+                recorder.request("submit", time.perf_counter() - submitted_at, ok=False)
+                time.sleep(config.poll_interval)
+                continue
+            recorder.request("submit", time.perf_counter() - submitted_at, ok=status == 202)
+            recorder.submitted(status)
+            if status != 202:
+                # キュー満杯（503）などは少し待って次のジョブを投入する
+                time.sleep(config.poll_interval)
+                continue
+            job_id = json.loads(payload)["job_id"]
+            _follow_job(client, job_id, duration, submitted_at, config, recorder)
+    finally:
+        client.close()
+
+
+def _follow_job(
+    client: _Client,
+    job_id: str,
+    duration: int,
+    submitted_at: float,
+    config: LoadConfig,
+    recorder: _Recorder,
+) -> None:
+    """ジョブが終わるまで状態を確認し、完了していればダウンロードする。"""
+    while True:
+        if time.perf_counter() - submitted_at > _JOB_TIMEOUT:
+            recorder.finished("timeout", 0.0, duration, 0)
+            return
+        time.sleep(config.poll_interval)
+        started = time.perf_counter()
+        try:
+            status, payload = client.request("GET", f"/api/jobs/{job_id}")
+        except (http.client.HTTPException, OSError):
+            recorder.request("poll", time.perf_counter() - started, ok=False)
+            continue
+        recorder.request("poll", time.perf_counter() - started, ok=status == 200)
+        if status != 200:
+            recorder.finished("failed", 0.0, duration, 0)
+            return
+        job_status = json.loads(payload)["status"]
+        if job_status in ("failed", "cancelled"):
+            recorder.finished(job_status, 0.0, duration, 0)
+            return
+        if job_status == "completed":
+            break
+
+    started = time.perf_counter()
+    try:
+        status, audio = client.request("GET", f"/api/jobs/{job_id}/audio")
+    except (http.client.HTTPException, OSError):
+        recorder.request("download", time.perf_counter() - started, ok=False)
+        recorder.finished("failed", 0.0, duration, 0)
+        return
+    finished_at = time.perf_counter()
+    recorder.request("download", finished_at - started, ok=status == 200)
+    if status == 200:
+        recorder.finished("completed", finished_at - submitted_at, duration, len(audio))
+    else:
+        recorder.finished("failed", 0.0, duration, 0)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(port: int, process: subprocess.Popen, log_path: Path) -> None:
+    """サーバーが応答するまで待つ。先に終了した場合はログを添えて例外にする。"""
+    deadline = time.monotonic() + _STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"サーバーが起動できなかった。ログ: {log_path}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/metrics")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+            conn.close()
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"サーバーが {_STARTUP_TIMEOUT:g} 秒以内に起動しなかった。ログ: {log_path}")
+
+
+def run_load(config: LoadConfig) -> dict[str, Any]:
+    """
+    負荷試験を 1 回実行し、計測結果を返す。
+
+    サーバーの音声・キャッシュ・ログは一時ディレクトリに置き、終了後に削除する
+    （起動に失敗した場合はログを調べられるよう残す）。
+    """
+    workdir = Path(tempfile.mkdtemp(prefix="oto-bench-"))
+    stats_path = workdir / "server_stats.json"
+    log_path = workdir / "server.log"
+    port = _free_port()
+    env = {
+        **os.environ,
+        "OTO_GENERATOR": "fake",
+        "OTO_FAKE_WORK": config.work,
+        "OTO_FAKE_SECONDS_PER_AUDIO_SECOND": str(config.seconds_per_audio_second),
+        "OTO_QUEUE_MAX": str(config.queue_max),
+        "OTO_BATCH_MAX": str(config.batch_max),
+        "OTO_DEVICES": config.devices,
+        "OTO_REMOTE_WORKERS": "false",
+        "OTO_JOB_DB": "",
+        "OTO_AUDIO_DIR": str(workdir / "audio"),
+        "OTO_RESULT_CACHE_DIR": str(workdir / "results"),
+    }
+    with open(log_path, "wb") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.server", "--port", str(port), "--stats", str(stats_path)],
+            cwd=_REPO_ROOT,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    try:
+        _wait_until_ready(port, process, log_path)
+
+        recorder = _Recorder()
+        started = time.monotonic()
+        deadline = started + config.seconds
+        threads = [
+            threading.Thread(
+                target=_client_loop,
+                args=(index, port, config, deadline, recorder),
+                name=f"bench-client-{index}",
+                daemon=True,
+            )
+            for index in range(config.clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        # SIGINT で uvicorn を正常に止め、lifespan の終了処理で計測値を書き出させる
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    server_stats = json.loads(stats_path.read_text()) if stats_path.exists() else {}
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    submits = sum(recorder.submit_statuses.values())
+    requests = sum(len(values) for values in recorder.latencies.values())
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "jobs": {
+            "completed": recorder.completed,
+            "failed": recorder.failed,
+            "timed_out": recorder.timed_out,
+            "latency_seconds": percentiles(recorder.job_latencies),
+        },
+        "throughput": {
+            "jobs_per_second": round(recorder.completed / elapsed, 6),
+            "requests_per_second": round(requests / elapsed, 6),
+            "audio_seconds_per_second": round(recorder.audio_seconds / elapsed, 6),
+            "download_bytes_per_second": round(recorder.downloaded_bytes / elapsed, 3),
+        },
+        "requests": {
+            operation: {
+                "errors": recorder.errors[operation],
+                "latency_seconds": percentiles(values),
+            }
+            for operation, values in recorder.latencies.items()
+        },
+        "submit_statuses": recorder.submit_statuses,
+        "queue_full_rate": round(recorder.submit_statuses.get("503", 0) / submits, 6) if submits else 0.0,
+        "server": server_stats,
+    }
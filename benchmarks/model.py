@@ -0,0 +1,108 @@
+"""
+実際のモデルによる生成速度のベンチマーク。
+
+API やキューを通さずに load_models() と generate_and_save() を直接呼び、曲の長さごとに
+壁時計 1 秒あたりに生成できる曲の秒数を計測する。GPU とモデルのチェックポイントが
+必要で、読み込みに数分かかるため、明示的に `python -m benchmarks model` を実行した
+場合だけ動かす。
+"""
+
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from loguru import logger
+
+from benchmarks.report import percentiles
+
+
+@dataclass
+class ModelBenchConfig:
+    """モデルのベンチマークの条件。"""
+
+    durations: list[int] = field(default_factory=lambda: [30, 60, 120])   # 計測する曲の長さ（秒）
+    repeat: int = 3        # 曲の長さごとの計測回数
+    warmup: int = 0        # 計測前に捨てる生成の回数（load_models() が OTO_WARMUP_RUNS の分は済ませる）
+    device: str = "auto"   # モデルを読み込むデバイス
+    prompt: str = "calm lo-fi hip hop with soft piano"
+    seed: int = 42
+
+
+def run_model_bench(config: ModelBenchConfig) -> dict[str, Any]:
+    """
+    モデルを読み込み、曲の長さごとに repeat 回生成して計測結果を返す。
+
+    生成した MP3 は一時ディレクトリに保存し、終了時に削除する。
+    """
+    from backend.models.schemas import GenerateRequest
+    from backend.services.job_store import _JobRecord
+    from backend.services.metrics import gpu_memory_stats, stage_phase
+    from backend.services.model_loader import ensure_acestep_importable, load_models
+    from backend.services.music_generator import generate_and_save
+
+    ensure_acestep_importable()
+    started = time.perf_counter()
+    models = load_models(config.device)
+    load_seconds = time.perf_counter() - started
+    logger.info("モデル読み込み完了: {:.1f} 秒 (device={})", load_seconds, models.device)
+
+    with tempfile.TemporaryDirectory(prefix="oto-model-bench-") as save_dir:
+
+        def generate(duration: int) -> tuple[float, dict[str, float]]:
+            """1 曲生成し、所要時間と処理段階ごとの秒数を返す。"""
+            phases: dict[str, float] = {}
+            current = ["", time.perf_counter()]
+
+            def on_progress(value: float, stage: str) -> None:
+                phase = stage_phase(stage)
+                now = time.perf_counter()
+                if current[0]:
+                    phases[current[0]] = phases.get(current[0], 0.0) + now - current[1]
+                current[0], current[1] = phase, now
+
+            job = _JobRecord(
+                str(uuid.uuid4()),
+                GenerateRequest(prompt=config.prompt, duration=duration, seed=config.seed),
+            )
+            begin = time.perf_counter()
+            generate_and_save(models, job, save_dir, on_progress)
+            end = time.perf_counter()
+            if current[0]:
+                phases[current[0]] = phases.get(current[0], 0.0) + end - current[1]
+            return end - begin, phases
+
+        for _ in range(config.warmup):
+            generate(min(config.durations))
+
+        results: dict[str, Any] = {}
+        for duration in config.durations:
+            wall: list[float] = []
+            phase_totals: dict[str, list[float]] = {}
+            for run in range(config.repeat):
+                seconds, phases = generate(duration)
+                wall.append(seconds)
+                for name, value in phases.items():
+                    phase_totals.setdefault(name, []).append(value)
+                logger.info(
+                    "duration={}s run={}/{}: {:.2f} 秒 ({:.2f} 曲秒/秒)",
+                    duration,
+                    run + 1,
+                    config.repeat,
+                    seconds,
+                    duration / seconds,
+                )
+            results[str(duration)] = {
+                "wall_seconds": percentiles(wall),
+                "audio_seconds_per_second": round(duration * len(wall) / sum(wall), 6),
+                "phase_seconds": {name: percentiles(values) for name, values in phase_totals.items()},
+            }
+
+    return {
+        "device": models.device,
+        "lm_model": models.lm_model,
+        "load_seconds": round(load_seconds, 3),
+        "durations": results,
+        "gpu_memory_peak_bytes": {device: peak for device, _, peak in gpu_memory_stats()},
+    }
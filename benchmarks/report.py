@@ -0,0 +1,116 @@
+"""ベンチマーク結果の JSON の組み立てと比較。"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+# 結果の JSON の形式を変えたら上げる（compare は同じ版どうしだけを比較する）
+SCHEMA_VERSION = 1
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentiles(values: list[float]) -> dict[str, Optional[float]]:
+    """件数・平均・p50/p95/p99・最大を返す（nearest-rank 法）。値がなければ None を入れる。"""
+    if not values:
+        return {"count": 0, "mean": None, "p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        index = max(0, min(len(ordered) - 1, -(-len(ordered) * p // 100) - 1))
+        return round(ordered[int(index)], 6)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 6),
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+        "max": round(ordered[-1], 6),
+    }
+
+
+def environment() -> dict[str, Any]:
+    """結果を比較するときに必要な実行環境の情報。"""
+    try:
+        version = metadata.version("oto-factory")
+    except metadata.PackageNotFoundError:
+        version = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=_REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "version": version,
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def build_report(kind: str, config: dict[str, Any], results: dict[str, Any]) -> dict[str, Any]:
+    """1 回分の結果を JSON にできる dict にまとめる。"""
+    return {
+        "schema": SCHEMA_VERSION,
+        "kind": kind,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(),
+        "config": config,
+        "results": results,
+    }
+
+
+def write_report(report: dict[str, Any], output: Optional[str]) -> None:
+    """結果を output（None なら標準出力）に書き出す。"""
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output is None:
+        print(text)
+        return
+    Path(output).write_text(text + "\n", encoding="utf-8")
+
+
+def compare(old: dict[str, Any], new: dict[str, Any]) -> list[tuple[str, float, float, Optional[float]]]:
+    """
+    2 つの結果の results に含まれる数値を比較する。
+
+    Returns:
+        (項目のパス, 旧の値, 新の値, 変化率 %) のリスト。旧の値が 0 の場合の変化率は None。
+
+    Raises:
+        ValueError: 形式の版や種類が異なる場合。
+    """
+    if old.get("schema") != new.get("schema"):
+        raise ValueError(f"形式の版が異なる: {old.get('schema')} と {new.get('schema')}")
+    if old.get("kind") != new.get("kind"):
+        raise ValueError(f"ベンチマークの種類が異なる: {old.get('kind')} と {new.get('kind')}")
+    old_values = dict(_numbers(old.get("results", {})))
+    rows = []
+    for path, value in _numbers(new.get("results", {})):
+        if path not in old_values:
+            continue
+        before = old_values[path]
+        change = (value - before) / before * 100 if before else None
+        rows.append((path, before, value, change))
+    return rows
+
+
+def _numbers(tree: Any, prefix: str = "") -> Iterator[tuple[str, float]]:
+    """入れ子の dict から数値の葉を (ドット区切りのパス, 値) で列挙する。"""
+    if isinstance(tree, dict):
+        for key, value in tree.items():
+            yield from _numbers(value, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(tree, (int, float)) and not isinstance(tree, bool):
+        yield prefix, float(tree)
@@ -0,0 +1,131 @@
+"""
+負荷試験用に API サーバーを起動する（benchmarks.load から別プロセスとして起動される）。
+
+通常の backend.main:app をそのまま使い、起動後に JobStore と結果キャッシュのロックを
+待ち時間を計測するロックに差し替える。あわせてイベントループの遅れを計測し、
+終了時（SIGINT / SIGTERM）に --stats のファイルへ JSON で書き出す。
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any
+
+from benchmarks.report import percentiles
+
+# イベントループの遅れを測る間隔（秒）
+_LAG_INTERVAL = 0.05
+
+
+class ContentionLock:
+    """
+    threading.Lock の代わりに使い、取得の待ち時間と保持時間を記録するロック。
+
+    まず待たずに取得を試み、取れなかった場合だけ競合として待ち時間を測る。
+    記録はロックを保持している間に行うため、集計用の別のロックは要らない。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._acquired_at = 0.0
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.hold_seconds = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        waited = 0.0
+        if not self._lock.acquire(blocking=False):
+            if not blocking:
+                return False
+            started = time.perf_counter()
+            if not self._lock.acquire(timeout=timeout):
+                return False
+            waited = time.perf_counter() - started
+            self.contended += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.acquisitions += 1
+        self._acquired_at = time.perf_counter()
+        return True
+
+    def release(self) -> None:
+        self.hold_seconds += time.perf_counter() - self._acquired_at
+        self._lock.release()
+
+    def __enter__(self) -> "ContentionLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "contention_rate": round(self.contended / self.acquisitions, 6) if self.acquisitions else 0.0,
+            "wait_seconds": round(self.wait_seconds, 6),
+            "max_wait_seconds": round(self.max_wait_seconds, 6),
+            "hold_seconds": round(self.hold_seconds, 6),
+        }
+
+
+async def _measure_loop_lag(samples: list[float]) -> None:
+    """一定間隔で眠り、予定より遅れて起きた時間をイベントループの遅れとして記録する。"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + _LAG_INTERVAL
+        await asyncio.sleep(_LAG_INTERVAL)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+def _instrument(app: Any, stats_path: str) -> None:
+    """app の lifespan を包み、ロックの差し替えと終了時の書き出しを行う。"""
+    original = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app: Any):
+        async with original(app):
+            locks = {}
+            for name in ("job_store", "result_cache"):
+                target = getattr(app.state, name, None)
+                if target is not None and hasattr(target, "_lock"):
+                    locks[name] = target._lock = ContentionLock()
+            lag: list[float] = []
+            lag_task = asyncio.create_task(_measure_loop_lag(lag))
+            try:
+                yield
+            finally:
+                lag_task.cancel()
+                stats = {
+                    "locks": {name: lock.stats() for name, lock in locks.items()},
+                    "event_loop_lag_seconds": percentiles(lag),
+                }
+                with open(stats_path, "w", encoding="utf-8") as f:
+                    json.dump(stats, f)
+
+    app.router.lifespan_context = lifespan
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="負荷試験用の API サーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--stats", required=True, help="終了時に計測値を書き出すファイル")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    from backend.main import app
+
+    _instrument(app, args.stats)
+    uvicorn.run(app, host=args.host, port=args.port, workers=1, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
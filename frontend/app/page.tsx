@@ -40,7 +40,11 @@ export default function HomePage() {
         }
 
         setHealth(response);
-        setHealthMessage(null);
+        setHealthMessage(
+          response.model_loaded
+            ? null
+            : "モデルを読み込み中です。今生成を依頼すると、読み込み完了後に順番に生成します。",
+        );
       } catch (error: unknown) {
         if (!active || controller.signal.aborted) {
           return;
@@ -131,7 +135,9 @@ export default function HomePage() {
           <div className="hero-status">
             <div className="hero-status__item">
               <span>server</span>
-              <strong>{health?.status === "ok" ? "online" : "offline"}</strong>
+              <strong>
+                {health?.status === "ok" ? (health.model_loaded ? "online" : "loading") : "offline"}
+              </strong>
             </div>
             <div className="hero-status__item">
               <span>gpu</span>
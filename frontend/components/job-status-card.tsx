@@ -12,6 +12,10 @@ export function JobStatusCard({ uiStatus, job, message, error }: JobStatusCardPr
   const progress = job?.progress ?? (uiStatus === "completed" ? 1 : 0);
   const createdAt = formatTimestamp(job?.created_at ?? null);
   const completedAt = formatTimestamp(job?.completed_at ?? null);
+  const queueStage =
+    job?.status === "queued" && job.queue_position != null
+      ? `順番待ち（前に ${job.queue_position} 件）`
+      : null;
 
   return (
     <section className="card-oto reveal-card" aria-live="polite">
@@ -30,7 +34,7 @@ export function JobStatusCard({ uiStatus, job, message, error }: JobStatusCardPr
         </div>
         <div>
           <span className="status-meta__label">stage</span>
-          <strong>{job?.stage ?? message ?? "リクエストをお待ちしています"}</strong>
+          <strong>{queueStage ?? job?.stage ?? message ?? "リクエストをお待ちしています"}</strong>
         </div>
       </div>
 
@@ -2,7 +2,7 @@
 
 import { useEffect, useRef, useState } from "react";
 
-import { ApiError, generateMusic, getJobStatus } from "@/lib/api";
+import { ApiError, generateMusic, getJobStatus, subscribeJobEvents } from "@/lib/api";
 import type { GenerateRequest, JobStatusResponse, UiError, UiStatus } from "@/lib/types";
 
 interface GenerationJobState {
@@ -58,14 +58,43 @@ export function useGenerationJob() {
     };
   }, []);
 
+  // queued → running の遷移でストリームを張り直さないよう、監視中かどうかだけを依存に使う
+  const watchedJobId =
+    state.uiStatus === "queued" || state.uiStatus === "running" ? state.jobId : null;
+
   useEffect(() => {
-    if (!state.jobId || (state.uiStatus !== "queued" && state.uiStatus !== "running")) {
+    if (!watchedJobId) {
       return;
     }
 
-    const jobId = state.jobId;
+    const jobId = watchedJobId;
     let timeoutId: number | null = null;
+    let unsubscribe: (() => void) | null = null;
+
+    const applyJob = (job: JobStatusResponse) => {
+      setState((current) => ({
+        ...current,
+        jobId: job.job_id,
+        job,
+        uiStatus:
+          job.status === "completed"
+            ? "downloading"
+            : job.status === "failed" || job.status === "cancelled"
+              ? "failed"
+              : job.status,
+        error:
+          job.status === "failed"
+            ? {
+                summary: "生成中にエラーが発生しました。内容をご確認のうえ、再度お試しください。",
+                detail: job.error,
+              }
+            : job.status === "cancelled"
+              ? { summary: "ジョブがキャンセルされました。" }
+              : current.error,
+      }));
+    };
 
+    // --- ストリームが使えない場合のポーリング ---
     const schedulePoll = (delay: number) => {
       timeoutId = window.setTimeout(() => {
         void pollOnce();
@@ -79,24 +108,7 @@ export function useGenerationJob() {
 
       try {
         const job = await getJobStatus(jobId, controller.signal);
-        setState((current) => ({
-          ...current,
-          jobId: job.job_id,
-          job,
-          uiStatus:
-            job.status === "completed"
-              ? "downloading"
-              : job.status === "failed"
-                ? "failed"
-                : job.status,
-          error:
-            job.status === "failed"
-              ? {
-                  summary: "生成中にエラーが発生しました。内容をご確認のうえ、再度お試しください。",
-                  detail: job.error,
-                }
-              : current.error,
-        }));
+        applyJob(job);
 
         if (job.status === "queued" || job.status === "running") {
           schedulePoll(document.visibilityState === "visible" ? 2000 : 5000);
@@ -115,25 +127,38 @@ export function useGenerationJob() {
     };
 
     const handleVisibilityChange = () => {
-      if (document.visibilityState === "visible") {
-        if (timeoutId !== null) {
-          window.clearTimeout(timeoutId);
-        }
+      if (timeoutId !== null && document.visibilityState === "visible") {
+        window.clearTimeout(timeoutId);
         void pollOnce();
       }
     };
 
-    document.addEventListener("visibilitychange", handleVisibilityChange);
-    void pollOnce();
+    // --- SSE ストリームで状態変化を受け取る ---
+    unsubscribe = subscribeJobEvents([jobId], {
+      onJob: applyJob,
+      onMissing: () => {
+        setState((current) => ({
+          ...current,
+          uiStatus: "failed",
+          error: mapApiError(new ApiError("Job not found", 404)),
+        }));
+      },
+      onError: () => {
+        unsubscribe = null;
+        document.addEventListener("visibilitychange", handleVisibilityChange);
+        void pollOnce();
+      },
+    });
 
     return () => {
+      unsubscribe?.();
       document.removeEventListener("visibilitychange", handleVisibilityChange);
       pollingAbortRef.current?.abort();
       if (timeoutId !== null) {
         window.clearTimeout(timeoutId);
       }
     };
-  }, [state.jobId, state.uiStatus]);
+  }, [watchedJobId]);
 
   const submit = async (payload: GenerateRequest) => {
     pollingAbortRef.current?.abort();
@@ -147,16 +172,23 @@ export function useGenerationJob() {
 
     try {
       const response = await generateMusic(payload);
+      // 結果キャッシュにヒットした場合は completed で返るため、そのまま音声取得に進む
+      const cached = response.status === "completed";
       setState({
-        uiStatus: response.status,
+        uiStatus: cached ? "downloading" : response.status,
         job: {
           job_id: response.job_id,
           status: response.status,
-          progress: 0,
-          stage: "リクエストを受け付けました",
+          progress: cached ? 1 : 0,
+          stage: cached ? "生成済みの音声を取得します" : "リクエストを受け付けました",
           created_at: new Date().toISOString(),
-          completed_at: null,
+          completed_at: cached ? new Date().toISOString() : null,
           error: null,
+          queue_position: response.queue_position,
+          estimated_start_at: response.estimated_start_at,
+          estimated_finish_at: response.estimated_finish_at,
+          segment_count: null,
+          segments_ready: 0,
         },
         jobId: response.job_id,
         responseMessage: response.message,
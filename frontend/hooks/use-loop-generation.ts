@@ -2,7 +2,7 @@
 
 import { useCallback, useRef, useState } from "react";
 
-import { downloadAudio, generateMusic, getJobStatus } from "@/lib/api";
+import { cancelJob, downloadAudio, generateMusic, getEstimate, waitForJob } from "@/lib/api";
 import type { GenerateRequest, LoopStatus, UiError } from "@/lib/types";
 
 /** ループ生成の内部状態 */
@@ -22,18 +22,18 @@ const INITIAL_STATE: LoopState = {
   message: null,
 };
 
-/** ポーリング間隔（ms） */
-const POLL_INTERVAL = 2000;
-
 /** 生成時間の初期推定（ms） */
 const DEFAULT_GEN_TIME = 45000;
 
-/** 生成時間のマージン倍率 */
+/** 生成時間のマージン倍率（サーバーの推定値が得られない場合のみ使う） */
 const GEN_TIME_MARGIN = 1.3;
 
 /** 次トラックの先行生成に加えるバッファ（秒） */
 const TRIGGER_BUFFER_SEC = 15;
 
+/** サーバーの推定値を取り直す間隔（再生位置の秒数） */
+const ESTIMATE_REFRESH_SEC = 10;
+
 /** AudioPlayback フックの公開 API のうちループで使う部分 */
 interface AudioPlaybackHandle {
   audioRef: React.RefObject<HTMLAudioElement | null>;
@@ -53,6 +53,8 @@ export function useLoopGeneration() {
   const audioHandleRef = useRef<AudioPlaybackHandle | null>(null);
   const getPayloadRef = useRef<(() => GenerateRequest) | null>(null);
   const genHistoryRef = useRef<number[]>([]);
+  // サーバーが見積もった、今投入した場合に完了するまでの時間（ms）
+  const serverEstimateRef = useRef<number | null>(null);
   const timeupdateCleanupRef = useRef<(() => void) | null>(null);
   const triggerFiredRef = useRef(false);
   const loopStatusRef = useRef<LoopStatus>("inactive");
@@ -65,6 +67,8 @@ export function useLoopGeneration() {
 
   /** 生成時間の推定値（ms）を返す */
   const estimateGenTime = useCallback((): number => {
+    // サーバーの推定はキュー待ちを含み、実測から学習しているためマージンを掛けない
+    if (serverEstimateRef.current !== null) return serverEstimateRef.current;
     const history = genHistoryRef.current;
     if (history.length === 0) return DEFAULT_GEN_TIME;
     const max = Math.max(...history);
@@ -77,17 +81,20 @@ export function useLoopGeneration() {
       // 1. POST /api/generate
       const { job_id } = await generateMusic(payload, signal);
 
-      // 2. ポーリングで完了を待つ
-      // eslint-disable-next-line no-constant-condition
-      while (true) {
-        await new Promise((r) => setTimeout(r, POLL_INTERVAL));
-        if (signal.aborted) throw new DOMException("Aborted", "AbortError");
+      // ループ停止などで abort されたら、サーバー側の生成もキャンセルして GPU を空ける
+      const onAbort = () => {
+        cancelJob(job_id).catch(() => {});
+      };
+      signal.addEventListener("abort", onAbort, { once: true });
 
-        const job = await getJobStatus(job_id, signal);
-        if (job.status === "completed") break;
-        if (job.status === "failed") {
+      try {
+        // 2. SSE ストリームで完了を待つ
+        const job = await waitForJob(job_id, signal);
+        if (job.status === "failed" || job.status === "cancelled") {
           throw new Error(job.error ?? "生成に失敗した");
         }
+      } finally {
+        signal.removeEventListener("abort", onAbort);
       }
 
       // 3. 音声ダウンロード
@@ -96,12 +103,30 @@ export function useLoopGeneration() {
     [],
   );
 
+  /** 次のトラックの完了予定までの時間をサーバーに問い合わせる */
+  const refreshServerEstimate = useCallback(async () => {
+    const getPayload = getPayloadRef.current;
+    if (!getPayload) return;
+    try {
+      const estimate = await getEstimate(getPayload().duration);
+      serverEstimateRef.current = Math.max(
+        Date.parse(estimate.estimated_finish_at) - Date.now(),
+        0,
+      );
+    } catch {
+      // 取得できなければ前回の推定値（なければ直近の実測値）を使う
+    }
+  }, []);
+
   /** timeupdate リスナーを設置し、トリガーポイントで次トラック生成を開始する */
   const setupTimeupdateListener = useCallback(
     (audioElement: HTMLAudioElement) => {
       // 前回のリスナーをクリーンアップ
       timeupdateCleanupRef.current?.();
       triggerFiredRef.current = false;
+      void refreshServerEstimate();
+      // キューの状況は再生中にも変わるため、一定間隔で推定値を取り直す
+      let lastRefreshAt = 0;
 
       const handler = () => {
         if (triggerFiredRef.current) return;
@@ -110,6 +135,11 @@ export function useLoopGeneration() {
         const { currentTime, duration } = audioElement;
         if (!duration || !isFinite(duration)) return;
 
+        if (currentTime - lastRefreshAt >= ESTIMATE_REFRESH_SEC) {
+          lastRefreshAt = currentTime;
+          void refreshServerEstimate();
+        }
+
         const estGen = estimateGenTime() / 1000; // 秒に変換
         const triggerPoint = duration - estGen - TRIGGER_BUFFER_SEC;
 
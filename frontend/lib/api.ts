@@ -1,8 +1,12 @@
 import type {
+  BatchGenerateResponse,
+  EstimateResponse,
   GenerateJobResponse,
   GenerateRequest,
   HealthResponse,
+  JobListResponse,
   JobStatusResponse,
+  StationStatus,
 } from "@/lib/types";
 
 const API_BASE_URL =
@@ -17,6 +21,8 @@ export class ApiError extends Error {
     message: string,
     public status: number,
     public detail?: string,
+    /** 429 / 503 で返された Retry-After（秒） */
+    public retryAfter?: number,
   ) {
     super(message);
     this.name = "ApiError";
@@ -34,7 +40,13 @@ async function requestJson<T>(path: string, init?: RequestInit): Promise<T> {
 
   if (!response.ok) {
     const payload = (await response.json().catch(() => ({}))) as ApiErrorPayload;
-    throw new ApiError(payload.detail ?? "API request failed", response.status, payload.detail);
+    const retryAfter = Number(response.headers.get("Retry-After"));
+    throw new ApiError(
+      payload.detail ?? "API request failed",
+      response.status,
+      payload.detail,
+      Number.isFinite(retryAfter) && retryAfter > 0 ? retryAfter : undefined,
+    );
   }
 
   return (await response.json()) as T;
@@ -51,6 +63,33 @@ export async function generateMusic(
   });
 }
 
+/**
+ * 複数のリクエストをまとめて投入する（POST /api/generate/batch）。
+ * キューの空きが足りなければ 1 件も投入されず、503 の ApiError になる。
+ */
+export async function generateMusicBatch(
+  payloads: GenerateRequest[],
+  signal?: AbortSignal,
+): Promise<BatchGenerateResponse> {
+  return requestJson<BatchGenerateResponse>("/api/generate/batch", {
+    method: "POST",
+    body: JSON.stringify({ jobs: payloads }),
+    signal,
+  });
+}
+
+/** 複数のジョブの状態と全体のまとめを 1 回のリクエストで取得する（GET /api/jobs?ids=...）。 */
+export async function getJobStatuses(
+  jobIds: string[],
+  signal?: AbortSignal,
+): Promise<JobListResponse> {
+  const ids = jobIds.map(encodeURIComponent).join(",");
+  return requestJson<JobListResponse>(`/api/jobs?ids=${ids}`, {
+    method: "GET",
+    signal,
+  });
+}
+
 export async function getJobStatus(
   jobId: string,
   signal?: AbortSignal,
@@ -61,6 +100,112 @@ export async function getJobStatus(
   });
 }
 
+/**
+ * ジョブをキャンセルする（DELETE /api/jobs/{job_id}）。
+ * ページ遷移中でも送信されるよう keepalive を付ける。
+ */
+export async function cancelJob(jobId: string): Promise<JobStatusResponse> {
+  return requestJson<JobStatusResponse>(`/api/jobs/${jobId}`, {
+    method: "DELETE",
+    keepalive: true,
+  });
+}
+
+export interface JobEventHandlers {
+  onJob: (job: JobStatusResponse) => void;
+  onMissing?: (jobId: string) => void;
+  onError?: () => void;
+}
+
+/**
+ * ジョブ状態の SSE ストリーム（GET /api/jobs/events）を購読する。
+ * 返り値の関数を呼ぶと購読を解除する。
+ */
+export function subscribeJobEvents(jobIds: string[], handlers: JobEventHandlers): () => void {
+  const params = new URLSearchParams({ ids: jobIds.join(",") });
+  const source = new EventSource(`${API_BASE_URL}/api/jobs/events?${params.toString()}`);
+
+  source.addEventListener("job", (event) => {
+    handlers.onJob(JSON.parse((event as MessageEvent<string>).data) as JobStatusResponse);
+  });
+  source.addEventListener("missing", (event) => {
+    const { job_id } = JSON.parse((event as MessageEvent<string>).data) as { job_id: string };
+    handlers.onMissing?.(job_id);
+  });
+  // 全ジョブが終了するとサーバーが切断するため、自動再接続させずに閉じる
+  source.addEventListener("done", () => source.close());
+  source.onerror = () => {
+    source.close();
+    handlers.onError?.();
+  };
+
+  return () => source.close();
+}
+
+/** ストリームが使えない場合のポーリング間隔（ms） */
+const FALLBACK_POLL_INTERVAL = 2000;
+
+function isTerminal(job: JobStatusResponse): boolean {
+  return job.status === "completed" || job.status === "failed" || job.status === "cancelled";
+}
+
+async function pollUntilDone(jobId: string, signal?: AbortSignal): Promise<JobStatusResponse> {
+  // eslint-disable-next-line no-constant-condition
+  while (true) {
+    await new Promise((r) => setTimeout(r, FALLBACK_POLL_INTERVAL));
+    if (signal?.aborted) throw new DOMException("Aborted", "AbortError");
+
+    const job = await getJobStatus(jobId, signal);
+    if (isTerminal(job)) return job;
+  }
+}
+
+/**
+ * ジョブが完了または失敗するまで待ち、最終状態を返す。
+ * SSE ストリームで待機し、接続できない場合はポーリングに切り替える。
+ */
+export function waitForJob(jobId: string, signal?: AbortSignal): Promise<JobStatusResponse> {
+  return new Promise((resolve, reject) => {
+    if (signal?.aborted) {
+      reject(new DOMException("Aborted", "AbortError"));
+      return;
+    }
+
+    let unsubscribe = () => {};
+    const onAbort = () => {
+      unsubscribe();
+      reject(new DOMException("Aborted", "AbortError"));
+    };
+    const settle = (fn: () => void) => {
+      signal?.removeEventListener("abort", onAbort);
+      unsubscribe();
+      fn();
+    };
+
+    signal?.addEventListener("abort", onAbort, { once: true });
+    unsubscribe = subscribeJobEvents([jobId], {
+      onJob: (job) => {
+        if (isTerminal(job)) settle(() => resolve(job));
+      },
+      onMissing: () => {
+        settle(() => reject(new ApiError("ジョブが見つからない", 404, "ジョブが見つからない")));
+      },
+      onError: () => {
+        settle(() => void pollUntilDone(jobId, signal).then(resolve, reject));
+      },
+    });
+  });
+}
+
+/** 今投入した場合の生成時間と完了予定時刻を取得する */
+export async function getEstimate(duration: number, signal?: AbortSignal): Promise<EstimateResponse> {
+  const params = new URLSearchParams({ duration: String(duration) });
+  return requestJson<EstimateResponse>(`/api/estimate?${params.toString()}`, {
+    method: "GET",
+    signal,
+  });
+}
+
 export async function getHealth(signal?: AbortSignal): Promise<HealthResponse> {
   return requestJson<HealthResponse>("/api/health", {
     method: "GET",
@@ -81,3 +226,15 @@ export async function downloadAudio(jobId: string, signal?: AbortSignal): Promis
 
   return response.blob();
 }
+
+export async function listStations(signal?: AbortSignal): Promise<StationStatus[]> {
+  return requestJson<StationStatus[]>("/api/stations", {
+    method: "GET",
+    signal,
+  });
+}
+
+/** ステーションの放送ストリームの URL（`<audio src>` に直接指定する） */
+export function stationStreamUrl(name: string): string {
+  return `${API_BASE_URL}/api/stations/${encodeURIComponent(name)}/stream`;
+}
@@ -24,6 +24,8 @@ export function mapStatusLabel(status: UiStatus | JobStatus): string {
       return "完了";
     case "failed":
       return "エラー";
+    case "cancelled":
+      return "キャンセル";
     default:
       return status;
   }
@@ -1,4 +1,4 @@
-export type JobStatus = "queued" | "running" | "completed" | "failed";
+export type JobStatus = "queued" | "running" | "completed" | "failed" | "cancelled";
 
 export type LoopStatus = "inactive" | "active" | "stopping";
 
@@ -16,12 +16,18 @@ export interface GenerateRequest {
   duration: number;
   bpm?: number | null;
   seed?: number | null;
+  segmented?: boolean;
+  priority?: number;
+  client_id?: string | null;
 }
 
 export interface GenerateJobResponse {
   job_id: string;
   status: JobStatus;
   message: string;
+  queue_position: number | null;
+  estimated_start_at: string | null;
+  estimated_finish_at: string | null;
 }
 
 export interface JobStatusResponse {
@@ -32,17 +38,131 @@ export interface JobStatusResponse {
   created_at: string;
   completed_at: string | null;
   error: string | null;
+  queue_position: number | null;
+  estimated_start_at: string | null;
+  estimated_finish_at: string | null;
+  segment_count: number | null;
+  segments_ready: number;
+  audio_expired: boolean;
+}
+
+export interface BatchSummary {
+  total: number;
+  queued: number;
+  running: number;
+  completed: number;
+  failed: number;
+  cancelled: number;
+  missing: number;
+  progress: number;
+  finished: boolean;
+}
+
+export interface BatchGenerateResponse {
+  jobs: GenerateJobResponse[];
+  summary: BatchSummary;
+}
+
+export interface JobListResponse {
+  jobs: JobStatusResponse[];
+  missing: string[];
+  summary: BatchSummary;
+}
+
+export interface EstimateResponse {
+  duration: number;
+  generation_seconds: number;
+  estimated_start_at: string;
+  estimated_finish_at: string;
+}
+
+export interface CacheStats {
+  hits: number;
+  misses: number;
+  hit_rate: number;
+  entries: number;
+  size_bytes: number;
+  max_bytes: number;
+}
+
+export interface LmCacheStats {
+  hits: number;
+  misses: number;
+  hit_rate: number;
+  entries: number;
+  max_entries: number;
+}
+
+export interface PipelineStats {
+  lm: number;
+  dit: number;
+  overlap: number;
+  busy: number;
+}
+
+export interface StagingStats {
+  promoted: number;
+  promoted_bytes: number;
+  free_bytes: number;
+}
+
+export interface DiskUsage {
+  used_bytes: number;
+  files: number;
+  max_bytes: number;
+  evicted_jobs: number;
+  free_bytes: number;
+  staging: StagingStats | null;
+}
+
+export interface WorkerHealth {
+  device: string;
+  state: "starting" | "idle" | "busy" | "restarting" | "failed";
+  pid: number | null;
+  job_ids: string[];
+  completed: number;
+  restarts: number;
+  last_error: string | null;
+}
+
+export interface ModelLoadStatus {
+  device: string;
+  name: "dit" | "lm" | "warmup";
+  state: "pending" | "loading" | "ready" | "failed" | "skipped";
+  started_at: string | null;
+  finished_at: string | null;
+  elapsed_seconds: number | null;
+  error: string | null;
 }
 
 export interface HealthResponse {
   status: string;
   model_loaded: boolean;
+  models: ModelLoadStatus[];
   gpu: string;
   vram_gb: number;
   queue_size: number;
+  result_cache: CacheStats | null;
+  lm_cache: LmCacheStats | null;
+  pipeline: PipelineStats | null;
+  disk: DiskUsage | null;
+  workers: WorkerHealth[];
 }
 
 export interface UiError {
   summary: string;
   detail?: string | null;
 }
+
+export interface StationStatus {
+  name: string;
+  prompt: string;
+  duration: number;
+  crossfade_seconds: number;
+  listeners: number;
+  tracks_generated: number;
+  failures: number;
+  now_playing_job_id: string | null;
+  generating_job_id: string | null;
+  buffered_seconds: number;
+}
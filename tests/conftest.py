@@ -0,0 +1,38 @@
+"""テスト共通のフィクスチャ。"""
+
+import pytest
+from fastapi import FastAPI
+
+from backend.routers import generate
+from backend.services.admission import AdmissionController
+from backend.services.eta import GenerationTimeModel
+from backend.services.job_store import JobStore
+from backend.services.result_cache import ResultCache
+from backend.services.scheduler import JobScheduler
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """
+    生成エンドポイントだけを載せたアプリを作る関数を返す。
+
+    lifespan（モデルの読み込み・ワーカーの起動）は行わないため、投入したジョブは実行されず
+    キューに残る。app.state は引数で一部を差し替えられる。
+    """
+
+    def _make(**state) -> FastAPI:
+        app = FastAPI()
+        app.include_router(generate.router)
+        app.state.load_error = None
+        app.state.job_store = JobStore()
+        app.state.job_queue = JobScheduler(maxsize=100, policy="fifo")
+        app.state.result_cache = ResultCache(tmp_path / "results", max_bytes=0, model_tag=None)
+        app.state.eta = GenerationTimeModel(lm_enabled=False)
+        app.state.admission = AdmissionController(
+            seconds_per_minute=0, burst_seconds=0, max_backlog_seconds=0
+        )
+        for name, value in state.items():
+            setattr(app.state, name, value)
+        return app
+
+    return _make
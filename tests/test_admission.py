@@ -0,0 +1,88 @@
+"""AdmissionController のテスト。"""
+
+import pytest
+
+from backend.services.admission import AdmissionController
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """admission が参照する time.monotonic() を手で進める。"""
+    now = [1000.0]
+    monkeypatch.setattr("backend.services.admission.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_disabled_controller_admits_everything():
+    admission = AdmissionController(seconds_per_minute=0, burst_seconds=60, max_backlog_seconds=0)
+
+    assert not admission.rate_limited and not admission.backlog_limited
+    assert admission.admit({"h": 10_000}, backlog_seconds=10_000) is None
+
+
+def test_rate_limit_rejects_with_retry_after_until_refilled(clock):
+    admission = AdmissionController(seconds_per_minute=60, burst_seconds=100, max_backlog_seconds=0)
+
+    assert admission.admit({"h": 80}, backlog_seconds=0) is None
+    rejection = admission.admit({"h": 50}, backlog_seconds=0)
+
+    assert rejection is not None
+    assert rejection.reason == "rate_limit"
+    # 足りない 30 秒分は、毎秒 1 秒ずつ回復する
+    assert rejection.retry_after == 30
+    clock[0] += 30
+    assert admission.admit({"h": 50}, backlog_seconds=0) is None
+    assert admission.rejected["rate_limit"] == 1
+
+
+def test_rate_limit_is_per_client(clock):
+    admission = AdmissionController(seconds_per_minute=60, burst_seconds=100, max_backlog_seconds=0)
+
+    assert admission.admit({"a": 100}, backlog_seconds=0) is None
+    assert admission.admit({"a": 10}, backlog_seconds=0) is not None
+    assert admission.admit({"b": 100}, backlog_seconds=0) is None
+
+
+def test_cost_above_burst_is_admitted_only_with_a_full_bucket(clock):
+    admission = AdmissionController(seconds_per_minute=60, burst_seconds=100, max_backlog_seconds=0)
+
+    assert admission.admit({"h": 600}, backlog_seconds=0) is None
+    rejection = admission.admit({"h": 600}, backlog_seconds=0)
+    assert rejection is not None and rejection.retry_after == 100
+
+
+def test_batch_charges_nobody_unless_everyone_fits(clock):
+    admission = AdmissionController(seconds_per_minute=60, burst_seconds=100, max_backlog_seconds=0)
+    admission.admit({"a": 90}, backlog_seconds=0)
+
+    assert admission.admit({"b": 100, "a": 20}, backlog_seconds=0) is not None
+    # b のトークンは使われていない
+    assert admission.admit({"b": 100}, backlog_seconds=0) is None
+
+
+def test_backlog_limit_rejects_until_queue_drains():
+    admission = AdmissionController(seconds_per_minute=0, burst_seconds=100, max_backlog_seconds=300)
+
+    assert admission.admit({"h": 30}, backlog_seconds=300) is None
+    rejection = admission.admit({"h": 30}, backlog_seconds=420.5)
+
+    assert rejection is not None
+    assert rejection.reason == "backlog"
+    assert rejection.retry_after == 121
+    assert admission.rejected["backlog"] == 1
+
+
+def test_backlog_rejection_does_not_spend_tokens(clock):
+    admission = AdmissionController(seconds_per_minute=60, burst_seconds=100, max_backlog_seconds=300)
+
+    assert admission.admit({"h": 100}, backlog_seconds=301) is not None
+    assert admission.admit({"h": 100}, backlog_seconds=0) is None
+
+
+def test_queue_full_is_counted():
+    admission = AdmissionController(seconds_per_minute=0, burst_seconds=100, max_backlog_seconds=0)
+
+    rejection = admission.reject_queue_full(0.2)
+
+    assert (rejection.reason, rejection.retry_after) == ("queue_full", 1)
+    assert admission.rejected["queue_full"] == 1
@@ -0,0 +1,90 @@
+"""GET /api/jobs/{job_id}/audio の Range・ETag・条件付き GET のテスト。"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.models.schemas import GenerateRequest
+
+AUDIO = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def download(make_app, tmp_path):
+    """完了したジョブを 1 件持つアプリのクライアントと、音声の URL を返す。"""
+    app = make_app()
+    job_id = app.state.job_store.create(GenerateRequest(prompt="rain", duration=30))
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(AUDIO)
+    app.state.job_store.complete(job_id, audio_path=str(audio))
+    return TestClient(app), f"/api/jobs/{job_id}/audio"
+
+
+def test_full_download_has_strong_etag_and_long_cache(download):
+    client, url = download
+
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.content == AUDIO
+    assert response.headers["accept-ranges"] == "bytes"
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert "immutable" in response.headers["cache-control"]
+    # 内容から計算するため、同じファイルなら何度でも同じ ETag になる
+    assert client.get(url).headers["etag"] == etag
+
+
+def test_matching_if_none_match_returns_304(download):
+    client, url = download
+    etag = client.get(url).headers["etag"]
+
+    for header in (etag, f'"other", {etag}', f"W/{etag}", "*"):
+        response = client.get(url, headers={"If-None-Match": header})
+        assert response.status_code == 304, header
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_range_returns_partial_content(download):
+    client, url = download
+
+    response = client.get(url, headers={"Range": "bytes=100-199"})
+
+    assert response.status_code == 206
+    assert response.content == AUDIO[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(AUDIO)}"
+
+    suffix = client.get(url, headers={"Range": "bytes=-24"})
+    assert suffix.status_code == 206 and suffix.content == AUDIO[-24:]
+
+
+def test_unsatisfiable_range_returns_416(download):
+    client, url = download
+
+    response = client.get(url, headers={"Range": f"bytes={len(AUDIO)}-"})
+
+    assert response.status_code == 416
+
+
+def test_if_range_with_stale_etag_returns_whole_file(download):
+    client, url = download
+    etag = client.get(url).headers["etag"]
+
+    fresh = client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag})
+    stale = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+
+    assert fresh.status_code == 206 and fresh.content == AUDIO[:10]
+    assert stale.status_code == 200 and stale.content == AUDIO
+
+
+def test_head_returns_headers_without_body(download):
+    client, url = download
+
+    response = client.head(url)
+
+    assert response.status_code == 200
+    assert response.content == b""
+    assert int(response.headers["content-length"]) == len(AUDIO)
+    assert "etag" in response.headers
@@ -0,0 +1,93 @@
+"""継ぎ目の処理（クロスフェードと連続する MP3 エンコード）のテスト。"""
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+sf = pytest.importorskip("soundfile")
+
+from backend.services.audio_files import concat_mp3, split_mp3  # noqa: E402
+from backend.services.audio_seams import Crossfader, Mp3Joiner, mp3_encoding_error  # noqa: E402
+from backend.services.station import TrackEncoder  # noqa: E402
+
+SAMPLE_RATE = 48000
+
+
+def _tone(seconds: float, frequency: float) -> "np.ndarray":
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    wave = (0.3 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+    return np.stack([wave, wave], axis=1)
+
+
+def _frames(data: bytes) -> tuple[int, float]:
+    """フレームとして解釈できるバイト数と、その再生時間（秒）を返す。"""
+    chunks = split_mp3(data, math.inf)
+    return sum(len(chunk) for chunk, _ in chunks), sum(seconds for _, seconds in chunks)
+
+
+def test_crossfader_overlaps_joins_and_keeps_total_length():
+    crossfader = Crossfader(fade_seconds=0.5)
+    first = np.ones((SAMPLE_RATE * 2, 2), dtype=np.float32) * 0.5
+    second = np.ones((SAMPLE_RATE * 2, 2), dtype=np.float32) * -0.5
+
+    head = crossfader.join(first, SAMPLE_RATE)
+    rest = crossfader.join(second, SAMPLE_RATE, last=True)
+
+    fade = SAMPLE_RATE // 2
+    assert len(head) == len(first) - fade
+    assert len(head) + len(rest) == len(first) + len(second) - fade
+    # 継ぎ目は前の曲から次の曲へ徐々に移る
+    assert rest[0, 0] == pytest.approx(0.5)
+    assert rest[fade - 1, 0] == pytest.approx(-0.5, abs=1e-3)
+    assert rest[fade // 2, 0] == pytest.approx(0.0, abs=1e-3)
+    assert np.all(rest[fade:] == -0.5)
+
+
+def test_crossfader_matches_channels_of_next_track():
+    crossfader = Crossfader(fade_seconds=0.1)
+    crossfader.join(np.ones((SAMPLE_RATE, 1), dtype=np.float32), SAMPLE_RATE)
+
+    body = crossfader.join(np.zeros((SAMPLE_RATE, 2), dtype=np.float32), SAMPLE_RATE, last=True)
+
+    assert body.shape == (SAMPLE_RATE, 2)
+
+
+@pytest.mark.skipif(mp3_encoding_error() is not None, reason="MP3 をエンコードできない")
+def test_joiner_rewrites_segments_into_one_continuous_stream(tmp_path):
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"{index}.mp3"
+        sf.write(path, _tone(5, 220 * (index + 1)), SAMPLE_RATE, format="MP3")
+        paths.append(str(path))
+
+    joiner = Mp3Joiner(fade_seconds=1)
+    for index, path in enumerate(paths):
+        joiner.rewrite(path, last=index == len(paths) - 1)
+    concat_mp3(paths, str(tmp_path / "all.mp3"))
+
+    # 各セグメントはフレームの境界で終わり、単独でも再生できる
+    for path in paths:
+        data = open(path, "rb").read()
+        assert _frames(data)[0] == len(data)
+    data = (tmp_path / "all.mp3").read_bytes()
+    size, seconds = _frames(data)
+    assert size == len(data)
+    # 3 本 × 5 秒から継ぎ目 2 か所の 1 秒ずつを重ねた長さ（エンコーダーの遅延分の誤差を許す）
+    assert seconds == pytest.approx(13, abs=0.1)
+
+
+@pytest.mark.skipif(mp3_encoding_error() is not None, reason="MP3 をエンコードできない")
+def test_station_track_encoder_streams_tracks_without_gaps(tmp_path):
+    encoder = TrackEncoder(crossfade_seconds=1, chunk_seconds=0.5)
+    chunks = []
+    for index in range(2):
+        path = tmp_path / f"{index}.mp3"
+        sf.write(path, _tone(5, 330), SAMPLE_RATE, format="MP3")
+        chunks += encoder.encode(str(path))
+
+    data = b"".join(bytes(chunk) for chunk, _ in chunks)
+    # ヘッダーのない連続したフレームだけが並ぶ
+    assert _frames(data)[0] == len(data)
+    # 2 曲目の末尾 1 秒は次の曲とのクロスフェードのために保留される
+    assert sum(seconds for _, seconds in chunks) == pytest.approx(8, abs=0.2)
@@ -0,0 +1,97 @@
+"""実行待ちのジョブを同じ形ごとにまとめるマイクロバッチのテスト。"""
+
+import asyncio
+
+from backend.config import settings
+from backend.main import _next_batch
+from backend.models.schemas import GenerateRequest
+from backend.services.job_store import JobStore
+from backend.services.music_generator import batch_shape
+
+
+def _queue(app, *requests: GenerateRequest) -> list[str]:
+    """ジョブを作って順に実行待ちに積み、ID を返す。"""
+    job_ids = []
+    for request in requests:
+        job_id = app.state.job_store.create(request)
+        app.state.job_queue.put_nowait(job_id, duration=request.duration)
+        job_ids.append(job_id)
+    return job_ids
+
+
+def _next_batch_ids(app) -> list[str]:
+    return [record.job_id for record in asyncio.run(_next_batch(app))]
+
+
+def test_batch_shape_ignores_seed_only():
+    store = JobStore()
+    shapes = [
+        batch_shape(store.get(store.create(request)))
+        for request in (
+            GenerateRequest(prompt="rain", duration=30, bpm=90, seed=1),
+            GenerateRequest(prompt="rain", duration=30, bpm=90, seed=2),
+            GenerateRequest(prompt="rain", duration=60, bpm=90),
+            GenerateRequest(prompt="rain", duration=30, bpm=120),
+            GenerateRequest(prompt="rain", duration=30, bpm=90, segmented=True),
+        )
+    ]
+
+    assert shapes[0] == shapes[1]
+    assert len(set(shapes)) == 4
+
+
+def test_matching_jobs_are_batched_and_others_keep_their_place(make_app, monkeypatch):
+    monkeypatch.setattr(settings, "batch_window_ms", 0)
+    app = make_app(max_batch_size=3)
+    rain = GenerateRequest(prompt="rain", duration=30)
+    a, b, c, d, e = _queue(app, rain, GenerateRequest(prompt="wind", duration=30), rain, rain, rain)
+
+    # 先頭と同じ形のジョブを最大 3 件まで集め、形の違うジョブは順番を保つ
+    assert _next_batch_ids(app) == [a, c, d]
+    assert app.state.job_queue.job_ids() == [b, e]
+    assert _next_batch_ids(app) == [b]
+    assert _next_batch_ids(app) == [e]
+
+
+def test_segmented_and_unbatched_jobs_run_alone(make_app, monkeypatch):
+    monkeypatch.setattr(settings, "batch_window_ms", 0)
+    segmented = GenerateRequest(prompt="rain", duration=30, segmented=True)
+    app = make_app(max_batch_size=4)
+    first, second = _queue(app, segmented, segmented)
+    assert _next_batch_ids(app) == [first]
+    assert app.state.job_queue.job_ids() == [second]
+
+    app = make_app(max_batch_size=1)
+    rain = GenerateRequest(prompt="rain", duration=30)
+    first, second = _queue(app, rain, rain)
+    assert _next_batch_ids(app) == [first]
+
+
+def test_cancelled_jobs_are_skipped_and_not_batched(make_app, monkeypatch):
+    monkeypatch.setattr(settings, "batch_window_ms", 0)
+    app = make_app(max_batch_size=3)
+    rain = GenerateRequest(prompt="rain", duration=30)
+    a, b, c = _queue(app, rain, rain, rain)
+    app.state.job_store.cancel(a)
+    app.state.job_store.cancel(c)
+
+    assert _next_batch_ids(app) == [b]
+    # 先頭に来たときに読み飛ばされるまで、実行待ちに残る
+    assert app.state.job_queue.job_ids() == [c]
+
+
+def test_batch_waits_for_matching_jobs_within_the_window(make_app, monkeypatch):
+    monkeypatch.setattr(settings, "batch_window_ms", 300)
+    app = make_app(max_batch_size=2)
+    rain = GenerateRequest(prompt="rain", duration=30)
+    (first,) = _queue(app, rain)
+
+    async def scenario():
+        late = app.state.job_store.create(rain)
+        asyncio.get_running_loop().call_later(0.05, app.state.job_queue.put_nowait, late)
+        batch = await _next_batch(app)
+        return [record.job_id for record in batch], late
+
+    job_ids, late = asyncio.run(scenario())
+
+    assert job_ids == [first, late]
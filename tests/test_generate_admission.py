@@ -0,0 +1,92 @@
+"""POST /api/generate の受け付け判定のテスト。"""
+
+from fastapi.testclient import TestClient
+
+from backend.config import settings
+from backend.services.admission import AdmissionController
+
+
+def _rate_limited_app(make_app):
+    # 1 分あたり 60 秒・容量 60 秒：60 秒の曲を 1 件投入するとバケットが空になる
+    return make_app(
+        admission=AdmissionController(seconds_per_minute=60, burst_seconds=60, max_backlog_seconds=0)
+    )
+
+
+def test_rotating_client_id_does_not_bypass_rate_limit(make_app):
+    app = _rate_limited_app(make_app)
+    client = TestClient(app, client=("10.0.0.1", 50000))
+
+    first = client.post("/api/generate", json={"prompt": "rain", "duration": 60, "client_id": "a"})
+    assert first.status_code == 202
+
+    second = client.post("/api/generate", json={"prompt": "rain", "duration": 60, "client_id": "b"})
+    assert second.status_code == 429
+    assert int(second.headers["Retry-After"]) >= 1
+    assert app.state.job_queue.qsize() == 1
+
+
+def test_rate_limit_is_per_host(make_app):
+    app = _rate_limited_app(make_app)
+
+    for host in ("10.0.0.1", "10.0.0.2"):
+        client = TestClient(app, client=(host, 50000))
+        response = client.post("/api/generate", json={"prompt": "rain", "duration": 60})
+        assert response.status_code == 202
+
+
+def test_batch_is_charged_to_the_host(make_app):
+    app = _rate_limited_app(make_app)
+    client = TestClient(app, client=("10.0.0.1", 50000))
+    first = client.post("/api/generate", json={"prompt": "rain", "duration": 30, "client_id": "a"})
+    assert first.status_code == 202
+
+    # client_id ごとには 20 秒ずつだが、同じ接続元の合計で残り 30 秒を超える
+    response = client.post(
+        "/api/generate/batch",
+        json={
+            "jobs": [
+                {"prompt": "wind", "duration": 20, "client_id": "b"},
+                {"prompt": "waves", "duration": 20, "client_id": "c"},
+            ]
+        },
+    )
+    assert response.status_code == 429
+    # 1 件も投入せず、ジョブの登録もロールバックする
+    assert app.state.job_queue.qsize() == 1
+    assert sum(app.state.job_store.status_counts().values()) == 1
+
+
+def test_priority_requires_operator_token(make_app, monkeypatch):
+    monkeypatch.setattr(settings, "operator_token", "secret")
+    app = make_app()
+    client = TestClient(app)
+
+    denied = client.post("/api/generate", json={"prompt": "rain", "duration": 30, "priority": 5})
+    assert denied.status_code == 403
+    assert app.state.job_queue.qsize() == 0
+
+    allowed = client.post(
+        "/api/generate",
+        json={"prompt": "rain", "duration": 30, "priority": 5},
+        headers={"Authorization": "Bearer secret"},
+    )
+    assert allowed.status_code == 202
+    assert app.state.job_store.get(allowed.json()["job_id"]).priority == 5
+
+
+def test_client_id_is_trusted_only_from_operator(make_app, monkeypatch):
+    monkeypatch.setattr(settings, "operator_token", "secret")
+    app = make_app()
+    client = TestClient(app, client=("10.0.0.1", 50000))
+
+    public = client.post("/api/generate", json={"prompt": "rain", "duration": 30, "client_id": "vip"})
+    operator = client.post(
+        "/api/generate",
+        json={"prompt": "rain", "duration": 30, "client_id": "tenant-a"},
+        headers={"Authorization": "Bearer secret"},
+    )
+
+    job_store = app.state.job_store
+    assert job_store.get(public.json()["job_id"]).client_id == "10.0.0.1"
+    assert job_store.get(operator.json()["job_id"]).client_id == "tenant-a"
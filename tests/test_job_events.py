@@ -0,0 +1,98 @@
+"""GET /api/jobs/events（SSE）のテスト。"""
+
+import asyncio
+import json
+
+import httpx
+
+from backend.config import settings
+from backend.models.schemas import GenerateRequest, JobStatus
+from backend.services.job_events import JobEventBroker
+
+
+def _parse(body: str) -> list[tuple[str, dict]]:
+    """SSE の本文を (イベント名, データ) の列にする。keep-alive のコメントは読み飛ばす。"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        if fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def _stream(make_app, ids: str, setup, changes) -> list[tuple[str, dict]]:
+    """
+    setup(job_store) で作ったジョブを購読し、changes(job_store, job_ids) で状態を変えながら
+    done まで受け取る。
+
+    broker はイベントループ上で作る必要があるため、アプリを asyncio.run の中で組み立てる。
+    """
+
+    async def scenario():
+        app = make_app()
+        app.state.job_events = JobEventBroker(asyncio.get_running_loop())
+        app.state.job_store.add_listener(app.state.job_events.notify)
+        job_ids = setup(app.state.job_store)
+        task = asyncio.create_task(changes(app.state.job_store, job_ids))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await asyncio.wait_for(
+                client.get("/api/jobs/events", params={"ids": ids.format(*job_ids)}), timeout=5
+            )
+        await task
+        assert response.headers["content-type"].startswith("text/event-stream")
+        return _parse(response.text)
+
+    return asyncio.run(scenario())
+
+
+def test_stream_sends_each_change_until_jobs_finish(make_app, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "stream_coalesce_ms", 0)
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"x")
+
+    async def changes(store, job_ids):
+        await asyncio.sleep(0.05)
+        store.update_status(job_ids[0], JobStatus.RUNNING)
+        await asyncio.sleep(0.05)
+        store.complete(job_ids[0], audio_path=str(audio))
+
+    events = _stream(
+        make_app,
+        "{0},missing",
+        lambda store: [store.create(GenerateRequest(prompt="rain", duration=30))],
+        changes,
+    )
+
+    assert [name for name, _ in events] == ["job", "missing", "job", "job", "done"]
+    assert [data["status"] for name, data in events if name == "job"] == [
+        JobStatus.QUEUED.value,
+        JobStatus.RUNNING.value,
+        JobStatus.COMPLETED.value,
+    ]
+    assert events[1][1] == {"job_id": "missing"}
+
+
+def test_stream_coalesces_bursts_of_progress(make_app, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "stream_coalesce_ms", 100)
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"x")
+
+    async def changes(store, job_ids):
+        await asyncio.sleep(0.05)
+        for step in range(1, 10):
+            store.update_progress(job_ids[0], step / 10, "生成中")
+        await asyncio.sleep(0.3)
+        store.complete(job_ids[0], audio_path=str(audio))
+
+    events = _stream(
+        make_app,
+        "{0}",
+        lambda store: [store.create(GenerateRequest(prompt="rain", duration=30))],
+        changes,
+    )
+
+    # 接続直後・まとめた進捗 1 回・完了の 3 回だけ送る
+    progress = [data["progress"] for name, data in events if name == "job"]
+    assert len(progress) == 3 and progress[1:] == [0.9, 1.0]
+    assert events[-1][0] == "done"
@@ -0,0 +1,164 @@
+"""ジョブの永続化と再起動後の復元のテスト。"""
+
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+from backend.models.schemas import GenerateRequest, JobStatus
+from backend.services.job_persistence import SqliteJobPersistence
+from backend.services.job_store import JobStore
+
+
+def _stored_statuses(db_path) -> dict[str, str]:
+    """別の接続から、コミット済みの行だけを読む。"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute("SELECT job_id, status FROM jobs"))
+    finally:
+        conn.close()
+
+
+def test_flush_commits_before_returning(tmp_path):
+    db_path = tmp_path / "jobs.db"
+    store = JobStore(persistence=SqliteJobPersistence(db_path))
+
+    job_id = store.create(GenerateRequest(prompt="rain", duration=30))
+    store.flush()
+
+    assert _stored_statuses(db_path) == {job_id: "queued"}
+
+
+def test_restore_after_crash_without_close(tmp_path):
+    db_path = tmp_path / "jobs.db"
+    store = JobStore(persistence=SqliteJobPersistence(db_path))
+    queued = store.create(GenerateRequest(prompt="rain", duration=30))
+    failed = store.create(GenerateRequest(prompt="wind", duration=30))
+    store.fail(failed, error="boom")
+    store.flush()
+    # close() を呼ばずに（書き込みスレッドを止めずに）、別のプロセスとして開き直す
+
+    restarted = JobStore(persistence=SqliteJobPersistence(db_path))
+    assert restarted.restore() == [queued]
+    assert restarted.get(queued).status == JobStatus.QUEUED
+    assert restarted.get(failed).status == JobStatus.FAILED
+    assert restarted.get(failed).error == "boom"
+
+
+def test_generate_is_committed_before_202(tmp_path, make_app):
+    db_path = tmp_path / "jobs.db"
+    app = make_app(job_store=JobStore(persistence=SqliteJobPersistence(db_path)))
+    client = TestClient(app)
+
+    response = client.post("/api/generate", json={"prompt": "rain", "duration": 30})
+
+    assert response.status_code == 202
+    assert _stored_statuses(db_path) == {response.json()["job_id"]: "queued"}
+
+
+def test_flush_after_close_does_not_block(tmp_path):
+    persistence = SqliteJobPersistence(tmp_path / "jobs.db")
+    persistence.close()
+
+    assert persistence.flush(timeout=1.0) is False
+
+
+def test_evicted_job_survives_restart(tmp_path):
+    db_path = tmp_path / "jobs.db"
+    store = JobStore(persistence=SqliteJobPersistence(db_path), max_audio_bytes=150)
+    job_ids = []
+    for _ in range(2):
+        job_id = store.create(GenerateRequest(prompt="rain", duration=30))
+        path = tmp_path / f"{job_id}.mp3"
+        path.write_bytes(b"x" * 100)
+        store.complete(job_id, audio_path=str(path))
+        job_ids.append(job_id)
+    store.flush()
+
+    restarted = JobStore(persistence=SqliteJobPersistence(db_path), max_audio_bytes=150)
+    restarted.restore()
+    evicted, kept = (restarted.get(job_id) for job_id in job_ids)
+    assert evicted.status == JobStatus.COMPLETED and evicted.audio_expired
+    assert not kept.audio_expired and kept.audio_path is not None
+
+
+def test_missing_audio_is_restored_as_expired(tmp_path):
+    db_path = tmp_path / "jobs.db"
+    store = JobStore(persistence=SqliteJobPersistence(db_path))
+    job_id = store.create(GenerateRequest(prompt="rain", duration=30))
+    store.complete(job_id, audio_path=str(tmp_path / "lost.mp3"))
+    store.flush()
+
+    restarted = JobStore(persistence=SqliteJobPersistence(db_path))
+    restarted.restore()
+    record = restarted.get(job_id)
+    assert record.status == JobStatus.COMPLETED
+    assert record.audio_expired and record.audio_path is None
+
+
+def test_restore_requeues_queued_jobs_and_fails_interrupted_ones(tmp_path):
+    db_path = tmp_path / "jobs.db"
+    store = JobStore(persistence=SqliteJobPersistence(db_path))
+    request = GenerateRequest(prompt="rain", duration=30, seed=1)
+    running = store.create(GenerateRequest(prompt="wind", duration=30))
+    store.update_status(running, JobStatus.RUNNING)
+    queued = store.create(request, cache_key="key")
+    follower = store.attach(request, "key").job_id
+    store.flush()
+
+    restarted = JobStore(persistence=SqliteJobPersistence(db_path))
+
+    # 相乗りしているジョブは再投入せず、主ジョブの結果を待つ
+    assert restarted.restore() == [queued]
+    assert restarted.get(running).status == JobStatus.FAILED
+    assert restarted.linked_job_ids(queued) == [queued, follower]
+    assert restarted.attach(request, "key").primary_id == queued
+
+
+def _break_database(db_path) -> None:
+    """以降の書き込みが失敗するよう、別の接続からテーブルを消す。"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("DROP TABLE jobs")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_flush_reports_failed_commit(tmp_path):
+    db_path = tmp_path / "jobs.db"
+    store = JobStore(persistence=SqliteJobPersistence(db_path))
+    store.create(GenerateRequest(prompt="rain", duration=30))
+    assert store.flush() is True
+
+    _break_database(db_path)
+    store.create(GenerateRequest(prompt="wind", duration=30))
+
+    assert store.flush() is False
+
+
+def test_generate_answers_503_and_rolls_back_when_commit_fails(tmp_path, make_app):
+    db_path = tmp_path / "jobs.db"
+    app = make_app(job_store=JobStore(persistence=SqliteJobPersistence(db_path)))
+    client = TestClient(app)
+    _break_database(db_path)
+
+    single = client.post("/api/generate", json={"prompt": "rain", "duration": 30})
+    batch = client.post(
+        "/api/generate/batch",
+        json={"jobs": [{"prompt": "wind", "duration": 30}, {"prompt": "waves", "duration": 30}]},
+    )
+
+    assert single.status_code == 503 and batch.status_code == 503
+    # 受け付けたことにしたジョブは残さない
+    assert app.state.job_queue.qsize() == 0
+    assert sum(app.state.job_store.status_counts().values()) == 0
+
+
+def test_cancel_answers_503_when_commit_fails(tmp_path, make_app):
+    db_path = tmp_path / "jobs.db"
+    app = make_app(job_store=JobStore(persistence=SqliteJobPersistence(db_path)))
+    client = TestClient(app)
+    job_id = client.post("/api/generate", json={"prompt": "rain", "duration": 30}).json()["job_id"]
+    _break_database(db_path)
+
+    assert client.delete(f"/api/jobs/{job_id}").status_code == 503
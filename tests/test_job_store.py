@@ -0,0 +1,226 @@
+"""JobStore のテスト。"""
+
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from backend.models.schemas import GenerateRequest, JobStatus
+from backend.services import job_store
+from backend.services.job_store import JobStore
+from backend.services.music_generator import GENERATED_STAGE
+
+
+def test_sweep_orphans_only_removes_own_files(tmp_path):
+    store = JobStore()
+    orphan = tmp_path / f"{uuid.uuid4()}.mp3"
+    partial = tmp_path / f"{uuid.uuid4()}.mp3.1234.tmp"
+    foreign = [tmp_path / "album.mp3", tmp_path / "notes.tmp", tmp_path / "keep.txt"]
+    for path in [orphan, partial, *foreign]:
+        path.write_bytes(b"x" * 10)
+
+    removed, removed_bytes = store.sweep_orphans([str(tmp_path)])
+
+    assert (removed, removed_bytes) == (2, 20)
+    assert not orphan.exists() and not partial.exists()
+    assert all(path.exists() for path in foreign)
+
+
+def _completed_job(store: JobStore, directory, size: int) -> tuple[str, str]:
+    """size バイトの音声で完了したジョブを作り、(job_id, 音声のパス) を返す。"""
+    job_id = store.create(GenerateRequest(prompt="rain", duration=30))
+    path = directory / f"{uuid.uuid4()}.mp3"
+    path.write_bytes(b"x" * size)
+    store.complete(job_id, audio_path=str(path))
+    return job_id, str(path)
+
+
+def _wait_removed(path: str) -> None:
+    # 音声ファイルの削除は別スレッドで行われる
+    deadline = time.monotonic() + 5
+    while os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_eviction_keeps_record_and_deletes_audio(tmp_path):
+    store = JobStore(max_audio_bytes=250)
+    oldest, _ = _completed_job(store, tmp_path, 100)
+    touched, _ = _completed_job(store, tmp_path, 100)
+    store.touch(oldest)
+    # 3 件目で上限を超え、最も長く参照されていない 2 件目の音声を削除する
+    newest, _ = _completed_job(store, tmp_path, 100)
+
+    record = store.get(touched)
+    assert record is not None
+    assert record.status == JobStatus.COMPLETED
+    assert record.audio_expired and record.audio_path is None
+    assert not store.get(oldest).audio_expired
+    assert not store.get(newest).audio_expired
+    assert store.disk_usage()["used_bytes"] == 200
+    assert store.evicted == 1
+
+
+def test_evicted_audio_is_removed_from_disk(tmp_path):
+    store = JobStore(max_audio_bytes=150)
+    first, first_path = _completed_job(store, tmp_path, 100)
+    _completed_job(store, tmp_path, 100)
+
+    _wait_removed(first_path)
+    assert not os.path.exists(first_path)
+    assert store.get(first).audio_expired
+
+
+def test_audio_of_evicted_job_is_gone(tmp_path, make_app):
+    store = JobStore(max_audio_bytes=150)
+    app = make_app(job_store=store)
+    client = TestClient(app)
+    job_ids = [_completed_job(store, tmp_path, 100)[0] for _ in range(2)]
+
+    status = client.get(f"/api/jobs/{job_ids[0]}")
+    assert status.status_code == 200
+    assert status.json()["status"] == "completed"
+    assert status.json()["audio_expired"] is True
+    assert client.get(f"/api/jobs/{job_ids[0]}/audio").status_code == 410
+    assert client.get(f"/api/jobs/{job_ids[1]}/audio").status_code == 200
+
+
+def test_attach_shares_the_primary_result(tmp_path):
+    store = JobStore()
+    request = GenerateRequest(prompt="rain", duration=30, seed=1)
+    assert store.attach(request, "key") is None
+
+    primary = store.create(request, cache_key="key")
+    follower = store.attach(request, "key")
+    assert follower is not None and follower.primary_id == primary
+    assert store.linked_job_ids(primary) == [primary, follower.job_id]
+
+    store.update_status(primary, JobStatus.RUNNING)
+    assert store.get(follower.job_id).status == JobStatus.RUNNING
+    audio = tmp_path / f"{uuid.uuid4()}.mp3"
+    audio.write_bytes(b"x")
+    store.complete(primary, audio_path=str(audio))
+
+    for job_id in (primary, follower.job_id):
+        record = store.get(job_id)
+        assert record.status == JobStatus.COMPLETED
+        assert record.audio_path == str(audio)
+    # 完了後は新しいリクエストを相乗りさせない
+    assert store.attach(request, "key") is None
+
+
+def test_cancelling_primary_keeps_generating_for_followers(tmp_path):
+    store = JobStore()
+    request = GenerateRequest(prompt="rain", duration=30, seed=1)
+    primary = store.create(request, cache_key="key")
+    follower = store.attach(request, "key").job_id
+
+    assert store.cancel(primary).status == JobStatus.CANCELLED
+    assert store.is_wanted(primary)
+
+    audio = tmp_path / f"{uuid.uuid4()}.mp3"
+    audio.write_bytes(b"x")
+    assert store.complete(primary, audio_path=str(audio)) is True
+    assert store.get(primary).status == JobStatus.CANCELLED
+    assert store.get(follower).status == JobStatus.COMPLETED
+
+
+def test_cancelling_every_linked_job_stops_generation(tmp_path):
+    store = JobStore()
+    request = GenerateRequest(prompt="rain", duration=30, seed=1)
+    primary = store.create(request, cache_key="key")
+    follower = store.attach(request, "key").job_id
+
+    store.cancel(follower)
+    assert store.is_wanted(primary)
+    store.cancel(primary)
+    assert not store.is_wanted(primary)
+    assert store.attach(request, "key") is None
+
+    # 打ち切りが間に合わずに届いた結果は捨てる
+    audio = tmp_path / f"{uuid.uuid4()}.mp3"
+    audio.write_bytes(b"x")
+    assert store.complete(primary, audio_path=str(audio)) is False
+    _wait_removed(str(audio))
+    assert not audio.exists()
+
+
+def test_cancel_leaves_finished_jobs_alone(tmp_path):
+    store = JobStore()
+    job_id, path = _completed_job(store, tmp_path, 10)
+
+    assert store.cancel(job_id).status == JobStatus.COMPLETED
+    assert store.cancel("missing") is None
+    assert os.path.exists(path)
+
+
+def test_status_counts_follow_every_transition(tmp_path):
+    store = JobStore()
+    request = GenerateRequest(prompt="rain", duration=30, seed=1)
+    primary = store.create(request, cache_key="key")
+    follower = store.attach(request, "key").job_id
+    other = store.create(GenerateRequest(prompt="wind", duration=30))
+    assert store.queue_size() == 3
+
+    store.update_status(primary, JobStatus.RUNNING)
+    store.fail(other, "error")
+    assert store.status_counts() == {
+        JobStatus.QUEUED: 0,
+        JobStatus.RUNNING: 2,
+        JobStatus.FAILED: 1,
+    }
+
+    store.cancel(follower)
+    _completed_job(store, tmp_path, 10)
+    store.delete(other)
+    counts = store.status_counts()
+    assert counts[JobStatus.RUNNING] == 1
+    assert counts[JobStatus.CANCELLED] == 1
+    assert counts[JobStatus.COMPLETED] == 1
+    assert counts[JobStatus.FAILED] == 0
+
+
+def test_cleanup_removes_only_jobs_past_ttl(tmp_path, monkeypatch):
+    now = [datetime(2026, 1, 1, tzinfo=timezone.utc)]
+
+    class _Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now[0]
+
+    monkeypatch.setattr(job_store, "datetime", _Clock)
+    store = JobStore(ttl_seconds=60)
+    expired, path = _completed_job(store, tmp_path, 10)
+    now[0] += timedelta(seconds=30)
+    kept, _ = _completed_job(store, tmp_path, 10)
+    running = store.create(GenerateRequest(prompt="rain", duration=30))
+    store.update_status(running, JobStatus.RUNNING)
+
+    now[0] += timedelta(seconds=45)
+    assert store.cleanup_expired() == 1
+    assert store.get(expired) is None
+    assert store.get(kept) is not None and store.get(running) is not None
+    _wait_removed(path)
+    assert not os.path.exists(path)
+
+    now[0] += timedelta(seconds=30)
+    assert store.cleanup_expired() == 1
+    assert store.get(running) is not None
+
+
+def test_finished_jobs_do_not_keep_showing_the_last_stage(tmp_path):
+    store = JobStore()
+    completed = store.create(GenerateRequest(prompt="rain", duration=30))
+    failed = store.create(GenerateRequest(prompt="wind", duration=30))
+    for job_id in (completed, failed):
+        store.update_status(job_id, JobStatus.RUNNING)
+        store.update_progress(job_id, 1.0, GENERATED_STAGE)
+
+    audio = tmp_path / f"{uuid.uuid4()}.mp3"
+    audio.write_bytes(b"x")
+    store.complete(completed, audio_path=str(audio))
+    store.fail(failed, "MP3 のエンコードに失敗")
+
+    assert store.get(completed).stage == "完了"
+    assert store.get(failed).stage == "失敗"
@@ -0,0 +1,73 @@
+"""LM メタデータキャッシュを生成に使う条件のテスト。"""
+
+from dataclasses import dataclass
+
+import pytest
+
+from backend.services import fake_generator, music_generator
+from backend.services.fake_generator import FakeDitHandler
+from backend.services.lm_cache import LmMetadataCache
+from backend.services.model_loader import GenerationApi, LoadedModels
+
+METADATA = {"bpm": 92, "keyscale": "A minor"}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = LmMetadataCache(max_entries=16, path=None)
+    cache.set_model("lm")
+    cache.put(cache.key_for("rain", None), METADATA)
+    monkeypatch.setattr(music_generator, "lm_metadata_cache", cache)
+    return cache
+
+
+def _generate(tmp_path, params_class: type = fake_generator.GenerationParams) -> list:
+    """LM ありで 1 曲生成し、fake の generate_music() に渡された GenerationParams を返す。"""
+    calls: list = []
+
+    def _record(**kwargs):
+        calls.append(kwargs["params"])
+        return fake_generator.generate_music(**kwargs)
+
+    models = LoadedModels(
+        device="cpu",
+        dit_handler=FakeDitHandler(device="cpu", seconds_per_audio_second=0),
+        llm_handler=object(),   # LM あり
+        lm_model="lm",
+        max_batch_size=1,
+        api=GenerationApi(_record, params_class, fake_generator.GenerationConfig),
+    )
+    music_generator._generate(
+        models,
+        caption="rain",
+        duration=10,
+        bpm=None,
+        seeds=[1],
+        save_dir=str(tmp_path),
+        progress_callback=lambda value, stage: None,
+        log_id="job",
+    )
+    return calls
+
+
+def test_cache_hit_skips_only_metadata_inference(tmp_path, cache):
+    @dataclass
+    class ParamsWithCotMetas(fake_generator.GenerationParams):
+        use_cot_metas: bool = True
+        keyscale: str = ""
+
+    (params,) = _generate(tmp_path, ParamsWithCotMetas)
+
+    assert cache.hits == 1
+    # LM による音声コードの生成は続ける
+    assert params.thinking is True
+    assert params.use_cot_metas is False
+    assert (params.bpm, params.keyscale) == (92, "A minor")
+
+
+def test_cache_unused_when_metadata_inference_cannot_be_skipped(tmp_path, cache):
+    (params,) = _generate(tmp_path)
+
+    assert (cache.hits, cache.misses) == (0, 0)
+    assert params.thinking is True
+    assert params.bpm is None
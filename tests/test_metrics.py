@@ -0,0 +1,32 @@
+"""JobMetrics のテスト。"""
+
+from backend.models.schemas import GenerateRequest, JobStatus
+from backend.services.job_store import JobStore
+from backend.services.metrics import JobMetrics
+
+
+def _latency_counts(metrics: JobMetrics) -> dict[str, str]:
+    """oto_job_latency_seconds_count の行を、ラベル部分 → 値の dict にする。"""
+    prefix = "oto_job_latency_seconds_count"
+    return dict(line[len(prefix) :].split(" ") for line in metrics.render() if line.startswith(prefix))
+
+
+def test_latency_is_labelled_by_where_the_result_came_from(tmp_path):
+    metrics = JobMetrics()
+    store = JobStore(metrics=metrics)
+    request = GenerateRequest(prompt="rain", duration=30, seed=1)
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"x")
+
+    cached = store.create(request, cache_key="hit")
+    store.complete(cached, audio_path=str(audio), cached=True)
+    primary = store.create(request, cache_key="miss")
+    store.attach(request, "miss")
+    store.update_status(primary, JobStatus.RUNNING)
+    store.complete(primary, audio_path=str(audio))
+
+    assert _latency_counts(metrics) == {
+        '{source="cache",duration_bucket="0-30"}': "1",
+        '{source="coalesced",duration_bucket="0-30"}': "1",
+        '{source="generated",duration_bucket="0-30"}': "1",
+    }
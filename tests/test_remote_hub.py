@@ -0,0 +1,123 @@
+"""RemoteWorkerHub（リモートワーカーへの貸し出し）のテスト。"""
+
+import asyncio
+import os
+
+import pytest
+
+from backend.config import settings
+from backend.main import _check_settings
+from backend.models.schemas import GenerateRequest
+from backend.services.job_store import _JobRecord
+from backend.services import remote_hub
+from backend.services.remote_hub import RemoteWorkerHub, UploadTooLarge
+from backend.services.worker_pool import WorkerLost
+
+
+def _hub(tmp_path, **kwargs) -> RemoteWorkerHub:
+    options = {"lease_seconds": 60.0, "max_attempts": 3, **kwargs}
+    return RemoteWorkerHub(save_dir=str(tmp_path), lm_model="", max_batch_size=1, **options)
+
+
+async def _lend(hub: RemoteWorkerHub, job_id: str = "job-1"):
+    """ワーカー w1 にジョブ 1 件を貸し出し、(リース, run() のタスク) を返す。"""
+    batch = [_JobRecord(job_id, GenerateRequest(prompt="rain", duration=30))]
+    polling = asyncio.create_task(hub.lease("w1", "cpu", wait_seconds=5))
+    slot = await hub.acquire()
+    running = asyncio.create_task(hub.run(slot, batch, lambda *_: None, lambda _: None))
+    return await polling, running
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def test_upload_within_limit_completes_the_lease(tmp_path):
+    async def scenario():
+        hub = _hub(tmp_path, max_upload_bytes=10)
+        lease, running = await _lend(hub)
+        await hub.store_audio(lease, "job-1", _chunks(b"abcde", b"fghij"))
+        return await running
+
+    (path,) = asyncio.run(scenario())
+    with open(path, "rb") as f:
+        assert f.read() == b"abcdefghij"
+
+
+def test_upload_over_limit_is_rejected_and_discarded(tmp_path):
+    async def scenario():
+        hub = _hub(tmp_path, max_upload_bytes=10)
+        lease, running = await _lend(hub)
+        with pytest.raises(UploadTooLarge):
+            await hub.store_audio(lease, "job-1", _chunks(b"abcdef", b"ghijkl"))
+        assert not running.done()
+        running.cancel()
+
+    asyncio.run(scenario())
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.fixture
+def fast_expiry(monkeypatch):
+    monkeypatch.setattr(remote_hub, "_EXPIRY_CHECK_SECONDS", 0.01)
+
+
+def test_silent_worker_loses_the_lease_and_the_job_is_requeued(tmp_path, fast_expiry):
+    async def scenario():
+        hub = _hub(tmp_path, lease_seconds=0.05)
+        await hub.start()
+        lease, running = await _lend(hub)
+        with pytest.raises(WorkerLost):
+            await running
+        # 期限切れのリースにはアップロードも延長もできない
+        assert hub.touch(lease.lease_id) is None
+        (worker,) = hub.health()
+        await hub.close()
+        return worker
+
+    worker = asyncio.run(scenario())
+    assert worker["state"] == "offline"
+    assert worker["job_ids"] == []
+
+
+def test_lease_expiring_too_often_fails_the_job(tmp_path, fast_expiry):
+    async def scenario():
+        hub = _hub(tmp_path, lease_seconds=0.05, max_attempts=2)
+        await hub.start()
+        _, running = await _lend(hub)
+        with pytest.raises(WorkerLost):
+            await running
+        _, running = await _lend(hub)
+        with pytest.raises(RuntimeError, match="2 回"):
+            await running
+        await hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_heartbeats_keep_the_lease_alive(tmp_path, fast_expiry):
+    async def scenario():
+        hub = _hub(tmp_path, lease_seconds=0.05)
+        await hub.start()
+        lease, running = await _lend(hub)
+        for _ in range(10):
+            await asyncio.sleep(0.02)
+            assert hub.touch(lease.lease_id) is lease
+        await hub.store_audio(lease, "job-1", _chunks(b"mp3"))
+        paths = await running
+        await hub.close()
+        return paths
+
+    (path,) = asyncio.run(scenario())
+    assert os.path.exists(path)
+
+
+def test_remote_workers_require_a_token(monkeypatch):
+    monkeypatch.setattr(settings, "remote_workers", True)
+    monkeypatch.setattr(settings, "worker_token", "")
+    with pytest.raises(RuntimeError):
+        _check_settings()
+
+    monkeypatch.setattr(settings, "worker_token", "secret")
+    _check_settings()
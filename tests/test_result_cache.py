@@ -0,0 +1,95 @@
+"""ResultCache と、結果キャッシュを使った投入のテスト。"""
+
+from fastapi.testclient import TestClient
+
+from backend.config import settings
+from backend.models.schemas import JobStatus
+from backend.services.result_cache import ResultCache
+
+
+def _audio(directory, name: str, size: int) -> str:
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_key_requires_seed_and_model(tmp_path):
+    cache = ResultCache(tmp_path / "results", max_bytes=1000, model_tag="dit+lm")
+
+    key = cache.key_for("rain", 30, None, 1)
+    assert key is not None and key == cache.key_for("rain", 30, None, 1)
+    assert key != cache.key_for("rain", 30, None, 2)
+    assert key != cache.key_for("rain", 30, None, 1, segmented=True)
+    # seed 未指定の結果は毎回変わるため、キャッシュしない
+    assert cache.key_for("rain", 30, None, None) is None
+    # モデルの読み込み中はモデル設定が未確定
+    loading = ResultCache(tmp_path / "loading", max_bytes=1000, model_tag=None)
+    assert loading.key_for("rain", 30, None, 1) is None
+
+
+def test_fetch_hits_stored_result_and_misses_otherwise(tmp_path):
+    cache = ResultCache(tmp_path / "results", max_bytes=1000, model_tag="dit")
+    key = cache.key_for("rain", 30, None, 1)
+    dest = tmp_path / "job.mp3"
+
+    assert cache.fetch(key, str(dest)) is False
+    cache.store(key, _audio(tmp_path, "generated.mp3", 100))
+    assert cache.fetch(key, str(dest)) is True
+
+    assert dest.read_bytes() == b"x" * 100
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_store_evicts_least_recently_used_beyond_max_bytes(tmp_path):
+    cache = ResultCache(tmp_path / "results", max_bytes=250, model_tag="dit")
+    keys = [cache.key_for("rain", 30, None, seed) for seed in range(3)]
+    cache.store(keys[0], _audio(tmp_path, "0.mp3", 100))
+    cache.store(keys[1], _audio(tmp_path, "1.mp3", 100))
+    cache.fetch(keys[0], str(tmp_path / "read.mp3"))
+
+    # 3 件目で上限を超え、最も長く参照されていない 2 件目を削除する
+    cache.store(keys[2], _audio(tmp_path, "2.mp3", 100))
+
+    assert not (tmp_path / "results" / f"{keys[1]}.mp3").exists()
+    assert cache.stats()["entries"] == 2 and cache.stats()["size_bytes"] == 200
+    assert cache.fetch(keys[1], str(tmp_path / "miss.mp3")) is False
+    assert cache.fetch(keys[0], str(tmp_path / "hit.mp3")) is True
+
+
+def test_result_larger_than_cache_is_not_stored(tmp_path):
+    cache = ResultCache(tmp_path / "results", max_bytes=50, model_tag="dit")
+    key = cache.key_for("rain", 30, None, 1)
+
+    cache.store(key, _audio(tmp_path, "generated.mp3", 100))
+
+    assert cache.stats()["entries"] == 0
+    assert cache.fetch(key, str(tmp_path / "job.mp3")) is False
+
+
+def test_index_is_restored_on_restart(tmp_path):
+    cache = ResultCache(tmp_path / "results", max_bytes=1000, model_tag="dit")
+    key = cache.key_for("rain", 30, None, 1)
+    cache.store(key, _audio(tmp_path, "generated.mp3", 100))
+
+    restarted = ResultCache(tmp_path / "results", max_bytes=1000, model_tag="dit")
+
+    assert restarted.fetch(key, str(tmp_path / "job.mp3")) is True
+
+
+def test_cached_request_completes_without_queueing(tmp_path, make_app, monkeypatch):
+    monkeypatch.setattr(settings, "audio_output_dir", str(tmp_path / "audio"))
+    (tmp_path / "audio").mkdir()
+    cache = ResultCache(tmp_path / "results", max_bytes=1000, model_tag="dit")
+    cache.store(cache.key_for("rain", 30, None, 7), _audio(tmp_path, "generated.mp3", 100))
+    app = make_app(result_cache=cache)
+    client = TestClient(app)
+
+    hit = client.post("/api/generate", json={"prompt": "rain", "duration": 30, "seed": 7})
+    miss = client.post("/api/generate", json={"prompt": "rain", "duration": 30, "seed": 8})
+
+    assert hit.status_code == 202 and hit.json()["status"] == JobStatus.COMPLETED.value
+    assert miss.json()["status"] == JobStatus.QUEUED.value
+    assert app.state.job_queue.job_ids() == [miss.json()["job_id"]]
+    audio = client.get(f"/api/jobs/{hit.json()['job_id']}/audio")
+    assert audio.status_code == 200 and audio.content == b"x" * 100
@@ -0,0 +1,153 @@
+"""JobScheduler のテスト。"""
+
+import asyncio
+
+import pytest
+
+from backend.services.scheduler import JobScheduler
+
+
+def _drain(scheduler: JobScheduler) -> list[str]:
+    """実行待ちのジョブをすべて取り出した順に返す。"""
+
+    async def scenario():
+        return [await scheduler.get() for _ in range(scheduler.qsize())]
+
+    return asyncio.run(scenario())
+
+
+def test_fifo_runs_in_submission_order_after_priority():
+    scheduler = JobScheduler(policy="fifo")
+    for job_id in ("a", "b", "c"):
+        scheduler.put_nowait(job_id, duration=30)
+    scheduler.put_nowait("urgent", priority=5, duration=30)
+    scheduler.put_nowait("later", priority=-1, duration=30)
+
+    assert scheduler.job_ids() == ["urgent", "a", "b", "c", "later"]
+    assert _drain(scheduler) == ["urgent", "a", "b", "c", "later"]
+
+
+def test_fair_interleaves_clients_by_generated_seconds():
+    scheduler = JobScheduler(policy="fair")
+    for job_id in ("a1", "a2", "a3"):
+        scheduler.put_nowait(job_id, client_id="a", duration=60)
+    scheduler.put_nowait("b1", client_id="b", duration=60)
+    scheduler.put_nowait("b2", client_id="b", duration=60)
+
+    assert _drain(scheduler) == ["a1", "b1", "a2", "b2", "a3"]
+
+
+def test_fair_charges_long_songs_more_than_short_ones():
+    scheduler = JobScheduler(policy="fair")
+    scheduler.put_nowait("long1", client_id="long", duration=300)
+    scheduler.put_nowait("long2", client_id="long", duration=300)
+    for index in range(3):
+        scheduler.put_nowait(f"short{index}", client_id="short", duration=60)
+
+    # 300 秒の曲 1 曲の間に、60 秒の曲を順に実行する
+    assert _drain(scheduler) == ["long1", "short0", "short1", "short2", "long2"]
+
+
+def test_sjf_runs_shortest_first():
+    scheduler = JobScheduler(policy="sjf", sjf_aging=0)
+    for job_id, duration in (("long", 600), ("short", 30), ("medium", 120)):
+        scheduler.put_nowait(job_id, duration=duration)
+
+    assert _drain(scheduler) == ["short", "medium", "long"]
+
+
+def test_sjf_aging_lets_long_jobs_catch_up(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("backend.services.scheduler.time.monotonic", lambda: clock[0])
+    scheduler = JobScheduler(policy="sjf", sjf_aging=1.0)
+    scheduler.put_nowait("long", duration=120)
+    clock[0] += 100   # 100 秒待った long は、20 秒の曲と同じ扱いになる
+    scheduler.put_nowait("short", duration=30)
+
+    assert _drain(scheduler) == ["long", "short"]
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        JobScheduler(policy="lifo")
+
+
+def test_full_queue_raises():
+    scheduler = JobScheduler(maxsize=2)
+    scheduler.put_nowait("a")
+    scheduler.put_nowait("b")
+
+    assert scheduler.full() and scheduler.free_slots() == 0
+    with pytest.raises(asyncio.QueueFull):
+        scheduler.put_nowait("c")
+
+
+def test_remove_takes_job_out_of_order_and_positions():
+    scheduler = JobScheduler()
+    for job_id in ("a", "b", "c"):
+        scheduler.put_nowait(job_id)
+    assert scheduler.queue_position("c") == 2
+
+    assert scheduler.remove("b") is True
+    assert scheduler.remove("b") is False
+    assert scheduler.remove("missing") is False
+
+    assert scheduler.qsize() == 2
+    assert scheduler.queue_position("b") is None
+    assert scheduler.queue_position("c") == 1
+    assert _drain(scheduler) == ["a", "c"]
+
+
+def test_take_matching_keeps_order_of_skipped_jobs():
+    scheduler = JobScheduler()
+    for job_id in ("x1", "y1", "x2", "x3", "y2"):
+        scheduler.put_nowait(job_id)
+
+    taken = asyncio.run(scheduler.take_matching(lambda job_id: job_id.startswith("x"), limit=2))
+
+    assert taken == ["x1", "x2"]
+    assert scheduler.job_ids() == ["y1", "x3", "y2"]
+
+
+def test_take_matching_waits_for_new_jobs_until_timeout():
+    async def scenario():
+        scheduler = JobScheduler()
+        scheduler.put_nowait("x1")
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, scheduler.put_nowait, "y1")
+        loop.call_later(0.1, scheduler.put_nowait, "x2")
+        taken = await scheduler.take_matching(lambda job_id: job_id.startswith("x"), limit=3, timeout=0.5)
+        return taken, scheduler.job_ids()
+
+    taken, remaining = asyncio.run(scenario())
+
+    assert taken == ["x1", "x2"]
+    assert remaining == ["y1"]
+
+
+def test_get_waits_for_put():
+    async def scenario():
+        scheduler = JobScheduler()
+        asyncio.get_running_loop().call_later(0.01, scheduler.put_nowait, "a")
+        return await asyncio.wait_for(scheduler.get(), timeout=1)
+
+    assert asyncio.run(scenario()) == "a"
+
+
+def test_fair_counts_pending_jobs_per_client():
+    scheduler = JobScheduler(policy="fair")
+    scheduler.put_nowait("a1", client_id="a", duration=60)
+    scheduler.put_nowait("a2", client_id="a", duration=60)
+    scheduler.put_nowait("b1", client_id="b", duration=60)
+    assert scheduler._pending == {"a": 2, "b": 1}
+
+    scheduler.remove("a2")
+    assert scheduler._pending == {"a": 1, "b": 1}
+    assert _drain(scheduler) == ["a1", "b1"]
+    assert scheduler._pending == {}
+
+    # 仮想時刻より先の終了タグは残り、すぐに戻ってきたクライアントは順番を前借りできない
+    scheduler.put_nowait("a3", client_id="a", duration=60)
+    scheduler.put_nowait("c1", client_id="c", duration=60)
+    assert _drain(scheduler) == ["c1", "a3"]
+    assert scheduler._pending == {}
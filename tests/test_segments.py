@@ -0,0 +1,52 @@
+"""セグメント生成のジョブの配信（セグメント・プレイリスト）のテスト。"""
+
+from fastapi.testclient import TestClient
+
+from backend.config import settings
+from backend.models.schemas import GenerateRequest, JobStatus
+from backend.services.music_generator import segment_durations
+
+
+def test_segment_durations_fold_short_tail_into_last_segment():
+    assert segment_durations(150, 60) == [60, 60, 30]
+    assert segment_durations(125, 60) == [60, 65]
+    assert segment_durations(45, 60) == [45]
+
+
+def test_segments_are_served_as_they_finish(make_app, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "segment_seconds", 60)
+    app = make_app()
+    store = app.state.job_store
+    client = TestClient(app)
+    job_id = store.create(GenerateRequest(prompt="rain", duration=150, segmented=True))
+    store.update_status(job_id, JobStatus.RUNNING)
+    store.set_segment_count(job_id, 3)
+    first = tmp_path / "0.mp3"
+    first.write_bytes(b"first")
+    store.add_segment(job_id, str(first))
+
+    segment = client.get(f"/api/jobs/{job_id}/segments/0")
+    assert segment.status_code == 200 and segment.content == b"first"
+    cached = client.get(
+        f"/api/jobs/{job_id}/segments/0", headers={"If-None-Match": segment.headers["etag"]}
+    )
+    assert cached.status_code == 304
+    assert client.get(f"/api/jobs/{job_id}/segments/1").status_code == 409
+    assert client.get(f"/api/jobs/{job_id}/segments/3").status_code == 404
+
+    playlist = client.get(f"/api/jobs/{job_id}/playlist.m3u8").text
+    assert "segments/0" in playlist and "segments/1" not in playlist
+    assert "#EXT-X-ENDLIST" not in playlist
+
+
+def test_playlist_ends_when_job_completes(make_app, tmp_path):
+    app = make_app()
+    store = app.state.job_store
+    job_id = store.create(GenerateRequest(prompt="rain", duration=30))
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"x")
+    store.complete(job_id, audio_path=str(audio))
+
+    playlist = TestClient(app).get(f"/api/jobs/{job_id}/playlist.m3u8").text
+
+    assert playlist.splitlines()[-3:] == ["#EXTINF:30.0,", "audio", "#EXT-X-ENDLIST"]
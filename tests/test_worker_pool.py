@@ -0,0 +1,62 @@
+"""LocalGenerator の MP3 エンコードの振り分けのテスト。"""
+
+import pytest
+
+from backend.config import settings
+from backend.services import fake_generator, music_generator, worker_pool
+from backend.services.model_loader import GenerationApi, LoadedModels
+from backend.services.worker_pool import LocalGenerator
+
+
+@pytest.fixture
+def encoder_pools(monkeypatch):
+    """起動された AudioEncoderPool の (workers, queue_max) を記録する。プロセスは起動しない。"""
+    started: list[tuple[int, int]] = []
+
+    class _Pool:
+        def __init__(self, workers: int, queue_max: int) -> None:
+            started.append((workers, queue_max))
+
+        def shutdown(self) -> None:
+            pass
+
+    monkeypatch.setattr(worker_pool, "AudioEncoderPool", _Pool)
+    monkeypatch.setattr(settings, "pipeline", False)
+    return started
+
+
+def _generator() -> LocalGenerator:
+    api = GenerationApi(
+        fake_generator.generate_music, fake_generator.GenerationParams, fake_generator.GenerationConfig
+    )
+    return LocalGenerator(LoadedModels("cpu", object(), None, "", 1, api))
+
+
+def test_encoder_pool_is_off_by_default(encoder_pools, monkeypatch):
+    monkeypatch.setattr(settings, "encode_workers", 0)
+
+    assert _generator()._encoder is None
+    assert encoder_pools == []
+
+
+def test_encoder_pool_starts_when_mp3_can_be_encoded(encoder_pools, monkeypatch):
+    monkeypatch.setattr(settings, "encode_workers", 2)
+    monkeypatch.setattr(worker_pool, "mp3_encoding_error", lambda: None)
+
+    assert _generator()._encoder is not None
+    assert encoder_pools == [(2, settings.encode_queue_max)]
+
+
+def test_falls_back_to_saving_in_generation_thread_without_mp3_encoder(encoder_pools, monkeypatch):
+    monkeypatch.setattr(settings, "encode_workers", 2)
+    monkeypatch.setattr(worker_pool, "mp3_encoding_error", lambda: "libsndfile に MP3 の書き込み機能がない")
+
+    assert _generator()._encoder is None
+    assert encoder_pools == []
+
+
+def test_segments_are_joined_without_crossfade_when_mp3_cannot_be_encoded(monkeypatch):
+    monkeypatch.setattr(music_generator, "mp3_encoding_error", lambda: "libsndfile に MP3 の書き込み機能がない")
+
+    assert music_generator._segment_joiner(2) is None
+    assert music_generator._segment_joiner(0) is None